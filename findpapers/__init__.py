@@ -5,6 +5,8 @@ from findpapers.tools.bibtex_generator_tool import generate_bibtex
 from findpapers.tools.search_runner_tool import search
 from findpapers.tools.refiner_tool import refine
 from findpapers.tools.downloader_tool import download
+from findpapers.tools.query_tool import query
+from findpapers.tools.mirror_tool import sync_mirror
 
 try:
     import importlib.metadata as importlib_metadata
@@ -5,6 +5,7 @@ import logging
 from datetime import datetime
 from typing import Tuple, List
 import findpapers
+import findpapers.utils.persistence_util as persistence_util
 
 
 app = typer.Typer()
@@ -13,7 +14,7 @@ app = typer.Typer()
 @app.command("search")
 def search(
     outputpath: str = typer.Argument(
-        ..., help='A valid file path where the search result JSON file will be placed'
+        ..., help='A valid file path where the search result file will be placed (a SQLite database is used for .db, .sqlite or .sqlite3 extensions, a JSON Lines file updated as the papers are collected is used for the .jsonl extension, otherwise a JSON file is used)'
     ),
     query: str = typer.Option(
         None, "-q", "--query", show_default=True,
@@ -61,6 +62,34 @@ def search(
         None, "-x", "--proxy", show_default=True,
         help="proxy URL that can be used during requests"
     ),
+    max_parallel_databases: int = typer.Option(
+        1, "-pd", "--parallel-db", show_default=True,
+        help="The max number of databases that will be searched at the same time"
+    ),
+    cache_dir: str = typer.Option(
+        None, "-cd", "--cache-dir", show_default=True,
+        help="A directory path where the HTTP responses will be cached, so a repeated search won't fetch again the data that was already fetched"
+    ),
+    cache_ttl: float = typer.Option(
+        None, "-ct", "--cache-ttl", show_default=True,
+        help="The time to live of the cached HTTP responses in seconds, if not provided the cached responses never expire"
+    ),
+    max_parallel_enrichments: int = typer.Option(
+        1, "-pe", "--parallel-enrichment", show_default=True,
+        help="The max number of papers that will be enriched at the same time"
+    ),
+    resume: bool = typer.Option(
+        False, "-rs", "--resume", show_default=True,
+        help="If you wanna resume an interrupted search from its last checkpoint saved on the output path"
+    ),
+    rxiv_mirror_dir: str = typer.Option(
+        None, "-rm", "--rxiv-mirror-dir", show_default=True,
+        help="A directory path with the medRxiv and bioRxiv mirrors (see the mirror sync command), if provided the query is evaluated on them instead of the online search"
+    ),
+    async_http: bool = typer.Option(
+        False, "-ah", "--async-http", show_default=True,
+        help="If you wanna enrich the papers using an asyncio HTTP session instead of worker threads (it requires httpx and it cannot be used with a cache dir)"
+    ),
     verbose: bool = typer.Option(
         False, "-v", "--verbose", show_default=True,
         help="If you wanna a verbose mode logging"
@@ -112,6 +141,27 @@ def search(
         --publication-types "journal,conference proceedings,BOOK,other"
         --publication-types "Journal,book"
 
+        You can search on many databases at the same time by using -pd (or --parallel-db) argument,
+        it defines the max number of databases that will be searched concurrently. By default the databases are searched one after another.
+
+        You can cache the fetched data on a local directory by using -cd (or --cache-dir) argument, 
+        so re-running a search (e.g. after a crash or a small query tweak) won't fetch again the data that was already fetched.
+        The cached data can expire after a given number of seconds defined by -ct (or --cache-ttl) argument.
+
+        You can enrich many papers at the same time by using -pe (or --parallel-enrichment) argument,
+        it defines the max number of papers whose metadata will be fetched concurrently. By default the papers are enriched one after another.
+
+        The search is saved on the output path after each fetched page and after each finished stage. If a search is interrupted
+        you can resume it by using the -rs (or --resume) flag, the search will continue from its last checkpoint
+        without fetching again the data that was already fetched (the search parameters are loaded from the checkpoint).
+
+        You can search on local mirrors of medRxiv and bioRxiv (see the "findpapers mirror sync" command) by using
+        -rm (or --rxiv-mirror-dir) argument. The query is evaluated locally, so it has none of the restrictions of the online search of these databases.
+
+        You can enrich the papers using an asyncio HTTP session by using the -ah (or --async-http) flag, so many papers metadata
+        can be fetched concurrently (up to the -pe limit) without a thread for each one. It requires httpx (pip install findpapers[async]),
+        and it cannot be used with the -cd (or --cache-dir) argument since the async session doesn't use the cache.
+
         You can control the command logging verbosity by the -v (or --verbose) argument.
     """
 
@@ -126,7 +176,8 @@ def search(
                 query = f.read().strip()
 
         findpapers.search(outputpath, query, since, until, limit, limit_per_database,
-                          databases, publication_types, scopus_api_token, ieee_api_token, proxy, verbose)
+                          databases, publication_types, scopus_api_token, ieee_api_token, proxy, verbose, max_parallel_databases,
+                          cache_dir, cache_ttl, max_parallel_enrichments, resume, rxiv_mirror_dir, async_http)
     except Exception as e:
         if verbose:
             logging.debug(e, exc_info=True)
@@ -349,6 +400,149 @@ def bibtex(
         raise typer.Exit(code=1)
 
 
+@app.command("query")
+def query(
+    filepath: str = typer.Argument(
+        ..., help='A valid file path for the search result file'
+    ),
+    query: str = typer.Argument(
+        ..., help='A query string used to find the papers, e.g. [term A] AND ([term B] OR [term C*]) AND NOT [term D], or a list of keywords any of which can match'
+    ),
+    limit: int = typer.Option(
+        20, "-l", "--limit", show_default=True,
+        help="The max number of papers to show"
+    ),
+    rebuild_index: bool = typer.Option(
+        False, "-r", "--rebuild-index", show_default=True,
+        help="A flag to indicate if the search index will be rebuilt even if it's up to date"
+    ),
+    verbose: bool = typer.Option(
+        False, "-v", "--verbose", show_default=True,
+        help="If you wanna a verbose mode logging"
+    )
+):
+    """
+    Find the papers of a search result that match a query, ranked by relevance (BM25), without any network call.
+
+    The query is matched against the papers title, abstract and keywords. 
+    The papers index is saved next to the search result file (with the .index suffix) by the search command,
+    or by the first query when it's missing, so the next queries are much faster. The index is rebuilt when
+    the search result file changes, except for the refinements, which don't change the indexed content.
+
+    E.g.: 
+    findpapers query /some/path/search.json "[deep learning] AND [music*]"
+
+    You can control the command logging verbosity by the -v (or --verbose) argument.
+
+    """
+
+    try:
+        results = findpapers.query(filepath, query, limit, rebuild_index, verbose)
+        for i, (paper_key, paper_title, score) in enumerate(results):
+            typer.echo(f'{i + 1}. [{score:.2f}] {paper_title} ({paper_key})')
+    except Exception as e:
+        if verbose:
+            logging.debug(e, exc_info=True)
+        else:
+            typer.echo(e)
+        raise typer.Exit(code=1)
+
+
+@app.command("convert")
+def convert(
+    filepath: str = typer.Argument(
+        ..., help='A valid file path for the search result file'
+    ),
+    outputpath: str = typer.Argument(
+        ..., help='A valid file path where the converted search result file will be placed'
+    ),
+    input_format: str = typer.Option(
+        None, "-i", "--input-format", show_default=True,
+        help="The search result file format (json, jsonl or sqlite), by default it's given by the file extension"
+    ),
+    output_format: str = typer.Option(
+        None, "-o", "--output-format", show_default=True,
+        help="The converted search result file format (json, jsonl or sqlite), by default it's given by the file extension"
+    ),
+    verbose: bool = typer.Option(
+        False, "-v", "--verbose", show_default=True,
+        help="If you wanna a verbose mode logging"
+    )
+):
+    """
+    Convert a search result file between the JSON, JSON Lines and SQLite formats.
+
+    A SQLite database (.db, .sqlite or .sqlite3 extension) is faster to refine, 
+    since each answer only updates the refined paper instead of rewriting the whole file.
+
+    E.g.: 
+    findpapers convert /some/path/search.json /some/path/search.db
+
+    You can control the command logging verbosity by the -v (or --verbose) argument.
+
+    """
+
+    try:
+        persistence_util.convert(filepath, outputpath, input_format, output_format)
+    except Exception as e:
+        if verbose:
+            logging.debug(e, exc_info=True)
+        else:
+            typer.echo(e)
+        raise typer.Exit(code=1)
+
+
+mirror_app = typer.Typer(help="Manage the local mirrors of the medRxiv and bioRxiv papers metadata")
+app.add_typer(mirror_app, name="mirror")
+
+
+@mirror_app.command("sync")
+def mirror_sync(
+    database: str = typer.Argument(
+        ..., help='The database to be mirrored (medrxiv or biorxiv)'
+    ),
+    mirror_dir: str = typer.Option(
+        None, "-m", "--mirror-dir", show_default=True,
+        help="A directory path where the mirror will be placed, by default it's the FINDPAPERS_MIRROR_DIR environment variable or ~/.findpapers/mirrors"
+    ),
+    since: datetime = typer.Option(
+        None, "-s", "--since", show_default=True,
+        help="The date (YYYY-MM-DD) from which the papers will be fetched on the first synchronization, by default all the papers are fetched",
+        formats=["%Y-%m-%d"]
+    ),
+    proxy: str = typer.Option(
+        None, "-x", "--proxy", show_default=True,
+        help="proxy URL that can be used during requests"
+    ),
+    verbose: bool = typer.Option(
+        False, "-v", "--verbose", show_default=True,
+        help="If you wanna a verbose mode logging"
+    )
+):
+    """
+    Synchronize a local mirror of the medRxiv or bioRxiv papers metadata.
+
+    The first synchronization fetches all the papers (or the ones posted since the -s (or --since) date), 
+    the next ones only fetch the papers posted since the last synchronization.
+    The mirrors can be used by the search command with the -rm (or --rxiv-mirror-dir) argument.
+
+    E.g.: 
+    findpapers mirror sync medrxiv
+
+    You can control the command logging verbosity by the -v (or --verbose) argument.
+    """
+
+    try:
+        since = since.date() if since is not None else None
+        findpapers.sync_mirror(database, mirror_dir, since, proxy, verbose)
+    except Exception as e:
+        if verbose:
+            logging.debug(e, exc_info=True)
+        else:
+            typer.echo(e)
+        raise typer.Exit(code=1)
+
+
 @app.command("version")
 def version():
     """
@@ -1,15 +1,116 @@
 from __future__ import annotations
 import datetime
 import re
-from typing import List, Set, Optional
+import threading
+from collections.abc import MutableSet
+from typing import Any, Iterable, Iterator, List, Set, Optional
+import findpapers.utils.common_util as common_util
 from findpapers.models.publication import Publication
 
 
+class DatabaseSet(MutableSet):
+    """
+    Set of database names stored as a bitmask, the bits are given by a vocabulary of database names shared by all the sets
+    """
+
+    __slots__ = ('mask',)
+
+    _names = []
+    _bit_by_name = {}
+    _lock = threading.Lock()
+
+    def __init__(self, names: Optional[Iterable[str]] = None):
+        """
+        DatabaseSet class constructor
+
+        Parameters
+        ----------
+        names : Optional[Iterable[str]], optional
+            The initial database names, by default None
+        """
+
+        self.mask = 0
+
+        if names is not None:
+            for name in names:
+                self.add(name)
+
+    @classmethod
+    def get_bit(cls, name: str) -> int:
+        """
+        Get the bit that represents a database name, registering it on the vocabulary if it's a new one
+
+        Parameters
+        ----------
+        name : str
+            A database name
+
+        Returns
+        -------
+        int
+            The database bit
+        """
+
+        bit = cls._bit_by_name.get(name)
+
+        if bit is None:
+            with cls._lock:
+                bit = cls._bit_by_name.get(name)
+                if bit is None:
+                    bit = 1 << len(cls._names)
+                    cls._names.append(common_util.intern(name))
+                    cls._bit_by_name[name] = bit
+
+        return bit
+
+    @classmethod
+    def get_names(cls) -> List[str]:
+        """
+        Get the vocabulary of database names, the i-th name is represented by the bit 1 << i
+
+        Returns
+        -------
+        List[str]
+            The database names
+        """
+
+        return list(cls._names)
+
+    def __contains__(self, name: Any) -> bool:
+        bit = self._bit_by_name.get(name) if isinstance(name, str) else None
+        return bit is not None and self.mask & bit != 0
+
+    def __iter__(self) -> Iterator[str]:
+        mask = self.mask
+        for name in self._names[:mask.bit_length()]:
+            if mask & 1:
+                yield name
+            mask >>= 1
+
+    def __len__(self) -> int:
+        return bin(self.mask).count('1')
+
+    def __repr__(self) -> str:
+        return f'DatabaseSet({set(self)})'
+
+    def add(self, name: str):
+        self.mask |= self.get_bit(name)
+
+    def discard(self, name: str):
+        bit = self._bit_by_name.get(name)
+        if bit is not None:
+            self.mask &= ~bit
+
+
 class Paper():
     """
     Class that represents a paper instance
     """
 
+    # there can be millions of papers in memory, so they don't have a __dict__
+    __slots__ = ('title', 'abstract', 'authors', 'publication', 'publication_date', 'urls', 'doi', 'citations',
+                 'keywords', 'comments', 'number_of_pages', 'pages', '_databases', 'selected', 'categories')
+
     def __init__(self, title: str, abstract: str, authors: List[str], publication: Publication,
                  publication_date: datetime.date, urls: Set[str], doi: Optional[str] = None, citations: Optional[int] = None,
                  keywords: Optional[Set[str]] = None, comments: Optional[str] = None, number_of_pages: Optional[int] = None,
@@ -64,20 +165,37 @@ class Paper():
 
         self.title = title
         self.abstract = abstract
-        self.authors = authors
+        self.authors = [common_util.intern(x) for x in authors] if authors is not None else None
         self.publication = publication
         self.publication_date = publication_date
         self.urls = urls
         self.doi = doi
         self.citations = citations
-        self.keywords = keywords if keywords is not None else set()
+        self.keywords = {common_util.intern(x) for x in keywords} if keywords is not None else set()
         self.comments = comments
         self.number_of_pages = number_of_pages
         self.pages = pages
-        self.databases = databases if databases is not None else set()
+        self.databases = databases
         self.selected = selected
         self.categories = categories
 
+    @property
+    def databases(self) -> DatabaseSet:
+        return self._databases
+
+    @databases.setter
+    def databases(self, value: Optional[Iterable[str]]):
+        """
+        Databases value setter, the database names are stored as a DatabaseSet
+
+        Parameters
+        ----------
+        value : Optional[Iterable[str]]
+            The names of the databases where the paper was found
+        """
+
+        self._databases = value if isinstance(value, DatabaseSet) else DatabaseSet(value)
+
     def add_database(self, database_name: str):
         """
         Adds database name where the paper was found
@@ -0,0 +1,713 @@
+from __future__ import annotations
+import os
+import re
+import sys
+import json
+import math
+import bisect
+from array import array
+from typing import Iterable, List, Optional, Set, Tuple, Union
+from findpapers.models.paper import Paper
+from findpapers.models.search import Search
+import findpapers.utils.query_util as query_util
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+INDEX_VERSION = 2
+TOKEN_PATTERN = re.compile(r'\w+')
+QUERY_TOKEN_PATTERN = re.compile(r'[\w?*]+')
+
+# BM25 parameters, see https://en.wikipedia.org/wiki/Okapi_BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def _is_in_sorted(values: np.ndarray, sorted_values: np.ndarray) -> np.ndarray:
+    """
+    Private method that checks which values are in a sorted array, it's faster than np.isin since nothing is sorted again
+
+    Parameters
+    ----------
+    values : np.ndarray
+        The values to check
+    sorted_values : np.ndarray
+        A sorted array
+
+    Returns
+    -------
+    np.ndarray
+        A boolean array with a value for each checked value
+    """
+
+    if len(sorted_values) == 0:
+        return np.zeros(len(values), dtype=bool)
+
+    indexes = np.searchsorted(sorted_values, values)
+    indexes[indexes == len(sorted_values)] = 0
+
+    return sorted_values[indexes] == values
+
+
+def _intersect(sorted_values_a: np.ndarray, sorted_values_b: np.ndarray) -> np.ndarray:
+    """
+    Private method that intersects two sorted arrays of unique values
+
+    Parameters
+    ----------
+    sorted_values_a : np.ndarray
+        A sorted array of unique values
+    sorted_values_b : np.ndarray
+        Another sorted array of unique values
+
+    Returns
+    -------
+    np.ndarray
+        The sorted intersection
+    """
+
+    if len(sorted_values_a) > len(sorted_values_b):
+        sorted_values_a, sorted_values_b = sorted_values_b, sorted_values_a
+
+    return sorted_values_a[_is_in_sorted(sorted_values_a, sorted_values_b)]
+
+
+def _get_unique(sorted_values: np.ndarray) -> np.ndarray:
+    """
+    Private method that removes the repeated values of a sorted array, it's faster than np.unique since nothing is sorted again
+
+    Parameters
+    ----------
+    sorted_values : np.ndarray
+        A sorted array
+
+    Returns
+    -------
+    np.ndarray
+        The sorted unique values
+    """
+
+    if len(sorted_values) == 0:
+        return sorted_values
+
+    return sorted_values[np.concatenate([[True], sorted_values[1:] != sorted_values[:-1]])]
+
+
+def _union(sorted_arrays: List[np.ndarray]) -> np.ndarray:
+    """
+    Private method that merges sorted arrays of unique values
+
+    Parameters
+    ----------
+    sorted_arrays : List[np.ndarray]
+        Sorted arrays of unique values
+
+    Returns
+    -------
+    np.ndarray
+        The sorted union
+    """
+
+    sorted_arrays = [x for x in sorted_arrays if len(x) > 0]
+
+    if len(sorted_arrays) == 0:
+        return np.zeros(0, dtype=np.uint32)
+    if len(sorted_arrays) == 1:
+        return sorted_arrays[0]
+
+    # the merge sort is fast on a concatenation of sorted runs
+    return _get_unique(np.sort(np.concatenate(sorted_arrays), kind='stable'))
+
+
+class PaperIndex():
+    """
+    Inverted index over the title, abstract and keywords of papers, used for full-text search with BM25 ranking.
+
+    Each paper is a document with an integer ID. For each term, the index keeps a posting list with the IDs of the
+    documents that contain the term (in ascending order), the term frequency on each document and the term positions,
+    all of them in compact arrays. A changed paper is indexed again as a new document and its old document is marked
+    as deleted, so the index is only appended while a search is running, and the deleted documents are dropped when
+    the index is compacted (e.g. before it's saved).
+
+    The queries are evaluated over NumPy views of the posting lists, so NumPy is required by the search
+    """
+
+    def __init__(self, papers: Optional[Iterable[Paper]] = None, track_papers: Optional[bool] = False):
+        """
+        PaperIndex class constructor
+
+        Parameters
+        ----------
+        papers : Optional[Iterable[Paper]], optional
+            The papers to index, by default None
+        track_papers : Optional[bool], optional
+            If the index keeps a reference to the indexed paper instances, so a changed paper is found even when its key
+            changes (e.g. it's enriched with a DOI), by default False. It should only be used when the papers are kept
+            in memory anyway, as the papers of a Search
+        """
+
+        self.keys = []  # the paper key of each document
+        self.titles = []  # the paper title of each document
+        self.lengths = array('I')  # the number of tokens of each document
+        self.deleted_documents = set()
+        self.document_by_key = {}
+        self.key_by_paper = {} if track_papers else None
+
+        # term -> (document IDs, term frequencies, position offsets, positions),
+        # the positions of the i-th document are positions[position_offsets[i]:position_offsets[i] + term_frequencies[i]]
+        self.postings = {}
+
+        self.total_length = 0
+        self._sorted_terms = None
+
+        if papers is not None:
+            for paper in papers:
+                self.add_paper(paper)
+
+    def __len__(self) -> int:
+        return len(self.keys) - len(self.deleted_documents)
+
+    @staticmethod
+    def get_paper_key(paper: Paper) -> str:
+        """
+        Returns the key of a paper, the same key used by the Search to index its papers
+
+        Parameters
+        ----------
+        paper : Paper
+            A paper instance
+
+        Returns
+        -------
+        str
+            The paper key
+        """
+
+        return Search.get_paper_key(paper.title, paper.publication_date, paper.doi)
+
+    @staticmethod
+    def get_tokens(paper: Paper) -> List[Tuple[str, int]]:
+        """
+        Returns the (term, position) tokens of a paper title, abstract and keywords.
+        The fields are separated by a position gap, so a phrase never matches across two fields
+
+        Parameters
+        ----------
+        paper : Paper
+            A paper instance
+
+        Returns
+        -------
+        List[Tuple[str, int]]
+            The tokens
+        """
+
+        fields = [paper.title, paper.abstract] + sorted(paper.keywords if paper.keywords is not None else [])
+
+        tokens = []
+        position = 0
+
+        for field in fields:
+            if field is None:
+                continue
+            for term in TOKEN_PATTERN.findall(field.lower()):
+                tokens.append((term, position))
+                position += 1
+            position += 1
+
+        return tokens
+
+    def add_paper(self, paper: Paper):
+        """
+        Index a paper, replacing its previous document if it was already indexed
+
+        Parameters
+        ----------
+        paper : Paper
+            A paper instance
+        """
+
+        key = self.get_paper_key(paper)
+
+        # the key changes when the paper is enriched with a DOI
+        if self.key_by_paper is not None:
+            previous_key = self.key_by_paper.get(paper)
+            if previous_key is not None and previous_key != key:
+                self.remove_paper(previous_key)
+            self.key_by_paper[paper] = key
+
+        self.remove_paper(key)
+        document = len(self.keys)
+        tokens = self.get_tokens(paper)
+
+        self.keys.append(key)
+        self.titles.append(paper.title)
+        self.lengths.append(len(tokens))
+        self.document_by_key[key] = document
+        self.total_length += len(tokens)
+
+        positions_by_term = {}
+        for term, position in tokens:
+            positions_by_term.setdefault(term, []).append(position)
+
+        for term, positions in positions_by_term.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = (array('I'), array('I'), array('I'), array('I'))
+                self.postings[term] = posting
+                self._sorted_terms = None
+            documents, frequencies, offsets, all_positions = posting
+            documents.append(document)
+            frequencies.append(len(positions))
+            offsets.append(len(all_positions))
+            all_positions.extend(positions)
+
+    def remove_paper(self, paper: Union[Paper, str]):
+        """
+        Remove a paper from the index, it's only marked as deleted until the index is compacted
+
+        Parameters
+        ----------
+        paper : Union[Paper, str]
+            A paper instance or a paper key
+        """
+
+        if isinstance(paper, str):
+            key = paper
+        else:
+            key = self.key_by_paper.pop(paper, None) if self.key_by_paper is not None else None
+            if key is None:
+                key = self.get_paper_key(paper)
+
+        document = self.document_by_key.pop(key, None)
+
+        if document is not None:
+            self.deleted_documents.add(document)
+            self.total_length -= self.lengths[document]
+
+    def compact(self):
+        """
+        Rebuild the index without the deleted documents
+        """
+
+        if len(self.deleted_documents) == 0:
+            return
+
+        new_document_by_document = {}
+        keys = []
+        titles = []
+        lengths = array('I')
+
+        for document, key in enumerate(self.keys):
+            if document not in self.deleted_documents:
+                new_document_by_document[document] = len(keys)
+                keys.append(key)
+                titles.append(self.titles[document])
+                lengths.append(self.lengths[document])
+
+        postings = {}
+
+        for term, (documents, frequencies, offsets, all_positions) in self.postings.items():
+            new_posting = (array('I'), array('I'), array('I'), array('I'))
+            for i, document in enumerate(documents):
+                new_document = new_document_by_document.get(document)
+                if new_document is not None:
+                    new_posting[0].append(new_document)
+                    new_posting[1].append(frequencies[i])
+                    new_posting[2].append(len(new_posting[3]))
+                    new_posting[3].extend(all_positions[offsets[i]:offsets[i] + frequencies[i]])
+            if len(new_posting[0]) > 0:
+                postings[term] = new_posting
+
+        self.keys = keys
+        self.titles = titles
+        self.lengths = lengths
+        self.postings = postings
+        self.document_by_key = {key: document for document, key in enumerate(keys)}
+        self.deleted_documents = set()
+        self._sorted_terms = None
+
+    def _get_sorted_terms(self) -> List[str]:
+        """
+        Private method that returns the sorted vocabulary, used to expand the wildcard terms
+
+        Returns
+        -------
+        List[str]
+            The sorted terms
+        """
+
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings.keys())
+
+        return self._sorted_terms
+
+    def _expand_word(self, word: str) -> List[str]:
+        """
+        Private method that expands a query word with wildcards (? or *) into the matching index terms
+
+        Parameters
+        ----------
+        word : str
+            A lowercase query word
+
+        Returns
+        -------
+        List[str]
+            The matching terms
+        """
+
+        if '?' not in word and '*' not in word:
+            return [word] if word in self.postings else []
+
+        # the terms sharing the word prefix (i.e., the part before the first wildcard) are a contiguous range of the vocabulary
+        prefix = re.split(r'[?*]', word)[0]
+        sorted_terms = self._get_sorted_terms()
+        start = bisect.bisect_left(sorted_terms, prefix)
+        end = bisect.bisect_left(sorted_terms, prefix + '\uffff') if len(prefix) > 0 else len(sorted_terms)
+
+        regex = re.compile(''.join(r'\w' if x == '?' else r'\w*' if x == '*' else re.escape(x) for x in word))
+
+        return [x for x in sorted_terms[start:end] if regex.fullmatch(x)]
+
+    def _is_in(self, documents: np.ndarray, other_documents: np.ndarray) -> np.ndarray:
+        """
+        Private method that checks which documents are in another array of documents,
+        using a bitmap of all the document IDs, so it's linear on the arrays size
+
+        Parameters
+        ----------
+        documents : np.ndarray
+            The document IDs to check
+        other_documents : np.ndarray
+            Other document IDs
+
+        Returns
+        -------
+        np.ndarray
+            A boolean array with a value for each checked document
+        """
+
+        bitmap = np.zeros(len(self.keys), dtype=bool)
+        bitmap[other_documents] = True
+
+        return bitmap[documents]
+
+    def _get_array(self, values: array) -> np.ndarray:
+        """
+        Private method that returns a NumPy view of a compact array, without copying it
+
+        Parameters
+        ----------
+        values : array
+            A compact array of unsigned integers
+
+        Returns
+        -------
+        np.ndarray
+            The NumPy view
+        """
+
+        return np.frombuffer(values, dtype=np.uint32) if len(values) > 0 else np.zeros(0, dtype=np.uint32)
+
+    def _get_word_documents(self, terms: List[str]) -> np.ndarray:
+        """
+        Private method that returns the documents that contain any of the given index terms
+
+        Parameters
+        ----------
+        terms : List[str]
+            Index terms, i.e. the expansion of a query word
+
+        Returns
+        -------
+        np.ndarray
+            The sorted document IDs
+        """
+
+        return _union([self._get_array(self.postings.get(x)[0]) for x in terms])
+
+    def _get_phrase_documents(self, expanded_words: List[List[str]], documents: np.ndarray) -> np.ndarray:
+        """
+        Private method that filters the documents where the phrase words appear in sequence
+
+        Parameters
+        ----------
+        expanded_words : List[List[str]]
+            The index terms of each phrase word
+        documents : np.ndarray
+            The sorted IDs of the documents that contain all the phrase words
+
+        Returns
+        -------
+        np.ndarray
+            The sorted document IDs
+        """
+
+        phrase_starts = None
+
+        for i, terms in enumerate(expanded_words):
+            word_starts = []
+            for term in terms:
+                term_documents, frequencies, _, positions = self.postings.get(term)
+                # the positions are stored in the document order, so each position is paired with its document by a repetition
+                position_documents = np.repeat(self._get_array(term_documents), self._get_array(frequencies))
+                is_candidate = self._is_in(position_documents, documents)
+                # a (document, phrase start position) pair is encoded in a single integer,
+                # the start is shifted by the number of words, so it's never negative
+                start_positions = self._get_array(positions)[is_candidate].astype(np.uint64) + np.uint64(len(expanded_words) - i)
+                word_starts.append((position_documents[is_candidate].astype(np.uint64) << np.uint64(32)) | start_positions)
+            # the pairs of each term are already sorted, since the positions are stored in the document order
+            word_starts = _union(word_starts)
+            phrase_starts = word_starts if phrase_starts is None else _intersect(phrase_starts, word_starts)
+
+        return _get_unique((phrase_starts >> np.uint64(32)).astype(np.uint32))
+
+    def _get_term_documents(self, term: query_util.QueryTerm, matched_terms: Set[str]) -> np.ndarray:
+        """
+        Private method that returns the documents that contain a query term.
+        A term with several words is a phrase, i.e. its words must appear in sequence
+
+        Parameters
+        ----------
+        term : query_util.QueryTerm
+            A query term
+        matched_terms : Set[str]
+            The index terms that matched the query are added to this set, they're used by the ranking
+
+        Returns
+        -------
+        np.ndarray
+            The sorted document IDs
+        """
+
+        words = QUERY_TOKEN_PATTERN.findall(term.value.lower())
+        expanded_words = [self._expand_word(x) for x in words]
+
+        if len(words) == 0 or any(len(x) == 0 for x in expanded_words):
+            return np.zeros(0, dtype=np.uint32)
+
+        # the rarest word is used first, so the intersection is as small as possible from the start
+        documents = None
+        for word_documents in sorted([self._get_word_documents(x) for x in expanded_words], key=len):
+            documents = word_documents if documents is None else documents[self._is_in(documents, word_documents)]
+
+        if len(words) > 1 and len(documents) > 0:
+            documents = self._get_phrase_documents(expanded_words, documents)
+
+        if len(documents) > 0:
+            matched_terms.update(x for terms in expanded_words for x in terms)
+
+        return documents
+
+    def _get_documents(self, node: Union[query_util.QueryTerm, query_util.QueryGroup], matched_terms: Set[str]) -> np.ndarray:
+        """
+        Private method that returns the documents that match a query tree node,
+        with the same connector precedence used by query_util.compile_matcher
+
+        Parameters
+        ----------
+        node : Union[query_util.QueryTerm, query_util.QueryGroup]
+            A query tree node
+        matched_terms : Set[str]
+            The index terms that matched the query are added to this set, they're used by the ranking
+
+        Returns
+        -------
+        np.ndarray
+            The sorted document IDs, including the deleted ones
+        """
+
+        if isinstance(node, query_util.QueryTerm):
+            return self._get_term_documents(node, matched_terms)
+
+        documents = np.zeros(0, dtype=np.uint32)
+        clause_documents = self._get_documents(node.nodes[0], matched_terms)
+
+        for connector, child_node in zip(node.connectors, node.nodes[1:]):
+            if connector == 'OR':
+                documents = _union([documents, clause_documents])
+                clause_documents = self._get_documents(child_node, matched_terms)
+            elif connector == 'AND':
+                child_documents = self._get_documents(child_node, matched_terms)
+                clause_documents = clause_documents[self._is_in(clause_documents, child_documents)]
+            else:
+                # the terms of a negated node aren't used by the ranking
+                clause_documents = clause_documents[~self._is_in(clause_documents, self._get_documents(child_node, set()))]
+
+        return _union([documents, clause_documents])
+
+    def search(self, query: Union[str, query_util.QueryGroup], limit: Optional[int] = None) -> List[Tuple[str, str, float]]:
+        """
+        Search the papers that match a query, ranked by their BM25 score. It requires NumPy
+
+        Parameters
+        ----------
+        query : Union[str, query_util.QueryGroup]
+            A findpapers query (e.g. [term a] AND ([term b] OR [term c*])) or its syntax tree.
+            A query that doesn't start with a search term or a group is handled as a list of keywords, any of which can match
+        limit : Optional[int], optional
+            The max number of results, by default None (i.e., all the matching papers)
+
+        Returns
+        -------
+        List[Tuple[str, str, float]]
+            The (paper key, paper title, score) of the matching papers, the best ones first
+
+        Raises
+        ------
+        query_util.QueryError
+            Invalid query
+        ImportError
+            NumPy isn't installed
+        """
+
+        if np is None:  # pragma: no cover
+            raise ImportError('NumPy is required by the paper index search, you can install it running "pip install findpapers[analytics]"')
+
+        if isinstance(query, str):
+            query = query.strip()
+            if len(query) > 0 and query[0] not in '[(':
+                query = ' OR '.join(f'[{x}]' for x in query.split())
+            query = query_util.parse(query)
+
+        matched_terms = set()
+        documents = self._get_documents(query, matched_terms)
+
+        if len(self.deleted_documents) > 0:
+            documents = documents[~self._is_in(documents, np.fromiter(self.deleted_documents, dtype=np.uint32))]
+
+        if len(documents) == 0:
+            return []
+
+        number_of_documents = len(self)
+        average_length = self.total_length / number_of_documents
+        lengths = self._get_array(self.lengths)
+        scores = np.zeros(len(documents))
+
+        for term in matched_terms:
+            term_documents, frequencies, _, _ = self.postings.get(term)
+            term_documents = self._get_array(term_documents)
+            is_matched = self._is_in(term_documents, documents)
+            idf = math.log(1 + (number_of_documents - len(term_documents) + 0.5) / (len(term_documents) + 0.5))
+            matched_documents = term_documents[is_matched]
+            matched_frequencies = self._get_array(frequencies)[is_matched].astype(np.float64)
+            length_norms = 1 - BM25_B + BM25_B * lengths[matched_documents] / average_length
+            scores[np.searchsorted(documents, matched_documents)] += \
+                idf * matched_frequencies * (BM25_K1 + 1) / (matched_frequencies + BM25_K1 * length_norms)
+
+        rows = np.arange(len(documents))
+        if limit is not None and limit < len(documents):
+            # only the best rows are sorted
+            rows = np.argpartition(-scores, limit - 1)[:limit] if limit > 0 else rows[:0]
+
+        # sorted by score (descending) and by document ID, i.e. the indexing order
+        rows = rows[np.lexsort((documents[rows], -scores[rows]))]
+
+        return [(self.keys[documents[i]], self.titles[documents[i]], float(scores[i])) for i in rows]
+
+    def save(self, outputpath: str, source_signature: Optional[tuple] = None):
+        """
+        Save the index, it's compacted before that.
+        The file has a JSON header line (the metadata, the keys, the titles and the vocabulary) followed by the
+        lengths and posting lists as raw unsigned integers, so loading an index never runs any code from the file
+
+        Parameters
+        ----------
+        outputpath : str
+            A valid file path used to save the index
+        source_signature : Optional[tuple], optional
+            A value that identifies the indexed content (e.g. the search file size and modification time),
+            used to detect an outdated index when it's loaded, by default None
+        """
+
+        self.compact()
+
+        terms = list(self.postings.keys())
+        header = {
+            'version': INDEX_VERSION,
+            'byteorder': sys.byteorder,
+            'source_signature': list(source_signature) if source_signature is not None else None,
+            'total_length': self.total_length,
+            'keys': self.keys,
+            'titles': self.titles,
+            'terms': terms,
+            'sizes': [[len(self.postings[x][0]), len(self.postings[x][3])] for x in terms],
+        }
+
+        temp_outputpath = f'{outputpath}.tmp'
+
+        with open(temp_outputpath, 'wb') as indexfile:
+            indexfile.write(json.dumps(header).encode('utf-8') + b'\n')
+            self.lengths.tofile(indexfile)
+            for term in terms:
+                for values in self.postings[term]:
+                    values.tofile(indexfile)
+
+        os.replace(temp_outputpath, outputpath)
+
+    @classmethod
+    def load(cls, index_path: str, source_signature: Optional[tuple] = None) -> Optional[PaperIndex]:
+        """
+        Load an index saved by PaperIndex.save
+
+        Parameters
+        ----------
+        index_path : str
+            A valid file path of an index
+        source_signature : Optional[tuple], optional
+            The current signature of the indexed content, by default None (i.e., it isn't checked)
+
+        Returns
+        -------
+        Optional[PaperIndex]
+            The loaded index, or None if the index file doesn't exist, it has an unsupported version or it's outdated
+        """
+
+        if not os.path.isfile(index_path):
+            return None
+
+        with open(index_path, 'rb') as indexfile:
+            try:
+                header = json.loads(indexfile.readline().decode('utf-8'))
+            except ValueError:
+                return None  # e.g. an index saved by a previous version
+
+            if not isinstance(header, dict) or header.get('version') != INDEX_VERSION:
+                return None
+
+            if source_signature is not None and tuple(header.get('source_signature') or ()) != tuple(source_signature):
+                return None
+
+            values = array('I')
+            values.frombytes(indexfile.read())
+
+        if header.get('byteorder') != sys.byteorder:
+            values.byteswap()
+
+        keys = header.get('keys')
+        offset = len(keys)
+        postings = {}
+
+        for term, (documents_count, positions_count) in zip(header.get('terms'), header.get('sizes')):
+            posting = []
+            for size in (documents_count, documents_count, documents_count, positions_count):
+                posting.append(values[offset:offset + size])
+                offset += size
+            postings[term] = tuple(posting)
+
+        if offset != len(values):
+            return None  # e.g. the file was truncated
+
+        index = cls()
+        index.keys = keys
+        index.titles = header.get('titles')
+        index.lengths = values[:len(keys)]
+        index.postings = postings
+        index.total_length = header.get('total_length')
+        index.document_by_key = {key: document for document, key in enumerate(keys)}
+
+        return index
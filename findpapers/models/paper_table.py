@@ -0,0 +1,301 @@
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional
+from findpapers.models.paper import Paper, DatabaseSet
+from findpapers.models.publication import Publication
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+# the value used on the integer columns when a paper doesn't have the value defined
+MISSING_VALUE = -1
+
+
+class PaperTable():
+    """
+    Columnar view of a list of papers, used for bulk analytics (filters, group-bys and top-k) over search results.
+    Each column is a NumPy array with a row for each paper:
+
+        - year: the publication year
+        - citations: the number of citations, or MISSING_VALUE
+        - selected: 1 if the paper was selected on the refinement, 0 if it was removed, or MISSING_VALUE if it wasn't refined
+        - databases: a bitmask of the databases where the paper was found (see DatabaseSet)
+        - publication_id: the index of the paper publication on the publications list, or MISSING_VALUE
+    """
+
+    COLUMNS = ['year', 'citations', 'selected', 'databases', 'publication_id']
+
+    def __init__(self, papers: Iterable[Paper]):
+        """
+        PaperTable class constructor
+
+        Parameters
+        ----------
+        papers : Iterable[Paper]
+            The papers of the table
+
+        Raises
+        ------
+        ImportError
+            NumPy isn't installed
+        """
+
+        if np is None:  # pragma: no cover
+            raise ImportError('NumPy is required by the paper table, you can install it running "pip install findpapers[analytics]"')
+
+        self.papers = list(papers)
+        self.publications = []
+
+        publication_id_by_publication = {}
+        publication_ids = []
+
+        for paper in self.papers:
+            if paper.publication is None:
+                publication_ids.append(MISSING_VALUE)
+            else:
+                publication_id = publication_id_by_publication.get(paper.publication)
+                if publication_id is None:
+                    publication_id = len(self.publications)
+                    publication_id_by_publication[paper.publication] = publication_id
+                    self.publications.append(paper.publication)
+                publication_ids.append(publication_id)
+
+        size = len(self.papers)
+
+        self.columns = {
+            'year': np.fromiter((x.publication_date.year for x in self.papers), dtype=np.int32, count=size),
+            'citations': np.fromiter((x.citations if x.citations is not None else MISSING_VALUE for x in self.papers),
+                                     dtype=np.int64, count=size),
+            'selected': np.fromiter((int(x.selected) if x.selected is not None else MISSING_VALUE for x in self.papers),
+                                    dtype=np.int8, count=size),
+            'databases': np.fromiter((x.databases.mask for x in self.papers), dtype=np.uint64, count=size),
+            'publication_id': np.array(publication_ids, dtype=np.int32)
+        }
+
+    @classmethod
+    def _from_rows(cls, table: PaperTable, rows: np.ndarray) -> PaperTable:
+        """
+        Private method that creates a table with some rows of another table, sharing its publications list
+
+        Parameters
+        ----------
+        table : PaperTable
+            A paper table
+        rows : np.ndarray
+            The row indexes
+
+        Returns
+        -------
+        PaperTable
+            A new paper table
+        """
+
+        new_table = cls.__new__(cls)
+        new_table.papers = [table.papers[i] for i in rows]
+        new_table.publications = table.publications
+        new_table.columns = {name: column[rows] for name, column in table.columns.items()}
+
+        return new_table
+
+    def __len__(self) -> int:
+        return len(self.papers)
+
+    def __getitem__(self, column_name: str) -> np.ndarray:
+        """
+        Get a column
+
+        Parameters
+        ----------
+        column_name : str
+            The column name (year, citations, selected, databases or publication_id)
+
+        Returns
+        -------
+        np.ndarray
+            The column array
+        """
+
+        return self.columns[column_name]
+
+    def has_database(self, database: str) -> np.ndarray:
+        """
+        Get a boolean mask of the papers found in a database, that can be used on a filter
+
+        Parameters
+        ----------
+        database : str
+            The database name
+
+        Returns
+        -------
+        np.ndarray
+            A boolean array with a value for each row
+        """
+
+        return (self.columns.get('databases') & np.uint64(DatabaseSet.get_bit(database))) != 0
+
+    def filter(self, mask: np.ndarray) -> PaperTable:
+        """
+        Get the rows that match a boolean mask, e.g. table.filter((table['year'] >= 2010) & table.has_database('ACM'))
+
+        Parameters
+        ----------
+        mask : np.ndarray
+            A boolean array with a value for each row
+
+        Returns
+        -------
+        PaperTable
+            A new paper table with the matched rows
+        """
+
+        return self._from_rows(self, np.flatnonzero(mask))
+
+    def sort(self, column_name: str, reverse: Optional[bool] = False) -> PaperTable:
+        """
+        Get the rows sorted by a column, the rows with equal values keep their order
+
+        Parameters
+        ----------
+        column_name : str
+            The column name
+        reverse : Optional[bool], optional
+            If the rows will be sorted in descending order, by default False
+
+        Returns
+        -------
+        PaperTable
+            A new paper table with the sorted rows
+        """
+
+        column = self.columns.get(column_name)
+
+        if reverse:
+            rows = len(column) - 1 - np.argsort(column[::-1], kind='stable')[::-1]
+        else:
+            rows = np.argsort(column, kind='stable')
+
+        return self._from_rows(self, rows)
+
+    def top_k(self, column_name: str, k: int) -> PaperTable:
+        """
+        Get the k rows with the highest values of a column, sorted in descending order
+
+        Parameters
+        ----------
+        column_name : str
+            The column name
+        k : int
+            The number of rows
+
+        Returns
+        -------
+        PaperTable
+            A new paper table with the top k rows
+        """
+
+        column = self.columns.get(column_name)
+        k = min(k, len(column))
+
+        if k <= 0:
+            return self._from_rows(self, np.array([], dtype=np.int64))
+
+        # only the k highest values are sorted
+        rows = np.argpartition(column, len(column) - k)[len(column) - k:]
+        rows = rows[np.argsort(column[rows], kind='stable')[::-1]]
+
+        return self._from_rows(self, rows)
+
+    def group_by(self, column_name: str, value_column_name: Optional[str] = None, aggregation: Optional[str] = 'count') -> Dict[int, float]:
+        """
+        Aggregate the rows by the values of a column, e.g. table.group_by('year', 'citations', 'sum')
+
+        Parameters
+        ----------
+        column_name : str
+            The column whose values define the groups
+        value_column_name : Optional[str], optional
+            The column whose values are aggregated, it's required by the sum and mean aggregations, by default None
+        aggregation : Optional[str], optional
+            The aggregation (count, sum or mean), by default 'count'.
+            The rows with a MISSING_VALUE on the value column are ignored by the sum and mean aggregations
+
+        Returns
+        -------
+        Dict[int, float]
+            The aggregated value of each group
+
+        Raises
+        ------
+        ValueError
+            Invalid aggregation
+        """
+
+        if aggregation not in ['count', 'sum', 'mean']:
+            raise ValueError(f'Invalid aggregation: {aggregation}')
+
+        groups, group_indexes = np.unique(self.columns.get(column_name), return_inverse=True)
+        group_indexes = group_indexes.ravel()
+
+        if aggregation == 'count':
+            values = np.bincount(group_indexes, minlength=len(groups))
+        else:
+            value_column = self.columns.get(value_column_name)
+            is_defined = value_column != MISSING_VALUE
+            values = np.bincount(group_indexes, weights=np.where(is_defined, value_column, 0), minlength=len(groups))
+            if aggregation == 'mean':
+                counts = np.bincount(group_indexes, weights=is_defined, minlength=len(groups))
+                values = np.divide(values, counts, out=np.full(len(groups), np.nan), where=counts > 0)
+
+        return dict(zip(groups.tolist(), values.tolist()))
+
+    def count_by_database(self) -> Dict[str, int]:
+        """
+        Count the papers found in each database
+
+        Returns
+        -------
+        Dict[str, int]
+            The number of papers by database name
+        """
+
+        counts = {}
+        databases = self.columns.get('databases')
+
+        for i, database in enumerate(DatabaseSet.get_names()):
+            count = int(np.count_nonzero(databases & np.uint64(1 << i)))
+            if count > 0:
+                counts[database] = count
+
+        return counts
+
+    def get_publication(self, publication_id: int) -> Optional[Publication]:
+        """
+        Get a publication by its ID on the publication_id column
+
+        Parameters
+        ----------
+        publication_id : int
+            The publication ID
+
+        Returns
+        -------
+        Optional[Publication]
+            The publication, or None if it's the MISSING_VALUE
+        """
+
+        return self.publications[publication_id] if publication_id != MISSING_VALUE else None
+
+    def get_papers(self) -> List[Paper]:
+        """
+        Get the papers of the table rows
+
+        Returns
+        -------
+        List[Paper]
+            The papers, in the table order
+        """
+
+        return list(self.papers)
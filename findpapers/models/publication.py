@@ -1,6 +1,7 @@
 from __future__ import annotations
 from typing import List, Optional
 import json
+import findpapers.utils.common_util as common_util
 
 
 class Publication():
@@ -8,6 +9,9 @@ class Publication():
     Class that represents a publication (journal, conference proceedings, book) instance
     """
 
+    __slots__ = ('title', 'isbn', 'issn', 'publisher', '_category', 'cite_score', 'sjr', 'snip', 'subject_areas',
+                 'is_potentially_predatory')
+
     def __init__(self, title: str, isbn: Optional[str] = None, issn: Optional[str] = None, publisher: Optional[str] = None,
                  category: Optional[str] = None, cite_score: Optional[float] = None, sjr: Optional[float] = None,
                  snip: Optional[float] = None, subject_areas: Optional[set] = None, is_potentially_predatory: Optional[bool] = False):
@@ -50,12 +54,12 @@ class Publication():
         self.title = title
         self.isbn = isbn
         self.issn = issn
-        self.publisher = publisher
+        self.publisher = common_util.intern(publisher)
         self.category = category if category is not None else title # trying to figure out what is the category by publication title
         self.cite_score = cite_score
         self.sjr = sjr
         self.snip = snip
-        self.subject_areas = subject_areas if subject_areas is not None else set()
+        self.subject_areas = {common_util.intern(x) for x in subject_areas} if subject_areas is not None else set()
         self.is_potentially_predatory = is_potentially_predatory
 
     @property
@@ -1,10 +1,21 @@
 from __future__ import annotations
+import copy
+import time
 import datetime
-import itertools
-import edlib
-from typing import List, Optional
+import threading
+from typing import List, Optional, TYPE_CHECKING
 from findpapers.models.paper import Paper
 from findpapers.models.publication import Publication
+import findpapers.utils.dedup_util as dedup_util
+import findpapers.utils.query_util as query_util
+
+if TYPE_CHECKING:  # pragma: no cover
+    from findpapers.models.paper_table import PaperTable
+    from findpapers.models.paper_index import PaperIndex
+
+
+# the min number of seconds between two checkpoints made after fetched pages
+DEFAULT_CHECKPOINT_INTERVAL = 30
 
 
 class Search():
@@ -14,7 +25,8 @@ class Search():
 
     def __init__(self, query: str, since: Optional[datetime.date] = None, until: Optional[datetime.date] = None,
                  limit: Optional[int] = None, limit_per_database: Optional[int] = None, processed_at: Optional[datetime.datetime] = None,
-                 databases: Optional[List[str]] = None, publication_types: Optional[List[str]] = None, papers: Optional[set] = None):
+                 databases: Optional[List[str]] = None, publication_types: Optional[List[str]] = None, papers: Optional[set] = None,
+                 similarity_threshold: Optional[float] = 0.95):
         """
         Class constructor
 
@@ -40,9 +52,15 @@ class Search():
             List of publication list of publication types to filter when searching, if not specified all publication types will be used. By default None
         papers : set, optional
             A list of papers already collected
+        similarity_threshold : float, optional
+            A value between 0 and 1 used to find duplicated papers when they are added to the search,
+            if two papers titles are similar by this threshold or more, and if the papers have the same year of publication,
+            they are merged into a single paper, by default 0.95 (95%)
         """
 
         self.query = query
+        self._query_tree = None
+        self._parsed_query = None
         self.since = since
         self.until = until
         self.limit = limit
@@ -54,8 +72,34 @@ class Search():
         self.paper_by_key = {}
         self.publication_by_key = {}
         self.paper_by_doi = {}
+        # the key and DOI that each paper is stored by, since merging and enrichment can change them
+        self.keys_by_paper = {}
         self.papers_by_database = {}
 
+        # the search progress, used to resume an interrupted search from its last checkpoint
+        self.cursor_by_database = {}
+        self.finished_databases = set()
+        self.finished_stages = []
+        self.checkpoint_callback = None
+        self.checkpoint_interval = DEFAULT_CHECKPOINT_INTERVAL
+        self.checkpointed_at = None
+        # the checkpoints are written outside the search lock, but only one at a time
+        self.checkpoint_lock = threading.Lock()
+
+        # called with a paper when it's added or changed (e.g. by a duplication merging), and when it's removed,
+        # so the search output can be written incrementally
+        self.paper_callback = None
+        self.removed_paper_callback = None
+
+        # full-text index of the collected papers, it's only kept up to date after create_index is called
+        self.index = None
+
+        # titles of the collected papers blocked by publication year, used to find duplications as soon as a paper is added
+        self.title_index = dedup_util.TitleIndex(similarity_threshold)
+
+        # the searchers can run concurrently, so every change on the collected papers must hold this lock
+        self.lock = threading.RLock()
+
         self.papers = set()
         if papers is not None:
             for paper in papers:
@@ -64,7 +108,30 @@ class Search():
                 except Exception:
                     pass
 
-    def get_paper_key(self, paper_title: str, publication_date: datetime.date, paper_doi: Optional[str] = None) -> str:
+    @property
+    def query_tree(self) -> query_util.QueryGroup:
+        """
+        The syntax tree of the search query, it's parsed once and cached until the query changes
+
+        Returns
+        -------
+        query_util.QueryGroup
+            The root group of the query
+
+        Raises
+        ------
+        query_util.QueryError
+            Invalid query
+        """
+
+        if self._query_tree is None or self._parsed_query != self.query:
+            self._query_tree = query_util.parse(self.query)
+            self._parsed_query = self.query
+
+        return self._query_tree
+
+    @staticmethod
+    def get_paper_key(paper_title: str, publication_date: datetime.date, paper_doi: Optional[str] = None) -> str:
         """
         We have a map called paper_by_key that is filled using the string this method returns
 
@@ -88,7 +155,8 @@ class Search():
         else:
             return f'{paper_title.lower()}|{publication_date.year if publication_date is not None else ""}'
 
-    def get_publication_key(self, publication_title: str, publication_issn: Optional[str] = None, publication_isbn: Optional[str] = None) -> str:
+    @staticmethod
+    def get_publication_key(publication_title: str, publication_issn: Optional[str] = None, publication_isbn: Optional[str] = None) -> str:
         """
         We have a map called publication_by_key that is filled using the string this method returns
 
@@ -114,7 +182,7 @@ class Search():
         else:
             return f'TITLE-{publication_title.lower()}'
 
-    def add_paper(self, paper: Paper):
+    def add_paper(self, paper: Paper, merge_similar: Optional[bool] = True):
         """
         Method that handle the action to add a paper to the list of already collected papers, 
         dealing with possible paper's duplications
@@ -123,6 +191,9 @@ class Search():
         ----------
         paper : Paper
             A new collected paper instance
+        merge_similar : Optional[bool], optional
+            If the paper will be merged with an already collected paper with a similar title, by default True.
+            The papers of a saved search were already deduplicated, so they are restored without this costly lookup
         Raises
         ------
         ValueError
@@ -131,6 +202,21 @@ class Search():
             - When the papers limit is provided, you cannot exceed it
         """
 
+        with self.lock:
+            self._add_paper(paper, merge_similar)
+
+    def _add_paper(self, paper: Paper, merge_similar: Optional[bool] = True):
+        """
+        Private method that adds a paper to the search, it must be called holding the search lock
+
+        Parameters
+        ----------
+        paper : Paper
+            A new collected paper instance
+        merge_similar : Optional[bool], optional
+            If the paper will be merged with an already collected paper with a similar title, by default True
+        """
+
         if len(paper.databases) == 0:
             raise ValueError(
                 'Paper cannot be added to search without at least one defined database')
@@ -165,21 +251,116 @@ class Search():
         if (self.since is None or paper.publication_date >= self.since) \
                 and (self.until is None or paper.publication_date <= self.until):
 
+            if already_collected_paper is None and merge_similar:
+                already_collected_paper = self._get_similar_paper(paper)
+
             if already_collected_paper is None:
                 self.papers.add(paper)
-                self.paper_by_key[paper_key] = paper
+                self._update_paper_keys(paper)
 
-                if paper.doi is not None:
-                    self.paper_by_doi[paper.doi] = paper
+                if paper.publication_date is not None:
+                    self.title_index.add(paper, paper.title.lower(), paper.publication_date.year)
 
                 for database in paper.databases:
                     if database not in self.papers_by_database:
                         self.papers_by_database[database] = set()
                     self.papers_by_database[database].add(paper)
+
+                if self.index is not None:
+                    self.index.add_paper(paper)
+
+                if self.paper_callback is not None:
+                    self.paper_callback(paper)
             else:
-                self.papers_by_database[database].add(already_collected_paper)
                 already_collected_paper.enrich(paper)
-        
+
+                # the merged paper can get a DOI, so it's stored by its new key
+                self._update_paper_keys(already_collected_paper)
+
+                for database in paper.databases:
+                    self.papers_by_database.setdefault(database, set()).add(already_collected_paper)
+
+                if self.index is not None:
+                    self.index.add_paper(already_collected_paper)
+
+                if self.paper_callback is not None:
+                    self.paper_callback(already_collected_paper)
+
+    def _update_paper_keys(self, paper: Paper):
+        """
+        Private method that stores a paper by its current key and DOI, dropping the ones it was stored by before.
+        It must be called holding the search lock
+
+        Parameters
+        ----------
+        paper : Paper
+            A collected paper instance
+        """
+
+        paper_key = self.get_paper_key(paper.title, paper.publication_date, paper.doi)
+        previous_keys = self.keys_by_paper.get(paper, (None, None))
+
+        if (paper_key, paper.doi) == previous_keys:
+            return
+
+        self._drop_paper_keys(paper)
+
+        # a key that is already used by another paper is kept by it, the duplication is solved by merge_duplications
+        if self.paper_by_key.get(paper_key, paper) is paper:
+            self.paper_by_key[paper_key] = paper
+        else:
+            paper_key = None
+
+        if paper.doi is not None:
+            self.paper_by_doi[paper.doi] = paper
+
+        self.keys_by_paper[paper] = (paper_key, paper.doi)
+
+    def _drop_paper_keys(self, paper: Paper):
+        """
+        Private method that drops the key and DOI that a paper is stored by. It must be called holding the search lock
+
+        Parameters
+        ----------
+        paper : Paper
+            A collected paper instance
+        """
+
+        paper_key, paper_doi = self.keys_by_paper.pop(paper, (None, None))
+
+        if paper_key is not None and self.paper_by_key.get(paper_key) is paper:
+            del self.paper_by_key[paper_key]
+
+        if paper_doi is not None and self.paper_by_doi.get(paper_doi) is paper:
+            del self.paper_by_doi[paper_doi]
+
+    def _get_similar_paper(self, paper: Paper) -> Optional[Paper]:
+        """
+        Private method that finds an already collected paper that is a duplication of the provided one,
+        i.e. a paper from the same year with a similar title and without a different DOI
+
+        Parameters
+        ----------
+        paper : Paper
+            A new collected paper instance
+
+        Returns
+        -------
+        Optional[Paper]
+            The already collected paper, or None if there isn't a duplication of the provided paper
+        """
+
+        if paper.publication_date is None:
+            return None
+
+        normalized_doi = dedup_util.normalize_doi(paper.doi)
+
+        for similar_paper in self.title_index.find_similar(paper.title.lower(), paper.publication_date.year):
+            similar_paper_doi = dedup_util.normalize_doi(similar_paper.doi)
+            if normalized_doi is None or similar_paper_doi is None or normalized_doi == similar_paper_doi:
+                return similar_paper
+
+        return None
 
     def get_paper(self, paper_title: str, publication_date: str, paper_doi: Optional[str] = None) -> Paper:
         """
@@ -228,6 +409,34 @@ class Search():
 
         return self.publication_by_key.get(publication_key, None)
 
+    def update_paper(self, paper: Paper):
+        """
+        Method that handles a collected paper that was changed in place (e.g. enriched), its title or DOI can be
+        changed, so it's stored by its new key and indexed again
+
+        Parameters
+        ----------
+        paper : Paper
+            A collected paper instance
+        """
+
+        with self.lock:
+
+            if paper not in self.papers:
+                return
+
+            self._update_paper_keys(paper)
+
+            self.title_index.remove(paper)
+            if paper.publication_date is not None:
+                self.title_index.add(paper, paper.title.lower(), paper.publication_date.year)
+
+            if self.index is not None:
+                self.index.add_paper(paper)
+
+            if self.paper_callback is not None:
+                self.paper_callback(paper)
+
     def remove_paper(self, paper: Paper):
         """
         Remove a collected paper
@@ -238,16 +447,22 @@ class Search():
             A paper instance
         """
 
-        paper_key = self.get_paper_key(
-            paper.title, paper.publication_date, paper.doi)
+        with self.lock:
 
-        if paper_key in self.paper_by_key:
-            del self.paper_by_key[paper_key]
+            # the paper is removed by identity, since its title or DOI can be changed after it's collected
+            self._drop_paper_keys(paper)
 
-        for database in paper.databases:
-            self.papers_by_database[database].remove(paper)
+            for database in paper.databases:
+                self.papers_by_database.get(database, set()).discard(paper)
 
-        self.papers.remove(paper)
+            self.papers.remove(paper)
+            self.title_index.remove(paper)
+
+            if self.index is not None:
+                self.index.remove_paper(paper)
+
+            if self.removed_paper_callback is not None:
+                self.removed_paper_callback(paper)
 
     def merge_duplications(self, similarity_threshold: float = 0.95):
         """
@@ -256,46 +471,201 @@ class Search():
         using a similarity threshold, by default 0.95 (95%), i.e., if two papers titles
         are similar by 95% or more, and if the papers have the same year of publication
         this papers are considered duplications of a same paper.
+        Papers with the same (normalized) DOI are always considered duplications, 
+        and papers with different DOIs are never merged.
+
+        The papers are blocked by publication year and only the pairs of titles found by a
+        title index are compared, so this method doesn't need to compare every pair of papers
 
         Parameters
         ----------
-        max_similarity_threshold : float, optional
+        similarity_threshold : float, optional
             A value between 0 and 1 that represents a threshold that says if a pair of papers is a duplication or not, by default 0.95 (95%)
         """
 
-        paper_key_pairs = list(
-            itertools.combinations(self.paper_by_key.keys(), 2))
+        with self.lock:
+
+            # every collected paper is stored by keys_by_paper, in the order the papers were collected
+            papers = [x for x in self.keys_by_paper if x in self.papers]
+            disjoint_set = dedup_util.DisjointSet(papers)
+            title_index = dedup_util.TitleIndex(similarity_threshold)
+            paper_by_normalized_doi = {}
+            doi_by_root = {}
+
+            def merge(paper_1: Paper, paper_2: Paper):
+                root_1 = disjoint_set.find(paper_1)
+                root_2 = disjoint_set.find(paper_2)
+                doi_1 = doi_by_root.get(root_1)
+                doi_2 = doi_by_root.get(root_2)
+                if root_1 == root_2 or (doi_1 is not None and doi_2 is not None and doi_1 != doi_2):
+                    return  # we cannot merge papers with different DOIs
+                doi_by_root.pop(root_1, None)
+                doi_by_root.pop(root_2, None)
+                root = disjoint_set.union(root_1, root_2)
+                if doi_1 is not None or doi_2 is not None:
+                    doi_by_root[root] = doi_1 if doi_1 is not None else doi_2
 
-        for i, pair in enumerate(paper_key_pairs):
+            for paper in papers:
+
+                normalized_doi = dedup_util.normalize_doi(paper.doi)
+
+                if normalized_doi is not None:
+                    doi_by_root[disjoint_set.find(paper)] = normalized_doi
+                    if normalized_doi in paper_by_normalized_doi:
+                        merge(paper_by_normalized_doi[normalized_doi], paper)
+                    else:
+                        paper_by_normalized_doi[normalized_doi] = paper
+
+            for paper in papers:
+
+                if paper.publication_date is None:
+                    continue  # We cannot merge papers without a year defined
+
+                title = paper.title.lower()
+                year = paper.publication_date.year
 
-            paper_1_key = pair[0]
-            paper_2_key = pair[1]
-            paper_1 = self.paper_by_key.get(paper_1_key)
-            paper_2 = self.paper_by_key.get(paper_2_key)
+                for similar_paper in title_index.find_similar(title, year):
+                    merge(similar_paper, paper)
 
-            if (paper_1.publication_date is None or paper_2.publication_date is None) or \
-                (paper_1.publication_date.year != paper_2.publication_date.year) or \
-                (paper_1.doi is not None and paper_2.doi is not None and paper_1.doi != paper_2.doi):
-                # We cannot merge paper from different years or without a year defined or different DOI
-                break
+                title_index.add(paper, title, year)
 
-            max_title_length = max(len(paper_1.title), len(paper_2.title))
+            for cluster in disjoint_set.get_clusters():
 
-            # creating the max valid edit distance using the max title length between the two papers and the provided similarity threshold
-            max_edit_distance = int(
-                max_title_length * (1 - similarity_threshold))
+                if len(cluster) == 1:
+                    continue
 
-            # calculating the edit distance between the titles
-            titles_edit_distance = edlib.align(
-                paper_1.title.lower(), paper_2.title.lower())['editDistance']
+                # the papers with DOI are preferred to represent the cluster
+                main_paper = sorted(cluster, key=lambda x: x.doi is None)[0]
 
-            if (paper_1.doi is not None and paper_1.doi == paper_2.doi) or (titles_edit_distance <= max_edit_distance):
+                for paper in cluster:
+                    if paper is not main_paper:
+                        # using the information of the duplicated paper to enrich the main one
+                        main_paper.enrich(paper)
+                        self.remove_paper(paper)
 
-                # using the information of paper_2 to enrich paper_1
-                paper_1.enrich(paper_2)
+                self._update_paper_keys(main_paper)
 
-                # removing the paper_2 instance
-                self.remove_paper(paper_2)
+                for database in main_paper.databases:
+                    self.papers_by_database.setdefault(database, set()).add(main_paper)
+
+                if self.index is not None:
+                    self.index.add_paper(main_paper)
+
+                if self.paper_callback is not None:
+                    self.paper_callback(main_paper)
+
+    def get_cursor(self, database: str) -> Optional[dict]:
+        """
+        Get the pagination cursor of a database, i.e. where the database fetching should continue from
+
+        Parameters
+        ----------
+        database : str
+            The database name
+
+        Returns
+        -------
+        Optional[dict]
+            The cursor defined by the database searcher, or None if the database fetching didn't start yet
+        """
+
+        return self.cursor_by_database.get(database)
+
+    def set_cursor(self, database: str, cursor: dict):
+        """
+        Define the pagination cursor of a database and checkpoint the search. 
+        The searchers call it after each fetched page, so an interrupted search can be resumed.
+        The search is only checkpointed if the last checkpoint is older than the checkpoint interval
+
+        Parameters
+        ----------
+        database : str
+            The database name
+        cursor : dict
+            A JSON serializable dict defined by the database searcher (e.g. {'start_record': 200})
+        """
+
+        with self.lock:
+            self.cursor_by_database[database] = cursor
+
+        self.checkpoint(force=False)
+
+    def checkpoint(self, force: Optional[bool] = True):
+        """
+        Call the checkpoint callback (if it's defined) with the search. 
+        The callback is called without holding the search lock, so the other threads can keep adding papers 
+        while the checkpoint is written (see get_snapshot)
+
+        Parameters
+        ----------
+        force : Optional[bool], optional
+            If the search will be checkpointed even if the last checkpoint is newer than the checkpoint interval, by default True
+        """
+
+        with self.lock:
+
+            if self.checkpoint_callback is None:
+                return
+
+            now = time.monotonic()
+            if not force and self.checkpointed_at is not None and now - self.checkpointed_at < self.checkpoint_interval:
+                return
+
+            self.checkpointed_at = now
+            checkpoint_callback = self.checkpoint_callback
+
+        with self.checkpoint_lock:
+            checkpoint_callback(self)
+
+    def get_snapshot(self) -> Search:
+        """
+        Get a copy of the search state (including its papers and its progress) that isn't changed 
+        by the other threads, so it can be saved without holding the search lock
+
+        Returns
+        -------
+        Search
+            A Search instance
+        """
+
+        snapshot = Search(self.query, self.since, self.until, self.limit, self.limit_per_database, self.processed_at,
+                          self.databases, self.publication_types)
+
+        with self.lock:
+            papers = list(self.papers)
+            paper_copies = copy.deepcopy(papers)
+            copy_by_paper = dict(zip(papers, paper_copies))
+
+            snapshot.papers = set(paper_copies)
+            snapshot.papers_by_database = {database: {copy_by_paper.get(x) for x in database_papers}
+                                           for database, database_papers in self.papers_by_database.items()}
+            snapshot.cursor_by_database = copy.deepcopy(self.cursor_by_database)
+            snapshot.finished_databases = set(self.finished_databases)
+            snapshot.finished_stages = list(self.finished_stages)
+
+        return snapshot
+
+    def has_checkpoint(self) -> bool:
+        """
+        Returns a flag that says if the search has some progress that can be resumed
+
+        Returns
+        -------
+        bool
+            a flag that says if the search has some progress that can be resumed
+        """
+
+        return len(self.cursor_by_database) > 0 or len(self.finished_databases) > 0 or len(self.finished_stages) > 0
+
+    def clear_checkpoint(self):
+        """
+        Clear the search progress, it's used when the search is finished
+        """
+
+        with self.lock:
+            self.cursor_by_database = {}
+            self.finished_databases = set()
+            self.finished_stages = []
 
     def reached_its_limit(self, database: str) -> bool:
         """
@@ -319,6 +689,90 @@ class Search():
 
         return reached_general_limit or reached_database_limit
 
+    def get_remaining_limit(self, database: str) -> Optional[int]:
+        """
+        Returns the max number of papers that can still be collected from a database
+
+        Parameters
+        ----------
+        database : str
+            The database name that will be used to check the limit
+
+        Returns
+        -------
+        Optional[int]
+            The number of papers that can still be collected, or None if the search has no limit
+        """
+
+        remaining_limits = []
+
+        if self.limit is not None:
+            remaining_limits.append(self.limit - len(self.papers))
+        if self.limit_per_database is not None:
+            remaining_limits.append(self.limit_per_database - len(self.papers_by_database.get(database, set())))
+
+        return max(min(remaining_limits), 0) if len(remaining_limits) > 0 else None
+
+    def get_matching_papers(self, query: Optional[str] = None) -> List[Paper]:
+        """
+        Returns the collected papers whose title, abstract or keywords match a query, without any network call.
+        It can be used to post-filter the papers of databases with a weak query support, or to narrow the search results
+
+        Parameters
+        ----------
+        query : Optional[str], optional
+            A search query, by default None (i.e., the search query)
+
+        Returns
+        -------
+        List[Paper]
+            The matching papers, the most recent ones first
+
+        Raises
+        ------
+        query_util.QueryError
+            Invalid query
+        """
+
+        query_tree = self.query_tree if query is None else query_util.parse(query)
+
+        with self.lock:
+            return list(query_util.filter_papers(Search.get_sorted_papers(self), query_tree))
+
+    def create_index(self) -> PaperIndex:
+        """
+        Creates a full-text index of the collected papers (see PaperIndex), that is kept up to date
+        as the papers are added, changed or removed
+
+        Returns
+        -------
+        PaperIndex
+            The search index
+        """
+
+        from findpapers.models.paper_index import PaperIndex
+
+        with self.lock:
+            self.index = PaperIndex(Search.get_sorted_papers(self), track_papers=True)
+            return self.index
+
+    def to_table(self) -> PaperTable:
+        """
+        Returns a columnar view of the search papers (see PaperTable), used for bulk analytics.
+        It requires NumPy
+
+        Returns
+        -------
+        PaperTable
+            A table with a row for each paper, the most recent ones first
+        """
+
+        # imported here, so NumPy is only loaded when a table is requested
+        from findpapers.models.paper_table import PaperTable
+
+        with self.lock:
+            return PaperTable(Search.get_sorted_papers(self))
+
     @classmethod
     def from_dict(cls, search_dict: dict) -> Search:
         """
@@ -354,14 +808,42 @@ class Search():
         databases = search_dict.get('databases')
         publication_types = search_dict.get('publication_types')
 
-        papers = set()
+        search = cls(query, since, until, limit, limit_per_database, processed_at, databases, publication_types)
+
         for paper in search_dict.get('papers', []):
-            papers.add(Paper.from_dict(paper))
+            try:
+                search.add_paper(Paper.from_dict(paper), merge_similar=False)
+            except Exception:
+                pass
+
+        checkpoint = search_dict.get('checkpoint')
+        if checkpoint is not None:
+            search.cursor_by_database = checkpoint.get('cursor_by_database', {})
+            search.finished_databases = set(checkpoint.get('finished_databases', []))
+            search.finished_stages = checkpoint.get('finished_stages', [])
 
-        return cls(query, since, until, limit, limit_per_database, processed_at, databases, publication_types, papers)
+        return search
 
     @staticmethod
-    def to_dict(search: Search) -> dict:
+    def get_sorted_papers(search: Search) -> List[Paper]:
+        """
+        Get the search papers in the order they are serialized, i.e. the most recent ones first
+
+        Parameters
+        ----------
+        search : Search
+            A Search instance
+
+        Returns
+        -------
+        List[Paper]
+            The sorted papers
+        """
+
+        return sorted(search.papers, key=lambda x: x.publication_date, reverse=True)
+
+    @staticmethod
+    def to_dict(search: Search, include_papers: Optional[bool] = True) -> dict:
         """
         A method that returns a dict object based on the provided Search instance
 
@@ -369,6 +851,9 @@ class Search():
         ----------
         search : Search
             A Search instance
+        include_papers : Optional[bool], optional
+            If the papers will be included in the dict, by default True.
+            The papers can be left out to be serialized one at a time (see get_sorted_papers)
 
         Returns
         -------
@@ -376,17 +861,11 @@ class Search():
             A dict that represents a Search instance
         """
 
-        papers = []
-        for paper in search.papers:
-            papers.append(Paper.to_dict(paper))
-
-        papers = sorted(papers, key=lambda x: x.get('publication_date', '1900'), reverse=True)
-
         number_of_papers_by_database = {}
         for database, items in search.papers_by_database.items():
             number_of_papers_by_database[database] = len(items)
 
-        return {
+        search_dict = {
             'query': search.query,
             'since': search.since.strftime('%Y-%m-%d') if search.since is not None else None,
             'until': search.until.strftime('%Y-%m-%d') if search.until is not None else None,
@@ -395,7 +874,18 @@ class Search():
             'processed_at': search.processed_at.strftime('%Y-%m-%d %H:%M:%S') if search.processed_at is not None else None,
             'databases': search.databases,
             'publication_types': search.publication_types,
-            'number_of_papers': len(papers),
-            'number_of_papers_by_database': number_of_papers_by_database,
-            'papers': papers
+            'number_of_papers': len(search.papers),
+            'number_of_papers_by_database': number_of_papers_by_database
         }
+
+        if include_papers:
+            search_dict['papers'] = [Paper.to_dict(paper) for paper in Search.get_sorted_papers(search)]
+
+        if search.has_checkpoint():
+            search_dict['checkpoint'] = {
+                'cursor_by_database': search.cursor_by_database,
+                'finished_databases': sorted(search.finished_databases),
+                'finished_stages': search.finished_stages
+            }
+
+        return search_dict
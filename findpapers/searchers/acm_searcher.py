@@ -2,8 +2,9 @@ import logging
 import math
 import requests
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
-from typing import Optional
+from typing import Dict, List, Optional
 from lxml import html
 import findpapers.utils.query_util as query_util
 import findpapers.utils.common_util as common_util
@@ -16,6 +17,8 @@ from findpapers.utils.requests_util import DefaultSession
 DATABASE_LABEL = 'ACM'
 BASE_URL = 'https://dl.acm.org'
 MAX_ENTRIES_PER_PAGE = 100
+# the citeproc export accepts many DOIs per request, the batches are kept small so a failure doesn't lose much
+MAX_DOIS_PER_METADATA_REQUEST = 50
 
 
 def _get_search_url(search: Search, start_record: Optional[int] = 0) -> str:
@@ -37,11 +40,7 @@ def _get_search_url(search: Search, start_record: Optional[int] = 0) -> str:
     """
     
     # when a wildcard is present, the search term cannot be enclosed in quotes
-    transformed_query = query_util.replace_search_term_enclosures(search.query, '', '', True)
-    
-    # some additional query transformations
-    transformed_query = transformed_query.replace(' AND NOT ', ' NOT ')
-    transformed_query = query_util.replace_search_term_enclosures(transformed_query, '"', '"')
+    transformed_query = query_util.render(search.query_tree, lambda x: x.value if x.has_wildcard else f'"{x.value}"', {'AND NOT': 'NOT'})
 
     query = f'Abstract:({transformed_query})'
 
@@ -141,7 +140,62 @@ def _get_paper_metadata(doi: str) -> dict:  # pragma: no cover
         return response['items'][0][doi]
 
 
-def _get_paper(paper_page: html.HtmlElement, paper_doi: str, paper_url: str) -> Paper:
+def _get_papers_metadata(dois: List[str]) -> Dict[str, dict]:  # pragma: no cover
+    """
+    Get the metadata of many papers in a single request
+
+    Parameters
+    ----------
+    dois : List[str]
+        The papers DOIs
+
+    Returns
+    -------
+    Dict[str, dict]
+        The ACM papers metadata by DOI, the papers without available metadata are absent
+    """
+
+    form = {
+        'dois': ','.join(dois),
+        'targetFile': 'custom-bibtex',
+        'format': 'bibTex'
+    }
+
+    response = common_util.try_success(lambda: DefaultSession().post(
+        f'{BASE_URL}/action/exportCiteProcCitation', data=form).json(), 2)
+
+    metadata_by_doi = {}
+
+    if response is not None:
+        for item in response.get('items', None) or []:
+            metadata_by_doi.update(item)
+
+    return metadata_by_doi
+
+
+def _get_paper_doi(paper_url: str) -> Optional[str]:
+    """
+    Get a paper DOI from its ACM URL
+
+    Parameters
+    ----------
+    paper_url : str
+        The ACM paper URL
+
+    Returns
+    -------
+    Optional[str]
+        The paper DOI, or None if the URL has an unknown shape
+    """
+
+    for url_path in ('/abs/', '/book/', '/doi/'):
+        if url_path in paper_url:
+            return paper_url.split(url_path)[1]
+
+    return None
+
+
+def _get_paper(paper_page: html.HtmlElement, paper_doi: str, paper_url: str, paper_metadata: Optional[dict] = None) -> Paper:
     """
     Using a paper entry provided, this method builds a paper instance
 
@@ -153,6 +207,8 @@ def _get_paper(paper_page: html.HtmlElement, paper_doi: str, paper_url: str) ->
         The paper DOI
     paper_url : str
         The ACM paper URL
+    paper_metadata : Optional[dict], optional
+        The paper metadata if it was already fetched, by default None (i.e., it'll be fetched by its DOI)
 
     Returns
     -------
@@ -169,7 +225,8 @@ def _get_paper(paper_page: html.HtmlElement, paper_doi: str, paper_url: str) ->
     if len(citation_elements) == 1:
         paper_citations = int(citation_elements[0].text)
 
-    paper_metadata = _get_paper_metadata(paper_doi)
+    if paper_metadata is None:
+        paper_metadata = _get_paper_metadata(paper_doi)
 
     if paper_metadata is None:
         return None
@@ -231,19 +288,125 @@ def _get_paper(paper_page: html.HtmlElement, paper_doi: str, paper_url: str) ->
     return paper
 
 
-def run(search: Search):
+def _get_papers_metadata_batches(dois: List[str]) -> Dict[str, dict]:
+    """
+    Private method that gets the metadata of many papers, using one request for each batch of DOIs
+
+    Parameters
+    ----------
+    dois : List[str]
+        The papers DOIs
+
+    Returns
+    -------
+    Dict[str, dict]
+        The ACM papers metadata by DOI
+    """
+
+    metadata_by_doi = {}
+
+    for i in range(0, len(dois), MAX_DOIS_PER_METADATA_REQUEST):
+        metadata_by_doi.update(_get_papers_metadata(dois[i:i+MAX_DOIS_PER_METADATA_REQUEST]))
+
+    return metadata_by_doi
+
+
+def _collect_papers(search: Search, executor: ThreadPoolExecutor, papers_urls: List[str], papers_count: int, total_papers: int) -> int:
+    """
+    Private method that fetches the pages of a batch of papers using a pool of workers, and their metadata in batches of DOIs.
+    The papers are added to the search in the result order, as their pages arrive
+
+    Parameters
+    ----------
+    search : Search
+        A search instance
+    executor : ThreadPoolExecutor
+        The pool of workers
+    papers_urls : List[str]
+        The ACM papers URLs
+    papers_count : int
+        The number of papers of the result that were already handled
+    total_papers : int
+        The number of papers of the result
+
+    Returns
+    -------
+    int
+        The number of papers of the result that were handled after this batch
+    """
+
+    # the papers with an unknown URL shape are skipped, but they're still counted
+    papers_dois = [_get_paper_doi(x) for x in papers_urls]
+    metadata_future = executor.submit(_get_papers_metadata_batches, [x for x in papers_dois if x is not None])
+    page_futures = [executor.submit(_get_paper_page, x) if y is not None else None
+                    for x, y in zip(papers_urls, papers_dois)]
+
+    try:
+        metadata_by_doi = metadata_future.result()
+    except Exception as e:  # pragma: no cover
+        logging.debug(e, exc_info=True)
+        metadata_by_doi = {}
+
+    # the papers are added in the result order by this thread, as their pages arrive
+    for paper_url, paper_doi, page_future in zip(papers_urls, papers_dois, page_futures):
+
+        if papers_count >= total_papers or search.reached_its_limit(DATABASE_LABEL):
+            break
+
+        papers_count += 1
+
+        if page_future is None:
+            logging.info(f'({papers_count}/{total_papers}) Skipping ACM paper with an unknown URL: {paper_url}')
+            continue
+
+        try:
+            paper_page = page_future.result()
+
+            paper_title = paper_page.xpath('//*[@class="citation__title"]')[0].text
+
+            logging.info(f'({papers_count}/{total_papers}) Fetching ACM paper: {paper_title}')
+
+            paper = _get_paper(paper_page, paper_doi, paper_url, metadata_by_doi.get(paper_doi, None))
+
+            if paper is None:
+                continue
+
+            paper.add_database(DATABASE_LABEL)
+
+            search.add_paper(paper)
+
+        except Exception as e:  # pragma: no cover
+            logging.debug(e, exc_info=True)
+
+    # the pages that weren't fetched yet aren't needed anymore
+    for page_future in page_futures:
+        if page_future is not None:
+            page_future.cancel()
+
+    return papers_count
+
+
+def run(search: Search, max_parallel_papers: Optional[int] = 4):
     """
     This method fetch papers from ACM database using the provided search parameters
-    After fetch the data from ACM, the collected papers are added to the provided search instance
+    After fetch the data from ACM, the collected papers are added to the provided search instance.
+    The papers pages of a result page are fetched by a pool of workers while the next result page is prefetched,
+    and their metadata is requested in batches of DOIs
 
     Parameters
     ----------
     search : Search
         A search instance
+    max_parallel_papers : Optional[int], optional
+        The max number of papers pages that will be fetched at the same time, by default 4.
+        The requests still respect the rate limit defined for each host
     """
 
-    papers_count = 0
-    result = _get_result(search)
+    # when the search is resumed, the fetching continues from the last checkpoint
+    cursor = search.get_cursor(DATABASE_LABEL) or {}
+    papers_count = cursor.get('papers_count', 0)
+    page_index = cursor.get('page_index', 0)
+    result = _get_result(search, page_index)
 
     try:
         total_papers = int(result.xpath(
@@ -253,46 +416,37 @@ def run(search: Search):
 
     logging.info(f'ACM: {total_papers} papers to fetch')
 
-    page_index = 0
-    while(papers_count < total_papers and not search.reached_its_limit(DATABASE_LABEL)):
+    # one extra worker is used to fetch the next result page and the papers metadata
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel_papers or 1) + 1) as executor:
 
-        papers_urls = [BASE_URL+x.attrib['href']
-                       for x in result.xpath('//*[@class="hlFld-Title"]/a')]
+        while(papers_count < total_papers and not search.reached_its_limit(DATABASE_LABEL)):
 
-        for paper_url in papers_urls:
+            papers_urls = [BASE_URL+x.attrib['href']
+                           for x in result.xpath('//*[@class="hlFld-Title"]/a')]
+            papers_urls = papers_urls[:total_papers-papers_count]
 
-            if papers_count >= total_papers or search.reached_its_limit(DATABASE_LABEL):
-                break
-
-            try:
-                papers_count += 1
-
-                paper_page = _get_paper_page(paper_url)
+            has_next_page = papers_count + len(papers_urls) < total_papers and len(papers_urls) > 0
+            next_result_future = None
 
-                paper_title = paper_page.xpath('//*[@class="citation__title"]')[0].text
+            # only the papers that can still be collected are fetched, the rest of the page
+            # is only fetched if some of them aren't collected (e.g. invalid or duplicated papers)
+            while len(papers_urls) > 0 and not search.reached_its_limit(DATABASE_LABEL):
 
-                logging.info(f'({papers_count}/{total_papers}) Fetching ACM paper: {paper_title}')
-                
-                paper_doi = None
-                if '/abs/' in paper_url:
-                    paper_doi = paper_url.split('/abs/')[1]
-                elif '/book/' in paper_url:
-                    paper_doi = paper_url.split('/book/')[1]
-                else:
-                    paper_doi = paper_url.split('/doi/')[1]
+                remaining_limit = search.get_remaining_limit(DATABASE_LABEL)
+                batch_urls = papers_urls if remaining_limit is None else papers_urls[:remaining_limit]
+                papers_urls = papers_urls[len(batch_urls):]
 
-                paper = _get_paper(paper_page, paper_doi, paper_url)
+                # the next page is prefetched only when this batch can't reach the limit
+                if has_next_page and len(papers_urls) == 0 and (remaining_limit is None or remaining_limit > len(batch_urls)):
+                    next_result_future = executor.submit(_get_result, search, page_index + 1)
 
-                if paper is None:
-                    continue
-                
-                paper.add_database(DATABASE_LABEL)
+                papers_count = _collect_papers(search, executor, batch_urls, papers_count, total_papers)
 
-                search.add_paper(paper)
-
-            except Exception as e:  # pragma: no cover
-                logging.debug(e, exc_info=True)
+            if not has_next_page or search.reached_its_limit(DATABASE_LABEL):
+                if next_result_future is not None:
+                    next_result_future.cancel()
+                break
 
-        if papers_count < total_papers and not search.reached_its_limit(DATABASE_LABEL):
             page_index += 1
-            result = _get_result(search, page_index)
+            search.set_cursor(DATABASE_LABEL, {'page_index': page_index, 'papers_count': papers_count})
+            result = next_result_future.result() if next_result_future is not None else _get_result(search, page_index)
@@ -1,23 +1,30 @@
+import copy
 import requests
 import datetime
 import logging
 import re
 import math
-import xmltodict
-import time
-from lxml import html
-from typing import Optional
+from lxml import html, etree
+from typing import List, Optional, Iterator
 import findpapers.utils.common_util as common_util
+import findpapers.utils.xml_util as xml_util
 import findpapers.utils.query_util as query_util
 from findpapers.models.search import Search
 from findpapers.models.paper import Paper
 from findpapers.models.publication import Publication
-from findpapers.utils.requests_util import DefaultSession
+from findpapers.utils.requests_util import DefaultSession, PagePrefetcher, DEFAULT_PAGES_AHEAD
 
 
 DATABASE_LABEL = 'arXiv'
 BASE_URL = 'http://export.arxiv.org'
 MAX_ENTRIES_PER_PAGE = 200
+NAMESPACES = {
+    'atom': 'http://www.w3.org/2005/Atom',
+    'arxiv': 'http://arxiv.org/schemas/atom',
+    'opensearch': 'http://a9.com/-/spec/opensearch/1.1/'
+}
+ENTRY_TAG = f'{{{NAMESPACES["atom"]}}}entry'
+TOTAL_RESULTS_TAG = f'{{{NAMESPACES["opensearch"]}}}totalResults'
 SUBJECT_AREA_BY_KEY = {
     'astro-ph': 'Astrophysics',
     'astro-ph.CO': 'Cosmology and Nongalactic Astrophysics',
@@ -193,28 +200,26 @@ def _get_search_url(search: Search, start_record: Optional[int] = 0) -> str:
         a URL to be used to retrieve data from arXiv database
     """
 
-    transformed_query = search.query.replace(' AND NOT ', ' ANDNOT ')
-    transformed_query = transformed_query.replace('-', ' ') # the arXiv search engine doesn't support hyphens properly
-    if transformed_query[0] == '"':
-        transformed_query = ' ' + transformed_query
-    transformed_query = transformed_query.replace('[', 'FIELD_TYPE:[')
+    def get_field_query(field: str) -> str:
+
+        def render_term(term: query_util.QueryTerm) -> str:
+            value = term.value.replace('-', ' ') # the arXiv search engine doesn't support hyphens properly
+            # when a wildcard is present, the search term cannot be enclosed in quotes
+            return f'{field}:{value}' if term.has_wildcard else f'{field}:"{value}"'
 
-    # when a wildcard is present, the search term cannot be enclosed in quotes
-    transformed_query = query_util.replace_search_term_enclosures(transformed_query, '', '', True)
-    transformed_query = query_util.replace_search_term_enclosures(transformed_query, '"', '"').strip()
+        return query_util.render(search.query_tree, render_term, {'AND NOT': 'ANDNOT'})
 
-    abstract_query = transformed_query.replace('FIELD_TYPE:', 'abs:')
-    title_query = transformed_query.replace('FIELD_TYPE:', 'ti:')
-    final_query = f'({title_query}) OR ({abstract_query})'
+    final_query = f'({get_field_query("ti")}) OR ({get_field_query("abs")})'
 
     url = f'{BASE_URL}/api/query?search_query={final_query}&start={start_record}&sortBy=submittedDate&sortOrder=descending&max_results={MAX_ENTRIES_PER_PAGE}'
 
     return url
 
 
-def _get_api_result(search: Search, start_record: Optional[int] = 0) -> dict: # pragma: no cover
+def _get_api_result(search: Search, start_record: Optional[int] = 0) -> Iterator[etree._Element]: # pragma: no cover
     """
-    This method return results from arXiv database using the provided search parameters
+    This method return results from arXiv database using the provided search parameters.
+    The response is parsed incrementally, so only one entry is kept in memory at a time
 
     Parameters
     ----------
@@ -225,22 +230,50 @@ def _get_api_result(search: Search, start_record: Optional[int] = 0) -> dict: #
 
     Returns
     -------
-    dict
-        a result from arXiv database
+    Iterator[etree._Element]
+        an iterator of the feed total results element followed by the entry elements retrieved from arXiv database
     """
 
     url = _get_search_url(search, start_record)
 
-    return common_util.try_success(lambda: xmltodict.parse(DefaultSession().get(url).content), 2, pre_delay=1)
+    def get_response():
+        response = DefaultSession().get(url, stream=True)
+        response.raise_for_status()  # a failed request is retried
+        return response
+
+    response = common_util.try_success(get_response, 2)
+
+    return xml_util.iterparse_response(response, [TOTAL_RESULTS_TAG, ENTRY_TAG])
 
 
-def _get_publication(paper_entry: dict) -> Publication:
+def _get_api_page(search: Search, start_record: Optional[int] = 0) -> List[etree._Element]:
+    """
+    This method return a whole page of results from arXiv database, used to fetch a page ahead of its processing
+
+    Parameters
+    ----------
+    search : Search
+        A search instance
+    start_record : str
+        Sequence number of first record to fetch, by default 0
+
+    Returns
+    -------
+    List[etree._Element]
+        the feed total results element followed by the entry elements retrieved from arXiv database
+    """
+
+    # the incrementally parsed elements are released after each iteration, so they're copied
+    return [copy.deepcopy(x) for x in _get_api_result(search, start_record)]
+
+
+def _get_publication(paper_entry: etree._Element) -> Publication:
     """
     Using a paper entry provided, this method builds a publication instance
 
     Parameters
     ----------
-    paper_entry : dict
+    paper_entry : etree._Element
         A paper entry retrieved from arXiv API
 
     Returns
@@ -249,39 +282,31 @@ def _get_publication(paper_entry: dict) -> Publication:
         A publication instance
     """
 
-    if 'arxiv:journal_ref' in paper_entry:
-
-        publication_title = paper_entry.get('arxiv:journal_ref').get('#text')
+    publication_title = xml_util.get_text(paper_entry, 'arxiv:journal_ref', NAMESPACES)
 
-        if publication_title is None or len(publication_title) == 0:
-            return None
+    if publication_title is None or len(publication_title) == 0:
+        return None
 
-        subject_areas = set()
+    subject_areas = set()
 
-        if 'category' in paper_entry:
-            if isinstance(paper_entry.get('category'), list):
-                for category in paper_entry.get('category'):
-                    subject_area = SUBJECT_AREA_BY_KEY.get(category.get('@term'), None)
-                    if subject_area is not None:
-                        subject_areas.add(subject_area)
-            else:
-                subject_area = SUBJECT_AREA_BY_KEY.get(paper_entry.get('category').get('@term'), None)
-                if subject_area is not None:
-                    subject_areas.add(subject_area)
+    for category in paper_entry.iterfind('atom:category', NAMESPACES):
+        subject_area = SUBJECT_AREA_BY_KEY.get(category.get('term'), None)
+        if subject_area is not None:
+            subject_areas.add(subject_area)
 
-        publication = Publication(
-            publication_title, subject_areas=subject_areas)
+    publication = Publication(
+        publication_title, subject_areas=subject_areas)
 
-        return publication
+    return publication
 
 
-def _get_paper(paper_entry: dict, paper_publication_date: datetime.date, publication: Publication) -> Paper:
+def _get_paper(paper_entry: etree._Element, paper_publication_date: datetime.date, publication: Publication) -> Paper:
     """
     Using a paper entry provided, this method builds a paper instance
 
     Parameters
     ----------
-    paper_entry : dict
+    paper_entry : etree._Element
         A paper entry retrieved from arXiv API
     paper_publication_date : datetime.date
         The paper publication date
@@ -294,7 +319,7 @@ def _get_paper(paper_entry: dict, paper_publication_date: datetime.date, publica
         A paper instance
     """
 
-    paper_title = paper_entry.get('title', None)
+    paper_title = xml_util.get_text(paper_entry, 'atom:title', NAMESPACES)
 
     if paper_title is None or len(paper_title) == 0:
         return None
@@ -302,27 +327,11 @@ def _get_paper(paper_entry: dict, paper_publication_date: datetime.date, publica
     paper_title = paper_title.replace('\n','') 
     paper_title = re.sub(' +', ' ', paper_title)
 
-    paper_doi = paper_entry.get('arxiv:doi').get(
-        '#text') if 'arxiv:doi' in paper_entry else None
-    paper_abstract = paper_entry.get('summary', None)
-    paper_urls = set()
-    paper_authors = []
-
-    if 'link' in paper_entry:
-        if isinstance(paper_entry.get('link'), list):
-            for link in paper_entry.get('link'):
-                paper_urls.add(link.get('@href'))
-        else:
-            paper_urls.add(paper_entry.get('link').get('@href'))
-
-    if 'author' in paper_entry:
-        if isinstance(paper_entry.get('author'), list):
-            for author in paper_entry.get('author'):
-                paper_authors.append(author.get('name'))
-        else:
-            paper_authors.append(paper_entry.get('author').get('name'))
-
-    paper_comments = paper_entry.get('arxiv:comment', {}).get('#text', None)
+    paper_doi = xml_util.get_text(paper_entry, 'arxiv:doi', NAMESPACES)
+    paper_abstract = xml_util.get_text(paper_entry, 'atom:summary', NAMESPACES)
+    paper_urls = set([link.get('href') for link in paper_entry.iterfind('atom:link', NAMESPACES)])
+    paper_authors = [xml_util.get_text(author, 'atom:name', NAMESPACES) for author in paper_entry.iterfind('atom:author', NAMESPACES)]
+    paper_comments = xml_util.get_text(paper_entry, 'arxiv:comment', NAMESPACES)
 
     paper = Paper(paper_title, paper_abstract, paper_authors, publication,
                   paper_publication_date, paper_urls, paper_doi, comments=paper_comments)
@@ -330,67 +339,133 @@ def _get_paper(paper_entry: dict, paper_publication_date: datetime.date, publica
     return paper
 
 
-def run(search: Search):
+def _is_page_needed(search: Search, page_start: int, papers_count: int) -> bool:
+    """
+    Private method that says if a result page can be needed, i.e. the papers before it
+    don't reach the search limits even if all of them are collected
+
+    Parameters
+    ----------
+    search : Search
+        A search instance
+    page_start : int
+        The (0-based) index of the first result of the page
+    papers_count : int
+        The number of results that were already processed
+
+    Returns
+    -------
+    bool
+        True if the page can be needed, False otherwise
+    """
+
+    remaining_limit = search.get_remaining_limit(DATABASE_LABEL)
+
+    return remaining_limit is None or page_start < papers_count + remaining_limit
+
+
+def run(search: Search, pages_ahead: Optional[int] = DEFAULT_PAGES_AHEAD):
     """
     This method fetch papers from arXiv database using the provided search parameters
-    After fetch the data from arXiv, the collected papers are added to the provided search instance
+    After fetch the data from arXiv, the collected papers are added to the provided search instance.
+    Once the number of results is known, the next pages are fetched while the current one is processed
 
     Parameters
     ----------
     search : Search
         A search instance
+    pages_ahead : Optional[int], optional
+        The max number of pages fetched ahead of the page that is being processed, by default 2.
+        It's bounded by the arXiv API rate limit
 
     """
 
-    papers_count = 0
-    result = _get_api_result(search)
+    # when the search is resumed, the fetching continues from the last checkpoint
+    cursor = search.get_cursor(DATABASE_LABEL) or {}
+    papers_count = cursor.get('start_record', 0)
+    result = _get_api_result(search, papers_count)
 
-    total_papers = int(result.get('feed').get(
-        'opensearch:totalResults').get('#text'))
+    # the total results element comes before the entries on the feed
+    total_papers = int(next(result).text)
 
     logging.info(f'arXiv: {total_papers} papers to fetch')
 
-    while(papers_count < total_papers and not search.reached_its_limit(DATABASE_LABEL)):
+    pages = None
 
-        entries = result.get('feed', {}).get('entry', [])
-        if type(entries) != list: # if there's only one entry the result is not a list just a dict
-            entries = [entries]
+    try:
 
-        for paper_entry in entries:
+        while(papers_count < total_papers and not search.reached_its_limit(DATABASE_LABEL)):
 
-            if papers_count >= total_papers or search.reached_its_limit(DATABASE_LABEL):
-                break
+            page_papers_count = 0
 
-            papers_count += 1
+            for paper_entry in result:
 
-            try:
+                if paper_entry.tag != ENTRY_TAG:
+                    continue
 
-                paper_title = paper_entry.get("title")
-                logging.info(f'({papers_count}/{total_papers}) Fetching arXiv paper: {paper_title}')
+                if papers_count >= total_papers or search.reached_its_limit(DATABASE_LABEL):
+                    break
 
-                published_date = datetime.datetime.strptime(
-                    paper_entry.get('published')[:10], '%Y-%m-%d').date()
+                papers_count += 1
+                page_papers_count += 1
 
-                # nowadays we don't have a date filter on arXiv API, so we need to do it by ourselves'
-                if search.since is not None and published_date < search.since:
-                    logging.info(
-                        'Skipping paper due to "since" date constraint')
-                    continue
-                elif search.until is not None and published_date > search.until:
-                    logging.info(
-                        'Skipping paper due to "until" date constraint')
-                    continue
+                try:
+
+                    paper_title = xml_util.get_text(paper_entry, 'atom:title', NAMESPACES)
+                    logging.info(f'({papers_count}/{total_papers}) Fetching arXiv paper: {paper_title}')
+
+                    published_date = datetime.datetime.strptime(
+                        xml_util.get_text(paper_entry, 'atom:published', NAMESPACES)[:10], '%Y-%m-%d').date()
+
+                    # nowadays we don't have a date filter on arXiv API, so we need to do it by ourselves'
+                    if search.since is not None and published_date < search.since:
+                        logging.info(
+                            'Skipping paper due to "since" date constraint')
+                        continue
+                    elif search.until is not None and published_date > search.until:
+                        logging.info(
+                            'Skipping paper due to "until" date constraint')
+                        continue
+
+                    publication = _get_publication(paper_entry)
+                    paper = _get_paper(paper_entry, published_date, publication)
+
+                    if paper is not None:
+                        paper.add_database(DATABASE_LABEL)
+                        search.add_paper(paper)
 
-                publication = _get_publication(paper_entry)
-                paper = _get_paper(paper_entry, published_date, publication)
+                except Exception as e:  # pragma: no cover
+                    logging.debug(e, exc_info=True)
 
-                if paper is not None:
-                    paper.add_database(DATABASE_LABEL)
-                    search.add_paper(paper)
+            if page_papers_count == 0: # an empty page, there's nothing more to fetch
+                break
+
+            if papers_count >= total_papers or search.reached_its_limit(DATABASE_LABEL):
+                break
+
+            if pages is None:
+                # the API can return less entries than requested, so the page size is taken from the first page.
+                # The prefetched pages are completely read by the worker threads, only the first one is parsed incrementally.
+                # The pages beyond the search limits aren't fetched ahead
+                page_size = page_papers_count
+                next_records = range(papers_count, total_papers, page_size)
+                pages = PagePrefetcher(lambda x: _get_api_page(search, x), next_records, pages_ahead, BASE_URL,
+                                       lambda x: _is_page_needed(search, x, papers_count))
+
+            # a page that couldn't be fetched even after its retries is skipped
+            while True:
+                try:
+                    result = next(pages, None)
+                    break
+                except Exception as e:
+                    logging.warning(f'arXiv: skipping the papers from {papers_count + 1} to {papers_count + page_size}: {e}')
+                    papers_count += page_size
+
+            if result is None: # there's no page left
+                break
 
-            except Exception as e:  # pragma: no cover
-                logging.debug(e, exc_info=True)
+            search.set_cursor(DATABASE_LABEL, {'start_record': papers_count})
 
-        if papers_count < total_papers and not search.reached_its_limit(DATABASE_LABEL):
-            time.sleep(1) # sleep for 1 second to avoid server blocking
-            result = _get_api_result(search, papers_count)
+    finally:
+        if pages is not None:
+            pages.close()
@@ -10,7 +10,7 @@ import findpapers.utils.query_util as query_util
 from findpapers.models.search import Search
 from findpapers.models.paper import Paper
 from findpapers.models.publication import Publication
-from findpapers.utils.requests_util import DefaultSession
+from findpapers.utils.requests_util import DefaultSession, PagePrefetcher, DEFAULT_PAGES_AHEAD
 
 
 DATABASE_LABEL = 'IEEE'
@@ -38,8 +38,7 @@ def _get_search_url(search: Search, api_token: str, start_record: Optional[int]
         a URL to be used to retrieve data from IEEE database
     """
 
-    query = search.query.replace(' AND NOT ', ' NOT ')
-    query = query_util.replace_search_term_enclosures(query, '"Abstract":"', '"')
+    query = query_util.render(search.query_tree, lambda x: f'"Abstract":"{x.value}"', {'AND NOT': 'NOT'})
 
     url = f'{BASE_URL}/api/v1/search/articles?querytext=({query})&format=json&apikey={api_token}&max_records={MAX_ENTRIES_PER_PAGE}'
 
@@ -206,10 +205,36 @@ def _get_paper(paper_entry: dict, publication: Publication) -> Paper:
     return paper
 
 
-def run(search: Search, api_token: str):
+def _is_page_needed(search: Search, page_start: int, papers_count: int) -> bool:
+    """
+    Private method that says if a result page can be needed, i.e. the papers before it
+    don't reach the search limits even if all of them are collected
+
+    Parameters
+    ----------
+    search : Search
+        A search instance
+    page_start : int
+        The (0-based) index of the first result of the page
+    papers_count : int
+        The number of results that were already processed
+
+    Returns
+    -------
+    bool
+        True if the page can be needed, False otherwise
+    """
+
+    remaining_limit = search.get_remaining_limit(DATABASE_LABEL)
+
+    return remaining_limit is None or page_start < papers_count + remaining_limit
+
+
+def run(search: Search, api_token: str, pages_ahead: Optional[int] = DEFAULT_PAGES_AHEAD):
     """
     This method fetch papers from IEEE database using the provided search parameters
-    After fetch the data from IEEE, the collected papers are added to the provided search instance
+    After fetch the data from IEEE, the collected papers are added to the provided search instance.
+    Once the number of results is known, the next pages are fetched while the current one is processed
 
     Parameters
     ----------
@@ -217,6 +242,8 @@ def run(search: Search, api_token: str):
         A search instance
     api_token : str
         The API key used to fetch data from IEEE database,
+    pages_ahead : Optional[int], optional
+        The max number of pages fetched ahead of the page that is being processed, by default 2
 
     Raises
     ------
@@ -227,34 +254,65 @@ def run(search: Search, api_token: str):
     if api_token is None or len(api_token.strip()) == 0:
         raise AttributeError('The API token cannot be null')
 
-    papers_count = 0
-    result = _get_api_result(search, api_token)
+    # when the search is resumed, the fetching continues from the last checkpoint
+    cursor = search.get_cursor(DATABASE_LABEL) or {}
+    papers_count = cursor.get('papers_count', 0)
+    result = _get_api_result(search, api_token, papers_count+1)
     total_papers = result.get('total_records')
 
     logging.info(f'IEEE: {total_papers} papers to fetch')
 
-    while(papers_count < total_papers and not search.reached_its_limit(DATABASE_LABEL)):
+    pages = None
 
-        for paper_entry in result.get('articles'):
+    try:
 
-            if papers_count >= total_papers or search.reached_its_limit(DATABASE_LABEL):
+        while(papers_count < total_papers and not search.reached_its_limit(DATABASE_LABEL)):
+
+            page_papers_count = 0
+
+            for paper_entry in result.get('articles') or []:
+
+                if papers_count >= total_papers or search.reached_its_limit(DATABASE_LABEL):
+                    break
+                
+                papers_count += 1
+                page_papers_count += 1
+
+                try:
+
+                    logging.info(f'({papers_count}/{total_papers}) Fetching IEEE paper: {paper_entry.get("title")}')
+
+                    publication = _get_publication(paper_entry)
+                    paper = _get_paper(paper_entry, publication)
+
+                    if paper is not None:
+                        paper.add_database(DATABASE_LABEL)
+                        search.add_paper(paper)
+
+                except Exception as e:  # pragma: no cover
+                    logging.debug(e, exc_info=True)
+
+            if page_papers_count == 0: # an empty page, there's nothing more to fetch
                 break
-            
-            papers_count += 1
 
-            try:
+            if papers_count >= total_papers or search.reached_its_limit(DATABASE_LABEL):
+                break
 
-                logging.info(f'({papers_count}/{total_papers}) Fetching IEEE paper: {paper_entry.get("title")}')
+            if pages is None:
+                # the API can return less entries than requested, so the page size is taken from the first page.
+                # The prefetcher is only created after the first page is processed, and it doesn't fetch 
+                # the pages beyond the search limits, so no request of the API key quota is wasted
+                next_records = range(papers_count+1, total_papers+1, page_papers_count)
+                pages = PagePrefetcher(lambda x: _get_api_result(search, api_token, x), next_records, pages_ahead, BASE_URL,
+                                       lambda x: _is_page_needed(search, x-1, papers_count))
 
-                publication = _get_publication(paper_entry)
-                paper = _get_paper(paper_entry, publication)
+            result = next(pages, None)
 
-                if paper is not None:
-                    paper.add_database(DATABASE_LABEL)
-                    search.add_paper(paper)
+            if result is None: # there's no page left
+                break
 
-            except Exception as e:  # pragma: no cover
-                logging.debug(e, exc_info=True)
+            search.set_cursor(DATABASE_LABEL, {'papers_count': papers_count})
 
-        if papers_count < total_papers and not search.reached_its_limit(DATABASE_LABEL):
-            result = _get_api_result(search, api_token, papers_count+1)
+    finally:
+        if pages is not None:
+            pages.close()
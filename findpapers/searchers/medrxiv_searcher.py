@@ -1,9 +1,10 @@
+from typing import Optional
 from findpapers.models.search import Search
 import findpapers.searchers.rxiv_searcher as rxiv_searcher
 
 DATABASE_LABEL = 'medRxiv'
 
-def run(search: Search):
+def run(search: Search, mirror_path: Optional[str] = None):
     """
     This method fetch papers from medRxiv database using the provided search parameters
     After fetch the data from medRxiv, the collected papers are added to the provided search instance
@@ -12,6 +13,9 @@ def run(search: Search):
     ----------
     search : Search
         A search instance
+    mirror_path : Optional[str], optional
+        A file path of a local mirror of medRxiv (see findpapers.sync_mirror), by default None.
+        If it's provided the papers are collected from the mirror without any network call
     """
 
-    rxiv_searcher.run(search, DATABASE_LABEL)
+    rxiv_searcher.run(search, DATABASE_LABEL, mirror_path=mirror_path)
@@ -4,9 +4,10 @@ import logging
 import re
 import math
 import xmltodict
-from lxml import html
-from typing import Optional
+from lxml import html, etree
+from typing import Optional, Iterator
 import findpapers.utils.common_util as common_util
+import findpapers.utils.xml_util as xml_util
 import findpapers.utils.query_util as query_util
 from findpapers.models.search import Search
 from findpapers.models.paper import Paper
@@ -16,7 +17,7 @@ from findpapers.utils.requests_util import DefaultSession
 
 DATABASE_LABEL = 'PubMed'
 BASE_URL = 'https://eutils.ncbi.nlm.nih.gov'
-MAX_ENTRIES_PER_PAGE = 50
+MAX_ENTRIES_PER_PAGE = 200
 
 
 def _get_search_url(search: Search, start_record: Optional[int] = 0) -> str:
@@ -36,8 +37,7 @@ def _get_search_url(search: Search, start_record: Optional[int] = 0) -> str:
     str
         a URL to be used to retrieve data from PubMed database
     """
-    query = search.query.replace(' AND NOT ', ' NOT ')
-    query = query_util.replace_search_term_enclosures(query, '"', '"[TIAB]')
+    query = query_util.render(search.query_tree, lambda x: f'"{x.value}"[TIAB]', {'AND NOT': 'NOT'})
 
     url = f'{BASE_URL}/entrez/eutils/esearch.fcgi?db=pubmed&term={query} AND has abstract [FILT] AND "journal article"[Publication Type]'
 
@@ -51,7 +51,8 @@ def _get_search_url(search: Search, start_record: Optional[int] = 0) -> str:
     if start_record is not None:
         url += f'&retstart={start_record}'
 
-    url += f'&retmax={MAX_ENTRIES_PER_PAGE}&sort=pub+date'
+    # the results are kept on the history server, so the papers can be fetched in batches without running the query again
+    url += f'&retmax={MAX_ENTRIES_PER_PAGE}&sort=pub+date&usehistory=y'
 
     return url
 
@@ -75,37 +76,49 @@ def _get_api_result(search: Search, start_record: Optional[int] = 0) -> dict:  #
 
     url = _get_search_url(search, start_record)
 
-    return common_util.try_success(lambda: xmltodict.parse(DefaultSession().get(url).content), 2, pre_delay=1)
+    return common_util.try_success(lambda: xmltodict.parse(DefaultSession().get(url).content), 2)
 
 
-def _get_paper_entry(pubmed_id: str) -> dict:  # pragma: no cover
+def _get_paper_entries(web_env: str, query_key: str, start_record: Optional[int] = 0) -> Iterator[etree._Element]:  # pragma: no cover
     """
-    This method return paper data from PubMed database using the provided PubMed ID
+    This method return a batch of papers data from PubMed database using a search stored on the history server.
+    The response is parsed incrementally, so only one paper entry is kept in memory at a time
 
     Parameters
     ----------
-    pubmed_id : str
-        A PubMed ID
+    web_env : str
+        The WebEnv returned by the PubMed search
+    query_key : str
+        The QueryKey returned by the PubMed search
+    start_record : str, optional
+        Sequence number of first record to fetch, by default 0
 
     Returns
     -------
-    dict
-        a paper entry from PubMed database
+    Iterator[etree._Element]
+        an iterator of paper entries (PubmedArticle elements) from PubMed database
     """
 
-    url = f'{BASE_URL}/entrez/eutils/efetch.fcgi?db=pubmed&id={pubmed_id}&rettype=abstract'
+    url = f'{BASE_URL}/entrez/eutils/efetch.fcgi?db=pubmed&WebEnv={web_env}&query_key={query_key}&retstart={start_record}&retmax={MAX_ENTRIES_PER_PAGE}&rettype=abstract&retmode=xml'
+
+    def get_response():
+        response = DefaultSession().get(url, stream=True)
+        response.raise_for_status()  # a failed request is retried
+        return response
 
-    return common_util.try_success(lambda: xmltodict.parse(DefaultSession().get(url).content), 2, pre_delay=1)
+    response = common_util.try_success(get_response, 2)
 
+    return xml_util.iterparse_response(response, ['PubmedArticle'])
 
-def _get_publication(paper_entry: dict) -> Publication:
+
+def _get_publication(paper_entry: etree._Element) -> Publication:
     """
     Using a paper entry provided, this method builds a publication instance
 
     Parameters
     ----------
-    paper_entry : dict
-        A paper entry retrieved from PubMed API
+    paper_entry : etree._Element
+        A paper entry (PubmedArticle) retrieved from PubMed API
 
     Returns
     -------
@@ -113,15 +126,14 @@ def _get_publication(paper_entry: dict) -> Publication:
         A publication instance
     """
 
-    article = paper_entry.get('PubmedArticleSet').get(
-        'PubmedArticle').get('MedlineCitation').get('Article')
+    article = paper_entry.find('MedlineCitation/Article')
 
-    publication_title = article.get('Journal').get('Title')
+    publication_title = xml_util.get_text(article, 'Journal/Title')
 
     if publication_title is None or len(publication_title) == 0:
         return None
 
-    publication_issn = article.get('Journal').get('ISSN').get('#text')
+    publication_issn = xml_util.get_text(article, 'Journal/ISSN')
 
     publication = Publication(publication_title, None,
                               publication_issn, None, 'Journal')
@@ -129,40 +141,14 @@ def _get_publication(paper_entry: dict) -> Publication:
     return publication
 
 
-def _get_text_recursively(text_entry) -> str:
-    """
-    Get the text given a arbitrary object
-
-    Parameters
-    ----------
-    text_entry : any
-        A arbitrary object that contains some text
-
-    Returns
-    -------
-    str
-        The extracted text
-    """
-    if text_entry is None:
-        return ''
-    if type(text_entry) == str:
-        return text_entry
-    else:
-        text = []
-        items = text_entry if type(text_entry) == list else [x for k, x in text_entry.items()]
-        for item in items:
-            text.append(_get_text_recursively(item))
-        return ' '.join(text)
-
-
-def _get_paper(paper_entry: dict, publication: Publication) -> Paper:
+def _get_paper(paper_entry: etree._Element, publication: Publication) -> Paper:
     """
     Using a paper entry provided, this method builds a paper instance
 
     Parameters
     ----------
-    paper_entry : dict
-        A paper entry retrieved from IEEE API
+    paper_entry : etree._Element
+        A paper entry (PubmedArticle) retrieved from PubMed API
     publication : Publication
         A publication instance that will be associated with the paper
 
@@ -172,48 +158,36 @@ def _get_paper(paper_entry: dict, publication: Publication) -> Paper:
         A paper instance or None
     """
 
-    article = paper_entry.get('PubmedArticleSet').get(
-        'PubmedArticle').get('MedlineCitation').get('Article')
+    article = paper_entry.find('MedlineCitation/Article')
 
-    paper_title = _get_text_recursively(article.get('ArticleTitle', None))
+    paper_title = xml_util.get_text(article, 'ArticleTitle')
 
     if paper_title is None or len(paper_title) == 0:
         return None
 
-    if 'ArticleDate' in article:
-        paper_publication_date_day = article.get('ArticleDate').get('Day')
-        paper_publication_date_month = article.get('ArticleDate').get('Month')
-        paper_publication_date_year = article.get('ArticleDate').get('Year')
+    if article.find('ArticleDate') is not None:
+        paper_publication_date_day = xml_util.get_text(article, 'ArticleDate/Day')
+        paper_publication_date_month = xml_util.get_text(article, 'ArticleDate/Month')
+        paper_publication_date_year = xml_util.get_text(article, 'ArticleDate/Year')
     else:
         paper_publication_date_day = 1
         paper_publication_date_month = common_util.get_numeric_month_by_string(
-            article.get('Journal').get('JournalIssue').get('PubDate').get('Month'))
-        paper_publication_date_year = article.get('Journal').get(
-            'JournalIssue').get('PubDate').get('Year')
+            xml_util.get_text(article, 'Journal/JournalIssue/PubDate/Month'))
+        paper_publication_date_year = xml_util.get_text(article, 'Journal/JournalIssue/PubDate/Year')
 
     paper_doi = None
-    paper_ids = paper_entry.get('PubmedArticleSet').get('PubmedArticle').get(
-        'PubmedData').get('ArticleIdList').get('ArticleId')
-    for paper_id in paper_ids:
-        if type(paper_id) == dict and paper_id.get('@IdType', None) == 'doi':
-            paper_doi = paper_id.get('#text')
+    for paper_id in paper_entry.iterfind('PubmedData/ArticleIdList/ArticleId'):
+        if paper_id.get('IdType') == 'doi':
+            paper_doi = xml_util.get_text(paper_id)
             break
 
-    paper_abstract = None
-    paper_abstract_entry = article.get('Abstract', {}).get('AbstractText', None)
-    if paper_abstract_entry is None:
+    paper_abstract_entries = article.findall('Abstract/AbstractText')
+    if len(paper_abstract_entries) == 0:
         raise ValueError('Paper abstract is empty')
 
-    if isinstance(paper_abstract_entry, list):
-        paper_abstract = '\n'.join([_get_text_recursively(x) for x in paper_abstract_entry])
-    else:
-        paper_abstract = _get_text_recursively(paper_abstract_entry)
+    paper_abstract = '\n'.join([xml_util.get_text(x) for x in paper_abstract_entries])
 
-    try:
-        paper_keywords = set([_get_text_recursively(x).strip() for x in paper_entry.get('PubmedArticleSet').get(
-            'PubmedArticle').get('MedlineCitation').get('KeywordList').get('Keyword')])
-    except Exception:
-        paper_keywords = set()
+    paper_keywords = set([xml_util.get_text(x) for x in paper_entry.iterfind('MedlineCitation/KeywordList/Keyword')])
     
     paper_publication_date = None
     try:
@@ -227,22 +201,16 @@ def _get_paper(paper_entry: dict, publication: Publication) -> Paper:
         return None
 
     paper_authors = []
-    retrived_authors = []
-    if isinstance(article.get('AuthorList').get('Author'), dict): # only one author
-        retrived_authors = [article.get('AuthorList').get('Author')]
-    else:
-        retrived_authors = article.get('AuthorList').get('Author')
-
-    for author in retrived_authors:
-        if isinstance(author, str):
-            paper_authors.append(author)
-        elif isinstance(author, dict):
-            paper_authors.append(f"{author.get('ForeName')} {author.get('LastName')}")
+    for author in article.iterfind('AuthorList/Author'):
+        if author.find('LastName') is not None:
+            paper_authors.append(f"{xml_util.get_text(author, 'ForeName')} {xml_util.get_text(author, 'LastName')}")
+        else: # e.g. a collective name
+            paper_authors.append(xml_util.get_text(author))
 
     paper_pages = None
     paper_number_of_pages = None
     try:
-        paper_pages = article.get('Pagination').get('MedlinePgn')
+        paper_pages = xml_util.get_text(article, 'Pagination/MedlinePgn')
         if not paper_pages.isdigit(): # if it's a digit, the paper pages range is invalid
             pages_split = paper_pages.split('-')
             paper_number_of_pages = abs(int(pages_split[0])-int(pages_split[1]))+1
@@ -278,35 +246,52 @@ def run(search: Search):
         logging.info('Skiping PubMed search, journal publication type not in filters. Nowadays the PubMed only retrieves papers published on journals.')
         return
 
-    papers_count = 0
-    result = _get_api_result(search)
+    cursor = search.get_cursor(DATABASE_LABEL)
 
-    if result.get('eSearchResult').get('ErrorList', None) is not None:
-        total_papers = 0
+    if cursor is not None:
+        # when the search is resumed, the fetching continues from the last checkpoint using the same history server search
+        total_papers = cursor.get('total_papers')
+        web_env = cursor.get('web_env')
+        query_key = cursor.get('query_key')
+        start_record = cursor.get('start_record')
     else:
-        total_papers = int(result.get('eSearchResult').get('Count'))
-    
+        result = _get_api_result(search)
+
+        if result.get('eSearchResult').get('ErrorList', None) is not None:
+            total_papers = 0
+        else:
+            total_papers = int(result.get('eSearchResult').get('Count'))
+        
+        web_env = result.get('eSearchResult').get('WebEnv')
+        query_key = result.get('eSearchResult').get('QueryKey')
+        start_record = 0
+
+    papers_count = start_record
+
     logging.info(f'PubMed: {total_papers} papers to fetch')
 
-    while(papers_count < total_papers and not search.reached_its_limit(DATABASE_LABEL)):
+    while(start_record < total_papers and not search.reached_its_limit(DATABASE_LABEL)):
 
-        for pubmed_id in result.get('eSearchResult').get('IdList').get('Id'):
+        if start_record > 0:
+            search.set_cursor(DATABASE_LABEL, {'web_env': web_env, 'query_key': query_key, 
+                                               'start_record': start_record, 'total_papers': total_papers})
 
-            if papers_count >= total_papers or search.reached_its_limit(DATABASE_LABEL):
-                break
-            
-            papers_count += 1
-            
-            try:
+        # all the papers of a page are fetched by a single request
+        page_start_record = start_record
+        start_record += MAX_ENTRIES_PER_PAGE
 
-                paper_entry = _get_paper_entry(pubmed_id)
+        try:
 
-                if paper_entry is not None:
+            for paper_entry in _get_paper_entries(web_env, query_key, page_start_record):
 
-                    paper_title = paper_entry.get('PubmedArticleSet').get('PubmedArticle').get(
-                        'MedlineCitation').get('Article').get('ArticleTitle')
+                if papers_count >= total_papers or search.reached_its_limit(DATABASE_LABEL):
+                    break
+            
+                papers_count += 1
+            
+                try:
 
-                    paper_title = _get_text_recursively(paper_title)
+                    paper_title = xml_util.get_text(paper_entry, 'MedlineCitation/Article/ArticleTitle')
 
                     logging.info(f'({papers_count}/{total_papers}) Fetching PubMed paper: {paper_title}')
 
@@ -317,8 +302,10 @@ def run(search: Search):
                         paper.add_database(DATABASE_LABEL)
                         search.add_paper(paper)
 
-            except Exception as e:  # pragma: no cover
-                logging.debug(e, exc_info=True)
+                except Exception as e:  # pragma: no cover
+                    logging.debug(e, exc_info=True)
 
-        if papers_count < total_papers and not search.reached_its_limit(DATABASE_LABEL):
-            result = _get_api_result(search, papers_count)
+        except Exception as e:
+            # the page couldn't be fetched even after its retries, so its papers are skipped
+            logging.warning(f'PubMed: skipping the papers from {papers_count + 1} to {min(start_record, total_papers)}: {e}')
+            papers_count = min(start_record, total_papers)
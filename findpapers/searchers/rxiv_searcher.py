@@ -1,12 +1,15 @@
+import os
 import logging
+import itertools
 import math
 import requests
 import datetime
 from urllib.parse import urlencode
-from typing import Optional, List
+from typing import Dict, Iterator, Optional, List, Tuple
 from lxml import html
 import findpapers.utils.query_util as query_util
 import findpapers.utils.common_util as common_util
+import findpapers.utils.mirror_util as mirror_util
 from findpapers.models.search import Search
 from findpapers.models.paper import Paper
 from findpapers.models.publication import Publication
@@ -15,6 +18,30 @@ from findpapers.utils.requests_util import DefaultSession
 
 BASE_URL = 'https://www.medrxiv.org'
 API_BASE_URL = 'https://api.biorxiv.org'
+# number of records returned by each page of the details API
+API_PAGE_SIZE = 100
+
+
+def _get_interval(search: Search) -> Tuple[str, str]:
+    """
+    Get the dates interval of a search, in the format used by medRxiv/bioRxiv
+
+    Parameters
+    ----------
+    search : Search
+        A search instance
+
+    Returns
+    -------
+    Tuple[str, str]
+        The (since, until) dates
+    """
+
+    date_pattern = '%Y-%m-%d'
+    since = search.since.strftime(date_pattern) if search.since is not None else '1970-01-01'
+    until = search.until.strftime(date_pattern) if search.until is not None else datetime.datetime.now().strftime(date_pattern)
+
+    return since, until
 
 
 def _get_search_urls(search: Search, database: str) -> List[str]:
@@ -35,55 +62,47 @@ def _get_search_urls(search: Search, database: str) -> List[str]:
         a URL list to be used to retrieve data from medRxiv/bioRxiv database
     """
 
+    query_tree = search.query_tree
+
     # The databases don't support wildcards properly nowadays
-    if '?' in search.query or '*' in search.query:
-        raise ValueError('Queries with wildcards are not supported by medRxiv/bioRxiv database')
-    
+    for term in query_util.get_terms(query_tree):
+        if term.has_wildcard:
+            raise query_util.QueryError('Queries with wildcards are not supported by medRxiv/bioRxiv database', term.position)
+
     # NOT connectors aren't supported
-    if ' AND NOT ' in search.query:
-        raise ValueError('NOT connectors aren\'t supported')
-    
+    if 'AND NOT' in query_util.get_connectors(query_tree):
+        raise query_util.QueryError('NOT connectors aren\'t supported')
+
     # Parentheses are used for URL splitting purposes and only 1-level grouping is supported with an OR connector between the groups
-    current_level = 0
-    for character in search.query:
-        if character == '(':
-            current_level += 1
-        elif character == ')':
-            current_level -= 1
-        
-        if current_level > 1:
-            raise ValueError('Max 1-level parentheses grouping exceeded')
-    
-    if ') AND (' in search.query:
-        raise ValueError('Only the OR connector can be used between the groups')
-    
-    query = query_util.apply_on_each_term(search.query, lambda x: x.replace(' ', '+'))
-    queries = query.split(') OR (')
-    queries = [x[1:] if x[0] == '(' else x for x in queries]
-    queries = [x[:-1] if x[-1] == ')' else x for x in queries]
+    if query_tree.depth > 1:
+        raise query_util.QueryError('Max 1-level parentheses grouping exceeded')
+
+    if query_tree.depth == 1:
+        if any(x != 'OR' for x in query_tree.connectors):
+            raise query_util.QueryError('Only the OR connector can be used between the groups')
+        groups = query_tree.nodes
+    else:
+        groups = [query_tree]
 
     urls = []
 
-    date_pattern = '%Y-%m-%d'
-    since = search.since.strftime(date_pattern) if search.since is not None else '1970-01-01'
-    until = search.until.strftime(date_pattern) if search.until is not None else datetime.datetime.now().strftime(date_pattern)
+    since, until = _get_interval(search)
     date_parameter = f'limit_from%3A{since}%20limit_to%3A{until}'
 
     url_suffix = f'jcode%3A{database.lower()}%20{date_parameter}%20numresults%3A75%20sort%3Apublication-date%20direction%3Adescending%20format_result%3Acondensed'
 
-    for query in queries:
-        ors_count = len(query.split(' OR ')) - 1
-        ands_count = len(query.split(' AND ')) - 1
+    for group in groups:
+
+        terms = query_util.get_terms(group)
+        connectors = set(query_util.get_connectors(group))
 
         # All the inner connectors of the groups needs to be the same
-        if ors_count > 0 and ands_count > 0:
-            raise ValueError(f'Mixed inner connectors found. Each query group must use only one connector type, only ANDs or only ORs: {query}')
-        
-        query_match_flag = 'match-any'
-        if ands_count > 0:
-            query_match_flag = 'match-all'
+        if len(connectors) > 1:
+            raise query_util.QueryError('Mixed inner connectors found. Each query group must use only one connector type, only ANDs or only ORs', group.position)
+
+        query_match_flag = 'match-all' if 'AND' in connectors else 'match-any'
 
-        encoded_query = query.replace('+', '%252B').replace(' OR ', '%2B').replace(' AND ', '%2B').replace('[', '%2522').replace(']', '%2522')
+        encoded_query = '%2B'.join(f'%2522{x.value.replace(" ", "+").replace("+", "%252B")}%2522' for x in terms)
 
         url = f'{BASE_URL}/search/abstract_title%3A{encoded_query}%20abstract_title_flags%3A{query_match_flag}%20{url_suffix}'
         urls.append(url)
@@ -177,29 +196,177 @@ def _get_paper_metadata(doi: str, database: str) -> dict:  # pragma: no cover
         return response.get('collection')[0]
 
 
-def _get_data(url: str) -> List[dict]:
+def _get_interval_page(database: str, since: str, until: str, cursor: Optional[int] = 0) -> dict:  # pragma: no cover
     """
-    Get the data list from medRxiv/bioRxiv given the search url
+    Get a page of the papers metadata posted in a dates interval
 
     Parameters
     ----------
-    url : str
-        A search URL
+    database : str
+        The database name (medRxiv or bioRxiv)
+    since : str
+        The interval start date (YYYY-MM-DD)
+    until : str
+        The interval end date (YYYY-MM-DD)
+    cursor : Optional[int], optional
+        The index of the first record of the page, by default 0
 
     Returns
     -------
-    List[dict]
-        Data list
+    dict
+        The details API response, or None if the API doesn't return a valid response
     """
 
-    result_page = _get_result(url)
-    page_data = _get_result_page_data(result_page)
-    data = [page_data]
+    url = f'{API_BASE_URL}/details/{database.lower()}/{since}/{until}/{cursor}'
 
-    if page_data.get('next_page_url') is not None:
-        data = data + _get_data(page_data.get('next_page_url'))
+    return common_util.try_success(lambda: DefaultSession().get(url).json(), 2)
 
-    return data
+
+def _get_interval_total(interval_page: dict) -> int:
+    """
+    Get the number of papers of a dates interval from one of its pages
+
+    Parameters
+    ----------
+    interval_page : dict
+        A details API response
+
+    Returns
+    -------
+    int
+        The number of papers (i.e., papers versions) in the interval
+    """
+
+    try:
+        return int(interval_page.get('messages')[0].get('total'))
+    except Exception:
+        return 0
+
+
+def iterate_interval_metadata(database: str, since: str, until: str, first_page: Optional[dict] = None) -> Iterator[dict]:
+    """
+    Iterate over the metadata of all the papers posted in a dates interval, fetching one page after another
+
+    Parameters
+    ----------
+    database : str
+        The database name (medRxiv or bioRxiv)
+    since : str
+        The interval start date (YYYY-MM-DD)
+    until : str
+        The interval end date (YYYY-MM-DD)
+    first_page : Optional[dict], optional
+        The first page of the interval if it was already fetched, by default None
+
+    Yields
+    -------
+    dict
+        A paper metadata, in the same format of _get_paper_metadata
+
+    Raises
+    ------
+    ConnectionError
+        A page couldn't be fetched
+    """
+
+    page = first_page if first_page is not None else _get_interval_page(database, since, until, 0)
+    cursor = 0
+
+    while True:
+
+        if page is None:
+            raise ConnectionError(f'The {database} papers metadata from {since} to {until} could not be fetched')
+
+        collection = page.get('collection', None) or []
+
+        yield from collection
+
+        cursor += len(collection)
+
+        if len(collection) == 0 or cursor >= _get_interval_total(page):
+            break
+
+        logging.info(f'{database}: {cursor}/{_get_interval_total(page)} papers metadata fetched')
+
+        page = _get_interval_page(database, since, until, cursor)
+
+
+def _get_version(paper_metadata: dict) -> int:
+    """
+    Private method that returns the version number of a paper metadata
+
+    Parameters
+    ----------
+    paper_metadata : dict
+        A paper metadata, as provided by the details API
+
+    Returns
+    -------
+    int
+        The paper version, 1 if it's not defined
+    """
+
+    try:
+        return int(paper_metadata.get('version') or 1)
+    except ValueError:  # pragma: no cover
+        return 1
+
+
+def _get_metadata_by_doi(database: str, since: str, until: str, first_page: Optional[dict] = None) -> Dict[str, dict]:
+    """
+    Get the metadata of all the papers posted in a dates interval, so the papers can be looked up by their DOIs
+    without one request for each paper
+
+    Parameters
+    ----------
+    database : str
+        The database name (medRxiv or bioRxiv)
+    since : str
+        The interval start date (YYYY-MM-DD)
+    until : str
+        The interval end date (YYYY-MM-DD)
+    first_page : Optional[dict], optional
+        The first page of the interval if it was already fetched, by default None
+
+    Returns
+    -------
+    Dict[str, dict]
+        The papers metadata by (lowercase) DOI
+    """
+
+    metadata_by_doi = {}
+
+    for paper_metadata in iterate_interval_metadata(database, since, until, first_page):
+        # the earliest version of each paper is kept, as a paper requested by its DOI has its first version.
+        # A paper whose first version was posted before the interval only has its later versions here
+        if paper_metadata.get('doi', None) is not None:
+            doi = paper_metadata.get('doi').lower()
+            if doi not in metadata_by_doi or _get_version(paper_metadata) < _get_version(metadata_by_doi.get(doi)):
+                metadata_by_doi[doi] = paper_metadata
+
+    return metadata_by_doi
+
+
+def _get_data(url: str) -> Iterator[dict]:
+    """
+    Get the data of each result page from medRxiv/bioRxiv given the search url, 
+    the pages are lazily fetched one after another
+
+    Parameters
+    ----------
+    url : str
+        A search URL
+
+    Yields
+    -------
+    dict
+        The data of a result page
+    """
+
+    while url is not None:
+        page_data = _get_result_page_data(_get_result(url))
+        yield page_data
+        url = page_data.get('next_page_url')
 
 
 def _get_paper(paper_metadata: dict) -> Paper:
@@ -238,10 +405,63 @@ def _get_paper(paper_metadata: dict) -> Paper:
                   paper_citations, paper_keywords, paper_comments, paper_number_of_pages, paper_pages)
 
 
-def run(search: Search, database: str):
+def _run_offline(search: Search, database: str, mirror_path: str):
+    """
+    Private method that collects the papers from a local mirror of medRxiv/bioRxiv (see findpapers.sync_mirror),
+    the query is evaluated locally, so it has none of the restrictions of the online search
+
+    Parameters
+    ----------
+    search : Search
+        A search instance
+    database : str
+        The database name (medRxiv or bioRxiv)
+    mirror_path : str
+        A valid file path of the database mirror
+
+    Raises
+    ------
+    FileNotFoundError
+        The mirror doesn't exist
+    """
+
+    if not os.path.isfile(mirror_path):
+        raise FileNotFoundError(f'The {database} mirror was not found on {mirror_path}, run "findpapers mirror sync {database.lower()}" first')
+
+    since, until = _get_interval(search)
+    matcher = query_util.compile_matcher(search.query_tree)
+
+    logging.info(f'{database}: Searching for papers on the mirror synchronized up to {mirror_util.get_watermark(mirror_path)}')
+
+    papers_count = 0
+
+    for paper_metadata in mirror_util.iterate_papers_metadata(mirror_path, search.query_tree, since, until):
+
+        if search.reached_its_limit(database):
+            break
+
+        try:
+            paper = _get_paper(paper_metadata)
+
+            if not matcher(paper):
+                continue
+
+            papers_count += 1
+            logging.info(f'({papers_count}) Fetching {database} paper: {paper.title}')
+
+            paper.add_database(database)
+            search.add_paper(paper)
+
+        except Exception as e:  # pragma: no cover
+            logging.debug(e, exc_info=True)
+
+
+def run(search: Search, database: str, bulk: Optional[bool] = None, mirror_path: Optional[str] = None):
     """
     This method fetch papers from medRxiv/bioRxiv database using the provided search parameters
-    After fetch the data from medRxiv/bioRxiv, the collected papers are added to the provided search instance
+    After fetch the data from medRxiv/bioRxiv, the collected papers are added to the provided search instance.
+    The papers metadata can be requested one by one or in bulk, i.e. the metadata of all the papers posted 
+    in the search dates interval is fetched once and the papers are looked up on it
 
     Parameters
     ----------
@@ -249,34 +469,94 @@ def run(search: Search, database: str):
         A search instance
     database : str
         The database name (medRxiv or bioRxiv)
+    bulk : Optional[bool], optional
+        If the papers metadata will be fetched in bulk, by default None (i.e., the bulk mode is used when 
+        it needs less requests than fetching the papers one by one)
+    mirror_path : Optional[str], optional
+        A file path of a local mirror of the database (see findpapers.sync_mirror), by default None.
+        If it's provided the papers are collected from the mirror without any network call
     """
 
+    if mirror_path is not None:
+        return _run_offline(search, database, mirror_path)
+
     urls = _get_search_urls(search, database)
+    since, until = _get_interval(search)
+
+    # when the search is resumed, the fetching continues from the last checkpoint
+    cursor = search.get_cursor(database) or {}
+
+    metadata_by_doi = None
+    interval_total = None
 
     for i, url in enumerate(urls):
 
+        if i < cursor.get('url_index', 0):
+            continue
+
         if search.reached_its_limit(database):
             break
 
+        if i > 0:
+            search.set_cursor(database, {'url_index': i})
+
         logging.info(f'{database}: Requesting for papers...')
 
         data = _get_data(url)
+        first_page_data = next(data, None)
 
         total_papers = 0
-        if len(data) > 0:
-            total_papers = data[0].get('total_papers')
+        if first_page_data is not None:
+            total_papers = first_page_data.get('total_papers')
 
         logging.info(f'{database}: {total_papers} papers to fetch from {i+1}/{len(urls)} papers requests')
 
+        # the next result pages are only requested when the DOIs of the previous ones were consumed
+        # without reaching the search limit
+        dois = itertools.chain.from_iterable(x.get('dois') for x in itertools.chain([first_page_data], data)
+                                             if x is not None)
+
+        if metadata_by_doi is None and bulk is not False and total_papers > 0:
+
+            first_page = None
+
+            if interval_total is None:
+                first_page = _get_interval_page(database, since, until, 0)
+                interval_total = _get_interval_total(first_page) if first_page is not None else 0
+
+            # only the papers allowed by the search limits will be requested one by one
+            papers_to_fetch = total_papers
+            remaining_limit = search.get_remaining_limit(database)
+            if remaining_limit is not None:
+                papers_to_fetch = min(papers_to_fetch, remaining_limit)
+
+            if interval_total > 0 and (bulk or math.ceil(interval_total / API_PAGE_SIZE) < papers_to_fetch):
+                logging.info(f'{database}: Fetching the metadata of {interval_total} papers posted from {since} to {until}')
+                try:
+                    metadata_by_doi = _get_metadata_by_doi(database, since, until, first_page)
+                except ConnectionError as e:  # pragma: no cover
+                    # the papers missing on the bulk metadata are requested one by one
+                    logging.warning(e)
+                    metadata_by_doi = {}
+
         papers_count = 0
-        dois = sum([d.get('dois') for d in [x for x in data]], [])
 
-        for doi in dois:
-            if papers_count >= total_papers or search.reached_its_limit(database):
+        # the limit is checked before pulling the next DOI, so no page is requested after it's reached
+        while papers_count < total_papers and not search.reached_its_limit(database):
+            doi = next(dois, None)
+            if doi is None:
                 break
             try:
                 papers_count += 1
-                paper_metadata = _get_paper_metadata(doi, database)
+
+                paper_metadata = None
+                if metadata_by_doi is not None:
+                    paper_metadata = metadata_by_doi.get(doi.lower(), None)
+
+                # a paper whose first version was posted out of the interval isn't on the bulk metadata,
+                # or it's there with a later version only, so its first version is requested by its DOI
+                if paper_metadata is None or _get_version(paper_metadata) != 1:
+                    paper_metadata = _get_paper_metadata(doi, database)
 
                 paper_title = paper_metadata.get('title')
                 
@@ -15,6 +15,13 @@ from findpapers.utils.requests_util import DefaultSession
 DATABASE_LABEL = 'Scopus'
 BASE_URL = 'https://api.elsevier.com'
 
+# the COMPLETE view is limited to 25 entries per page, the STANDARD view to 200
+COMPLETE_VIEW_PAGE_SIZE = 25
+STANDARD_VIEW_PAGE_SIZE = 200
+COMPLETE_VIEW_FIELDS = ['dc:title', 'dc:creator', 'dc:description', 'author', 'authkeywords', 'prism:coverDate',
+                        'prism:doi', 'citedby-count', 'prism:publicationName', 'prism:isbn', 'prism:issn',
+                        'prism:aggregationType', 'prism:pageRange', 'link']
+
 
 def _get_query(search: Search) -> str:
     """
@@ -32,8 +39,8 @@ def _get_query(search: Search) -> str:
         The translated query
     """
 
-    query = query_util.replace_search_term_enclosures(search.query, '"', '"', True)
-    query = query_util.replace_search_term_enclosures(query, '{', '}')
+    # the wildcards only work on loose phrases ("..."), the other terms are exact phrases ({...})
+    query = query_util.render(search.query_tree, lambda x: f'"{x.value}"' if x.has_wildcard else f'{{{x.value}}}')
 
     query = f'TITLE-ABS-KEY({query})'
 
@@ -147,9 +154,56 @@ def _get_paper_page(url: str) -> object:  # pragma: no cover
     return html.fromstring(response.content)
 
 
+def _get_number_of_pages(paper_pages: str) -> int:
+    """
+    Get the number of pages of a paper from its page range (e.g. 10-20)
+
+    Parameters
+    ----------
+    paper_pages : str
+        The paper page range
+
+    Returns
+    -------
+    int
+        The number of pages or None
+    """
+
+    if paper_pages is None:
+        return None
+
+    try:
+        if paper_pages.isdigit():  # pragma: no cover
+            return 1
+        pages_split = paper_pages.split('-')
+        return abs(int(pages_split[0])-int(pages_split[1]))+1
+    except Exception:  # pragma: no cover
+        return None
+
+
+def _is_complete_entry(paper_entry: dict) -> bool:
+    """
+    Check if a paper entry was retrieved using the COMPLETE view, i.e. it already has the paper abstract, authors and keywords
+
+    Parameters
+    ----------
+    paper_entry : dict
+        A paper entry retrieved from scopus API
+
+    Returns
+    -------
+    bool
+        True if the entry has the COMPLETE view fields, False otherwise
+    """
+
+    return 'dc:description' in paper_entry or 'author' in paper_entry
+
+
 def _get_paper(paper_entry: dict, publication: Publication) -> Paper:
     """
-    Using a paper entry provided, this method builds a paper instance
+    Using a paper entry provided, this method builds a paper instance.
+    The paper abstract, authors and keywords are taken from the entry when it was retrieved using the COMPLETE view,
+    otherwise they're scraped from the paper page
 
     Parameters
     ----------
@@ -175,18 +229,29 @@ def _get_paper(paper_entry: dict, publication: Publication) -> Paper:
     paper_doi = paper_entry.get('prism:doi', None)
     paper_citations = paper_entry.get('citedby-count', None)
     paper_first_author = paper_entry.get('dc:creator', None)
-    paper_abstract = None
+    paper_abstract = paper_entry.get('dc:description', None)
     paper_authors = []
     paper_urls = set()
     paper_keywords = set()
-    paper_pages = None
-    paper_number_of_pages = None
+    paper_pages = paper_entry.get('prism:pageRange', None)
 
     # post processing data
 
-    if paper_first_author is not None:
+    for author in paper_entry.get('author', None) or []:
+        author_name = author.get('authname', None)
+        if author_name is not None and len(author_name.strip()) > 0:
+            paper_authors.append(author_name.strip())
+
+    if len(paper_authors) == 0 and paper_first_author is not None:
         paper_authors.append(paper_first_author)
 
+    for keyword in (paper_entry.get('authkeywords', None) or '').split('|'):
+        if len(keyword.strip()) > 0:
+            paper_keywords.add(keyword.strip())
+
+    if paper_abstract is not None:
+        paper_abstract = paper_abstract.strip()
+
     if paper_publication_date is not None:
         date_split = paper_publication_date.split('-')
         paper_publication_date = datetime.date(
@@ -207,9 +272,11 @@ def _get_paper(paper_entry: dict, publication: Publication) -> Paper:
             break
 
     if paper_scopus_link is not None:
-
         paper_urls.add(paper_scopus_link)
 
+    # the paper page is only scraped when the API didn't provide the COMPLETE view fields
+    if paper_scopus_link is not None and not _is_complete_entry(paper_entry):
+
         try:
 
             paper_page = _get_paper_page(paper_scopus_link)
@@ -235,22 +302,17 @@ def _get_paper(paper_entry: dict, publication: Publication) -> Paper:
                 paper_keywords.add(keyword.text.strip())
 
             try:
-                paper_pages = paper_entry.get('prism:pageRange', None)
                 if paper_pages is None:
                     paper_pages = paper_page.xpath(
                         '//span[@id="journalInfo"]')[0].text.split('Pages')[1].strip()
-                if paper_pages.isdigit():  # pragma: no cover
-                    paper_number_of_pages = 1
-                else:
-                    pages_split = paper_pages.split('-')
-                    paper_number_of_pages = abs(
-                        int(pages_split[0])-int(pages_split[1]))+1
             except Exception:  # pragma: no cover
                 pass
 
         except Exception as e:
             logging.debug(e, exc_info=True)
 
+    paper_number_of_pages = _get_number_of_pages(paper_pages)
+
     paper = Paper(paper_title, paper_abstract, paper_authors, publication,
                   paper_publication_date, paper_urls, paper_doi, paper_citations, paper_keywords,
                   None, paper_number_of_pages, paper_pages)
@@ -258,7 +320,8 @@ def _get_paper(paper_entry: dict, publication: Publication) -> Paper:
     return paper
 
 
-def _get_search_results(search: Search, api_token: str, url: Optional[str] = None) -> dict:  # pragma: no cover
+def _get_search_results(search: Search, api_token: str, url: Optional[str] = None,
+                        complete_view: Optional[bool] = True) -> dict:  # pragma: no cover
     """
     This method fetch papers from Scopus database using the provided search parameters
 
@@ -270,13 +333,25 @@ def _get_search_results(search: Search, api_token: str, url: Optional[str] = Non
         The API key used to fetch data from Scopus database,
     url : Optional[str]
         A predefined URL to be used for the search execution, 
-        this is usually used for make the next recursive call on a result pagination
+        this is usually used to fetch the next page of a result pagination
+    complete_view : Optional[bool]
+        If the COMPLETE view (with the papers abstract, authors and keywords) will be requested, by default True.
+        It requires an API key with the COMPLETE view entitlement
+
+    Returns
+    -------
+    dict (or None)
+        The search results, or None if the API doesn't return a valid response
     """
 
-    # is url is not None probably this is a recursive call to the next url of a pagination
+    # if url is not None this is a request for the next page of a pagination
     if url is None:
         query = _get_query(search)
-        url = f'{BASE_URL}/content/search/scopus?&sort=coverDate&apiKey={api_token}&query={query}'
+        url = f'{BASE_URL}/content/search/scopus?&sort=coverDate&apiKey={api_token}&query={query}&cursor=*'
+        if complete_view:
+            url += f'&view=COMPLETE&count={COMPLETE_VIEW_PAGE_SIZE}&field={",".join(COMPLETE_VIEW_FIELDS)}'
+        else:
+            url += f'&count={STANDARD_VIEW_PAGE_SIZE}'
 
     headers = {'Accept': 'application/json'}
 
@@ -363,7 +438,8 @@ def enrich_publication_data(search: Search, api_token: str):
 def run(search: Search, api_token: str, url: Optional[str] = None, papers_count: Optional[int] = 0):
     """
     This method fetch papers from Scopus database using the provided search parameters
-    After fetch the data from Scopus, the collected papers are added to the provided search instance
+    After fetch the data from Scopus, the collected papers are added to the provided search instance.
+    The results are fetched page by page using the Scopus cursor (deep) pagination
 
     Parameters
     ----------
@@ -373,9 +449,9 @@ def run(search: Search, api_token: str, url: Optional[str] = None, papers_count:
         The API key used to fetch data from Scopus database,
     url : Optional[str]
         A predefined URL to be used for the search execution, 
-        this is usually used for make the next recursive call on a result pagination
+        this is usually used to resume the fetching from a page of a result pagination
     papers_count : Optional[int]
-        Papers count used on recursion calls
+        The number of papers already fetched before the provided URL
 
     Raises
     ------
@@ -386,41 +462,61 @@ def run(search: Search, api_token: str, url: Optional[str] = None, papers_count:
     if api_token is None or len(api_token.strip()) == 0:
         raise AttributeError('The API token cannot be null')
 
+    cursor = search.get_cursor(DATABASE_LABEL)
+    if url is None and cursor is not None:
+        # when the search is resumed, the fetching continues from the last checkpoint
+        url = f"{cursor.get('next_url')}&apiKey={api_token}"
+        papers_count = cursor.get('papers_count')
+
     search_results = _get_search_results(search, api_token, url)
 
+    if search_results is None and url is None:
+        # the API key may not be entitled to the COMPLETE view, so the papers pages will be scraped
+        logging.info('Scopus: the COMPLETE view is unavailable, falling back to the STANDARD view')
+        search_results = _get_search_results(search, api_token, url, complete_view=False)
+
+    if search_results is None:
+        logging.warning('Scopus: the search results could not be fetched')
+        return
+
     total_papers = int(search_results.get('opensearch:totalResults', 0))
 
     logging.info(f'Scopus: {total_papers} papers to fetch')
 
-    for paper_entry in search_results.get('entry', []):
+    while search_results is not None:
 
-        if papers_count >= total_papers or search.reached_its_limit(DATABASE_LABEL):
-            break
+        for paper_entry in search_results.get('entry', []):
 
-        papers_count += 1
+            if papers_count >= total_papers or search.reached_its_limit(DATABASE_LABEL):
+                break
 
-        try:
+            papers_count += 1
 
-            paper_title = paper_entry.get("dc:title")
-            logging.info(f'({papers_count}/{total_papers}) Fetching Scopus paper: {paper_title}')
+            try:
 
-            publication = _get_publication(paper_entry, api_token)
-            paper = _get_paper(paper_entry, publication)
+                paper_title = paper_entry.get("dc:title")
+                logging.info(f'({papers_count}/{total_papers}) Fetching Scopus paper: {paper_title}')
 
-            if paper is not None:
-                paper.add_database(DATABASE_LABEL)
-                search.add_paper(paper)
+                publication = _get_publication(paper_entry, api_token)
+                paper = _get_paper(paper_entry, publication)
 
-        except Exception as e:  # pragma: no cover
-            logging.debug(e, exc_info=True)
+                if paper is not None:
+                    paper.add_database(DATABASE_LABEL)
+                    search.add_paper(paper)
+
+            except Exception as e:  # pragma: no cover
+                logging.debug(e, exc_info=True)
+
+        next_url = None
+        for link in search_results.get('link', []):
+            if link.get('@ref') == 'next':
+                next_url = link.get('@href')
+                break
 
-    next_url = None
-    for link in search_results['link']:
-        if link['@ref'] == 'next':
-            next_url = link['@href']
+        # the next page link carries the cursor of the pagination, it's absent on the last page
+        if papers_count >= total_papers or next_url is None or search.reached_its_limit(DATABASE_LABEL):
             break
 
-    # If there is a next url, the API provided response was paginated and we need to process the next url
-    # We'll make a recursive call for it
-    if papers_count < total_papers and next_url is not None and not search.reached_its_limit(DATABASE_LABEL):
-        run(search, api_token, next_url, papers_count)
+        # the API key isn't stored on the checkpoint
+        search.set_cursor(DATABASE_LABEL, {'next_url': re.sub(r'&?apiKey=[^&]*', '', next_url), 'papers_count': papers_count})
+        search_results = _get_search_results(search, api_token, next_url)
@@ -14,7 +14,7 @@ def generate_bibtex(search_path: str, outputpath: str, only_selected_papers: Opt
     Parameters
     ----------
     search_path : str
-        A valid file path containing a JSON representation of the search results
+        A valid file path containing a JSON representation of the search results, or a SQLite database
     outputpath : str
         A valid file path for the BibTeX output file
     only_selected_papers : bool, optional
@@ -29,7 +29,6 @@ def generate_bibtex(search_path: str, outputpath: str, only_selected_papers: Opt
 
     common_util.logging_initialize(verbose)
 
-    search = persistence_util.load(search_path)
     common_util.check_write_access(outputpath)
 
     default_tab = ' ' * 4
@@ -47,7 +46,7 @@ def generate_bibtex(search_path: str, outputpath: str, only_selected_papers: Opt
             '}\n\n'
         ])
 
-    for paper in search.papers:
+    for paper in persistence_util.iterate_papers(search_path):
 
         if (only_selected_papers and not paper.selected) or \
         (categories_filter is not None and (paper.categories is None or not paper.has_category_match(categories_filter))):
@@ -33,7 +33,7 @@ def download(search_path: str, output_directory: str, only_selected_papers: Opti
     Parameters
     ----------
     search_path : str
-        A valid file path containing a JSON representation of the search results
+        A valid file path containing a JSON representation of the search results, or a SQLite database
     output_directory : str
         A valid file path of the directory where the downloaded papers will be placed
     only_selected_papers : bool, False by default
@@ -51,7 +51,7 @@ def download(search_path: str, output_directory: str, only_selected_papers: Opti
     if proxy is not None:
         os.environ['FINDPAPERS_PROXY'] = proxy
 
-    search = persistence_util.load(search_path)
+    number_of_papers = persistence_util.get_number_of_papers(search_path)
 
     if not os.path.exists(output_directory):
         os.makedirs(output_directory)
@@ -65,9 +65,9 @@ def download(search_path: str, output_directory: str, only_selected_papers: Opti
         fp.write(
             f"------- A new download process started at: {datetime.datetime.strftime(now, '%Y-%m-%d %H:%M:%S')} \n")
 
-    for i, paper in enumerate(search.papers):
+    for i, paper in enumerate(persistence_util.iterate_papers(search_path)):
 
-        logging.info(f'({i+1}/{len(search.papers)}) {paper.title}')
+        logging.info(f'({i+1}/{number_of_papers}) {paper.title}')
 
         if (only_selected_papers and not paper.selected) or \
         (categories_filter is not None and (paper.categories is None or not paper.has_category_match(categories_filter))):
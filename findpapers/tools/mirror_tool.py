@@ -0,0 +1,103 @@
+import os
+import logging
+import datetime
+from typing import Optional
+import findpapers.utils.common_util as common_util
+import findpapers.utils.mirror_util as mirror_util
+import findpapers.searchers.rxiv_searcher as rxiv_searcher
+import findpapers.searchers.medrxiv_searcher as medrxiv_searcher
+import findpapers.searchers.biorxiv_searcher as biorxiv_searcher
+
+
+DEFAULT_MIRROR_DIR = os.path.join(os.path.expanduser('~'), '.findpapers', 'mirrors')
+# the first bioRxiv preprints were posted in November 2013, medRxiv started in June 2019
+MIRROR_START_DATE = '2013-11-01'
+DATABASE_LABELS = [medrxiv_searcher.DATABASE_LABEL, biorxiv_searcher.DATABASE_LABEL]
+
+
+def get_mirror_dir(mirror_dir: Optional[str] = None) -> str:
+    """
+    Get the directory where the databases mirrors are placed
+
+    Parameters
+    ----------
+    mirror_dir : Optional[str], optional
+        A directory path, by default None (i.e., the FINDPAPERS_MIRROR_DIR environment variable or ~/.findpapers/mirrors)
+
+    Returns
+    -------
+    str
+        The mirrors directory path
+    """
+
+    if mirror_dir is None:
+        mirror_dir = os.getenv('FINDPAPERS_MIRROR_DIR', DEFAULT_MIRROR_DIR)
+
+    return mirror_dir
+
+
+def sync_mirror(database: str, mirror_dir: Optional[str] = None, since: Optional[datetime.date] = None,
+                proxy: Optional[str] = None, verbose: Optional[bool] = False) -> int:
+    """
+    Synchronize a local mirror of the medRxiv or bioRxiv papers metadata, so searches on these databases
+    can be made without any network call (see the rxiv_mirror_dir argument of findpapers.search).
+    Only the papers posted since the last synchronization (i.e., the mirror watermark) are fetched
+
+    Parameters
+    ----------
+    database : str
+        The database name (medRxiv or bioRxiv), this parameter is case insensitive
+    mirror_dir : Optional[str], optional
+        A directory path where the mirror will be placed, by default None
+        (i.e., the FINDPAPERS_MIRROR_DIR environment variable or ~/.findpapers/mirrors)
+    since : Optional[datetime.date], optional
+        The date from which the papers will be fetched on the first synchronization, by default None (i.e., all the papers)
+    proxy : Optional[str], optional
+        proxy URL that can be used during requests. This can be also defined by an environment variable FINDPAPERS_PROXY. By default None
+    verbose : Optional[bool], optional
+        If you wanna a verbose logging
+
+    Returns
+    -------
+    int
+        The number of fetched papers metadata
+
+    Raises
+    ------
+    ValueError
+        Invalid database
+    """
+
+    common_util.logging_initialize(verbose)
+
+    if proxy is not None:
+        os.environ['FINDPAPERS_PROXY'] = proxy
+
+    database_label = next((x for x in DATABASE_LABELS if x.lower() == database.strip().lower()), None)
+
+    if database_label is None:
+        raise ValueError(f'Invalid database: {database}, the available databases are {", ".join(DATABASE_LABELS)}')
+
+    mirror_dir = get_mirror_dir(mirror_dir)
+    os.makedirs(mirror_dir, exist_ok=True)
+    mirror_path = mirror_util.get_mirror_path(database_label, mirror_dir)
+
+    # the watermark day is fetched again, since more papers can be posted on it after the last synchronization
+    watermark = mirror_util.get_watermark(mirror_path)
+    if watermark is not None:
+        since = watermark
+    elif since is not None:
+        since = since.strftime('%Y-%m-%d')
+    else:
+        since = MIRROR_START_DATE
+
+    until = datetime.date.today().strftime('%Y-%m-%d')
+
+    logging.info(f'Synchronizing the {database_label} mirror {mirror_path} from {since} to {until}')
+
+    papers_metadata = rxiv_searcher.iterate_interval_metadata(database_label, since, until)
+    count = mirror_util.save_papers_metadata(mirror_path, papers_metadata, until)
+
+    logging.info(f'{count} {database_label} papers metadata fetched, the mirror is synchronized up to {until}')
+
+    return count
@@ -0,0 +1,134 @@
+import os
+import logging
+from typing import List, Optional, Tuple
+from findpapers.models.paper_index import PaperIndex
+import findpapers.utils.persistence_util as persistence_util
+import findpapers.utils.common_util as common_util
+
+
+INDEX_EXTENSION = '.index'
+
+
+def get_source_signature(search_path: str) -> tuple:
+    """
+    Returns a signature of a search file, used to detect an outdated index
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path of a search result
+
+    Returns
+    -------
+    tuple
+        The file size and modification time
+    """
+
+    stat = os.stat(search_path)
+
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def get_index(search_path: str, rebuild_index: Optional[bool] = False) -> PaperIndex:
+    """
+    Get the full-text index of a search result. The index is saved next to the search file (with the .index suffix),
+    and it's rebuilt only when the search file changes
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path containing a representation of the search results (JSON, JSON Lines, SQLite or binary)
+    rebuild_index : Optional[bool], optional
+        If the index will be rebuilt even if it's up to date, by default False
+
+    Returns
+    -------
+    PaperIndex
+        The search index
+    """
+
+    index_path = f'{search_path}{INDEX_EXTENSION}'
+    source_signature = get_source_signature(search_path)
+
+    index = None if rebuild_index else PaperIndex.load(index_path, source_signature)
+
+    if index is None:
+
+        logging.info(f'Indexing the papers of {search_path}')
+
+        # the papers are streamed, so only the index is kept in memory
+        index = PaperIndex(persistence_util.iterate_papers(search_path))
+
+        save_index(index, search_path)
+
+    return index
+
+
+def save_index(index: PaperIndex, search_path: str):
+    """
+    Save the full-text index of a search result next to the search file (with the .index suffix),
+    so it's used by get_index while the search file doesn't change
+
+    Parameters
+    ----------
+    index : PaperIndex
+        The index of the search papers
+    search_path : str
+        A valid file path containing a representation of the search results, it must be already saved
+    """
+
+    index_path = f'{search_path}{INDEX_EXTENSION}'
+
+    try:
+        index.save(index_path, get_source_signature(search_path))
+    except OSError:
+        logging.warning(f'The index could not be saved on {index_path}', exc_info=True)
+
+
+def refresh_index(search_path: str, previous_source_signature: tuple):
+    """
+    Keep the saved index of a search result valid after a change of the search file that doesn't change the
+    indexed content (e.g. the papers selection made by the refiner), so the papers aren't indexed again
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path containing a representation of the search results
+    previous_source_signature : tuple
+        The signature of the search file before the change (see get_source_signature)
+    """
+
+    index = PaperIndex.load(f'{search_path}{INDEX_EXTENSION}', previous_source_signature)
+
+    if index is not None:
+        save_index(index, search_path)
+
+
+def query(search_path: str, query: str, limit: Optional[int] = 20, rebuild_index: Optional[bool] = False,
+          verbose: Optional[bool] = False) -> List[Tuple[str, str, float]]:
+    """
+    Method used to find the papers of a search result that match a query, ranked by relevance (BM25) without any network call.
+    It requires NumPy
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path containing a representation of the search results (JSON, JSON Lines, SQLite or binary)
+    query : str
+        A findpapers query (e.g. [term a] AND ([term b] OR [term c*])), or a list of keywords any of which can match
+    limit : Optional[int], optional
+        The max number of results, by default 20. If it's None all the matching papers are returned
+    rebuild_index : Optional[bool], optional
+        If the search index will be rebuilt even if it's up to date, by default False
+    verbose : Optional[bool], optional
+        If you wanna a verbose logging
+
+    Returns
+    -------
+    List[Tuple[str, str, float]]
+        The (paper key, paper title, score) of the matching papers, the best ones first
+    """
+
+    common_util.logging_initialize(verbose)
+
+    return get_index(search_path, rebuild_index).search(query, limit)
@@ -7,6 +7,7 @@ from findpapers.models.search import Search
 from findpapers.models.paper import Paper
 import findpapers.utils.common_util as common_util
 import findpapers.utils.persistence_util as persistence_util
+import findpapers.tools.query_tool as query_tool
 
 
 def _print_paper_details(paper: Paper, highlights: List[str], show_abstract: bool, show_extra_info: bool):  # pragma: no cover
@@ -156,7 +157,7 @@ def refine(search_path: str, categories: Optional[dict] = None, highlights: Opti
     Parameters
     ----------
     search_path : str
-        valid file path containing a JSON representation of the search results
+        valid file path containing a JSON representation of the search results, a JSON Lines file (.jsonl extension) or a SQLite database (.db, .sqlite or .sqlite3 extension)
     categories : dict, optional
         A dict with lists of categories by their facets, used to assign to selected papers, by default None
         E.g.:
@@ -195,6 +196,11 @@ def refine(search_path: str, categories: Optional[dict] = None, highlights: Opti
         highlights = []
 
     search = persistence_util.load(search_path)
+    source_signature = query_tool.get_source_signature(search_path)
+
+    # the SQLite and JSON Lines files are updated on each answer, so only the JSON files need to be rewritten at the end
+    search_format = persistence_util.detect_format(search_path)
+    is_incremental = search_format in persistence_util.INCREMENTAL_FORMATS
 
     has_already_refined_papers = False
     for paper in search.papers:
@@ -242,10 +248,17 @@ def refine(search_path: str, categories: Optional[dict] = None, highlights: Opti
 
             if paper.selected:
                 paper.categories = _get_category_question_input(categories)
+
+            if is_incremental:
+                persistence_util.update_paper(search, search_path, paper, search_format)
             
             done_papers.append(paper)
 
     if read_only:
         print(f'\n{Fore.CYAN}{len(todo_papers)} papers\n')
-    else:
-        persistence_util.save(search, search_path)
+    elif not is_incremental:
+        persistence_util.save(search, search_path, search_format)
+
+    # the refinement doesn't change the indexed content, so the saved index is still valid
+    if not read_only:
+        query_tool.refresh_index(search_path, source_signature)
@@ -1,16 +1,19 @@
 import os
+import asyncio
 import datetime
 import logging
 import requests
 import copy
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse
-from lxml import html
-from typing import Optional, List
+from lxml import etree
+from typing import Optional, List, Tuple
 from findpapers.models.search import Search
 from findpapers.models.paper import Paper
 from findpapers.models.publication import Publication
 from findpapers.utils.requests_util import DefaultSession
+import findpapers.utils.async_requests_util as async_requests_util
 import findpapers.searchers.scopus_searcher as scopus_searcher
 import findpapers.searchers.ieee_searcher as ieee_searcher
 import findpapers.searchers.pubmed_searcher as pubmed_searcher
@@ -19,8 +22,149 @@ import findpapers.searchers.acm_searcher as acm_searcher
 import findpapers.searchers.medrxiv_searcher as medrxiv_searcher
 import findpapers.searchers.biorxiv_searcher as biorxiv_searcher
 import findpapers.utils.common_util as common_util
+import findpapers.utils.query_util as query_util
 import findpapers.utils.persistence_util as persistence_util
+import findpapers.utils.jsonl_util as jsonl_util
+import findpapers.tools.query_tool as query_tool
 import findpapers.utils.publication_util as publication_util
+import findpapers.utils.mirror_util as mirror_util
+
+
+MAX_HTML_HEAD_BYTES = 256 * 1024
+HTML_CHUNK_SIZE = 16 * 1024
+
+
+def _get_html_head_meta_list(response: requests.Response, max_bytes: Optional[int] = MAX_HTML_HEAD_BYTES) -> List[dict]:
+    """
+    Private method that returns the meta tags attributes of a HTML page head. 
+    The page is parsed incrementally while it's downloaded, and the download stops 
+    as soon as the head is completely parsed (or the max number of bytes is read)
+
+    Parameters
+    ----------
+    response : requests.Response
+        A response requested using stream=True
+    max_bytes : Optional[int], optional
+        The max number of bytes that will be read, by default 256 KB
+
+    Returns
+    -------
+    List[dict]
+        A list of meta tags attributes
+    """
+
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+    meta_list = []
+    read_bytes = 0
+
+    for chunk in response.iter_content(chunk_size=HTML_CHUNK_SIZE):
+
+        read_bytes += len(chunk)
+
+        if _feed_html_head_parser(parser, chunk, meta_list):
+            break
+
+        if max_bytes is not None and read_bytes >= max_bytes:
+            break
+
+    return meta_list
+
+
+def _feed_html_head_parser(parser: etree.HTMLPullParser, chunk: bytes, meta_list: List[dict]) -> bool:
+    """
+    Private method that feeds a HTML page chunk to a pull parser, appending the attributes of the parsed meta tags to a list
+
+    Parameters
+    ----------
+    parser : etree.HTMLPullParser
+        A parser listening to the start and end events
+    chunk : bytes
+        A page chunk
+    meta_list : List[dict]
+        The list where the meta tags attributes will be appended
+
+    Returns
+    -------
+    bool
+        True if the page head was completely parsed, False otherwise
+    """
+
+    parser.feed(chunk)
+
+    for event, element in parser.read_events():
+        if event == 'start' and element.tag == 'meta':
+            meta_list.append(dict(element.attrib))
+        elif (event == 'end' and element.tag == 'head') or (event == 'start' and element.tag == 'body'):
+            return True
+
+    return False
+
+
+async def _get_html_head_meta_list_async(response: 'httpx.Response', max_bytes: Optional[int] = MAX_HTML_HEAD_BYTES) -> List[dict]:
+    """
+    Asynchronous version of _get_html_head_meta_list
+
+    Parameters
+    ----------
+    response : httpx.Response
+        A response requested using AsyncSession.stream
+    max_bytes : Optional[int], optional
+        The max number of bytes that will be read, by default 256 KB
+
+    Returns
+    -------
+    List[dict]
+        A list of meta tags attributes
+    """
+
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+    meta_list = []
+    read_bytes = 0
+
+    async for chunk in response.aiter_bytes(chunk_size=HTML_CHUNK_SIZE):
+
+        read_bytes += len(chunk)
+
+        if _feed_html_head_parser(parser, chunk, meta_list):
+            break
+
+        if max_bytes is not None and read_bytes >= max_bytes:
+            break
+
+    return meta_list
+
+
+def _get_paper_metadata_from_meta_list(meta_list: List[dict]) -> dict:
+    """
+    Private method that builds a paper metadata dict from the meta tags attributes of its page,
+    the values of repeated meta names are grouped in a list
+
+    Parameters
+    ----------
+    meta_list : List[dict]
+        A list of meta tags attributes
+
+    Returns
+    -------
+    dict
+        A paper metadata dict
+    """
+
+    paper_metadata = {}
+
+    for meta in meta_list:
+        meta_name = meta.get('name')
+        meta_content = meta.get('content')
+        if meta_name is not None and meta_content is not None:
+
+            if meta_name in paper_metadata:
+                if not isinstance(paper_metadata.get(meta_name), list):
+                    paper_metadata[meta_name] = [paper_metadata.get(meta_name)]
+                paper_metadata.get(meta_name).append(meta_content)
+            else:
+                paper_metadata[meta_name] = meta_content
+
+    return paper_metadata
 
 
 def _get_paper_metadata_by_url(url: str):
@@ -39,28 +183,48 @@ def _get_paper_metadata_by_url(url: str):
     """
 
     response = common_util.try_success(
-        lambda url=url: requests.get(url, allow_redirects=True), 2, 2)
+        lambda url=url: DefaultSession().get(url, allow_redirects=True, stream=True, partial_content=True), 2)
+
+    if response is not None and 'text/html' in response.headers.get('content-type', '').lower():
+
+        try:
+            # the metadata is always on the page head, so the rest of the page isn't downloaded
+            meta_list = _get_html_head_meta_list(response)
+        finally:
+            response.close()
+
+        return _get_paper_metadata_from_meta_list(meta_list), response.url
+
 
-    if response is not None and 'text/html' in response.headers.get('content-type').lower():
+async def _get_paper_metadata_by_url_async(session: async_requests_util.AsyncSession, url: str):
+    """
+    Asynchronous version of _get_paper_metadata_by_url
+
+    Parameters
+    ----------
+    session : AsyncSession
+        The async session used by the request
+    url : str
+        A paper URL
+
+    Returns
+    -------
+    dict
+        A paper metadata dict (or None if the paper metadata cannot be found)
+    """
 
-        page = html.fromstring(response.content)
-        meta_list = page.xpath('//meta')
+    async def get_paper_metadata():
+        # a failed request raises an error, so it's tried again
+        async with session.stream('GET', url) as response:
 
-        paper_metadata = {}
+            if 'text/html' in response.headers.get('content-type', '').lower():
 
-        for meta in meta_list:
-            meta_name = meta.attrib.get('name')
-            meta_content = meta.attrib.get('content')
-            if meta_name is not None and meta_content is not None:
+                # the metadata is always on the page head, so the rest of the page isn't downloaded
+                meta_list = await _get_html_head_meta_list_async(response)
 
-                if meta_name in paper_metadata:
-                    if not isinstance(paper_metadata.get(meta_name), list):
-                        paper_metadata[meta_name] = [paper_metadata.get(meta_name)]
-                    paper_metadata.get(meta_name).append(meta_content)
-                else:
-                    paper_metadata[meta_name] = meta_content
+                return _get_paper_metadata_from_meta_list(meta_list), str(response.url)
 
-        return paper_metadata, response.url
+    return await common_util.try_success_async(get_paper_metadata, 2)
 
 
 def _force_single_metadata_value_by_key(metadata_entry: dict, metadata_key: str):
@@ -84,117 +248,249 @@ def _force_single_metadata_value_by_key(metadata_entry: dict, metadata_key: str)
     return metadata_entry.get(metadata_key, None) if not isinstance(metadata_entry.get(metadata_key, None), list) else metadata_entry.get(metadata_key)[0]
 
 
+def _get_paper_metadata_list(paper_urls: List[str]) -> List[dict]:
+    """
+    Private method that fetches the metadata of a paper from each one of its URLs.
+    It doesn't change the paper, so it can be safely called from worker threads
 
-def _enrich(search: Search, scopus_api_token: Optional[str] = None):
+    Parameters
+    ----------
+    paper_urls : List[str]
+        The paper URLs
+
+    Returns
+    -------
+    List[dict]
+        A list of paper metadata dicts
     """
-    Private method that enriches the search results based on paper metadata
+
+    paper_metadata_list = []
+
+    for url in paper_urls:
+
+        if 'pdf' in url: # trying to skip PDF links
+            continue
+
+        try:
+            paper_metadata, paper_url = _get_paper_metadata_by_url(url)
+            paper_metadata_list.append(paper_metadata)
+        except Exception:  # pragma: no cover
+            pass
+
+    return paper_metadata_list
+
+
+async def _get_paper_metadata_list_async(session: async_requests_util.AsyncSession, paper_urls: List[str]) -> List[dict]:
+    """
+    Asynchronous version of _get_paper_metadata_list
 
     Parameters
     ----------
-    search : Search
-        A search instance
-    scopus_api_token : Optional[str], optional
-        A API token used to fetch data from Scopus database. If you don't have one go to https://dev.elsevier.com and get it, by default None
+    session : AsyncSession
+        The async session used by the requests
+    paper_urls : List[str]
+        The paper URLs
+
+    Returns
+    -------
+    List[dict]
+        A list of paper metadata dicts
     """
 
-    for i, paper in enumerate(search.papers):
+    paper_metadata_list = []
 
-        logging.info(f'({i+1}/{len(search.papers)}) Enriching paper: {paper.title}')
+    for url in paper_urls:
+
+        if 'pdf' in url: # trying to skip PDF links
+            continue
 
         try:
+            paper_metadata, paper_url = await _get_paper_metadata_by_url_async(session, url)
+            paper_metadata_list.append(paper_metadata)
+        except Exception:
+            pass
 
-            urls = set()
-            if paper.doi is not None:
-                urls.add(f'http://doi.org/{paper.doi}')
-            else:
-                urls = copy.copy(paper.urls)
+    return paper_metadata_list
+
+
+async def _get_papers_metadata_lists_async(papers: List[Paper], urls_by_paper: dict, max_parallel_enrichments: int,
+                                           on_paper_metadata_list: callable):
+    """
+    Private method that fetches the metadata of many papers from a single thread, using an AsyncSession
+
+    Parameters
+    ----------
+    papers : List[Paper]
+        The papers
+    urls_by_paper : dict
+        The URLs of each paper
+    max_parallel_enrichments : int
+        The max number of papers whose metadata will be fetched at the same time
+    on_paper_metadata_list : callable
+        A function called with each paper and its metadata list as soon as they're fetched
+    """
+
+    semaphore = asyncio.Semaphore(max(max_parallel_enrichments, 1))
+
+    async with async_requests_util.AsyncSession() as session:
+
+        async def get_paper_metadata_list(paper: Paper):
+            async with semaphore:
+                return paper, await _get_paper_metadata_list_async(session, urls_by_paper.get(paper))
+
+        for task in asyncio.as_completed([get_paper_metadata_list(x) for x in papers]):
+            on_paper_metadata_list(*(await task))
+
+
+def _enrich_paper(paper: Paper, paper_metadata_list: List[dict]):
+    """
+    Private method that enriches a paper using the metadata fetched from its URLs
+
+    Parameters
+    ----------
+    paper : Paper
+        A paper instance
+    paper_metadata_list : List[dict]
+        A list of paper metadata dicts
+    """
+
+    for paper_metadata in paper_metadata_list:
+
+        try:
+
+            if paper_metadata is not None and 'citation_title' in paper_metadata:
 
-            for url in urls:
+                # when some paper data is present on page's metadata, force to use it. In most of the cases this data is more relyable
 
-                if 'pdf' in url: # trying to skip PDF links
+                paper_title = _force_single_metadata_value_by_key(paper_metadata, 'citation_title')
+            
+                if paper_title is None or len(paper_title.strip()) == 0:
                     continue
 
-                paper_metadata, paper_url = _get_paper_metadata_by_url(url)
-
-                if paper_metadata is not None and 'citation_title' in paper_metadata:
-
-                    # when some paper data is present on page's metadata, force to use it. In most of the cases this data is more relyable
-
-                    paper_title = _force_single_metadata_value_by_key(paper_metadata, 'citation_title')
-                    
-                    if paper_title is None or len(paper_title.strip()) == 0:
-                        continue
-
-                    paper.title = paper_title
-
-                    paper_doi = _force_single_metadata_value_by_key(paper_metadata, 'citation_doi')
-                    if paper_doi is not None and len(paper_doi.strip()) > 0:
-                        paper.doi = paper_doi
-
-                    paper_abstract = _force_single_metadata_value_by_key(paper_metadata, 'citation_abstract')
-                    if paper_abstract is None:
-                        paper_abstract = _force_single_metadata_value_by_key(paper_metadata, 'DC.Description')
-                    if paper_abstract is None:
-                        paper_abstract = _force_single_metadata_value_by_key(paper_metadata, 'description')
-
-                    if paper_abstract is not None and len(paper_abstract.strip()) > 0:
-                        paper.abstract = paper_abstract
-
-                    paper_authors = paper_metadata.get('citation_author', None)
-                    if paper_authors is not None and not isinstance(paper_authors, list): # there is only one author
-                        paper_authors = [paper_authors]
-
-                    if paper_authors is not None and len(paper_authors) > 0:
-                        paper.authors = paper_authors
-
-                    paper_keywords = _force_single_metadata_value_by_key(paper_metadata, 'citation_keywords')
-                    if paper_keywords is None or len(paper_keywords.strip()) > 0:
-                        paper_keywords = _force_single_metadata_value_by_key(paper_metadata, 'keywords')
-
-                    if paper_keywords is not None and len(paper_keywords.strip()) > 0:
-                        if ',' in paper_keywords:
-                            paper_keywords = paper_keywords.split(',')
-                        elif ';' in paper_keywords:
-                            paper_keywords = paper_keywords.split(';')
-                        paper_keywords = set([x.strip() for x in paper_keywords])
-
-                    if paper_keywords is not None and len(paper_keywords) > 0:
-                        paper.keywords = paper_keywords
-                    
-                    publication = None
-                    publication_title = None
-                    publication_category = None
-                    if 'citation_journal_title' in paper_metadata:
-                        publication_title = _force_single_metadata_value_by_key(paper_metadata, 'citation_journal_title')
-                        publication_category = 'Journal'
-                    elif 'citation_conference_title' in paper_metadata:
-                        publication_title = _force_single_metadata_value_by_key(paper_metadata, 'citation_conference_title')
-                        publication_category = 'Conference Proceedings'
-                    elif 'citation_book_title' in paper_metadata:
-                        publication_title = _force_single_metadata_value_by_key(paper_metadata, 'citation_book_title')
-                        publication_category = 'Book'
-
-                    if publication_title is not None and len(publication_title) > 0 and publication_title.lower() not in ['biorxiv', 'medrxiv', 'arxiv']:
-                    
-                        publication_issn = _force_single_metadata_value_by_key(paper_metadata, 'citation_issn')
-                        publication_isbn = _force_single_metadata_value_by_key(paper_metadata, 'citation_isbn')
-                        publication_publisher = _force_single_metadata_value_by_key(paper_metadata, 'citation_publisher')
-
-                        publication = Publication(publication_title, publication_isbn, publication_issn, publication_publisher, publication_category)
-                        
-                        if paper.publication is None:
-                            paper.publication = publication
-                        else:
-                            paper.publication.enrich(publication)
-
-                    paper_pdf_url = _force_single_metadata_value_by_key(paper_metadata, 'citation_pdf_url')
-                    
-                    if paper_pdf_url is not None: 
-                        paper.add_url(paper_pdf_url)
+                paper.title = paper_title
+
+                paper_doi = _force_single_metadata_value_by_key(paper_metadata, 'citation_doi')
+                if paper_doi is not None and len(paper_doi.strip()) > 0:
+                    paper.doi = paper_doi
+
+                paper_abstract = _force_single_metadata_value_by_key(paper_metadata, 'citation_abstract')
+                if paper_abstract is None:
+                    paper_abstract = _force_single_metadata_value_by_key(paper_metadata, 'DC.Description')
+                if paper_abstract is None:
+                    paper_abstract = _force_single_metadata_value_by_key(paper_metadata, 'description')
+
+                if paper_abstract is not None and len(paper_abstract.strip()) > 0:
+                    paper.abstract = paper_abstract
+
+                paper_authors = paper_metadata.get('citation_author', None)
+                if paper_authors is not None and not isinstance(paper_authors, list): # there is only one author
+                    paper_authors = [paper_authors]
+
+                if paper_authors is not None and len(paper_authors) > 0:
+                    paper.authors = paper_authors
+
+                paper_keywords = _force_single_metadata_value_by_key(paper_metadata, 'citation_keywords')
+                if paper_keywords is None or len(paper_keywords.strip()) > 0:
+                    paper_keywords = _force_single_metadata_value_by_key(paper_metadata, 'keywords')
+
+                if paper_keywords is not None and len(paper_keywords.strip()) > 0:
+                    if ',' in paper_keywords:
+                        paper_keywords = paper_keywords.split(',')
+                    elif ';' in paper_keywords:
+                        paper_keywords = paper_keywords.split(';')
+                    paper_keywords = set([x.strip() for x in paper_keywords])
+
+                if paper_keywords is not None and len(paper_keywords) > 0:
+                    paper.keywords = paper_keywords
+            
+                publication = None
+                publication_title = None
+                publication_category = None
+                if 'citation_journal_title' in paper_metadata:
+                    publication_title = _force_single_metadata_value_by_key(paper_metadata, 'citation_journal_title')
+                    publication_category = 'Journal'
+                elif 'citation_conference_title' in paper_metadata:
+                    publication_title = _force_single_metadata_value_by_key(paper_metadata, 'citation_conference_title')
+                    publication_category = 'Conference Proceedings'
+                elif 'citation_book_title' in paper_metadata:
+                    publication_title = _force_single_metadata_value_by_key(paper_metadata, 'citation_book_title')
+                    publication_category = 'Book'
+
+                if publication_title is not None and len(publication_title) > 0 and publication_title.lower() not in ['biorxiv', 'medrxiv', 'arxiv']:
+            
+                    publication_issn = _force_single_metadata_value_by_key(paper_metadata, 'citation_issn')
+                    publication_isbn = _force_single_metadata_value_by_key(paper_metadata, 'citation_isbn')
+                    publication_publisher = _force_single_metadata_value_by_key(paper_metadata, 'citation_publisher')
+
+                    publication = Publication(publication_title, publication_isbn, publication_issn, publication_publisher, publication_category)
+                
+                    if paper.publication is None:
+                        paper.publication = publication
+                    else:
+                        paper.publication.enrich(publication)
+
+                paper_pdf_url = _force_single_metadata_value_by_key(paper_metadata, 'citation_pdf_url')
+            
+                if paper_pdf_url is not None: 
+                    paper.add_url(paper_pdf_url)
 
         except Exception:  # pragma: no cover
             pass
 
+
+def _enrich(search: Search, scopus_api_token: Optional[str] = None, max_parallel_enrichments: Optional[int] = 1,
+            async_http: Optional[bool] = False):
+    """
+    Private method that enriches the search results based on paper metadata
+
+    Parameters
+    ----------
+    search : Search
+        A search instance
+    scopus_api_token : Optional[str], optional
+        A API token used to fetch data from Scopus database. If you don't have one go to https://dev.elsevier.com and get it, by default None
+    max_parallel_enrichments : Optional[int], optional
+        The max number of papers whose metadata will be fetched at the same time, by default 1 (i.e., no concurrency).
+        The requests still respect the rate limit defined for each host
+    async_http : Optional[bool], optional
+        If the papers metadata will be fetched by an asyncio HTTP session (it requires httpx) instead of worker threads, by default False
+    """
+
+    papers = list(search.papers)
+    urls_by_paper = {}
+
+    for paper in papers:
+        if paper.doi is not None:
+            urls_by_paper[paper] = [f'http://doi.org/{paper.doi}']
+        else:
+            urls_by_paper[paper] = list(paper.urls)
+
+    if async_http:
+        enriched_papers = []
+
+        def on_paper_metadata_list(paper: Paper, paper_metadata_list: List[dict]):
+            enriched_papers.append(paper)
+            logging.info(f'({len(enriched_papers)}/{len(papers)}) Enriching paper: {paper.title}')
+            _enrich_paper(paper, paper_metadata_list)
+            search.update_paper(paper)
+
+        # the papers are changed by this thread as the results arrive, as in the worker threads approach
+        asyncio.run(_get_papers_metadata_lists_async(papers, urls_by_paper, max_parallel_enrichments or 1, on_paper_metadata_list))
+    elif max_parallel_enrichments is None or max_parallel_enrichments <= 1:
+        for i, paper in enumerate(papers):
+            logging.info(f'({i+1}/{len(papers)}) Enriching paper: {paper.title}')
+            _enrich_paper(paper, _get_paper_metadata_list(urls_by_paper.get(paper)))
+            search.update_paper(paper)
+    else:
+        # only the metadata fetching runs on the worker threads, the papers are changed by this thread as the results arrive
+        with ThreadPoolExecutor(max_workers=max_parallel_enrichments) as executor:
+            paper_by_future = {executor.submit(_get_paper_metadata_list, urls_by_paper.get(paper)): paper for paper in papers}
+            for i, future in enumerate(as_completed(paper_by_future)):
+                paper = paper_by_future.get(future)
+                logging.info(f'({i+1}/{len(papers)}) Enriching paper: {paper.title}')
+                _enrich_paper(paper, future.result())
+                search.update_paper(paper)
+
     if scopus_api_token is not None:
 
         try:
@@ -275,15 +571,72 @@ def _database_safe_run(function: callable, search: Search, database_label: str):
     database_label : str
         A database label
     """
-    if not search.reached_its_limit(database_label):
+    if database_label in search.finished_databases:
+        logging.info(f'Skipping {database_label} database, its papers were already fetched')
+    elif not search.reached_its_limit(database_label):
         logging.info(f'Fetching papers from {database_label} database...')
         try:
             function()
+            with search.lock:
+                search.finished_databases.add(database_label)
+            search.checkpoint()
         except Exception:  # pragma: no cover
             logging.debug(
                 f'Error while fetching papers from {database_label} database', exc_info=True)
 
 
+def _run_stage(function: callable, search: Search, stage: str):
+    """
+    Private method that runs a search stage and checkpoints the search after it, 
+    the stage is skipped if it was already finished before the search was resumed
+
+    Parameters
+    ----------
+    function : callable
+        A function that will be called to run the stage
+    search : Search
+        A search instance
+    stage : str
+        The stage name
+    """
+
+    if stage in search.finished_stages:
+        logging.info(f'Skipping the {stage} stage, it was already finished')
+        return
+
+    function()
+
+    search.finished_stages.append(stage)
+    search.checkpoint()
+
+
+def _run_databases(database_runs: List[Tuple[callable, str]], search: Search, max_parallel_databases: Optional[int] = 1):
+    """
+    Private method that runs the database fetching functions, one after another or 
+    concurrently if more than one parallel database is allowed
+
+    Parameters
+    ----------
+    database_runs : List[Tuple[callable, str]]
+        A list of (function, database label) pairs, each function will be called for its database fetching
+    search : Search
+        A search instance
+    max_parallel_databases : Optional[int], optional
+        The max number of databases that will be fetched at the same time, by default 1 (i.e., no concurrency)
+    """
+
+    if max_parallel_databases is None or max_parallel_databases <= 1:
+        for function, database_label in database_runs:
+            _database_safe_run(function, search, database_label)
+    else:
+        # the search instance is thread-safe, so each database can feed it independently
+        with ThreadPoolExecutor(max_workers=max_parallel_databases) as executor:
+            futures = [executor.submit(_database_safe_run, function, search, database_label)
+                       for function, database_label in database_runs]
+            for future in futures:
+                future.result()
+
+
 def _sanitize_query(query: str) -> str:
     """
     Remove some invalid characters from the query
@@ -330,74 +683,15 @@ def _is_query_ok(query: str) -> bool:
         A boolean value indicating whether the query is valid or not
     """
 
-    if len(query) == 0 or len(query) < 3 or query[0] not in ['(', '['] or query[-1] not in [')', ']']:
-        return False
-    
-    # checking groups
-    group_characters = []
-    for character in query:
-        if character in ['(', ')']:
-            if len(group_characters) == 0:
-                group_characters.append(character)
-            else:
-                last_group_character = group_characters[-1]
-
-                if last_group_character == character:
-                    group_characters.append(character)
-                else:
-                    group_characters.pop()
-
-    if len(group_characters) > 0: 
-        # after the processing above, the list needs to be empty
-        return False
-    
-    # checking keywords and operators
-    #TODO: improve this query validation, 'cause this approach ignore the parenthesis
-    # and still can return True for invalid queries like [term a] O(R) [term b]
-
-    query_ok = True
-    inside_keyword = False
-    current_operator = None
-    current_keyword = None
-    valid_operators = [' AND ', ' OR ', ' AND NOT ']
-    transformed_query = query.replace('(','').replace(')','')
-    
-    for character in transformed_query:
-
-        if inside_keyword:
-            if character == ']': # closing a search term
-                if current_keyword is None or len(current_keyword.strip()) == 0:
-                    query_ok = False
-                    break
-                current_keyword = None
-                inside_keyword = False
-            else:
-                if current_keyword is None:
-                    current_keyword = character
-                else:
-                    current_keyword += character
-        else:
-            if character == '[': # opening a search term
-                if current_operator is not None and current_operator not in valid_operators:
-                    query_ok = False
-                    break
-                current_operator = None
-                inside_keyword = True
-            else:
-                if current_operator is None:
-                    current_operator = character
-                else:
-                    current_operator += character
-
-    # after the processing above, query_ok needs to be True, 
-    # and current_keyword and current_operator need to be null
-    return query_ok and current_keyword is None and current_operator is None
+    return query_util.is_valid(query)
 
 
 def search(outputpath: str, query: Optional[str] = None, since: Optional[datetime.date] = None, until: Optional[datetime.date] = None,
         limit: Optional[int] = None, limit_per_database: Optional[int] = None, databases: Optional[List[str]] = None,
         publication_types: Optional[List[str]] = None, scopus_api_token: Optional[str] = None, ieee_api_token: Optional[str] = None,
-        proxy: Optional[str] = None, verbose: Optional[bool] = False):
+        proxy: Optional[str] = None, verbose: Optional[bool] = False, max_parallel_databases: Optional[int] = 1,
+        cache_dir: Optional[str] = None, cache_ttl: Optional[float] = None, max_parallel_enrichments: Optional[int] = 1,
+        resume: Optional[bool] = False, rxiv_mirror_dir: Optional[str] = None, async_http: Optional[bool] = False):
     """
     When you have a query and needs to get papers using it, this is the method that you'll need to call.
     This method will find papers from some databases based on the provided query.
@@ -405,7 +699,9 @@ def search(outputpath: str, query: Optional[str] = None, since: Optional[datetim
     Parameters
     ----------
     outputpath : str
-        A valid file path where the search result file will be placed
+        A valid file path where the search result file will be placed,
+        a SQLite database is used when the path has a .db, .sqlite or .sqlite3 extension, a JSON Lines file 
+        (updated as the papers are collected) is used when the path has a .jsonl extension, otherwise a JSON file is used
 
     query : str, optional
 
@@ -453,34 +749,89 @@ def search(outputpath: str, query: Optional[str] = None, since: Optional[datetim
 
     verbose : Optional[bool], optional
         If you wanna a verbose logging
+
+    max_parallel_databases : Optional[int], optional
+        The max number of databases that will be searched at the same time, 
+        by default 1 (i.e., the databases are searched one after another)
+
+    cache_dir : Optional[str], optional
+        A directory path where the HTTP responses will be cached, so a repeated search won't fetch again 
+        the data that was already fetched. If not provided the cache won't be used, by default None
+
+    cache_ttl : Optional[float], optional
+        The time to live of the cached responses in seconds, if not provided the cached responses never expire, by default None
+
+    max_parallel_enrichments : Optional[int], optional
+        The max number of papers that will be enriched at the same time, the requests still respect the rate limit of each host,
+        by default 1 (i.e., the papers are enriched one after another)
+
+    resume : Optional[bool], optional
+        If you wanna resume an interrupted search, the search is saved on the output path after each fetched page
+        and after each finished stage, so using this flag the search continues from its last checkpoint 
+        without fetching again the data that was already fetched. The search parameters are loaded from the checkpoint, by default False
+
+    rxiv_mirror_dir : Optional[str], optional
+        A directory path with local mirrors of medRxiv and bioRxiv (see findpapers.sync_mirror). If it's provided, 
+        the query is evaluated on the mirrors instead of the online search of these databases, by default None
+
+    async_http : Optional[bool], optional
+        If the papers will be enriched by an asyncio HTTP session instead of worker threads, so many requests can be in flight
+        without a thread for each one. It requires httpx (pip install findpapers[async]), and it cannot be used with cache_dir
+        since the async session doesn't use the responses cache, by default False
     """
 
     common_util.logging_initialize(verbose)
 
     if proxy is not None:
         os.environ['FINDPAPERS_PROXY'] = proxy
+
+    if async_http:
+        async_requests_util.check_availability()
+        if cache_dir is not None:
+            # the cached responses would be silently ignored, so a repeated search would fetch them again
+            raise ValueError('The async HTTP session doesn\'t use the responses cache, so async_http cannot be used with cache_dir')
+
+    if cache_dir is not None:
+        DefaultSession().enable_cache(cache_dir, cache_ttl)
     
     logging.info('Let\'s find some papers, this process may take a while...')
 
-    if databases is not None:
-        databases = [x.lower() for x in databases]
-    
-    if publication_types is not None:
-        publication_types = [x.lower().strip() for x in publication_types]
-        for publication_type in publication_types:
-            if publication_type not in ['journal', 'conference proceedings', 'book', 'other']:
-                raise ValueError(f'Invalid publication type: {publication_type}')
+    search = None
 
-    if query is None:
-        query = os.getenv('FINDPAPERS_QUERY')
+    if resume and os.path.exists(outputpath) and os.path.getsize(outputpath) > 0:
+        search = persistence_util.load(outputpath)
+        if not search.has_checkpoint():
+            logging.info('The search was already finished, there\'s nothing to resume')
+            return
+        logging.info(f'Resuming the search from the last checkpoint, {len(search.papers)} papers were already collected')
 
-    if query is not None:
-        query = _sanitize_query(query)
+    if search is None:
 
-    if query is None or not _is_query_ok(query):
-        raise ValueError('Invalid query format')
+        if databases is not None:
+            databases = [x.lower() for x in databases]
+        
+        if publication_types is not None:
+            publication_types = [x.lower().strip() for x in publication_types]
+            for publication_type in publication_types:
+                if publication_type not in ['journal', 'conference proceedings', 'book', 'other']:
+                    raise ValueError(f'Invalid publication type: {publication_type}')
 
-    common_util.check_write_access(outputpath)
+        if query is None:
+            query = os.getenv('FINDPAPERS_QUERY')
+
+        if query is not None:
+            query = _sanitize_query(query)
+
+        if query is None:
+            raise ValueError('Invalid query format')
+
+        search = Search(query, since, until, limit, limit_per_database, databases=databases, publication_types=publication_types)
+
+        # the query is parsed once and its tree is cached on the search, to be compiled by each searcher.
+        # A QueryError (a ValueError) with the position of the problem is raised if the query is invalid
+        search.query_tree
+
+        common_util.check_write_access(outputpath)
 
     if ieee_api_token is None:
         ieee_api_token = os.getenv('FINDPAPERS_IEEE_API_TOKEN')
@@ -488,58 +839,86 @@ def search(outputpath: str, query: Optional[str] = None, since: Optional[datetim
     if scopus_api_token is None:
         scopus_api_token = os.getenv('FINDPAPERS_SCOPUS_API_TOKEN')
 
-    search = Search(query, since, until, limit, limit_per_database, databases=databases, publication_types=publication_types)
+    # the search is saved after each fetched page and each finished stage, so it can be resumed if it's interrupted
+    jsonl_writer = None
+    if persistence_util.get_format(outputpath) == 'jsonl':
+        # each collected paper is appended to the output file as soon as it's added to the search
+        jsonl_writer = jsonl_util.JsonlWriter(outputpath, search)
+        search.checkpoint_callback = jsonl_writer.checkpoint
+        search.paper_callback = jsonl_writer.write_paper
+        search.removed_paper_callback = jsonl_writer.remove_paper
+    else:
+        # the whole search is rewritten, so it's saved from a snapshot while the searchers keep adding papers
+        search.checkpoint_callback = lambda x: persistence_util.save(x.get_snapshot(), outputpath)
+
+    # the full-text index is kept up to date as the papers are collected, enriched, merged and removed,
+    # and it's saved next to the output file, so the query command doesn't need to index the papers again
+    search.create_index()
+
+    databases = search.databases
+
+    database_runs = []
 
     if databases is None or arxiv_searcher.DATABASE_LABEL.lower() in databases:
-        _database_safe_run(lambda: arxiv_searcher.run(search),
-                        search, arxiv_searcher.DATABASE_LABEL)
+        database_runs.append((lambda: arxiv_searcher.run(search), arxiv_searcher.DATABASE_LABEL))
     
     if databases is None or pubmed_searcher.DATABASE_LABEL.lower() in databases:
-        _database_safe_run(lambda: pubmed_searcher.run(search),
-                        search, pubmed_searcher.DATABASE_LABEL)
+        database_runs.append((lambda: pubmed_searcher.run(search), pubmed_searcher.DATABASE_LABEL))
 
     if databases is None or acm_searcher.DATABASE_LABEL.lower() in databases:
-        _database_safe_run(lambda: acm_searcher.run(search),
-                        search, acm_searcher.DATABASE_LABEL)
+        database_runs.append((lambda: acm_searcher.run(search), acm_searcher.DATABASE_LABEL))
 
     if ieee_api_token is not None:
         if databases is None or ieee_searcher.DATABASE_LABEL.lower() in databases:
-            _database_safe_run(lambda: ieee_searcher.run(
-                search, ieee_api_token), search, ieee_searcher.DATABASE_LABEL)
+            database_runs.append((lambda: ieee_searcher.run(search, ieee_api_token), ieee_searcher.DATABASE_LABEL))
     else:
         logging.info('IEEE API token not found, skipping search on this database')
 
     if scopus_api_token is not None:
         if databases is None or scopus_searcher.DATABASE_LABEL.lower() in databases:
-            _database_safe_run(lambda: scopus_searcher.run(
-                search, scopus_api_token), search, scopus_searcher.DATABASE_LABEL)
+            database_runs.append((lambda: scopus_searcher.run(search, scopus_api_token), scopus_searcher.DATABASE_LABEL))
     else:
         logging.info('Scopus API token not found, skipping search on this database')
 
+    medrxiv_mirror_path = None
+    biorxiv_mirror_path = None
+    if rxiv_mirror_dir is not None:
+        medrxiv_mirror_path = mirror_util.get_mirror_path(medrxiv_searcher.DATABASE_LABEL, rxiv_mirror_dir)
+        biorxiv_mirror_path = mirror_util.get_mirror_path(biorxiv_searcher.DATABASE_LABEL, rxiv_mirror_dir)
+
     if databases is None or medrxiv_searcher.DATABASE_LABEL.lower() in databases:
-        _database_safe_run(lambda: medrxiv_searcher.run(search),
-                        search, medrxiv_searcher.DATABASE_LABEL)
+        database_runs.append((lambda: medrxiv_searcher.run(search, medrxiv_mirror_path), medrxiv_searcher.DATABASE_LABEL))
 
     if databases is None or biorxiv_searcher.DATABASE_LABEL.lower() in databases:
-        _database_safe_run(lambda: biorxiv_searcher.run(search),
-                        search, biorxiv_searcher.DATABASE_LABEL)
+        database_runs.append((lambda: biorxiv_searcher.run(search, biorxiv_mirror_path), biorxiv_searcher.DATABASE_LABEL))
+
+    _run_stage(lambda: _run_databases(database_runs, search, max_parallel_databases), search, 'collect')
 
     logging.info('Enriching results...')
 
-    _enrich(search, scopus_api_token)
+    _run_stage(lambda: _enrich(search, scopus_api_token, max_parallel_enrichments, async_http), search, 'enrich')
 
     logging.info('Filtering results...')
 
-    _filter(search)
+    _run_stage(lambda: _filter(search), search, 'filter')
 
     logging.info('Finding and merging duplications...')
 
-    search.merge_duplications()
+    _run_stage(lambda: search.merge_duplications(), search, 'dedup')
 
     logging.info('Flagging potentially predatory publications...')
 
-    _flag_potentially_predatory_publications(search)
+    _run_stage(lambda: _flag_potentially_predatory_publications(search), search, 'flag')
 
     logging.info(f'It\'s finally over! {len(search.papers)} papers retrieved. Good luck with your research :)')
 
+    search.checkpoint_callback = None
+    search.paper_callback = None
+    search.removed_paper_callback = None
+    search.clear_checkpoint()
+
+    if jsonl_writer is not None:
+        jsonl_writer.close()
+
     persistence_util.save(search, outputpath)
+    query_tool.save_index(search.index, outputpath)
@@ -0,0 +1,260 @@
+import os
+import random
+import asyncio
+import logging
+import contextlib
+from typing import AsyncIterator, Optional
+from urllib.parse import urlparse
+from findpapers.utils.requests_util import DefaultSession, USER_AGENTS
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 10
+DEFAULT_TIMEOUT = 20
+
+
+def check_availability():
+    """
+    Check if the async HTTP session can be used
+
+    Raises
+    ------
+    ImportError
+        httpx isn't installed
+    """
+
+    if httpx is None:
+        raise ImportError('The async HTTP session requires httpx, you can install it using: pip install findpapers[async]')
+
+
+class AsyncSession():
+
+    """
+    asyncio counterpart of the DefaultSession, so many requests can be in flight from a single thread. It requires httpx.
+
+    As the DefaultSession, when a proxy is provided (by the FINDPAPERS_PROXY environment variable) and a response isn't ok,
+    the request is tried one more time without the proxy, and every request respects the rate limit defined for its host
+    (the limits are shared with the DefaultSession). The number of concurrent connections is limited for each host.
+    Unlike the DefaultSession, a failed request raises an httpx.HTTPError, so it can be retried (e.g. by common_util.try_success_async).
+    The DefaultSession cache isn't used by this session.
+
+    An instance must be used by a single event loop, and closed after its use (e.g. using "async with AsyncSession() as session")
+    """
+
+    def __init__(self, max_connections: Optional[int] = DEFAULT_MAX_CONNECTIONS,
+                 max_connections_per_host: Optional[int] = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 timeout: Optional[float] = DEFAULT_TIMEOUT):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        max_connections : Optional[int], optional
+            The max number of concurrent connections, by default 100
+        max_connections_per_host : Optional[int], optional
+            The max number of concurrent connections to each host, by default 10
+        timeout : Optional[float], optional
+            The requests timeout in seconds, by default 20
+
+        Raises
+        ------
+        ImportError
+            httpx isn't installed
+        """
+
+        check_availability()
+
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        headers = {'User-Agent': random.choice(USER_AGENTS)}
+
+        # the clients are tried in this order, so a request through the proxy falls back to a direct request
+        self.clients = []
+
+        proxy = os.getenv('FINDPAPERS_PROXY')
+        if proxy is not None:
+            self.clients.append(httpx.AsyncClient(headers=headers, limits=limits, timeout=timeout, follow_redirects=True, proxy=proxy))
+
+        self.clients.append(httpx.AsyncClient(headers=headers, limits=limits, timeout=timeout, follow_redirects=True, trust_env=False))
+
+        self.max_connections_per_host = max_connections_per_host
+        self.semaphore_by_host = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """
+        Close the session connections
+        """
+
+        for client in self.clients:
+            await client.aclose()
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """
+        Private method that returns the semaphore that limits the concurrent connections to the URL's host
+
+        Parameters
+        ----------
+        url : str
+            A URL
+
+        Returns
+        -------
+        asyncio.Semaphore
+            The host semaphore
+        """
+
+        host = (urlparse(url).hostname or '').lower()
+
+        if host not in self.semaphore_by_host:
+            self.semaphore_by_host[host] = asyncio.Semaphore(self.max_connections_per_host)
+
+        return self.semaphore_by_host.get(host)
+
+    async def wait_for_host(self, url: str):
+        """
+        Wait, without blocking the event loop, until a request to the URL's host is allowed by its rate limit
+
+        Parameters
+        ----------
+        url : str
+            The URL that will be requested
+        """
+
+        bucket = DefaultSession().get_bucket(url)
+
+        if bucket is not None:
+            wait_time = bucket.reserve()
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+
+    async def request(self, method: str, url: str, **kwargs) -> 'httpx.Response':
+        """
+        Make a request, the response content is completely read
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method
+        url : str
+            The URL
+        kwargs
+            The httpx request arguments
+
+        Returns
+        -------
+        httpx.Response
+            The response
+
+        Raises
+        ------
+        httpx.HTTPError
+            The request failed, or its response isn't successful, using every client
+        """
+
+        async with self._get_host_semaphore(url):
+
+            response = None
+            error = None
+
+            for client in self.clients:
+
+                await self.wait_for_host(url)
+
+                try:
+                    response = await client.request(method, url, **kwargs)
+                    error = None
+                except httpx.HTTPError as e:
+                    logging.debug(e, exc_info=True)
+                    response = None
+                    error = e
+
+                if response is not None and response.is_success:
+                    return response
+
+        if error is not None:
+            raise error
+
+        response.raise_for_status()
+        return response  # pragma: no cover
+
+    async def get(self, url: str, **kwargs) -> 'httpx.Response':
+        """
+        Make a GET request, see request for more details
+        """
+
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> 'httpx.Response':
+        """
+        Make a POST request, see request for more details
+        """
+
+        return await self.request('POST', url, **kwargs)
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator['httpx.Response']:
+        """
+        Make a request whose response content is read on demand (e.g. using response.aiter_bytes()),
+        the connection is held until the context is exited
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method
+        url : str
+            The URL
+        kwargs
+            The httpx request arguments
+
+        Yields
+        -------
+        httpx.Response
+            The response
+
+        Raises
+        ------
+        httpx.HTTPError
+            The request failed, or its response isn't successful, using every client
+        """
+
+        async with self._get_host_semaphore(url):
+
+            async with contextlib.AsyncExitStack() as stack:
+
+                response = None
+                error = None
+
+                for client in self.clients:
+
+                    await self.wait_for_host(url)
+
+                    try:
+                        response = await stack.enter_async_context(client.stream(method, url, **kwargs))
+                        error = None
+                    except httpx.HTTPError as e:
+                        logging.debug(e, exc_info=True)
+                        response = None
+                        error = e
+
+                    if response is not None and response.is_success:
+                        break
+
+                    if response is not None:
+                        await response.aclose()  # the connection is released before the next attempt
+
+                if error is not None:
+                    raise error
+
+                response.raise_for_status()
+
+                yield response
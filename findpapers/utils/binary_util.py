@@ -0,0 +1,188 @@
+import gc
+import contextlib
+import io
+import os
+import json
+import gzip
+from typing import Optional
+from findpapers.models.search import Search
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+# A binary search file starts with a magic header, used to detect its format regardless of the file extension,
+# followed by the format version, the compression method and the compact JSON bytes of Search.to_dict
+BINARY_EXTENSION = '.fpz'
+MAGIC_HEADER = b'FINDPAPERS'
+VERSION = 1
+COMPRESSION_METHODS = {
+    None: 0,
+    'gzip': 1
+}
+GZIP_COMPRESSION_LEVEL = 1  # the higher levels are much slower and only slightly smaller
+
+
+@contextlib.contextmanager
+def _paused_gc():
+    """
+    Private context manager that pauses the garbage collector. It's used while the whole search is converted,
+    since the collector would traverse the new objects again and again, but none of them is garbage
+    """
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+
+    try:
+        yield
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _dumps(obj: dict) -> bytes:
+    """
+    Private method that serializes a dict to compact JSON bytes, using orjson when it's available
+
+    Parameters
+    ----------
+    obj : dict
+        A JSON serializable dict
+
+    Returns
+    -------
+    bytes
+        The JSON bytes
+    """
+
+    if orjson is not None:
+        return orjson.dumps(obj)
+
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')  # pragma: no cover
+
+
+def _loads(data: bytes) -> dict:
+    """
+    Private method that deserializes JSON bytes, using orjson when it's available
+
+    Parameters
+    ----------
+    data : bytes
+        The JSON bytes
+
+    Returns
+    -------
+    dict
+        The deserialized dict
+    """
+
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data.decode('utf-8'))  # pragma: no cover
+
+
+def is_binary_file(path: str) -> bool:
+    """
+    Check if a file is a binary search file using its magic header
+
+    Parameters
+    ----------
+    path : str
+        A file path
+
+    Returns
+    -------
+    bool
+        True if the file exists and starts with the magic header
+    """
+
+    if not os.path.isfile(path):
+        return False
+
+    with open(path, 'rb') as binaryfile:
+        return binaryfile.read(len(MAGIC_HEADER)) == MAGIC_HEADER
+
+
+def save(search: Search, outputpath: str, compression: Optional[str] = 'gzip'):
+    """
+    Method used to save a search result in a compact binary representation
+
+    Parameters
+    ----------
+    search : Search
+        A Search instance
+    outputpath : str
+        A valid file path used to save the search results
+    compression : Optional[str], optional
+        The compression method (gzip or None), by default 'gzip'
+
+    Raises
+    ------
+    ValueError
+        Unsupported compression method
+    """
+
+    if compression not in COMPRESSION_METHODS:
+        raise ValueError(f'Unsupported compression method: {compression}')
+
+    with _paused_gc():
+        data = _dumps(Search.to_dict(search))
+
+    if compression == 'gzip':
+        compressed_data = io.BytesIO()
+        # the timestamp is fixed, so saving the same search twice gives the same bytes
+        with gzip.GzipFile(fileobj=compressed_data, mode='wb', compresslevel=GZIP_COMPRESSION_LEVEL, mtime=0) as gzipfile:
+            gzipfile.write(data)
+        data = compressed_data.getvalue()
+
+    temp_outputpath = f'{outputpath}.tmp'
+
+    with open(temp_outputpath, 'wb') as binaryfile:
+        binaryfile.write(MAGIC_HEADER + bytes([VERSION, COMPRESSION_METHODS.get(compression)]))
+        binaryfile.write(data)
+
+    os.replace(temp_outputpath, outputpath)
+
+
+def load(search_path: str) -> Search:
+    """
+    Method used to load a search result from a binary representation
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path of a binary search file
+
+    Returns
+    -------
+    Search
+        The loaded search
+
+    Raises
+    ------
+    ValueError
+        Invalid binary search file
+    """
+
+    with open(search_path, 'rb') as binaryfile:
+        header = binaryfile.read(len(MAGIC_HEADER) + 2)
+        data = binaryfile.read()
+
+    if len(header) < len(MAGIC_HEADER) + 2 or header[:len(MAGIC_HEADER)] != MAGIC_HEADER:
+        raise ValueError(f'{search_path} isn\'t a binary search file')
+
+    version, compression_method = header[len(MAGIC_HEADER):]
+
+    if version > VERSION:
+        raise ValueError(f'Unsupported binary search file version: {version}, please upgrade findpapers')
+
+    if compression_method == COMPRESSION_METHODS.get('gzip'):
+        data = gzip.decompress(data)
+    elif compression_method != COMPRESSION_METHODS.get(None):
+        raise ValueError(f'Unsupported compression method: {compression_method}')
+
+    with _paused_gc():
+        return Search.from_dict(_loads(data))
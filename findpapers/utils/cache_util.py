@@ -0,0 +1,316 @@
+import io
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import requests
+from typing import Optional
+from urllib.parse import urlparse
+from requests.structures import CaseInsensitiveDict
+
+
+DEFAULT_CACHE_FILENAME = 'findpapers-cache.sqlite'
+DEFAULT_CACHE_MAX_SIZE = 1024 ** 3  # 1 GB
+
+
+class CachingStream():
+
+    """
+    Wrapper of a streamed response raw content that stores the response in the cache 
+    when its content is completely read. A partially read response (e.g. only the HTML head) is never cached
+    as a complete response, but the read bytes can be cached as a partial response when the stream is closed
+    """
+
+    def __init__(self, raw, on_complete: callable, on_partial: Optional[callable] = None):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        raw : file-like object
+            The response raw content
+        on_complete : callable
+            A function that will be called with the whole content after it is completely read
+        on_partial : Optional[callable], optional
+            A function that will be called with the read bytes if the stream is closed before the content
+            is completely read, by default None (i.e., a partially read content isn't stored)
+        """
+
+        self.raw = raw
+        self.on_complete = on_complete
+        self.on_partial = on_partial
+        self.buffer = io.BytesIO()
+        self.completed = False
+
+        if hasattr(raw, 'decode_content'):
+            raw.decode_content = True  # the cached content must be already decoded
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        """
+        Read the content
+
+        Parameters
+        ----------
+        amt : Optional[int], optional
+            The max number of bytes to be read, if not provided the whole content is read, by default None
+
+        Returns
+        -------
+        bytes
+            The read bytes
+        """
+
+        data = self.raw.read(amt)
+
+        if not self.completed:
+            self.buffer.write(data)
+            if amt is None or len(data) == 0:
+                self.completed = True
+                self.on_complete(self.buffer.getvalue())
+                self.buffer = None
+
+        return data
+
+    def close(self):
+        if not self.completed and self.on_partial is not None and self.buffer.tell() > 0:
+            self.completed = True
+            self.on_partial(self.buffer.getvalue())
+            self.buffer = None
+        self.raw.close()
+
+    def release_conn(self):
+        if hasattr(self.raw, 'release_conn'):
+            self.raw.release_conn()
+
+
+class ResponseCache():
+
+    """
+    Persistent HTTP response cache stored in a local SQLite database.
+    The responses are keyed by request method, URL and body, and the least recently used ones
+    are evicted when the cache exceeds its max size.
+    The beginning of a response that was only partially read (e.g. a HTML head) is stored by a partial key,
+    so it's only returned to the requests that accept a partial response
+    """
+
+    def __init__(self, cache_dir: str, ttl: Optional[float] = None, max_size: Optional[int] = DEFAULT_CACHE_MAX_SIZE):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        cache_dir : str
+            A directory path where the cache database will be placed
+        ttl : Optional[float], optional
+            The default time to live of the cached responses in seconds, if None the responses never expire, by default None
+        max_size : Optional[int], optional
+            The max size in bytes of the cached contents, by default 1 GB
+        """
+
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+        self.filepath = os.path.join(cache_dir, DEFAULT_CACHE_FILENAME)
+        self.ttl = ttl
+        self.ttl_by_host = {}
+        self.max_size = max_size
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(self.filepath, check_same_thread=False)
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                host TEXT,
+                url TEXT,
+                status_code INTEGER,
+                headers TEXT,
+                content BLOB,
+                size INTEGER,
+                created_at REAL,
+                accessed_at REAL
+            )
+        ''')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+        self.connection.commit()
+
+        self.size = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def set_ttl(self, host: str, ttl: Optional[float] = None):
+        """
+        Define a specific time to live for the responses of a host
+
+        Parameters
+        ----------
+        host : str
+            The host name (e.g. export.arxiv.org)
+        ttl : Optional[float], optional
+            The time to live in seconds, if None the host will use the default cache TTL, by default None
+        """
+
+        if ttl is None:
+            self.ttl_by_host.pop(host.lower(), None)
+        else:
+            self.ttl_by_host[host.lower()] = ttl
+
+    @staticmethod
+    def get_key(method: str, url: str, request_kwargs: dict, partial: Optional[bool] = False) -> str:
+        """
+        Get the cache key of a request
+
+        Parameters
+        ----------
+        method : str
+            The request method
+        url : str
+            The request URL
+        request_kwargs : dict
+            The request keyword arguments, only the params and body arguments are used
+        partial : Optional[bool], optional
+            If it's the key of a partially read response, by default False
+
+        Returns
+        -------
+        str
+            A key that represents the request
+        """
+
+        key_data = [method.upper(), url, request_kwargs.get('params'), request_kwargs.get('data'), request_kwargs.get('json')]
+
+        if partial:
+            key_data.append('partial')
+
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, method: str, url: str, request_kwargs: dict, partial: Optional[bool] = False) -> requests.Response:
+        """
+        Get a cached response
+
+        Parameters
+        ----------
+        method : str
+            The request method
+        url : str
+            The request URL
+        request_kwargs : dict
+            The request keyword arguments
+        partial : Optional[bool], optional
+            If a partially read response is accepted when there's no complete one, by default False
+
+        Returns
+        -------
+        requests.Response
+            The cached response, or None if there's no valid cached response for the request
+        """
+
+        response = self._get(self.get_key(method, url, request_kwargs))
+
+        if response is None and partial:
+            response = self._get(self.get_key(method, url, request_kwargs, True))
+
+        return response
+
+    def _get(self, key: str) -> requests.Response:
+        """
+        Private method that gets a cached response by its key
+
+        Parameters
+        ----------
+        key : str
+            The cache key
+
+        Returns
+        -------
+        requests.Response
+            The cached response, or None if there's no valid cached response for the key
+        """
+
+        with self.lock:
+
+            row = self.connection.execute(
+                'SELECT host, url, status_code, headers, content, size, created_at FROM responses WHERE key = ?', (key,)).fetchone()
+
+            if row is None:
+                return None
+
+            host, response_url, status_code, headers, content, size, created_at = row
+            ttl = self.ttl_by_host.get(host, self.ttl)
+
+            if ttl is not None and time.time() - created_at > ttl:
+                self.connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self.connection.commit()
+                self.size -= size
+                return None
+
+            self.connection.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self.connection.commit()
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = response_url
+        response._content = content
+        response.raw = io.BytesIO(content)  # allowing the cached response to be consumed as a stream too
+
+        return response
+
+    def set(self, method: str, url: str, request_kwargs: dict, response: requests.Response, content: Optional[bytes] = None,
+            partial: Optional[bool] = False):
+        """
+        Store a response in the cache, evicting the least recently used ones if the cache exceeds its max size
+
+        Parameters
+        ----------
+        method : str
+            The request method
+        url : str
+            The request URL
+        request_kwargs : dict
+            The request keyword arguments
+        response : requests.Response
+            The response to be cached
+        content : Optional[bytes], optional
+            The response content, if not provided the response content will be read, by default None
+        partial : Optional[bool], optional
+            If the content is only the beginning of the response, by default False
+        """
+
+        key = self.get_key(method, url, request_kwargs, partial)
+        if content is None:
+            content = response.content
+        size = len(content)
+        now = time.time()
+
+        if self.max_size is not None and size > self.max_size:
+            return
+
+        with self.lock:
+
+            row = self.connection.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                self.size -= row[0]
+
+            self.connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                    (key, (urlparse(url).hostname or '').lower(), response.url, response.status_code,
+                                     json.dumps(dict(response.headers)), content, size, now, now))
+            self.size += size
+
+            if self.max_size is not None and self.size > self.max_size:
+                for evicted_key, evicted_size in self.connection.execute(
+                        'SELECT key, size FROM responses ORDER BY accessed_at').fetchall():
+                    if self.size <= self.max_size:
+                        break
+                    self.connection.execute('DELETE FROM responses WHERE key = ?', (evicted_key,))
+                    self.size -= evicted_size
+
+            self.connection.commit()
+
+    def close(self):
+        """
+        Close the cache database connection
+        """
+
+        with self.lock:
+            self.connection.close()
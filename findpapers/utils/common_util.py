@@ -1,11 +1,13 @@
 import time
+import asyncio
 import re
 import traceback
 import logging
 import os
+import sys
 import subprocess
 import threading
-from typing import Optional
+from typing import Any, Optional
 from pathlib import Path
 
 
@@ -48,7 +50,8 @@ def try_success(function, attempts: Optional[int] = 1, pre_delay: Optional[int]
     This function will try N times to succeed, by provided number of attempts.
 
     Note: you can provide a delay time for pre and post function call,
-    so the total delayed time between calls is pre_delay + next_try_delay
+    so the total delayed time between calls is pre_delay + next_try_delay.
+    The requests politeness is handled by the DefaultSession rate limits, so you don't need to use these delays for it
 
     Parameters
     ----------
@@ -73,8 +76,43 @@ def try_success(function, attempts: Optional[int] = 1, pre_delay: Optional[int]
         return None
     except Exception as e:
         logging.debug(e, exc_info=True)
-        time.sleep(next_try_delay)
-        return try_success(function, attempts-1)
+        if attempts > 1:
+            time.sleep(next_try_delay)
+        return try_success(function, attempts-1, next_try_delay=next_try_delay)
+
+
+async def try_success_async(function, attempts: Optional[int] = 1, pre_delay: Optional[int] = 0, next_try_delay: Optional[int] = 3):
+    """
+    Asynchronous version of try_success, the delays don't block the event loop
+
+    Parameters
+    ----------
+    function : a coroutine function
+            A function that returns an awaitable, it will be tried N times
+    attempts : int, optional
+            number of attempts, by default 1
+    pre_delay : int, optional
+            The delay before each function attempts in seconds, by default 0
+    next_try_delay : int, optional
+            The delay between function attempts in seconds, by default 3
+
+    Returns
+    -------
+    Object or None
+            This method returns the returned value of function or None if function raise Exception in all attempts
+    """
+
+    await asyncio.sleep(pre_delay)
+
+    for attempt in range(attempts):
+        try:
+            return await function()
+        except Exception as e:
+            logging.debug(e, exc_info=True)
+            if attempt < attempts - 1:
+                await asyncio.sleep(next_try_delay)
+
+    return None
 
 
 def clear(): # pragma: no cover
@@ -139,3 +177,21 @@ class ThreadSafeSingletonMetaclass(type):
                 if cls not in cls._instances:
                     cls._instances[cls] = super(ThreadSafeSingletonMetaclass, cls).__call__(*args, **kwargs)
         return cls._instances[cls]
+
+
+def intern(value: Any) -> Any:
+    """
+    Intern a string, so all the equal strings (e.g. an author name found in many papers) share the same object
+
+    Parameters
+    ----------
+    value : Any
+        A value
+
+    Returns
+    -------
+    Any
+        The interned string, or the provided value if it isn't a string
+    """
+
+    return sys.intern(value) if type(value) is str else value
@@ -0,0 +1,412 @@
+import functools
+import edlib
+from typing import Any, Hashable, Iterable, List, Optional, Set, Tuple
+
+
+def normalize_doi(doi: Optional[str]) -> Optional[str]:
+    """
+    Get a normalized version of a DOI, that can be used to compare DOIs provided by different databases
+
+    Parameters
+    ----------
+    doi : Optional[str]
+        A DOI, or None
+
+    Returns
+    -------
+    Optional[str]
+        The lowercased DOI without the resolver prefix, or None if the DOI is not defined
+    """
+
+    if doi is None:
+        return None
+
+    doi = doi.strip().lower()
+
+    for prefix in ['https://doi.org/', 'http://doi.org/', 'https://dx.doi.org/', 'http://dx.doi.org/', 'doi:']:
+        if doi.startswith(prefix):
+            doi = doi[len(prefix):]
+            break
+
+    return doi if len(doi) > 0 else None
+
+
+def get_max_edit_distance(title_1: str, title_2: str, similarity_threshold: float) -> int:
+    """
+    Get the max edit distance between two titles to be considered similar
+
+    Parameters
+    ----------
+    title_1 : str
+        A title
+    title_2 : str
+        Another title
+    similarity_threshold : float
+        A value between 0 and 1 that represents the min similarity between the titles
+
+    Returns
+    -------
+    int
+        The max valid edit distance
+    """
+
+    return int(max(len(title_1), len(title_2)) * (1 - similarity_threshold))
+
+
+def is_similar(title_1: str, title_2: str, similarity_threshold: float) -> bool:
+    """
+    Check if two titles are similar using the edit distance between them
+
+    Parameters
+    ----------
+    title_1 : str
+        A title
+    title_2 : str
+        Another title
+    similarity_threshold : float
+        A value between 0 and 1 that represents the min similarity between the titles
+
+    Returns
+    -------
+    bool
+        True if the titles edit distance isn't greater than the max edit distance given by the similarity threshold
+    """
+
+    max_edit_distance = get_max_edit_distance(title_1, title_2, similarity_threshold)
+
+    if abs(len(title_1) - len(title_2)) > max_edit_distance:
+        return False
+
+    # edlib stops as soon as the distance exceeds k, returning -1
+    return edlib.align(title_1, title_2, k=max_edit_distance)['editDistance'] != -1
+
+
+class DisjointSet():
+
+    """
+    Union-find structure used to group items into clusters
+    """
+
+    def __init__(self, items: Optional[Iterable[Hashable]] = None):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        items : Optional[Iterable[Hashable]], optional
+            The initial items, each one in its own cluster, by default None
+        """
+
+        self.parent_by_item = {}
+        self.size_by_item = {}
+
+        for item in items if items is not None else []:
+            self.add(item)
+
+    def add(self, item: Hashable):
+        """
+        Add an item in its own cluster, if it isn't already present
+
+        Parameters
+        ----------
+        item : Hashable
+            An item
+        """
+
+        if item not in self.parent_by_item:
+            self.parent_by_item[item] = item
+            self.size_by_item[item] = 1
+
+    def find(self, item: Hashable) -> Hashable:
+        """
+        Get the root item of the item cluster
+
+        Parameters
+        ----------
+        item : Hashable
+            An item
+
+        Returns
+        -------
+        Hashable
+            The root item of the cluster
+        """
+
+        root = item
+        while self.parent_by_item[root] != root:
+            root = self.parent_by_item[root]
+
+        # path compression
+        while self.parent_by_item[item] != root:
+            self.parent_by_item[item], item = root, self.parent_by_item[item]
+
+        return root
+
+    def union(self, item_1: Hashable, item_2: Hashable) -> Hashable:
+        """
+        Merge the clusters of two items
+
+        Parameters
+        ----------
+        item_1 : Hashable
+            An item
+        item_2 : Hashable
+            Another item
+
+        Returns
+        -------
+        Hashable
+            The root item of the merged cluster
+        """
+
+        root_1 = self.find(item_1)
+        root_2 = self.find(item_2)
+
+        if root_1 == root_2:
+            return root_1
+
+        if self.size_by_item[root_1] < self.size_by_item[root_2]:
+            root_1, root_2 = root_2, root_1
+
+        self.parent_by_item[root_2] = root_1
+        self.size_by_item[root_1] += self.size_by_item.pop(root_2)
+
+        return root_1
+
+    def get_clusters(self) -> List[List[Hashable]]:
+        """
+        Get the clusters, keeping the items insertion order
+
+        Returns
+        -------
+        List[List[Hashable]]
+            A list of clusters, each one is a list of items
+        """
+
+        items_by_root = {}
+        for item in self.parent_by_item:
+            items_by_root.setdefault(self.find(item), []).append(item)
+
+        return list(items_by_root.values())
+
+
+class TitleIndex():
+
+    """
+    Index used to find similar titles without comparing every pair of titles.
+
+    The titles are blocked by a key (e.g. the publication year), and each indexed title is split into
+    k + 1 segments, where k is the max edit distance it can have to any similar title.
+    By the pigeonhole principle, a similar title must contain at least one of these segments unchanged
+    around the same position, so only the titles sharing a segment are compared using the edit distance
+    """
+
+    def __init__(self, similarity_threshold: float):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        similarity_threshold : float
+            A value between 0 and 1 that represents the min similarity between two titles to be considered similar
+        """
+
+        self.similarity_threshold = similarity_threshold
+        self.item_ids_by_key = {}
+        self.titles_count_by_length = {}
+        self.index_entry_by_item_id = {}
+
+    def _get_segments_count(self, title_length: int) -> int:
+        """
+        Get the number of segments of an indexed title, i.e. the max edit distance to any similar title plus one
+
+        Parameters
+        ----------
+        title_length : int
+            The title length
+
+        Returns
+        -------
+        int
+            The number of segments
+        """
+
+        if self.similarity_threshold <= 0:
+            return title_length + 1
+
+        # a similar title can be longer than the indexed one, so the bound uses the longest possible similar title
+        return int((title_length + 1) * (1 - self.similarity_threshold) / self.similarity_threshold) + 1
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_segments_bounds(title_length: int, segments_count: int) -> Tuple[Tuple[int, int]]:
+        """
+        Split a title into even segments
+
+        Parameters
+        ----------
+        title_length : int
+            The title length
+        segments_count : int
+            The number of segments
+
+        Returns
+        -------
+        Tuple[Tuple[int, int]]
+            The (segment start position, segment length) of each segment
+        """
+
+        segments_bounds = []
+        base_length = title_length // segments_count
+        longer_segments_count = title_length % segments_count
+        start = 0
+
+        for i in range(segments_count):
+            length = base_length + (1 if i >= segments_count - longer_segments_count else 0)
+            segments_bounds.append((start, length))
+            start += length
+
+        return tuple(segments_bounds)
+
+    def add(self, item_id: Hashable, title: str, block: Hashable):
+        """
+        Add a title to the index
+
+        Parameters
+        ----------
+        item_id : Hashable
+            An ID of the item (e.g. a paper) that the title belongs to
+        title : str
+            The title
+        block : Hashable
+            The block key of the title, only titles with the same block key are compared
+        """
+
+        if item_id in self.index_entry_by_item_id:
+            self.remove(item_id)
+
+        title_length = len(title)
+        segments_count = self._get_segments_count(title_length)
+
+        if segments_count > title_length:
+            # a title too short to be split, it's compared to every title of its block with a valid length
+            keys = [(block, title_length)]
+        else:
+            keys = [(block, title_length, i, title[start:start + length])
+                    for i, (start, length) in enumerate(self._get_segments_bounds(title_length, segments_count))]
+
+        for key in keys:
+            self.item_ids_by_key.setdefault(key, set()).add(item_id)
+
+        length_key = (block, title_length)
+        self.titles_count_by_length[length_key] = self.titles_count_by_length.get(length_key, 0) + 1
+        self.index_entry_by_item_id[item_id] = (title, block, keys)
+
+    def remove(self, item_id: Hashable):
+        """
+        Remove a title from the index
+
+        Parameters
+        ----------
+        item_id : Hashable
+            The ID of the item that the title belongs to
+        """
+
+        index_entry = self.index_entry_by_item_id.pop(item_id, None)
+
+        if index_entry is None:
+            return
+
+        title, block, keys = index_entry
+
+        for key in keys:
+            item_ids = self.item_ids_by_key[key]
+            item_ids.discard(item_id)
+            if len(item_ids) == 0:
+                del self.item_ids_by_key[key]
+
+        length_key = (block, len(title))
+        self.titles_count_by_length[length_key] -= 1
+        if self.titles_count_by_length[length_key] == 0:
+            del self.titles_count_by_length[length_key]
+
+    def get_candidates(self, title: str, block: Hashable) -> Set[Any]:
+        """
+        Get the IDs of the indexed items whose titles may be similar to the provided title
+
+        Parameters
+        ----------
+        title : str
+            A title
+        block : Hashable
+            The block key of the title
+
+        Returns
+        -------
+        Set[Any]
+            A set of item IDs
+        """
+
+        candidates = set()
+        title_length = len(title)
+        min_length = int(title_length * self.similarity_threshold) - 1
+        max_length = int(title_length / self.similarity_threshold) + 1 if self.similarity_threshold > 0 else title_length * 2 + 1
+
+        for indexed_length in range(max(min_length, 0), max_length + 1):
+
+            if (block, indexed_length) not in self.titles_count_by_length:
+                continue
+
+            length_difference = title_length - indexed_length
+            if abs(length_difference) > int(max(title_length, indexed_length) * (1 - self.similarity_threshold)):
+                continue
+
+            segments_count = self._get_segments_count(indexed_length)
+
+            if segments_count > indexed_length:
+                candidates.update(self.item_ids_by_key.get((block, indexed_length), set()))
+                continue
+
+            for i, (start, length) in enumerate(self._get_segments_bounds(indexed_length, segments_count)):
+
+                right_errors = segments_count - 1 - i
+
+                # the segment is shifted by the edits on its left, which can't be more than i,
+                # and the edits on its right can't be more than the number of segments on its right
+                first_position = max(start - i, start + length_difference - right_errors, 0)
+                last_position = min(start + i, start + length_difference + right_errors, title_length - length)
+
+                for position in range(first_position, last_position + 1):
+                    item_ids = self.item_ids_by_key.get((block, indexed_length, i, title[position:position + length]))
+                    if item_ids is not None:
+                        candidates.update(item_ids)
+
+        return candidates
+
+    def find_similar(self, title: str, block: Hashable) -> List[Any]:
+        """
+        Get the IDs of the indexed items whose titles are similar to the provided title
+
+        Parameters
+        ----------
+        title : str
+            A title
+        block : Hashable
+            The block key of the title
+
+        Returns
+        -------
+        List[Any]
+            A list of item IDs
+        """
+
+        similar_item_ids = []
+
+        for item_id in self.get_candidates(title, block):
+            if is_similar(title, self.index_entry_by_item_id[item_id][0], self.similarity_threshold):
+                similar_item_ids.append(item_id)
+
+        return similar_item_ids
+
+    def __len__(self) -> int:
+        return len(self.index_entry_by_item_id)
@@ -0,0 +1,216 @@
+import json
+from typing import Any, IO, Iterable, Iterator, Optional, Tuple
+
+
+def dump(obj: dict, fp: IO[str], streamed_values: Optional[dict] = None):
+    """
+    Write a JSON object in the same layout of json.dump(obj, fp, indent=2, sort_keys=True),
+    but writing the items of the streamed values one at a time, so they never need to be
+    entirely in memory
+
+    Parameters
+    ----------
+    obj : dict
+        The object members that are written at once
+    fp : IO[str]
+        A text file-like object
+    streamed_values : Optional[dict], optional
+        The object members whose values are iterables (e.g. generators) written as JSON arrays, by default None
+    """
+
+    if streamed_values is None:
+        streamed_values = {}
+
+    keys = sorted(list(obj.keys()) + list(streamed_values.keys()))
+
+    fp.write('{')
+
+    for i, key in enumerate(keys):
+
+        fp.write(f'{"," if i > 0 else ""}\n  {json.dumps(key)}: ')
+
+        if key in streamed_values:
+            is_empty = True
+            for item in streamed_values.get(key):
+                # JSON strings can't have raw line breaks, so the re-indentation never changes a value
+                item_json = json.dumps(item, indent=2, sort_keys=True).replace('\n', '\n    ')
+                fp.write(f'{"[" if is_empty else ","}\n    {item_json}')
+                is_empty = False
+            fp.write('[]' if is_empty else '\n  ]')
+        else:
+            fp.write(json.dumps(obj.get(key), indent=2, sort_keys=True).replace('\n', '\n  '))
+
+    fp.write('\n}' if len(keys) > 0 else '}')
+
+
+class _StreamReader():
+
+    """
+    Buffered reader used to decode the JSON values of a text stream one at a time
+    """
+
+    def __init__(self, fp: IO[str], chunk_size: int):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        fp : IO[str]
+            A text file-like object
+        chunk_size : int
+            The number of characters read from the stream at once
+        """
+
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def _read_chunk(self):
+        """
+        Read a new chunk from the stream, discarding the already consumed part of the buffer
+        """
+
+        chunk = self.fp.read(self.chunk_size)
+        self.eof = len(chunk) == 0
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def peek(self) -> Optional[str]:
+        """
+        Get the next non-whitespace character without consuming it
+
+        Returns
+        -------
+        Optional[str]
+            The next character, or None if the stream has ended
+        """
+
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in ' \t\n\r':
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self.eof:
+                return None
+            self._read_chunk()
+
+    def consume(self, expected_characters: str) -> str:
+        """
+        Consume the next non-whitespace character
+
+        Parameters
+        ----------
+        expected_characters : str
+            The valid characters
+
+        Returns
+        -------
+        str
+            The consumed character
+
+        Raises
+        ------
+        ValueError
+            Unexpected character
+        """
+
+        character = self.peek()
+
+        if character is None or character not in expected_characters:
+            raise ValueError(f'Invalid JSON, expecting one of "{expected_characters}" but found {repr(character)}')
+
+        self.position += 1
+
+        return character
+
+    def decode(self) -> Any:
+        """
+        Decode the next JSON value
+
+        Returns
+        -------
+        Any
+            The decoded value
+
+        Raises
+        ------
+        json.JSONDecodeError
+            Invalid JSON value
+        """
+
+        self.peek()
+
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # a number can be split between chunks, so it's only complete when followed by a non-number character
+                is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+                if self.eof or (end < len(self.buffer) and not (is_number and self.buffer[end] in '0123456789.eE+-')):
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read_chunk()
+
+
+def iterparse(fp: IO[str], streamed_keys: Iterable[str], chunk_size: Optional[int] = 64 * 1024) -> Iterator[Tuple[str, Any]]:
+    """
+    Incrementally parse a JSON object yielding its members one at a time.
+    The items of the arrays given by the streamed keys are yielded one by one, using the array key,
+    so these arrays never need to be entirely in memory
+
+    Parameters
+    ----------
+    fp : IO[str]
+        A text file-like object containing a JSON object
+    streamed_keys : Iterable[str]
+        The keys of the arrays whose items are yielded one at a time
+    chunk_size : Optional[int], optional
+        The number of characters read from the file at once, by default 64 * 1024
+
+    Yields
+    -------
+    Tuple[str, Any]
+        A (key, value) pair of a member, or a (key, item) pair of a streamed array
+
+    Raises
+    ------
+    ValueError
+        Invalid JSON object
+    """
+
+    reader = _StreamReader(fp, chunk_size)
+    streamed_keys = set(streamed_keys)
+
+    reader.consume('{')
+
+    if reader.peek() == '}':
+        reader.consume('}')
+        return
+
+    while True:
+
+        key = reader.decode()
+        if not isinstance(key, str):
+            raise ValueError(f'Invalid JSON, expecting an object key but found {repr(key)}')
+
+        reader.consume(':')
+
+        if key in streamed_keys and reader.peek() == '[':
+            reader.consume('[')
+            if reader.peek() == ']':
+                reader.consume(']')
+            else:
+                while True:
+                    yield key, reader.decode()
+                    if reader.consume(',]') == ']':
+                        break
+        else:
+            yield key, reader.decode()
+
+        if reader.consume(',}') == '}':
+            return
@@ -0,0 +1,389 @@
+import os
+import json
+import threading
+from typing import Iterator, List, Optional, Tuple
+from findpapers.models.search import Search
+from findpapers.models.paper import Paper
+
+
+# A JSON Lines search file has one record per line, the first one is a search record followed by the paper records.
+# New records are appended as the search goes on, and the last record of the search or of a paper wins, e.g.:
+#   {"type": "search", "query": "...", "since": "...", "databases": [...], ...}
+#   {"type": "paper", "key": "DOI-10.1000/xyz", "title": "...", ...}
+#   {"type": "removal", "key": "DOI-10.1000/xyz"}
+SEARCH_RECORD = 'search'
+PAPER_RECORD = 'paper'
+REMOVAL_RECORD = 'removal'
+
+
+def _get_paper_key(paper: Paper) -> str:
+    """
+    Private method that returns the key of a paper, the same key used by the Search to index its papers
+
+    Parameters
+    ----------
+    paper : Paper
+        A paper instance
+
+    Returns
+    -------
+    str
+        The paper key
+    """
+
+    return Search.get_paper_key(paper.title, paper.publication_date, paper.doi)
+
+
+def _get_search_record(search: Search) -> str:
+    """
+    Private method that returns a search record line
+
+    Parameters
+    ----------
+    search : Search
+        A Search instance
+
+    Returns
+    -------
+    str
+        The search record line
+    """
+
+    return json.dumps({'type': SEARCH_RECORD, **Search.to_dict(search, include_papers=False)}) + '\n'
+
+
+def _get_paper_record(paper: Paper, paper_key: Optional[str] = None) -> str:
+    """
+    Private method that returns a paper record line
+
+    Parameters
+    ----------
+    paper : Paper
+        A paper instance
+    paper_key : Optional[str], optional
+        The paper key, by default None (i.e., it's computed from the paper)
+
+    Returns
+    -------
+    str
+        The paper record line
+    """
+
+    if paper_key is None:
+        paper_key = _get_paper_key(paper)
+
+    return json.dumps({'type': PAPER_RECORD, 'key': paper_key, **Paper.to_dict(paper)}) + '\n'
+
+
+def _iterate_records(search_path: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Private method that iterates through the records of a search file.
+    An incomplete last line (e.g. the search process was killed while writing it) is ignored
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path of a JSON Lines search file
+
+    Yields
+    -------
+    Tuple[int, dict]
+        The line number and the record
+    """
+
+    with open(search_path, 'r') as jsonlfile:
+        for line_number, line in enumerate(jsonlfile):
+            if len(line.strip()) == 0:
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError:
+                if line.endswith('\n'):
+                    raise
+
+
+def _get_paper_line_numbers(search_path: str) -> List[int]:
+    """
+    Private method that finds the last record of each paper that wasn't removed
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path of a JSON Lines search file
+
+    Returns
+    -------
+    List[int]
+        The sorted line numbers of the paper records
+    """
+
+    line_number_by_key = {}
+
+    for line_number, record in _iterate_records(search_path):
+        record_type = record.get('type')
+        if record_type == PAPER_RECORD:
+            line_number_by_key.pop(record.get('key'), None)  # the paper order is given by its last record
+            line_number_by_key[record.get('key')] = line_number
+        elif record_type == REMOVAL_RECORD:
+            line_number_by_key.pop(record.get('key'), None)
+
+    return sorted(line_number_by_key.values())
+
+
+def save(search: Search, outputpath: str):
+    """
+    Method used to save a search result in a compacted JSON Lines file, i.e. a search record followed by a record for each paper
+
+    Parameters
+    ----------
+    search : Search
+        A Search instance
+    outputpath : str
+        A valid file path used to save the search results
+    """
+
+    temp_outputpath = f'{outputpath}.tmp'
+
+    with open(temp_outputpath, 'w') as jsonlfile:
+        jsonlfile.write(_get_search_record(search))
+        for paper in Search.get_sorted_papers(search):
+            jsonlfile.write(_get_paper_record(paper))
+
+    os.replace(temp_outputpath, outputpath)
+
+
+def load(search_path: str) -> Search:
+    """
+    Method used to load a search result from a JSON Lines file
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path of a JSON Lines search file
+
+    Returns
+    -------
+    Search
+        The loaded search
+    """
+
+    search_dict = None
+    paper_dict_by_key = {}
+
+    for _, record in _iterate_records(search_path):
+        record_type = record.pop('type', None)
+        if record_type == SEARCH_RECORD:
+            search_dict = record
+        elif record_type == PAPER_RECORD:
+            paper_key = record.pop('key', None)
+            paper_dict_by_key.pop(paper_key, None)
+            paper_dict_by_key[paper_key] = record
+        elif record_type == REMOVAL_RECORD:
+            paper_dict_by_key.pop(record.get('key'), None)
+
+    if search_dict is None:
+        raise ValueError(f'There\'s no search record in {search_path}')
+
+    search = Search.from_dict(search_dict)
+
+    for paper_dict in paper_dict_by_key.values():
+        try:
+            search.add_paper(Paper.from_dict(paper_dict), merge_similar=False)
+        except Exception:
+            pass
+
+    return search
+
+
+def iterate_papers(search_path: str) -> Iterator[Paper]:
+    """
+    Lazily iterate through the papers of a JSON Lines search file.
+    Only the line numbers of the papers are kept in memory, since a paper can have several records
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path of a JSON Lines search file
+
+    Yields
+    -------
+    Paper
+        A paper of the search
+    """
+
+    paper_line_numbers = iter(_get_paper_line_numbers(search_path))
+    next_line_number = next(paper_line_numbers, None)
+
+    for line_number, record in _iterate_records(search_path):
+        if next_line_number is None:
+            break
+        if line_number == next_line_number:
+            record.pop('type')
+            record.pop('key')
+            yield Paper.from_dict(record)
+            next_line_number = next(paper_line_numbers, None)
+
+
+def get_number_of_papers(search_path: str) -> int:
+    """
+    Get the number of papers of a JSON Lines search file
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path of a JSON Lines search file
+
+    Returns
+    -------
+    int
+        The number of papers
+    """
+
+    return len(_get_paper_line_numbers(search_path))
+
+
+def update_paper(search_path: str, paper: Paper):
+    """
+    Append a paper record to a JSON Lines search file, replacing the previous records of the paper
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path of a JSON Lines search file
+    paper : Paper
+        A paper instance that was loaded from the search file
+    """
+
+    with open(search_path, 'a') as jsonlfile:
+        jsonlfile.write(_get_paper_record(paper))
+
+
+class JsonlWriter():
+
+    """
+    Writer that keeps a JSON Lines search file up to date while a search is running,
+    appending a record for each added, changed or removed paper, so the file can be
+    consumed (e.g. using tail -f) before the search is finished
+    """
+
+    def __init__(self, filepath: str, search: Search):
+        """
+        Class constructor, the search file is rewritten with the current search state
+
+        Parameters
+        ----------
+        filepath : str
+            A valid file path used to save the search results
+        search : Search
+            A Search instance
+        """
+
+        self.filepath = filepath
+        self.lock = threading.Lock()
+        self.jsonlfile = None
+        self.key_by_paper = {}
+        self.finished_stages_count = None
+
+        self.rewrite(search)
+
+    def _append(self, record: str):
+        """
+        Private method that appends a record line, flushing it immediately
+
+        Parameters
+        ----------
+        record : str
+            A record line
+        """
+
+        self.jsonlfile.write(record)
+        self.jsonlfile.flush()
+
+    def rewrite(self, search: Search):
+        """
+        Rewrite the search file in place, with only one record for each paper
+
+        Parameters
+        ----------
+        search : Search
+            A Search instance
+        """
+
+        with self.lock:
+            if self.jsonlfile is not None:
+                self.jsonlfile.close()
+
+            save(search, self.filepath)
+
+            self.key_by_paper = {paper: _get_paper_key(paper) for paper in search.papers}
+            self.finished_stages_count = len(search.finished_stages)
+            self.jsonlfile = open(self.filepath, 'a')
+
+    def checkpoint(self, search: Search):
+        """
+        Persist the search progress. After a finished stage, the papers could be changed in place (e.g. enriched),
+        so the file is rewritten, otherwise only a new search record is appended
+
+        Parameters
+        ----------
+        search : Search
+            A Search instance
+        """
+
+        if len(search.finished_stages) != self.finished_stages_count:
+            self.rewrite(search)
+        else:
+            # only the search record is appended, and it's built holding the search lock
+            # (before this writer lock, as the paper records are written)
+            with search.lock:
+                search_record = _get_search_record(search)
+            with self.lock:
+                self._append(search_record)
+
+    def write_paper(self, paper: Paper):
+        """
+        Append a record of an added or changed paper
+
+        Parameters
+        ----------
+        paper : Paper
+            A paper instance
+        """
+
+        paper_key = _get_paper_key(paper)
+
+        with self.lock:
+            previous_paper_key = self.key_by_paper.get(paper)
+
+            # the key changes when the paper is enriched with a DOI
+            if previous_paper_key is not None and previous_paper_key != paper_key:
+                self._append(json.dumps({'type': REMOVAL_RECORD, 'key': previous_paper_key}) + '\n')
+
+            self._append(_get_paper_record(paper, paper_key))
+            self.key_by_paper[paper] = paper_key
+
+    def remove_paper(self, paper: Paper):
+        """
+        Append a removal record of a paper
+
+        Parameters
+        ----------
+        paper : Paper
+            A paper instance
+        """
+
+        with self.lock:
+            paper_key = self.key_by_paper.pop(paper, None)
+            if paper_key is None:
+                paper_key = _get_paper_key(paper)
+            self._append(json.dumps({'type': REMOVAL_RECORD, 'key': paper_key}) + '\n')
+
+    def close(self):
+        """
+        Close the search file
+        """
+
+        with self.lock:
+            if self.jsonlfile is not None:
+                self.jsonlfile.close()
+                self.jsonlfile = None
@@ -0,0 +1,354 @@
+import os
+import json
+import sqlite3
+from typing import Iterable, Iterator, Optional, Union
+import findpapers.utils.query_util as query_util
+
+
+MIRROR_EXTENSION = '.sqlite'
+PAPERS_BATCH_SIZE = 1000
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS mirror (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        watermark TEXT
+    );
+    CREATE TABLE IF NOT EXISTS papers (
+        id INTEGER PRIMARY KEY,
+        doi TEXT UNIQUE,
+        version INTEGER,
+        date TEXT,
+        title TEXT,
+        abstract TEXT,
+        metadata TEXT
+    );
+    CREATE INDEX IF NOT EXISTS papers_date ON papers (date);
+'''
+
+# the full-text index is kept in sync with the papers table by triggers, see https://www.sqlite.org/fts5.html#external_content_tables
+FTS_SCHEMA = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(title, abstract, content='papers', content_rowid='id');
+    CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN
+        INSERT INTO papers_fts (rowid, title, abstract) VALUES (new.id, new.title, new.abstract);
+    END;
+    CREATE TRIGGER IF NOT EXISTS papers_fts_delete AFTER DELETE ON papers BEGIN
+        INSERT INTO papers_fts (papers_fts, rowid, title, abstract) VALUES ('delete', old.id, old.title, old.abstract);
+    END;
+    CREATE TRIGGER IF NOT EXISTS papers_fts_update AFTER UPDATE ON papers BEGIN
+        INSERT INTO papers_fts (papers_fts, rowid, title, abstract) VALUES ('delete', old.id, old.title, old.abstract);
+        INSERT INTO papers_fts (rowid, title, abstract) VALUES (new.id, new.title, new.abstract);
+    END;
+'''
+
+# a paper is stored once, with the metadata of its latest version and the date of its first version
+UPSERT_PAPER = '''
+    INSERT INTO papers (doi, version, date, title, abstract, metadata) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (doi) DO UPDATE SET
+        date = MIN(date, excluded.date),
+        version = MAX(version, excluded.version),
+        title = CASE WHEN excluded.version >= version THEN excluded.title ELSE title END,
+        abstract = CASE WHEN excluded.version >= version THEN excluded.abstract ELSE abstract END,
+        metadata = CASE WHEN excluded.version >= version THEN excluded.metadata ELSE metadata END
+'''
+
+# the upsert syntax is only available since SQLite 3.24.0, on older versions the paper is inserted if
+# it doesn't exist and then updated, both statements receive the same row as UPSERT_PAPER
+HAS_UPSERT = sqlite3.sqlite_version_info >= (3, 24, 0)
+INSERT_PAPER = '''
+    INSERT OR IGNORE INTO papers (doi, version, date, title, abstract, metadata) VALUES (?1, ?2, ?3, ?4, ?5, ?6)
+'''
+UPDATE_PAPER = '''
+    UPDATE papers SET
+        date = MIN(date, ?3),
+        version = MAX(version, ?2),
+        title = CASE WHEN ?2 >= version THEN ?4 ELSE title END,
+        abstract = CASE WHEN ?2 >= version THEN ?5 ELSE abstract END,
+        metadata = CASE WHEN ?2 >= version THEN ?6 ELSE metadata END
+    WHERE doi = ?1 AND (version <= ?2 OR date > ?3)
+'''
+
+
+def get_mirror_path(database: str, mirror_dir: str) -> str:
+    """
+    Get the file path of the mirror of a database
+
+    Parameters
+    ----------
+    database : str
+        The database name (medRxiv or bioRxiv)
+    mirror_dir : str
+        The directory where the mirrors are placed
+
+    Returns
+    -------
+    str
+        The mirror file path
+    """
+
+    return os.path.join(mirror_dir, f'{database.lower()}{MIRROR_EXTENSION}')
+
+
+def _connect(mirror_path: str) -> sqlite3.Connection:
+    """
+    Private method that opens a connection with a mirror database, creating its tables if they don't exist
+
+    Parameters
+    ----------
+    mirror_path : str
+        A valid file path of the mirror database
+
+    Returns
+    -------
+    sqlite3.Connection
+        A database connection
+    """
+
+    connection = sqlite3.connect(mirror_path)
+    connection.executescript(SCHEMA)
+
+    try:
+        connection.executescript(FTS_SCHEMA)
+    except sqlite3.OperationalError:  # pragma: no cover
+        pass  # the SQLite build has no FTS5 support, so the papers are scanned
+
+    return connection
+
+
+def _upsert_papers(connection: sqlite3.Connection, rows: list):
+    """
+    Private method that inserts or updates papers on a mirror database
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        A database connection
+    rows : list
+        The papers rows (doi, version, date, title, abstract, metadata)
+    """
+
+    if HAS_UPSERT:
+        connection.executemany(UPSERT_PAPER, rows)
+    else:
+        connection.executemany(INSERT_PAPER, rows)
+        connection.executemany(UPDATE_PAPER, rows)
+
+
+def _has_fts(connection: sqlite3.Connection) -> bool:
+    """
+    Private method that checks if a mirror database has the full-text index
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        A database connection
+
+    Returns
+    -------
+    bool
+        True if the full-text index is available, False otherwise
+    """
+
+    return connection.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'papers_fts'").fetchone()[0] > 0
+
+
+def get_watermark(mirror_path: str) -> Optional[str]:
+    """
+    Get the date up to which a mirror was synchronized
+
+    Parameters
+    ----------
+    mirror_path : str
+        A file path of a mirror database
+
+    Returns
+    -------
+    Optional[str]
+        The watermark date (YYYY-MM-DD), or None if the mirror was never synchronized
+    """
+
+    if not os.path.isfile(mirror_path):
+        return None
+
+    connection = _connect(mirror_path)
+
+    try:
+        row = connection.execute('SELECT watermark FROM mirror WHERE id = 1').fetchone()
+        return row[0] if row is not None else None
+    finally:
+        connection.close()
+
+
+def save_papers_metadata(mirror_path: str, papers_metadata: Iterable[dict], watermark: str) -> int:
+    """
+    Save the papers metadata (as provided by the medRxiv/bioRxiv details API) on a mirror database.
+    The metadata is committed in batches and the watermark is only updated after all of it is saved,
+    so an interrupted synchronization is restarted from the previous watermark
+
+    Parameters
+    ----------
+    mirror_path : str
+        A valid file path of a mirror database, it's created if it doesn't exist
+    papers_metadata : Iterable[dict]
+        The papers metadata
+    watermark : str
+        The date (YYYY-MM-DD) up to which the mirror will be synchronized after the metadata is saved
+
+    Returns
+    -------
+    int
+        The number of saved papers metadata (i.e., papers versions)
+    """
+
+    connection = _connect(mirror_path)
+
+    try:
+        count = 0
+        rows = []
+
+        for paper_metadata in papers_metadata:
+
+            if paper_metadata.get('doi', None) is None:
+                continue
+
+            rows.append((paper_metadata.get('doi').lower(), int(paper_metadata.get('version') or 1), paper_metadata.get('date'),
+                         paper_metadata.get('title'), paper_metadata.get('abstract'), json.dumps(paper_metadata)))
+
+            if len(rows) >= PAPERS_BATCH_SIZE:
+                with connection:
+                    _upsert_papers(connection, rows)
+                count += len(rows)
+                rows = []
+
+        with connection:
+            _upsert_papers(connection, rows)
+            connection.execute('INSERT OR REPLACE INTO mirror VALUES (1, ?)', (watermark,))
+        count += len(rows)
+
+        return count
+
+    finally:
+        connection.close()
+
+
+def _get_fts_term(term: query_util.QueryTerm) -> Optional[str]:
+    """
+    Private method that renders a search term into a FTS5 phrase
+
+    Parameters
+    ----------
+    term : query_util.QueryTerm
+        A search term
+
+    Returns
+    -------
+    Optional[str]
+        The FTS5 phrase, or None if the term can't be rendered (i.e., it has a wildcard that isn't a suffix)
+    """
+
+    value = term.value.strip()
+    is_prefix = value.endswith('*')
+
+    if is_prefix:
+        value = value[:-1]
+
+    if len(value.strip()) == 0 or any(x in value for x in query_util.WILDCARDS):
+        return None
+
+    phrase = '"{}"'.format(value.replace('"', '""'))
+
+    return f'{phrase} *' if is_prefix else phrase
+
+
+def get_fts_query(node: Union[query_util.QueryTerm, query_util.QueryGroup]) -> Optional[str]:
+    """
+    Render a query tree into a FTS5 query that matches at least all the papers that match the query tree.
+    The negated nodes and the terms that can't be rendered are left out, so the matching papers still need
+    to be checked by the query matcher (see query_util.compile_matcher)
+
+    Parameters
+    ----------
+    node : Union[query_util.QueryTerm, query_util.QueryGroup]
+        A query tree node
+
+    Returns
+    -------
+    Optional[str]
+        The FTS5 query, or None if the node can match any paper
+    """
+
+    if isinstance(node, query_util.QueryTerm):
+        return _get_fts_term(node)
+
+    # as in the query matcher, AND and AND NOT bind tighter than OR
+    clauses = [[get_fts_query(node.nodes[0])]]
+
+    for connector, child_node in zip(node.connectors, node.nodes[1:]):
+        if connector == 'OR':
+            clauses.append([get_fts_query(child_node)])
+        elif connector == 'AND':
+            clauses[-1].append(get_fts_query(child_node))
+
+    rendered_clauses = []
+
+    for clause in clauses:
+        rendered_nodes = [x for x in clause if x is not None]
+        if len(rendered_nodes) == 0:
+            return None
+        rendered_clauses.append(f'({" AND ".join(rendered_nodes)})')
+
+    return f'({" OR ".join(rendered_clauses)})'
+
+
+def iterate_papers_metadata(mirror_path: str, query_tree: Optional[query_util.QueryGroup] = None,
+                            since: Optional[str] = None, until: Optional[str] = None) -> Iterator[dict]:
+    """
+    Lazily iterate through the papers metadata of a mirror database that can match a query.
+    The full-text index only narrows the candidates, so the papers still need to be checked by the query matcher
+
+    Parameters
+    ----------
+    mirror_path : str
+        A valid file path of a mirror database
+    query_tree : Optional[query_util.QueryGroup], optional
+        A query tree used to narrow the papers, by default None
+    since : Optional[str], optional
+        A lower bound (inclusive) date (YYYY-MM-DD) of the papers first version, by default None
+    until : Optional[str], optional
+        A upper bound (inclusive) date (YYYY-MM-DD) of the papers first version, by default None
+
+    Yields
+    -------
+    dict
+        A paper metadata, in the format provided by the medRxiv/bioRxiv details API
+    """
+
+    connection = _connect(mirror_path)
+
+    try:
+        sql = 'SELECT papers.metadata, papers.date FROM papers'
+        conditions = []
+        parameters = []
+
+        fts_query = get_fts_query(query_tree) if query_tree is not None else None
+        if fts_query is not None and _has_fts(connection):
+            sql += ' JOIN papers_fts ON papers_fts.rowid = papers.id'
+            conditions.append('papers_fts MATCH ?')
+            parameters.append(fts_query)
+
+        if since is not None:
+            conditions.append('papers.date >= ?')
+            parameters.append(since)
+        if until is not None:
+            conditions.append('papers.date <= ?')
+            parameters.append(until)
+
+        if len(conditions) > 0:
+            sql += f' WHERE {" AND ".join(conditions)}'
+
+        for metadata, date in connection.execute(f'{sql} ORDER BY papers.date DESC', parameters):
+            paper_metadata = json.loads(metadata)
+            paper_metadata['date'] = date
+            yield paper_metadata
+
+    finally:
+        connection.close()
@@ -1,12 +1,85 @@
-import json
-import re
-from typing import Optional
+import os
+from typing import Iterator, Optional
 from findpapers.models.search import Search
+from findpapers.models.paper import Paper
+import findpapers.utils.binary_util as binary_util
+import findpapers.utils.json_util as json_util
+import findpapers.utils.jsonl_util as jsonl_util
+import findpapers.utils.sqlite_util as sqlite_util
 
 
-def save(search: Search, outputpath: str):
+FORMATS = ['json', 'jsonl', 'sqlite', 'binary']
+
+# the formats whose files can be updated without rewriting the whole search
+INCREMENTAL_FORMATS = ['jsonl', 'sqlite']
+
+
+def get_format(path: str, format: Optional[str] = None) -> str:
+    """
+    Get the persistence format of a search file
+
+    Parameters
+    ----------
+    path : str
+        A search file path
+    format : Optional[str], optional
+        An explicit format (json, jsonl, sqlite or binary), by default None (i.e., the format is given by the file extension)
+
+    Returns
+    -------
+    str
+        The search file format
+
+    Raises
+    ------
+    ValueError
+        Unsupported format
+    """
+
+    if format is None:
+        if sqlite_util.is_sqlite_path(path):
+            return 'sqlite'
+        elif path.lower().endswith('.jsonl'):
+            return 'jsonl'
+        elif path.lower().endswith(binary_util.BINARY_EXTENSION):
+            return 'binary'
+        return 'json'
+
+    format = format.lower()
+
+    if format not in FORMATS:
+        raise ValueError(f'Unsupported format: {format}, the supported formats are {", ".join(FORMATS)}')
+
+    return format
+
+
+def detect_format(path: str, format: Optional[str] = None) -> str:
+    """
+    Get the persistence format of an existing search file,
+    a binary search file is detected by its magic header regardless of the file extension
+
+    Parameters
+    ----------
+    path : str
+        A search file path
+    format : Optional[str], optional
+        An explicit format, by default None (i.e., the format is given by the file content or extension)
+
+    Returns
+    -------
+    str
+        The search file format
     """
-    Method used to save a search result in a JSON representation
+
+    if format is None and binary_util.is_binary_file(path):
+        return 'binary'
+
+    return get_format(path, format)
+
+
+def save(search: Search, outputpath: str, format: Optional[str] = None):
+    """
+    Method used to save a search result in one of the supported formats (see get_format)
 
     Parameters
     ----------
@@ -14,21 +87,191 @@ def save(search: Search, outputpath: str):
         A Search instance
     outputpath : str
         A valid file path used to save the search results
+    format : Optional[str], optional
+        The file format (json, jsonl, sqlite or binary), by default None (i.e., the format is given by the file extension)
     """
 
-    with open(outputpath, 'w') as jsonfile:
-        json.dump(Search.to_dict(search), jsonfile, indent=2, sort_keys=True)
+    format = get_format(outputpath, format)
+
+    if format == 'sqlite':
+        return sqlite_util.save(search, outputpath)
+    elif format == 'jsonl':
+        return jsonl_util.save(search, outputpath)
+    elif format == 'binary':
+        return binary_util.save(search, outputpath)
 
+    # the search is written to a temporary file first, so an interrupted saving never corrupts a previous checkpoint
+    temp_outputpath = f'{outputpath}.tmp'
 
-def load(search_path: str):
+    # the papers are serialized one at a time, so the whole search dict is never in memory
+    papers = (Paper.to_dict(paper) for paper in Search.get_sorted_papers(search))
+
+    with open(temp_outputpath, 'w') as jsonfile:
+        json_util.dump(Search.to_dict(search, include_papers=False), jsonfile, {'papers': papers})
+
+    os.replace(temp_outputpath, outputpath)
+
+
+def load(search_path: str, format: Optional[str] = None):
     """
-    Method used to load a search result using a JSON representation
+    Method used to load a search result in one of the supported formats (see detect_format)
 
     Parameters
     ----------
     search_path : str
         A valid file path containing a JSON representation of the search results
+    format : Optional[str], optional
+        The file format (json, jsonl, sqlite or binary), by default None (i.e., the format is given by the file extension)
+    """
+
+    format = detect_format(search_path, format)
+
+    if format == 'sqlite':
+        return sqlite_util.load(search_path)
+    elif format == 'jsonl':
+        return jsonl_util.load(search_path)
+    elif format == 'binary':
+        return binary_util.load(search_path)
+
+    search_dict = {}
+    papers = []
+
+    with open(search_path, 'r') as jsonfile:
+        for key, value in json_util.iterparse(jsonfile, ['papers']):
+            if key == 'papers':
+                papers.append(Paper.from_dict(value))
+            else:
+                search_dict[key] = value
+
+    search = Search.from_dict(search_dict)
+
+    for paper in papers:
+        try:
+            search.add_paper(paper, merge_similar=False)
+        except Exception:
+            pass
+
+    return search
+
+
+def iterate_papers(search_path: str, format: Optional[str] = None) -> Iterator[Paper]:
     """
+    Lazily iterate through the papers of a search result, without loading the whole search in memory.
+    Unlike the papers of a loaded search, these papers aren't deduplicated again
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path containing a JSON representation of the search results, or a SQLite database
+    format : Optional[str], optional
+        The file format (json, jsonl, sqlite or binary), by default None (i.e., the format is given by the file extension)
+
+    Yields
+    -------
+    Paper
+        A paper of the search result
+    """
+
+    format = detect_format(search_path, format)
+
+    if format == 'sqlite':
+        yield from sqlite_util.iterate_papers(search_path)
+        return
+    elif format == 'jsonl':
+        yield from jsonl_util.iterate_papers(search_path)
+        return
+    elif format == 'binary':
+        # a binary file is a single compressed document, so it can't be partially read
+        yield from Search.get_sorted_papers(binary_util.load(search_path))
+        return
+
+    with open(search_path, 'r') as jsonfile:
+        for key, value in json_util.iterparse(jsonfile, ['papers']):
+            if key == 'papers':
+                yield Paper.from_dict(value)
+
+
+def get_number_of_papers(search_path: str, format: Optional[str] = None) -> int:
+    """
+    Get the number of papers of a search result, without loading the whole search in memory
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path containing a JSON representation of the search results, or a SQLite database
+    format : Optional[str], optional
+        The file format (json, jsonl, sqlite or binary), by default None (i.e., the format is given by the file extension)
+
+    Returns
+    -------
+    int
+        The number of papers
+    """
+
+    format = detect_format(search_path, format)
+
+    if format == 'sqlite':
+        return sqlite_util.get_number_of_papers(search_path)
+    elif format == 'jsonl':
+        return jsonl_util.get_number_of_papers(search_path)
+    elif format == 'binary':
+        return len(binary_util.load(search_path).papers)
+
+    number_of_papers = 0
 
     with open(search_path, 'r') as jsonfile:
-        return Search.from_dict(json.load(jsonfile))
+        for key, value in json_util.iterparse(jsonfile, ['papers']):
+            if key == 'number_of_papers':
+                # the keys are sorted, so this one comes before the papers
+                return value
+            elif key == 'papers':
+                number_of_papers += 1
+
+    return number_of_papers
+
+
+def update_paper(search: Search, search_path: str, paper: Paper, format: Optional[str] = None):
+    """
+    Persist the refinement data (selection and categories) of a single paper.
+    A SQLite database is updated in place and a JSON Lines file gets a new paper record,
+    while the JSON and binary files need to be entirely rewritten
+
+    Parameters
+    ----------
+    search : Search
+        The Search instance that the paper belongs to
+    search_path : str
+        A valid file path of the search results
+    paper : Paper
+        The refined paper
+    format : Optional[str], optional
+        The file format (json, jsonl, sqlite or binary), by default None (i.e., the format is given by the file extension)
+    """
+
+    format = detect_format(search_path, format)
+
+    if format == 'sqlite':
+        sqlite_util.update_paper(search_path, paper)
+    elif format == 'jsonl':
+        jsonl_util.update_paper(search_path, paper)
+    else:
+        save(search, search_path, format)
+
+
+def convert(input_path: str, output_path: str, input_format: Optional[str] = None, output_format: Optional[str] = None):
+    """
+    Convert a search file between the supported formats (e.g. importing a JSON file to a SQLite database, or exporting it back)
+
+    Parameters
+    ----------
+    input_path : str
+        A valid file path of the search results
+    output_path : str
+        A valid file path used to save the converted search results
+    input_format : Optional[str], optional
+        The input file format (json, jsonl, sqlite or binary), by default None (i.e., the format is given by the file extension)
+    output_format : Optional[str], optional
+        The output file format (json, jsonl, sqlite or binary), by default None (i.e., the format is given by the file extension)
+    """
+
+    save(load(input_path, input_format), output_path, output_format)
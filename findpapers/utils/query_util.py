@@ -1,78 +1,459 @@
-from typing import Optional, Callable
+from __future__ import annotations
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union, TYPE_CHECKING
 
+if TYPE_CHECKING:  # pragma: no cover
+    from findpapers.models.paper import Paper
 
-def replace_search_term_enclosures(query: str, open_replacement: str, close_replacement: str,
-                                   only_on_wildcards: Optional[bool] = False) -> str:
+
+# The query connectors, the longest ones first since they're matched in this order
+CONNECTORS = ['AND NOT', 'AND', 'OR']
+WILDCARDS = ['?', '*']
+
+
+class QueryError(ValueError):
+
+    """
+    Error raised when a query is invalid, it carries the position (i.e., the character index) of the problem on the query
+    """
+
+    def __init__(self, message: str, position: Optional[int] = None):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        message : str
+            The error message
+        position : Optional[int], optional
+            The character index of the problem on the query, by default None
+        """
+
+        if position is not None:
+            message = f'{message} at position {position}'
+
+        super().__init__(message)
+        self.position = position
+
+
+class QueryTerm():
+
+    """
+    A search term of a query, e.g. [term a]
+    """
+
+    def __init__(self, value: str, position: int):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        value : str
+            The term value, without its enclosures
+        position : int
+            The character index of the term on the query
+        """
+
+        self.value = value
+        self.position = position
+
+    @property
+    def has_wildcard(self) -> bool:
+        """
+        Returns True if the term has a wildcard (? or *)
+        """
+
+        return any(x in self.value for x in WILDCARDS)
+
+
+class QueryGroup():
+
+    """
+    A sequence of nodes (terms or groups) joined by connectors, e.g. ([term a] OR [term b] AND NOT [term c]).
+    The connectors are kept in the query order, so each database applies its own precedence rules, as it
+    does when it receives the raw query
+    """
+
+    def __init__(self, nodes: List[Union[QueryTerm, QueryGroup]], connectors: List[str], position: int, enclosed: bool):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        nodes : List[Union[QueryTerm, QueryGroup]]
+            The group nodes
+        connectors : List[str]
+            The connectors between the nodes (AND, OR or AND NOT), connectors[i] joins nodes[i] and nodes[i + 1]
+        position : int
+            The character index of the group on the query
+        enclosed : bool
+            If the group is enclosed in parentheses, only the root group isn't
+        """
+
+        self.nodes = nodes
+        self.connectors = connectors
+        self.position = position
+        self.enclosed = enclosed
+
+    @property
+    def depth(self) -> int:
+        """
+        Returns the number of nested enclosed groups, e.g. 0 for [term a] AND [term b]
+        and 1 for ([term a] AND [term b]) OR [term c]
+        """
+
+        inner_depth = max([x.depth for x in self.nodes if isinstance(x, QueryGroup)], default=0)
+
+        return inner_depth + 1 if self.enclosed else inner_depth
+
+
+def _get_tokens(query: str) -> Iterator[tuple]:
+    """
+    Private method that splits a query into (token type, value, position) tokens.
+    The token types are "(", ")", "term" and "connector"
+
+    Parameters
+    ----------
+    query : str
+        A search query
+
+    Yields
+    -------
+    tuple
+        A (token type, value, position) token
+
+    Raises
+    ------
+    QueryError
+        Invalid query
     """
-    Replace search term enclosures
+
+    position = 0
+
+    while position < len(query):
+
+        character = query[position]
+
+        if character in '()':
+            yield character, character, position
+            position += 1
+
+        elif character == '[':
+            end = query.find(']', position + 1)
+            if end < 0:
+                raise QueryError('Unclosed search term', position)
+            value = query[position + 1:end]
+            if '[' in value:
+                raise QueryError('Unclosed search term', position)
+            if len(value.strip()) == 0:
+                raise QueryError('Empty search term', position)
+            yield 'term', value, position
+            position = end + 1
+
+        else:
+            connector = next((x for x in CONNECTORS if query.startswith(f' {x} ', position)), None)
+            if connector is None:
+                raise QueryError(f'Unexpected character {repr(character)}, expecting a search term, a parenthesis or a connector ({", ".join(CONNECTORS)})', position)
+            yield 'connector', connector, position
+            position += len(connector) + 2
+
+
+def parse(query: str) -> QueryGroup:
+    """
+    Parse a query into a syntax tree, e.g. [term a] AND ([term b] OR [term c])
 
     Parameters
     ----------
     query : str
         A search query
-    open_replacement : str
-        An open replacement string
-    close_replacement : str
-        An open replacement string
-    only_on_wildcards : bool, optional
-        If the replacement should be only be performed on wildcards terms, by default False
 
     Returns
     -------
-    str
-        A transformed query
+    QueryGroup
+        The root group of the query
+
+    Raises
+    ------
+    QueryError
+        Invalid query, the error carries the position of the problem
     """
 
-    if only_on_wildcards:
+    if query is None or len(query.strip()) == 0:
+        raise QueryError('Empty query')
+
+    # each stack item is a (nodes, connectors, position) group under construction
+    stack = [([], [], 0)]
+    expecting_node = True
+
+    for token_type, value, position in _get_tokens(query):
+
+        nodes, connectors, group_position = stack[-1]
+
+        if expecting_node:
+            if token_type == 'term':
+                nodes.append(QueryTerm(value, position))
+                expecting_node = False
+            elif token_type == '(':
+                stack.append(([], [], position))
+            else:
+                raise QueryError(f'Expecting a search term or a group but found {repr(value)}', position)
 
-        def wildcards_apply(search_term):
-            if '?' in search_term or '*' in search_term:
-                return search_term.replace('[', open_replacement).replace(']', close_replacement)
+        else:
+            if token_type == 'connector':
+                connectors.append(value)
+                expecting_node = True
+            elif token_type == ')':
+                if len(stack) == 1:
+                    raise QueryError('Unopened parenthesis', position)
+                stack.pop()
+                stack[-1][0].append(QueryGroup(nodes, connectors, group_position, True))
             else:
-                return search_term
+                raise QueryError(f'Expecting a connector ({", ".join(CONNECTORS)}) but found {repr(value)}', position)
+
+    if expecting_node:
+        raise QueryError('Unexpected end of query, expecting a search term or a group', len(query))
 
-        return apply_on_each_term(query, wildcards_apply)
+    if len(stack) > 1:
+        raise QueryError('Unclosed parenthesis', stack[-1][2])
 
-    else:
+    nodes, connectors, _ = stack[0]
 
-        return query.replace('[', open_replacement).replace(']', close_replacement)
+    return QueryGroup(nodes, connectors, 0, False)
 
 
-def apply_on_each_term(query: str, function: Callable) -> str:
+def is_valid(query: str) -> bool:
     """
-    Apply a function to each term of the query
+    Check if a query is valid
 
     Parameters
     ----------
     query : str
         A search query
-    function : Callable
-        A callable function that will be applied to each term of the provided query
+
+    Returns
+    -------
+    bool
+        True if the query can be parsed, False otherwise
+    """
+
+    try:
+        parse(query)
+        return True
+    except QueryError:
+        return False
+
+
+def get_terms(node: Union[QueryTerm, QueryGroup]) -> List[QueryTerm]:
+    """
+    Get all the terms of a query tree, in the query order
+
+    Parameters
+    ----------
+    node : Union[QueryTerm, QueryGroup]
+        A query tree node
+
+    Returns
+    -------
+    List[QueryTerm]
+        The terms
+    """
+
+    if isinstance(node, QueryTerm):
+        return [node]
+
+    return [term for x in node.nodes for term in get_terms(x)]
+
+
+def get_connectors(node: Union[QueryTerm, QueryGroup]) -> List[str]:
+    """
+    Get all the connectors of a query tree
+
+    Parameters
+    ----------
+    node : Union[QueryTerm, QueryGroup]
+        A query tree node
+
+    Returns
+    -------
+    List[str]
+        The connectors
+    """
+
+    if isinstance(node, QueryTerm):
+        return []
+
+    return node.connectors + [connector for x in node.nodes for connector in get_connectors(x)]
+
+
+def render(node: Union[QueryTerm, QueryGroup], term_renderer: Callable[[QueryTerm], str],
+           connector_by_name: Optional[Dict[str, str]] = None) -> str:
+    """
+    Render a query tree into a database native syntax
+
+    Parameters
+    ----------
+    node : Union[QueryTerm, QueryGroup]
+        A query tree node
+    term_renderer : Callable[[QueryTerm], str]
+        A function that renders a search term
+    connector_by_name : Optional[Dict[str, str]], optional
+        The database connectors (e.g. {'AND NOT': 'NOT'}), by default None (i.e., the findpapers connectors)
 
     Returns
     -------
     str
-        A new query with each term transformed by the provided function
-    """
-
-    is_inside_a_term = False
-    search_term = ''
-    final_query = ''
-    for character in query:
-
-        if character == '[':
-            search_term += character
-            is_inside_a_term = True
-            continue
-
-        if is_inside_a_term:
-            search_term += character
-            if character == ']':
-                search_term = function(search_term)
-                final_query += search_term
-                search_term = ''
-                is_inside_a_term = False
+        The rendered query
+    """
+
+    if isinstance(node, QueryTerm):
+        return term_renderer(node)
+
+    if connector_by_name is None:
+        connector_by_name = {}
+
+    rendered_query = render(node.nodes[0], term_renderer, connector_by_name)
+
+    for connector, child_node in zip(node.connectors, node.nodes[1:]):
+        rendered_query += f' {connector_by_name.get(connector, connector)} {render(child_node, term_renderer, connector_by_name)}'
+
+    return f'({rendered_query})' if node.enclosed else rendered_query
+
+
+def _compile_term(term: QueryTerm) -> Callable[[str], bool]:
+    """
+    Private method that compiles a search term into a predicate over a lowercase text.
+    The term matches whole words, case-insensitively, where a question mark (?) replaces exactly one
+    character and an asterisk (*) replaces zero or more characters
+
+    Parameters
+    ----------
+    term : QueryTerm
+        A search term
+
+    Returns
+    -------
+    Callable[[str], bool]
+        A function that returns True if the term is found in a lowercase text
+    """
+
+    words = term.value.lower().split()
+    word_patterns = [''.join(r'\w' if x == '?' else r'\w*' if x == '*' else re.escape(x) for x in word) for word in words]
+    term_pattern = r'\s+'.join(word_patterns)
+    regex = re.compile(rf'(?<!\w){term_pattern}(?!\w)')
+
+    # the longest literal part of the term is searched first, since a substring lookup is much cheaper than a regex
+    literal = max(re.split(r'[?*\s]', term.value.lower()), key=len)
+
+    return lambda text: literal in text and regex.search(text) is not None
+
+
+def _compile_node(node: Union[QueryTerm, QueryGroup], predicate_by_term: dict) -> Callable[[str], bool]:
+    """
+    Private method that compiles a query tree node into a predicate over a lowercase text.
+    Inside a group, the AND and AND NOT connectors bind tighter than the OR connector,
+    so [a] OR [b] AND NOT [c] is evaluated as [a] OR ([b] AND NOT [c])
+
+    Parameters
+    ----------
+    node : Union[QueryTerm, QueryGroup]
+        A query tree node
+    predicate_by_term : dict
+        The already compiled terms, so a repeated term is compiled only once
+
+    Returns
+    -------
+    Callable[[str], bool]
+        A function that returns True if the node matches a lowercase text
+    """
+
+    if isinstance(node, QueryTerm):
+        term_key = node.value.lower()
+        if term_key not in predicate_by_term:
+            predicate_by_term[term_key] = _compile_term(node)
+        return predicate_by_term.get(term_key)
+
+    # each clause is a list of (is_negated, predicate), and the group matches if any clause matches
+    clauses = [[(False, _compile_node(node.nodes[0], predicate_by_term))]]
+
+    for connector, child_node in zip(node.connectors, node.nodes[1:]):
+        predicate = _compile_node(child_node, predicate_by_term)
+        if connector == 'OR':
+            clauses.append([(False, predicate)])
         else:
-            final_query += character
+            clauses[-1].append((connector == 'AND NOT', predicate))
+
+    return lambda text: any(all(predicate(text) != is_negated for is_negated, predicate in clause) for clause in clauses)
+
+
+def get_paper_text(paper: Paper) -> str:
+    """
+    Get the lowercase text of a paper that is matched by a query, i.e. its title, abstract and keywords
+
+    Parameters
+    ----------
+    paper : Paper
+        A paper instance
+
+    Returns
+    -------
+    str
+        The paper text
+    """
+
+    # the fields are separated by a non-space character, so a multi-word term never matches across two fields
+    fields = [paper.title, paper.abstract] + sorted(paper.keywords if paper.keywords is not None else [])
+
+    return ' | '.join(x for x in fields if x is not None).lower()
+
+
+def compile_matcher(query: Union[str, QueryGroup]) -> Callable[[Paper], bool]:
+    """
+    Compile a query into a predicate that checks, without any network call, if a paper title, abstract or keywords match it
+
+    Parameters
+    ----------
+    query : Union[str, QueryGroup]
+        A search query or its syntax tree
+
+    Returns
+    -------
+    Callable[[Paper], bool]
+        A function that returns True if a paper matches the query
+
+    Raises
+    ------
+    QueryError
+        Invalid query
+    """
+
+    query_tree = parse(query) if isinstance(query, str) else query
+    predicate = _compile_node(query_tree, {})
+
+    return lambda paper: predicate(get_paper_text(paper))
+
+
+def filter_papers(papers: Iterable[Paper], query: Union[str, QueryGroup]) -> Iterator[Paper]:
+    """
+    Lazily filter the papers that match a query, e.g. the papers of a search or the papers streamed from a search file
+
+    Parameters
+    ----------
+    papers : Iterable[Paper]
+        The papers
+    query : Union[str, QueryGroup]
+        A search query or its syntax tree
+
+    Returns
+    -------
+    Iterator[Paper]
+        The papers that match the query
+
+    Raises
+    ------
+    QueryError
+        Invalid query, it's raised right away, not when the papers are consumed
+    """
+
+    matcher = compile_matcher(query)
 
-    return final_query
\ No newline at end of file
+    return (x for x in papers if matcher(x))
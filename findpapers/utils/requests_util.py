@@ -1,7 +1,14 @@
 import os
+import time
 import random
+import threading
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
+from urllib.parse import urlparse
 import findpapers.utils.common_util as common_util
+from findpapers.utils.cache_util import ResponseCache, CachingStream, DEFAULT_CACHE_MAX_SIZE
 
 
 # list of most common user agents (Last Updated: Wed, 09 Sep 2020)
@@ -92,6 +99,69 @@ USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.149 Safari/537.36',
 ]
 
+# max number of requests allowed per period (in seconds) for each host, the hosts that aren't here are not rate limited
+DEFAULT_RATE_LIMIT_BY_HOST = {
+    'export.arxiv.org': (1, 3),
+    'eutils.ncbi.nlm.nih.gov': (3, 1),
+}
+
+# max number of result pages fetched ahead of the page that is being processed
+DEFAULT_PAGES_AHEAD = 2
+
+
+class TokenBucket():
+
+    """
+    Thread-safe token bucket used to limit the rate of requests made to a host
+    """
+
+    def __init__(self, requests_per_period: int, period: float):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        requests_per_period : int
+            The max number of requests allowed in each period
+        period : float
+            The period length in seconds
+        """
+
+        self.capacity = requests_per_period
+        self.rate = requests_per_period / period
+        self.tokens = requests_per_period
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take one token from the bucket without waiting for it, 
+        so the caller can wait in its own way (e.g. a thread sleep or an asyncio sleep)
+
+        Returns
+        -------
+        float
+            The time in seconds that the caller must wait before using the token
+        """
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0
+
+    def consume(self):
+        """
+        Take one token from the bucket, blocking until it's available. 
+        The token is reserved before waiting, so concurrent callers are served in arrival order
+        """
+
+        wait_time = self.reserve()
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
 
 class DefaultSession(requests.Session, metaclass=common_util.ThreadSafeSingletonMetaclass):
 
@@ -115,13 +185,134 @@ class DefaultSession(requests.Session, metaclass=common_util.ThreadSafeSingleton
         self.headers.update({'User-Agent': random.choice(USER_AGENTS)})
         self.default_timeout = 20
 
+        self.bucket_by_host = {}
+        self.buckets_lock = threading.Lock()
+        for host, (requests_per_period, period) in DEFAULT_RATE_LIMIT_BY_HOST.items():
+            self.set_rate_limit(host, requests_per_period, period)
+
+        self.cache = None
+
+    def enable_cache(self, cache_dir: str, ttl: Optional[float] = None, max_size: Optional[int] = DEFAULT_CACHE_MAX_SIZE):
+        """
+        Enable a persistent cache for the session responses, so the same request
+        won't hit the network again while its cached response is valid
+
+        Parameters
+        ----------
+        cache_dir : str
+            A directory path where the cache will be placed
+        ttl : Optional[float], optional
+            The time to live of the cached responses in seconds, if None the responses never expire, by default None
+        max_size : Optional[int], optional
+            The max size in bytes of the cache, by default 1 GB
+        """
+
+        self.disable_cache()
+        self.cache = ResponseCache(cache_dir, ttl, max_size)
+
+    def disable_cache(self):
+        """
+        Disable the session responses cache
+        """
+
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+    def set_rate_limit(self, host: str, requests_per_period: Optional[int] = None, period: Optional[float] = 1):
+        """
+        Define the max number of requests that can be made to a host per period, 
+        this limit is shared by all the threads that use the session
+
+        Parameters
+        ----------
+        host : str
+            The host name (e.g. export.arxiv.org)
+        requests_per_period : Optional[int], optional
+            The max number of requests allowed in each period, if None the host won't be rate limited, by default None
+        period : Optional[float], optional
+            The period length in seconds, by default 1
+        """
+
+        with self.buckets_lock:
+            if requests_per_period is None:
+                self.bucket_by_host.pop(host.lower(), None)
+            else:
+                self.bucket_by_host[host.lower()] = TokenBucket(requests_per_period, period)
+
+    def get_bucket(self, url: str) -> Optional[TokenBucket]:
+        """
+        Get the token bucket that limits the rate of requests made to the URL's host
+
+        Parameters
+        ----------
+        url : str
+            A URL
+
+        Returns
+        -------
+        Optional[TokenBucket]
+            The host token bucket, or None if the host isn't rate limited
+        """
+
+        return self.bucket_by_host.get((urlparse(url).hostname or '').lower(), None)
+
+    def wait_for_host(self, url: str):
+        """
+        Block the current thread until a request to the URL's host is allowed by its rate limit
+
+        Parameters
+        ----------
+        url : str
+            The URL that will be requested
+        """
+
+        bucket = self.get_bucket(url)
+
+        if bucket is not None:
+            bucket.consume()
+
+    def get_max_burst(self, url: str) -> Optional[int]:
+        """
+        Get the max number of requests to the URL's host that can be made at once by its rate limit
+
+        Parameters
+        ----------
+        url : str
+            A URL
+
+        Returns
+        -------
+        Optional[int]
+            The max number of requests per period, or None if the host isn't rate limited
+        """
+
+        bucket = self.get_bucket(url)
+
+        return bucket.capacity if bucket is not None else None
+
     def request(self, method, url, **kwargs):
         """
         This is just a common request, the only difference is that when proxies are provided
-        and a response isn't ok, we'll try one more time without using the proxies
+        and a response isn't ok, we'll try one more time without using the proxies.
+        Every request also respects the rate limit defined for its host, 
+        and when the cache is enabled a valid cached response is returned without any network call.
+
+        A streamed request can be made with partial_content=True when only the beginning of the response
+        will be read (e.g. a HTML head), so the read bytes are cached and returned by the next partial requests
         """
 
         kwargs['timeout'] = kwargs.get('timeout', self.default_timeout)
+        partial_content = kwargs.pop('partial_content', False)
+
+        cache = self.cache
+
+        if cache is not None:
+            response = cache.get(method, url, kwargs, partial_content)
+            if response is not None:
+                return response
+
+        self.wait_for_host(url)
 
         try:
             response = super().request(method, url, **kwargs)
@@ -136,6 +327,123 @@ class DefaultSession(requests.Session, metaclass=common_util.ThreadSafeSingleton
                 'http': None,
                 'https': None,
             }
+            self.wait_for_host(url)
             response = super().request(method, url, **kwargs)
 
+        if cache is not None and response.ok:
+            if kwargs.get('stream', False):
+                # a streamed response is cached only if its content is completely read, or as a partial response if it's accepted
+                on_partial = None
+                if partial_content:
+                    on_partial = lambda content, response=response: cache.set(method, url, kwargs, response, content, True)
+                response.raw = CachingStream(response.raw, lambda content, response=response: 
+                                             cache.set(method, url, kwargs, response, content), on_partial)
+            else:
+                cache.set(method, url, kwargs, response)
+
         return response
+
+
+class PagePrefetcher():
+
+    """
+    Iterator over the result pages of a paginated API that fetches the next pages on background threads
+    while the current one is processed. The pages are fetched as soon as the prefetcher is created and yielded in the offsets order
+    """
+
+    def __init__(self, fetch_page: Callable[[int], object], offsets: Iterable[int],
+                 pages_ahead: Optional[int] = DEFAULT_PAGES_AHEAD, url: Optional[str] = None,
+                 is_needed: Optional[Callable[[int], bool]] = None):
+        """
+        Class constructor
+
+        Parameters
+        ----------
+        fetch_page : Callable[[int], object]
+            A function that fetches the page of an offset (e.g. the first record of the page)
+        offsets : Iterable[int]
+            The offsets of the pages
+        pages_ahead : Optional[int], optional
+            The max number of pages fetched ahead of the page that is being processed, by default 2
+        url : Optional[str], optional
+            A URL of the API, if its host is rate limited the pages ahead are bounded by the max burst of requests, by default None
+        is_needed : Optional[Callable[[int], bool]], optional
+            A function that says if the page of an offset can be needed (e.g. the search limit isn't reached before it), 
+            a page isn't fetched ahead while it's not needed, by default None (i.e., all the pages are needed)
+        """
+
+        if url is not None:
+            max_burst = DefaultSession().get_max_burst(url)
+            if max_burst is not None:
+                pages_ahead = min(pages_ahead, max_burst)
+
+        self.fetch_page = fetch_page
+        self.offsets = iter(offsets)
+        self.is_needed = is_needed
+        self.next_offset = None
+        self.pages_ahead = max(pages_ahead, 0)
+        self.executor = ThreadPoolExecutor(max_workers=max(self.pages_ahead, 1))
+        self.futures = deque()
+        self.closed = False
+
+        for i in range(self.pages_ahead):
+            self._submit_next()
+
+    def _submit_next(self):
+        """
+        Private method that starts the fetching of the next page, if there's one and it's needed.
+        A page that isn't needed yet is kept to be checked again on the next call
+        """
+
+        if self.next_offset is None:
+            self.next_offset = next(self.offsets, None)
+
+        if self.next_offset is None:
+            return
+
+        if self.is_needed is not None and not self.is_needed(self.next_offset):
+            return
+
+        self.futures.append(self.executor.submit(self.fetch_page, self.next_offset))
+        self.next_offset = None
+
+    def __iter__(self) -> Iterator[object]:
+        return self
+
+    def __next__(self) -> object:
+
+        if self.closed:
+            raise StopIteration
+
+        if len(self.futures) == 0:
+            # without pages ahead, each page is only fetched when it's requested
+            self._submit_next()
+
+        if len(self.futures) == 0:
+            self.close()
+            raise StopIteration
+
+        future = self.futures.popleft()
+
+        if self.pages_ahead > 0:
+            self._submit_next()
+
+        return future.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Cancel the pages that aren't being fetched yet, it should be called when the remaining pages aren't needed anymore
+        """
+
+        self.closed = True
+
+        while len(self.futures) > 0:
+            self.futures.popleft().cancel()
+
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,442 @@
+import os
+import json
+import sqlite3
+import datetime
+from typing import Iterator, Optional, List
+from findpapers.models.search import Search
+from findpapers.models.paper import Paper
+from findpapers.models.publication import Publication
+
+
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+PAPERS_PAGE_SIZE = 1000
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS search (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        query TEXT,
+        since TEXT,
+        until TEXT,
+        max_papers INTEGER,
+        max_papers_per_database INTEGER,
+        processed_at TEXT,
+        databases TEXT,
+        publication_types TEXT,
+        checkpoint TEXT
+    );
+    CREATE TABLE IF NOT EXISTS publications (
+        id INTEGER PRIMARY KEY,
+        key TEXT UNIQUE,
+        title TEXT,
+        isbn TEXT,
+        issn TEXT,
+        publisher TEXT,
+        category TEXT,
+        cite_score REAL,
+        sjr REAL,
+        snip REAL,
+        subject_areas TEXT,
+        is_potentially_predatory INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS papers (
+        id INTEGER PRIMARY KEY,
+        key TEXT,
+        doi TEXT,
+        title TEXT,
+        abstract TEXT,
+        authors TEXT,
+        publication_id INTEGER REFERENCES publications (id),
+        publication_date TEXT,
+        citations INTEGER,
+        comments TEXT,
+        number_of_pages INTEGER,
+        pages TEXT,
+        databases TEXT,
+        selected INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS papers_key ON papers (key);
+    CREATE INDEX IF NOT EXISTS papers_doi ON papers (doi);
+    CREATE TABLE IF NOT EXISTS urls (
+        paper_id INTEGER REFERENCES papers (id),
+        url TEXT
+    );
+    CREATE INDEX IF NOT EXISTS urls_paper_id ON urls (paper_id);
+    CREATE TABLE IF NOT EXISTS keywords (
+        paper_id INTEGER REFERENCES papers (id),
+        keyword TEXT
+    );
+    CREATE INDEX IF NOT EXISTS keywords_paper_id ON keywords (paper_id);
+    CREATE TABLE IF NOT EXISTS categories (
+        paper_id INTEGER REFERENCES papers (id),
+        facet TEXT,
+        category TEXT
+    );
+    CREATE INDEX IF NOT EXISTS categories_paper_id ON categories (paper_id);
+'''
+
+
+def is_sqlite_path(path: str) -> bool:
+    """
+    Check if a file path has a SQLite database extension
+
+    Parameters
+    ----------
+    path : str
+        A file path
+
+    Returns
+    -------
+    bool
+        True if the path has one of the SQLite extensions (.db, .sqlite, .sqlite3)
+    """
+
+    return path.lower().endswith(SQLITE_EXTENSIONS)
+
+
+def _connect(filepath: str) -> sqlite3.Connection:
+    """
+    Private method that opens a connection with a search database, creating its tables if they don't exist
+
+    Parameters
+    ----------
+    filepath : str
+        A valid file path of the search database
+
+    Returns
+    -------
+    sqlite3.Connection
+        A database connection
+    """
+
+    connection = sqlite3.connect(filepath)
+    connection.executescript(SCHEMA)
+
+    return connection
+
+
+def _get_paper_key(paper: Paper) -> str:
+    """
+    Private method that returns the key of a paper, the same key used by the Search to index its papers
+
+    Parameters
+    ----------
+    paper : Paper
+        A paper instance
+
+    Returns
+    -------
+    str
+        The paper key
+    """
+
+    return Search.get_paper_key(paper.title, paper.publication_date, paper.doi)
+
+
+def _insert_paper_collections(connection: sqlite3.Connection, paper_id: int, paper: Paper):
+    """
+    Private method that inserts the URLs, keywords and categories of a paper
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        A database connection
+    paper_id : int
+        The paper row ID
+    paper : Paper
+        A paper instance
+    """
+
+    connection.executemany('INSERT INTO urls VALUES (?, ?)', [(paper_id, x) for x in paper.urls])
+    connection.executemany('INSERT INTO keywords VALUES (?, ?)', [(paper_id, x) for x in paper.keywords])
+
+    if paper.categories is not None:
+        connection.executemany('INSERT INTO categories VALUES (?, ?, ?)',
+                               [(paper_id, facet, category) for facet, categories in paper.categories.items() for category in categories])
+
+
+def save(search: Search, outputpath: str):
+    """
+    Method used to save a search result in a SQLite database
+
+    Parameters
+    ----------
+    search : Search
+        A Search instance
+    outputpath : str
+        A valid file path used to save the search results
+    """
+
+    # the search is written to a temporary database first, so an interrupted saving never corrupts a previous one
+    temp_outputpath = f'{outputpath}.tmp'
+    if os.path.exists(temp_outputpath):
+        os.remove(temp_outputpath)
+
+    connection = _connect(temp_outputpath)
+
+    with connection:
+
+        checkpoint = None
+        if search.has_checkpoint():
+            checkpoint = {
+                'cursor_by_database': search.cursor_by_database,
+                'finished_databases': sorted(search.finished_databases),
+                'finished_stages': search.finished_stages
+            }
+
+        connection.execute('INSERT INTO search VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+            search.query,
+            search.since.strftime('%Y-%m-%d') if search.since is not None else None,
+            search.until.strftime('%Y-%m-%d') if search.until is not None else None,
+            search.limit, search.limit_per_database,
+            search.processed_at.strftime('%Y-%m-%d %H:%M:%S') if search.processed_at is not None else None,
+            json.dumps(search.databases), json.dumps(search.publication_types), json.dumps(checkpoint)))
+
+        publication_id_by_key = {}
+
+        for paper in Search.get_sorted_papers(search):
+
+            publication_id = None
+
+            if paper.publication is not None:
+                publication = paper.publication
+                publication_key = Search.get_publication_key(publication.title, publication.issn, publication.isbn)
+                publication_id = publication_id_by_key.get(publication_key)
+
+                if publication_id is None:
+                    publication_id = connection.execute('INSERT INTO publications VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                        publication_key, publication.title, publication.isbn, publication.issn, publication.publisher,
+                        publication.category, publication.cite_score, publication.sjr, publication.snip,
+                        json.dumps(sorted(publication.subject_areas)), publication.is_potentially_predatory)).lastrowid
+                    publication_id_by_key[publication_key] = publication_id
+
+            paper_id = connection.execute('INSERT INTO papers VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                _get_paper_key(paper), paper.doi, paper.title, paper.abstract, json.dumps(paper.authors), publication_id,
+                paper.publication_date.strftime('%Y-%m-%d'), paper.citations, paper.comments, paper.number_of_pages,
+                paper.pages, json.dumps(sorted(paper.databases)), paper.selected)).lastrowid
+
+            _insert_paper_collections(connection, paper_id, paper)
+
+    connection.close()
+
+    os.replace(temp_outputpath, outputpath)
+
+
+def _get_papers(connection: sqlite3.Connection, where: Optional[str] = None, parameters: Optional[tuple] = ()) -> List[Paper]:
+    """
+    Private method that builds the papers stored on a search database
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        A database connection
+    where : Optional[str], optional
+        A SQL condition used to filter the papers, by default None (i.e., all the papers)
+    parameters : Optional[tuple], optional
+        The SQL condition parameters, by default ()
+
+    Returns
+    -------
+    List[Paper]
+        A list of papers
+    """
+
+    where_clause = f'WHERE {where}' if where is not None else ''
+    paper_ids_query = f'SELECT id FROM papers {where_clause}'
+
+    publication_by_id = {}
+    for row in connection.execute(f'SELECT * FROM publications WHERE id IN (SELECT publication_id FROM papers {where_clause})', parameters):
+        publication_id, key, title, isbn, issn, publisher, category, cite_score, sjr, snip, subject_areas, is_potentially_predatory = row
+        publication = Publication(title, isbn, issn, publisher, category, cite_score, sjr, snip, set(json.loads(subject_areas)),
+                                  bool(is_potentially_predatory))
+        publication_by_id[publication_id] = publication
+
+    urls_by_paper_id = {}
+    for paper_id, url in connection.execute(f'SELECT paper_id, url FROM urls WHERE paper_id IN ({paper_ids_query})', parameters):
+        urls_by_paper_id.setdefault(paper_id, set()).add(url)
+
+    keywords_by_paper_id = {}
+    for paper_id, keyword in connection.execute(f'SELECT paper_id, keyword FROM keywords WHERE paper_id IN ({paper_ids_query})', parameters):
+        keywords_by_paper_id.setdefault(paper_id, set()).add(keyword)
+
+    categories_by_paper_id = {}
+    for paper_id, facet, category in connection.execute(
+            f'SELECT paper_id, facet, category FROM categories WHERE paper_id IN ({paper_ids_query}) ORDER BY rowid', parameters):
+        categories_by_paper_id.setdefault(paper_id, {}).setdefault(facet, []).append(category)
+
+    papers = []
+    for row in connection.execute(f'SELECT * FROM papers {where_clause}', parameters):
+        paper_id, key, doi, title, abstract, authors, publication_id, publication_date, citations, comments, \
+            number_of_pages, pages, databases, selected = row
+        papers.append(Paper(title, abstract, json.loads(authors), publication_by_id.get(publication_id),
+                            datetime.datetime.strptime(publication_date, '%Y-%m-%d').date(), urls_by_paper_id.get(paper_id, set()),
+                            doi, citations, keywords_by_paper_id.get(paper_id, set()), comments, number_of_pages, pages,
+                            set(json.loads(databases)), bool(selected) if selected is not None else None,
+                            categories_by_paper_id.get(paper_id)))
+
+    return papers
+
+
+def load(search_path: str) -> Search:
+    """
+    Method used to load a search result from a SQLite database
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path of a search database
+
+    Returns
+    -------
+    Search
+        The loaded search
+    """
+
+    connection = _connect(search_path)
+
+    try:
+        query, since, until, limit, limit_per_database, processed_at, databases, publication_types, checkpoint = connection.execute(
+            'SELECT query, since, until, max_papers, max_papers_per_database, processed_at, databases, publication_types, checkpoint FROM search').fetchone()
+
+        search_dict = {
+            'query': query,
+            'since': since,
+            'until': until,
+            'limit': limit,
+            'limit_per_database': limit_per_database,
+            'processed_at': processed_at,
+            'databases': json.loads(databases),
+            'publication_types': json.loads(publication_types),
+            'checkpoint': json.loads(checkpoint) if checkpoint is not None else None,
+            'papers': []
+        }
+
+        search = Search.from_dict(search_dict)
+
+        for paper in _get_papers(connection):
+            try:
+                search.add_paper(paper, merge_similar=False)
+            except Exception:
+                pass
+
+        return search
+
+    finally:
+        connection.close()
+
+
+def iterate_papers(search_path: str) -> Iterator[Paper]:
+    """
+    Lazily iterate through the papers of a search database, building only a page of papers at a time
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path of a search database
+
+    Yields
+    -------
+    Paper
+        A paper of the search
+    """
+
+    connection = _connect(search_path)
+
+    try:
+        last_paper_id = 0
+        while True:
+            paper_ids = [x[0] for x in connection.execute(
+                'SELECT id FROM papers WHERE id > ? ORDER BY id LIMIT ?', (last_paper_id, PAPERS_PAGE_SIZE))]
+
+            if len(paper_ids) == 0:
+                break
+
+            yield from _get_papers(connection, 'id BETWEEN ? AND ?', (paper_ids[0], paper_ids[-1]))
+
+            last_paper_id = paper_ids[-1]
+
+    finally:
+        connection.close()
+
+
+def get_number_of_papers(search_path: str) -> int:
+    """
+    Get the number of papers of a search database
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path of a search database
+
+    Returns
+    -------
+    int
+        The number of papers
+    """
+
+    connection = _connect(search_path)
+
+    try:
+        return connection.execute('SELECT COUNT(*) FROM papers').fetchone()[0]
+    finally:
+        connection.close()
+
+
+def get_paper(search_path: str, paper_key: Optional[str] = None, paper_doi: Optional[str] = None) -> Optional[Paper]:
+    """
+    Get a single paper from a search database by its key or DOI, without loading the whole search
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path of a search database
+    paper_key : Optional[str], optional
+        The paper key (see Search.get_paper_key), by default None
+    paper_doi : Optional[str], optional
+        The paper DOI, by default None
+
+    Returns
+    -------
+    Optional[Paper]
+        The wanted paper, or None if there isn't a paper given by the provided arguments
+    """
+
+    connection = _connect(search_path)
+
+    try:
+        if paper_key is not None:
+            papers = _get_papers(connection, 'key = ?', (paper_key,))
+        else:
+            papers = _get_papers(connection, 'doi = ?', (paper_doi,))
+
+        return papers[0] if len(papers) > 0 else None
+
+    finally:
+        connection.close()
+
+
+def update_paper(search_path: str, paper: Paper):
+    """
+    Update the refinement data (selection and categories) of a single paper on a search database
+
+    Parameters
+    ----------
+    search_path : str
+        A valid file path of a search database
+    paper : Paper
+        A paper instance that was loaded from the search database
+    """
+
+    connection = _connect(search_path)
+
+    with connection:
+
+        paper_ids = [x[0] for x in connection.execute('SELECT id FROM papers WHERE key = ?', (_get_paper_key(paper),))]
+
+        for paper_id in paper_ids:
+            connection.execute('UPDATE papers SET selected = ? WHERE id = ?', (paper.selected, paper_id))
+            connection.execute('DELETE FROM categories WHERE paper_id = ?', (paper_id,))
+            if paper.categories is not None:
+                connection.executemany('INSERT INTO categories VALUES (?, ?, ?)',
+                                       [(paper_id, facet, category) for facet, categories in paper.categories.items() for category in categories])
+
+    connection.close()
@@ -0,0 +1,101 @@
+import requests
+from lxml import etree
+from typing import Iterator, List, Optional
+
+
+def iterparse(source, tags: List[str]) -> Iterator[etree._Element]:
+    """
+    Incrementally parse a XML source yielding each element with one of the provided tags
+    as soon as it is completely parsed. After the consumer handles an element, it and its
+    already handled siblings are released, so the memory usage doesn't grow with the document size
+
+    Parameters
+    ----------
+    source : file-like object or str
+        A file-like object (e.g. a response stream) or a file path
+    tags : List[str]
+        The tags of the elements to be yielded, using Clark notation for namespaced tags (e.g. {http://www.w3.org/2005/Atom}entry)
+
+    Yields
+    -------
+    etree._Element
+        A completely parsed element, that's only valid until the next element is requested
+    """
+
+    for _, element in etree.iterparse(source, events=('end',), tag=tags, resolve_entities=False, no_network=True):
+
+        yield element
+
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def iterparse_response(response: requests.Response, tags: List[str]) -> Iterator[etree._Element]:
+    """
+    Incrementally parse the content of a streamed response, see iterparse for more details.
+    The response is checked right away, so a failed request is reported before any element is requested
+
+    Parameters
+    ----------
+    response : requests.Response
+        A response requested using stream=True
+    tags : List[str]
+        The tags of the elements to be yielded
+
+    Returns
+    -------
+    Iterator[etree._Element]
+        An iterator of the completely parsed elements, each one is only valid until the next element is requested
+
+    Raises
+    ------
+    ConnectionError
+        There's no response, the response isn't ok or it has no content stream
+    """
+
+    if response is None or not response.ok or response.raw is None:
+        if response is not None and response.raw is not None:
+            response.close()
+        status_code = response.status_code if response is not None else None
+        raise ConnectionError(f'The XML response could not be read (status code: {status_code})')
+
+    if hasattr(response.raw, 'decode_content'):
+        response.raw.decode_content = True  # the gzip/deflate encodings aren't handled by the raw stream by default
+
+    def iterparse_content():
+        try:
+            yield from iterparse(response.raw, tags)
+        finally:
+            response.close()
+
+    return iterparse_content()
+
+
+def get_text(element: etree._Element, path: Optional[str] = None, namespaces: Optional[dict] = None) -> Optional[str]:
+    """
+    Get the whole stripped text of an element (or of its first sub-element that matches the provided path),
+    including the text of its inline children (e.g. <i>, <sup>)
+
+    Parameters
+    ----------
+    element : etree._Element
+        An element
+    path : Optional[str], optional
+        A path to a sub-element, by default None
+    namespaces : Optional[dict], optional
+        A prefix to namespace map used by the path, by default None
+
+    Returns
+    -------
+    Optional[str]
+        The element text, or None if there's no element matching the provided path
+    """
+
+    if path is not None:
+        element = element.find(path, namespaces)
+
+    if element is None:
+        return None
+
+    return ''.join(element.itertext()).strip()
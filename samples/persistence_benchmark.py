@@ -0,0 +1,74 @@
+# Compares the save/load time and the file size of the search file formats
+# usage: python persistence_benchmark.py [number of papers ...]
+
+import os
+import sys
+import time
+import uuid
+import random
+import datetime
+import tempfile
+from findpapers.models.search import Search
+from findpapers.models.paper import Paper
+from findpapers.models.publication import Publication
+import findpapers.utils.persistence_util as persistence_util
+
+FILENAME_BY_FORMAT = {
+    'json': 'search.json',
+    'jsonl': 'search.jsonl',
+    'sqlite': 'search.db',
+    'binary': 'search.fpz'
+}
+
+
+def get_search(number_of_papers: int) -> Search:
+
+    random.seed(42)
+
+    vocabulary = [uuid.uuid4().hex[:random.randint(2, 10)] for _ in range(20000)]
+    databases = ['ACM', 'arXiv', 'IEEE', 'PubMed', 'Scopus']
+    publications = [Publication(f'Publication {i}', issn=f'{i:04d}-0000', publisher=f'Publisher {i % 50}', category='Journal',
+                                subject_areas={'Computer Science', 'Music'}) for i in range(1000)]
+
+    search = Search('[rock] AND [music]', limit=number_of_papers, limit_per_database=number_of_papers)
+
+    for i in range(number_of_papers):
+        words = [random.choice(vocabulary) for _ in range(10)]
+        abstract = ' '.join(random.choice(vocabulary) for _ in range(200))
+        paper = Paper(f'{" ".join(words)} {uuid.uuid4().hex[:8]}', abstract, [f'Author {random.randint(0, 10000)}' for _ in range(4)],
+                      random.choice(publications), datetime.date(random.randint(1990, 2020), 1, 1),
+                      {f'https://papers.org/{i}'}, f'10.1000/{i}', random.randint(0, 1000), set(words[:3]),
+                      databases={random.choice(databases)})
+        search.add_paper(paper)
+
+    return search
+
+
+def run(number_of_papers: int):
+
+    search = get_search(number_of_papers)
+    directory = tempfile.mkdtemp()
+
+    print(f'\n{number_of_papers} papers')
+    print(f'{"format":<10}{"save (s)":>12}{"load (s)":>12}{"size (MB)":>12}')
+
+    for format, filename in FILENAME_BY_FORMAT.items():
+
+        filepath = os.path.join(directory, filename)
+
+        start = time.perf_counter()
+        persistence_util.save(search, filepath)
+        save_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded_search = persistence_util.load(filepath)
+        load_time = time.perf_counter() - start
+
+        assert len(loaded_search.papers) == len(search.papers)
+
+        print(f'{format:<10}{save_time:>12.2f}{load_time:>12.2f}{os.path.getsize(filepath) / 1024 / 1024:>12.1f}')
+
+
+if __name__ == '__main__':
+    for number_of_papers in [int(x) for x in sys.argv[1:]] or [10000, 100000]:
+        run(number_of_papers)
@@ -0,0 +1,53 @@
+# Measures the indexing time and the query time of the full-text search index (it requires NumPy)
+# usage: python query_benchmark.py [number of papers ...]
+
+import sys
+import time
+import uuid
+import random
+import datetime
+import itertools
+from findpapers.models.paper import Paper
+from findpapers.models.paper_index import PaperIndex
+
+
+def get_papers(number_of_papers: int, vocabulary: list):
+
+    # the word frequencies follow a Zipf distribution, as the words of a natural language
+    cumulative_weights = list(itertools.accumulate(1 / (i + 1) for i in range(len(vocabulary))))
+
+    for i in range(number_of_papers):
+        words = random.choices(vocabulary, cum_weights=cumulative_weights, k=130)
+        yield Paper(' '.join(words[:10]), ' '.join(words[10:]), [], None, datetime.date(2000, 1, 1), set(), f'10.1000/{i}')
+
+
+def run(number_of_papers: int):
+
+    random.seed(42)
+
+    vocabulary = [uuid.uuid4().hex[:random.randint(3, 9)] for _ in range(50000)]
+
+    start = time.perf_counter()
+    index = PaperIndex(get_papers(number_of_papers, vocabulary))
+    indexing_time = time.perf_counter() - start
+
+    print(f'\n{number_of_papers} papers indexed in {indexing_time:.1f}s')
+    print(f'{"query":<50}{"time (s)":>12}{"results":>12}')
+
+    queries = [
+        f'[{vocabulary[0]}]',
+        f'[{vocabulary[0]}] AND [{vocabulary[100]}]',
+        f'[{vocabulary[1]} {vocabulary[0]}]',
+        f'[{vocabulary[200][:3]}*] OR [{vocabulary[300]}]',
+        f'[{vocabulary[1000]}] AND NOT [{vocabulary[0]}]'
+    ]
+
+    for query in queries:
+        start = time.perf_counter()
+        results = index.search(query)
+        print(f'{query:<50}{time.perf_counter() - start:>12.3f}{len(results):>12}')
+
+
+if __name__ == '__main__':
+    for number_of_papers in [int(x) for x in sys.argv[1:]] or [10000, 100000]:
+        run(number_of_papers)
@@ -6,4 +6,5 @@ pytest_plugins = [
    "tests.mocks.mocks_pubmed",
    "tests.mocks.mocks_arxiv",
    "tests.mocks.mocks_acm",
+   "tests.mocks.mocks_rxiv",
 ]
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import random
+import uuid
 import pytest
 import json
 import datetime
@@ -41,7 +42,7 @@ def mock_get_paper_metadata(monkeypatch):
         filename = os.path.join(dirname, '../data/acm-paper-metadata.json')
         metadata = json.load(open(filename))
         metadata['DOI'] = f'FAKE-DOI-{datetime.datetime.now()}'
-        metadata['title'] = f'FAKE-TITLE-{datetime.datetime.now()}'
+        metadata['title'] = f'FAKE-TITLE-{uuid.uuid4()}'
 
         if random.random() > 0.5: 
             # changing data structure in some cases
@@ -51,3 +52,20 @@ def mock_get_paper_metadata(monkeypatch):
         return metadata
 
     monkeypatch.setattr(acm_searcher, '_get_paper_metadata', mocked_data)
+
+
+@pytest.fixture(autouse=True)
+def mock_get_papers_metadata(monkeypatch):
+
+    def mocked_data(dois, *args, **kwargs):
+        dirname = os.path.dirname(__file__)
+        filename = os.path.join(dirname, '../data/acm-paper-metadata.json')
+        metadata_by_doi = {}
+        for doi in dois:
+            metadata = json.load(open(filename))
+            metadata['DOI'] = doi
+            metadata['title'] = f'FAKE-TITLE-{uuid.uuid4()}'
+            metadata_by_doi[doi] = metadata
+        return metadata_by_doi
+
+    monkeypatch.setattr(acm_searcher, '_get_papers_metadata', mocked_data)
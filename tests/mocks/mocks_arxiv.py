@@ -1,8 +1,9 @@
 import os
+import uuid
 import pytest
-import xmltodict
 import datetime
 import findpapers.searchers.arxiv_searcher as arxiv_searcher
+import findpapers.utils.xml_util as xml_util
 
 
 @pytest.fixture(autouse=True)
@@ -11,14 +12,13 @@ def mock_arxiv_get_api_result(monkeypatch):
     def mocked_data(*args, **kwargs):
         dirname = os.path.dirname(__file__)
         filename = os.path.join(dirname, '../data/arxiv-api-search.xml')
-        with open(filename) as f:
-            data = xmltodict.parse(f.read())
 
-        for entry in data['feed']['entry']:
-            entry['title'] = f'FAKE-TITLE-{datetime.datetime.now()}'
-            if 'arxiv:doi' in entry:
-                entry['arxiv:doi']['#text'] = f'FAKE-DOI-{datetime.datetime.now()}'
-
-        return data
+        for element in xml_util.iterparse(filename, [arxiv_searcher.TOTAL_RESULTS_TAG, arxiv_searcher.ENTRY_TAG]):
+            if element.tag == arxiv_searcher.ENTRY_TAG:
+                element.find('atom:title', arxiv_searcher.NAMESPACES).text = f'FAKE-TITLE-{uuid.uuid4()}'
+                doi = element.find('arxiv:doi', arxiv_searcher.NAMESPACES)
+                if doi is not None:
+                    doi.text = f'FAKE-DOI-{datetime.datetime.now()}'
+            yield element
 
     monkeypatch.setattr(arxiv_searcher, '_get_api_result', mocked_data)
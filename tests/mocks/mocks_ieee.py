@@ -1,4 +1,5 @@
 import os
+import uuid
 import pytest
 import json
 import datetime
@@ -15,7 +16,7 @@ def mock_ieee_get_api_result(monkeypatch):
         search_results = json.load(open(filename))
 
         for article in search_results.get('articles'):
-            article['title'] = f'FAKE-TITLE-{datetime.datetime.now()}'
+            article['title'] = f'FAKE-TITLE-{uuid.uuid4()}'
             article['doi'] = f'FAKE-DOI-{datetime.datetime.now()}'
 
         return search_results
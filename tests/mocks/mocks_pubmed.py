@@ -1,9 +1,11 @@
 import os
+import uuid
 import pytest
 import xmltodict
 import random
 import datetime
 import findpapers.searchers.pubmed_searcher as pubmed_searcher
+import findpapers.utils.xml_util as xml_util
 
 
 @pytest.fixture(autouse=True)
@@ -14,29 +16,28 @@ def mock_pubmed_get_api_result(monkeypatch):
         filename = os.path.join(dirname, '../data/pubmed-api-search.xml')
         with open(filename) as f:
             data = xmltodict.parse(f.read())
+        data['eSearchResult']['WebEnv'] = 'FAKE-WEBENV'
+        data['eSearchResult']['QueryKey'] = '1'
         return data
 
     monkeypatch.setattr(pubmed_searcher, '_get_api_result', mocked_data)
 
 
 @pytest.fixture(autouse=True)
-def mock_pubmed_get_paper_entry(monkeypatch):
+def mock_pubmed_get_paper_entries(monkeypatch):
 
     def mocked_data(*args, **kwargs):
         dirname = os.path.dirname(__file__)
         filename = os.path.join(dirname, '../data/pubmed-api-paper.xml')
-        with open(filename) as f:
-            data = xmltodict.parse(f.read())
 
-        data['PubmedArticleSet']['PubmedArticle']['MedlineCitation'][
-            'Article']['ArticleTitle'] = f'FAKE-TITLE-{datetime.datetime.now()}'
-        data['PubmedArticleSet']['PubmedArticle']['PubmedData']['ArticleIdList'][
-            'ArticleId'][1]['#text'] = f'FAKE-DOI-{datetime.datetime.now()}'
+        for i in range(pubmed_searcher.MAX_ENTRIES_PER_PAGE):
+            for paper_entry in xml_util.iterparse(filename, ['PubmedArticle']):
+                paper_entry.find('MedlineCitation/Article/ArticleTitle').text = f'FAKE-TITLE-{uuid.uuid4()}'
+                paper_entry.findall('PubmedData/ArticleIdList/ArticleId')[1].text = f'FAKE-DOI-{datetime.datetime.now()}'
 
-        if random.random() > 0.5:
-            data['PubmedArticleSet']['PubmedArticle']['MedlineCitation'][
-            'Article']['Pagination']['MedlinePgn'] = f'{random.randint(1,100)}-{random.randint(1,100)}'
+                if random.random() > 0.5:
+                    paper_entry.find('MedlineCitation/Article/Pagination/MedlinePgn').text = f'{random.randint(1,100)}-{random.randint(1,100)}'
 
-        return data
+                yield paper_entry
 
-    monkeypatch.setattr(pubmed_searcher, '_get_paper_entry', mocked_data)
+    monkeypatch.setattr(pubmed_searcher, '_get_paper_entries', mocked_data)
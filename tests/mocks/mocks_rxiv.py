@@ -0,0 +1,59 @@
+import os
+import json
+import pytest
+from lxml import html
+import findpapers.searchers.rxiv_searcher as rxiv_searcher
+
+
+def _get_details() -> dict:
+    dirname = os.path.dirname(__file__)
+    filename = os.path.join(dirname, '../data/rxiv-api-details.json')
+    with open(filename) as f:
+        return json.load(f)
+
+
+@pytest.fixture(autouse=True)
+def mock_rxiv_get_result(monkeypatch):
+
+    def mocked_data(url, *args, **kwargs):
+        dirname = os.path.dirname(__file__)
+        filename = os.path.join(dirname, '../data/rxiv-search-page.html')
+        with open(filename) as f:
+            page = html.fromstring(f.read())
+
+        # the second page is the last one, and it has the paper posted on the 3rd
+        if 'page=1' in url:
+            for element in page.xpath('//*[@class="link-icon link-icon-after"]'):
+                element.getparent().remove(element)
+            for element in page.xpath('//*[@class="highwire-cite-metadata-doi highwire-cite-metadata"]'):
+                element.text = element.text.replace('2020.01.01.000001', '2020.01.03.000003')
+            page.xpath('//*[@class="highwire-cite-metadata-doi highwire-cite-metadata"]')[1].getparent().drop_tree()
+
+        return page
+
+    monkeypatch.setattr(rxiv_searcher, '_get_result', mocked_data)
+
+
+@pytest.fixture(autouse=True)
+def mock_rxiv_get_paper_metadata(monkeypatch):
+
+    def mocked_data(doi, *args, **kwargs):
+        collection = [x for x in _get_details().get('collection') if x.get('doi') == doi]
+        return collection[0] if len(collection) > 0 else None
+
+    monkeypatch.setattr(rxiv_searcher, '_get_paper_metadata', mocked_data)
+
+
+@pytest.fixture(autouse=True)
+def mock_rxiv_get_interval_page(monkeypatch):
+
+    def mocked_data(database, since, until, cursor=0, *args, **kwargs):
+        # the pages have 2 records to exercise the pagination
+        details = _get_details()
+        collection = details.get('collection')
+        details['collection'] = collection[cursor:cursor+2]
+        details['messages'][0]['cursor'] = cursor
+        details['messages'][0]['count'] = len(details.get('collection'))
+        return details
+
+    monkeypatch.setattr(rxiv_searcher, '_get_interval_page', mocked_data)
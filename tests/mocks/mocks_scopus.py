@@ -1,4 +1,5 @@
 import os
+import uuid
 import pytest
 import json
 import datetime
@@ -15,7 +16,7 @@ def mock_scopus_get_search_results(monkeypatch):
         search_results = json.load(open(filename)).get('search-results')
 
         for entry in search_results.get('entry'):
-            entry['dc:title'] = f'FAKE-TITLE-{datetime.datetime.now()}'
+            entry['dc:title'] = f'FAKE-TITLE-{uuid.uuid4()}'
             entry['prism:doi'] = f'FAKE-DOI-{datetime.datetime.now()}'
 
         # if it's a recursive call for new search results
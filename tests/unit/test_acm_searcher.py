@@ -1,4 +1,5 @@
 import datetime
+import itertools
 import pytest
 from urllib.parse import quote_plus
 import findpapers.searchers.acm_searcher as acm_searcher
@@ -10,7 +11,7 @@ def test_get_search_url(search: Search):
 
     url = acm_searcher._get_search_url(search)
 
-    query = search.query.replace(' AND NOT ', ' NOT ')
+    query = 'Abstract:("this" AND ("that thing" OR "something") NOT "anything")'
 
     assert quote_plus(query) in url
     assert url.startswith('https://dl.acm.org/action/doSearch?')
@@ -21,6 +22,18 @@ def test_mocks():
     assert acm_searcher._get_result() is not None
     assert acm_searcher._get_paper_page() is not None
     assert acm_searcher._get_paper_metadata() is not None
+    assert acm_searcher._get_papers_metadata([]) is not None
+
+
+@pytest.mark.parametrize('paper_url, paper_doi', [
+    ('https://dl.acm.org/abs/10.1145/3371158.3371232', '10.1145/3371158.3371232'),
+    ('https://dl.acm.org/book/10.1145/3378904.3378915', '10.1145/3378904.3378915'),
+    ('https://dl.acm.org/doi/10.1145/3336191.3371881', '10.1145/3336191.3371881'),
+    ('https://dl.acm.org/action/showFmPdf?doi=10.1145%2F3336191', None),
+])
+def test_get_paper_doi(paper_url: str, paper_doi: str):
+
+    assert acm_searcher._get_paper_doi(paper_url) == paper_doi
 
 
 def test_get_paper():
@@ -50,3 +63,50 @@ def test_run(search: Search):
     acm_searcher.run(search)
 
     assert len(search.papers) == 14
+
+
+@pytest.mark.parametrize('max_parallel_papers', [1, 4])
+def test_run_page(search: Search, max_parallel_papers: int):
+
+    search.limit = 7
+    search.limit_per_database = None
+
+    acm_searcher.run(search, max_parallel_papers)
+
+    assert len(search.papers) == 7
+    assert all(x.publication_date.year == 2020 for x in search.papers)
+
+
+def test_run_unknown_paper_urls(search: Search, monkeypatch):
+
+    search.limit = None
+    search.limit_per_database = None
+
+    # every other paper URL has an unknown shape, those papers are skipped instead of stopping the search
+    get_paper_doi = acm_searcher._get_paper_doi
+    calls = itertools.count()
+    monkeypatch.setattr(acm_searcher, '_get_paper_doi', lambda x: get_paper_doi(x) if next(calls) % 2 == 0 else None)
+
+    acm_searcher.run(search)
+
+    # the 14 results are the 10 papers of the mocked page followed by the first 4 of them again
+    assert len(search.papers) == 5
+
+
+def test_run_limit(search: Search, monkeypatch):
+
+    search.limit = 5
+    search.limit_per_database = None
+
+    # only the papers that can still be collected are fetched, and the next result page isn't needed
+    get_paper_page = acm_searcher._get_paper_page
+    get_result = acm_searcher._get_result
+    paper_pages_urls, results_pages = [], []
+    monkeypatch.setattr(acm_searcher, '_get_paper_page', lambda x: paper_pages_urls.append(x) or get_paper_page(x))
+    monkeypatch.setattr(acm_searcher, '_get_result', lambda x, y: results_pages.append(y) or get_result(x, y))
+
+    acm_searcher.run(search)
+
+    assert len(search.papers) == 5
+    assert len(paper_pages_urls) == 5
+    assert results_pages == [0]
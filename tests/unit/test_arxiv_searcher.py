@@ -1,46 +1,45 @@
 import datetime
 import copy
 import pytest
+from lxml import etree
 import findpapers.searchers.arxiv_searcher as arxiv_searcher
 from findpapers.models.search import Search
 from findpapers.models.publication import Publication
 
-paper_entry = {
-    'title': 'title fake',
-    'published': '2020-02-27T13:35:26Z',
-    'arxiv:journal_ref': {
-        '#text': 'fake publication name'
-    },
-    'category': [  # can be a single value
-        {'@term': 'astro-ph'}
-    ],
-    'arxiv:doi': {
-        '#text': 'fake-doi'
-    },
-    'summary': 'a long abstract',
-    'link': [  # can be a single value
-        {'@href': 'http://fake-url-A'},
-        {'@href': 'http://fake-url-B'},
-    ],
-    'author': [  # can be a single value
-        {'name': 'author A'},
-        {'name': 'author B'},
-    ],
-    'arxiv:comment': {
-        '#text': 'fake comment'
-    }
-}
-
-@pytest.mark.skip(reason="It needs some revision after some tool's refactoring")
+PAPER_ENTRY_XML = """
+<entry xmlns="http://www.w3.org/2005/Atom" xmlns:arxiv="http://arxiv.org/schemas/atom">
+    <title>title fake</title>
+    <published>2020-02-27T13:35:26Z</published>
+    <arxiv:journal_ref>fake publication name</arxiv:journal_ref>
+    <category term="astro-ph"/>
+    <category term="unknown-category"/>
+    <arxiv:doi>fake-doi</arxiv:doi>
+    <summary>  a long
+abstract</summary>
+    <link href="http://fake-url-A"/>
+    <link href="http://fake-url-B"/>
+    <author><name>author A</name></author>
+    <author><name>author B</name></author>
+    <arxiv:comment>fake comment</arxiv:comment>
+</entry>
+"""
+
+paper_entry = etree.fromstring(PAPER_ENTRY_XML)
+
 def test_get_search_url(search: Search):
 
     start_record = 25
-    query = 'all:this AND (all:that thing OR all:something) ANDNOT all:anything'
+    query = '(ti:"this" AND (ti:"that thing" OR ti:"something") ANDNOT ti:"anything")'
+    query += ' OR (abs:"this" AND (abs:"that thing" OR abs:"something") ANDNOT abs:"anything")'
 
     url = f'http://export.arxiv.org/api/query?search_query={query}&start={start_record}&sortBy=submittedDate&sortOrder=descending&max_results={arxiv_searcher.MAX_ENTRIES_PER_PAGE}'
 
     assert arxiv_searcher._get_search_url(search, start_record) == url
 
+    search.query = '[self-driving car?]'
+
+    assert 'search_query=(ti:self driving car?) OR (abs:self driving car?)&' in arxiv_searcher._get_search_url(search, start_record)
+
 
 def test_mocks():
 
@@ -51,8 +50,7 @@ def test_get_publication():
 
     publication = arxiv_searcher._get_publication(paper_entry)
 
-    assert publication.title == paper_entry.get(
-        'arxiv:journal_ref').get('#text')
+    assert publication.title == 'fake publication name'
     assert publication.isbn is None
     assert publication.issn is None
     assert publication.publisher is None
@@ -61,11 +59,9 @@ def test_get_publication():
     assert 'Astrophysics' in publication.subject_areas
 
     alternative_paper_entry = copy.deepcopy(paper_entry)
-    alternative_paper_entry['category'] = paper_entry.get('category')[0]
+    alternative_paper_entry.remove(alternative_paper_entry.find('arxiv:journal_ref', arxiv_searcher.NAMESPACES))
 
-    publication = arxiv_searcher._get_publication(alternative_paper_entry)
-    assert len(publication.subject_areas) == 1
-    assert 'Astrophysics' in publication.subject_areas
+    assert arxiv_searcher._get_publication(alternative_paper_entry) is None
 
 
 def test_get_paper(publication: Publication):
@@ -76,11 +72,12 @@ def test_get_paper(publication: Publication):
         paper_entry, publication_date, publication)
 
     assert paper.publication == publication
-    assert paper.title == paper_entry.get('title')
+    assert paper.title == 'title fake'
     assert paper.publication_date == publication_date
-    assert paper.doi == paper_entry.get('arxiv:doi').get('#text')
+    assert paper.doi == 'fake-doi'
     assert paper.citations is None
-    assert paper.abstract == paper_entry.get('summary')
+    assert paper.abstract == 'a long\nabstract'
+    assert paper.comments == 'fake comment'
     assert len(paper.authors) == 2
     assert 'author B' in paper.authors
     assert len(paper.keywords) == 0
@@ -88,8 +85,9 @@ def test_get_paper(publication: Publication):
     assert 'http://fake-url-B' in paper.urls
 
     alternative_paper_entry = copy.deepcopy(paper_entry)
-    alternative_paper_entry['link'] = paper_entry.get('link')[0]
-    alternative_paper_entry['author'] = paper_entry.get('author')[0]
+    for element in alternative_paper_entry.findall('atom:link', arxiv_searcher.NAMESPACES)[1:] + \
+            alternative_paper_entry.findall('atom:author', arxiv_searcher.NAMESPACES)[1:]:
+        alternative_paper_entry.remove(element)
 
     paper = arxiv_searcher._get_paper(
         alternative_paper_entry, publication_date, publication)
@@ -109,3 +107,57 @@ def test_run(search: Search):
     arxiv_searcher.run(search)
 
     assert len(search.papers) == 18
+
+
+def test_run_pages(search: Search):
+
+    search.limit = 40
+    search.limit_per_database = None
+    search.since = None
+    search.until = None
+
+    arxiv_searcher.run(search)
+
+    # the mocked API returns 20 of the 21 papers on each page
+    assert len(search.papers) == 21
+
+
+@pytest.mark.parametrize('limit, pages_count', [(10, 0), (21, 1), (None, 1)])
+def test_run_limit(search: Search, monkeypatch, limit: int, pages_count: int):
+
+    search.limit = limit
+    search.limit_per_database = None
+    search.since = None
+    search.until = None
+
+    requested_start_records = []
+    get_api_page = arxiv_searcher._get_api_page
+
+    def mocked_get_api_page(search, start_record=0):
+        requested_start_records.append(start_record)
+        return get_api_page(search, start_record)
+
+    monkeypatch.setattr(arxiv_searcher, '_get_api_page', mocked_get_api_page)
+
+    arxiv_searcher.run(search)
+
+    # the pages beyond the search limit aren't fetched ahead
+    assert len(requested_start_records) == pages_count
+
+
+def test_run_failed_page(search: Search, monkeypatch):
+
+    search.limit = None
+    search.limit_per_database = None
+    search.since = None
+    search.until = None
+
+    def mocked_get_api_page(search, start_record=0):
+        raise ConnectionError('The XML response could not be read (status code: 500)')
+
+    monkeypatch.setattr(arxiv_searcher, '_get_api_page', mocked_get_api_page)
+
+    arxiv_searcher.run(search)
+
+    # the second page is skipped, the papers of the first one are kept
+    assert len(search.papers) == 20
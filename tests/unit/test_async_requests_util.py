@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from findpapers.utils.async_requests_util import AsyncSession
+
+httpx = pytest.importorskip('httpx')
+
+
+def _get_session(handler_by_client: list, max_connections_per_host: int = 10) -> AsyncSession:
+
+    session = AsyncSession(max_connections_per_host=max_connections_per_host)
+    session.clients = [httpx.AsyncClient(transport=httpx.MockTransport(x)) for x in handler_by_client]
+
+    return session
+
+
+def test_async_session_proxy_fallback():
+
+    async def run():
+        async with _get_session([lambda request: httpx.Response(403), lambda request: httpx.Response(200, text=':)')]) as session:
+            return await session.get('https://fake-host.org/paper')
+
+    response = asyncio.run(run())
+
+    assert response.status_code == 200
+    assert response.text == ':)'
+
+
+def test_async_session_failure():
+
+    def handler(request):
+        raise httpx.ConnectError('fake error', request=request)
+
+    async def run():
+        async with _get_session([handler]) as session:
+            return await session.get('https://fake-host.org/paper')
+
+    # the failures are raised, so they can be retried
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(run())
+
+
+def test_async_session_unsuccessful_response():
+
+    async def run():
+        async with _get_session([lambda request: httpx.Response(403), lambda request: httpx.Response(404)]) as session:
+            return await session.get('https://fake-host.org/paper')
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+
+
+def test_async_session_stream():
+
+    async def run():
+        async with _get_session([lambda request: httpx.Response(403), lambda request: httpx.Response(200, text=':)')]) as session:
+            async with session.stream('GET', 'https://fake-host.org/paper') as response:
+                return b''.join([x async for x in response.aiter_bytes()])
+
+    assert asyncio.run(run()) == b':)'
+
+
+def test_async_session_connections_per_host():
+
+    in_flight = {'current': 0, 'max': 0}
+
+    async def handler(request):
+        in_flight['current'] += 1
+        in_flight['max'] = max(in_flight.get('max'), in_flight.get('current'))
+        await asyncio.sleep(0.01)
+        in_flight['current'] -= 1
+        return httpx.Response(200)
+
+    async def run():
+        async with _get_session([handler], max_connections_per_host=2) as session:
+            return await asyncio.gather(*[session.get(f'https://fake-host.org/{i}') for i in range(6)])
+
+    responses = asyncio.run(run())
+
+    assert all(x.status_code == 200 for x in responses)
+    assert in_flight.get('max') == 2
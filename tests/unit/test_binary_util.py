@@ -0,0 +1,58 @@
+import os
+import gzip
+import json
+import tempfile
+import pytest
+from findpapers.models.search import Search
+from findpapers.models.paper import Paper
+import findpapers.utils.binary_util as binary_util
+import findpapers.utils.persistence_util as persistence_util
+
+
+def _get_sorted_search_dict(search_dict: dict) -> dict:
+    for paper_dict in search_dict.get('papers'):
+        for field in ['urls', 'keywords', 'databases']:
+            paper_dict[field] = sorted(paper_dict[field])  # these fields are sets, so they have no order
+    return search_dict
+
+
+@pytest.mark.parametrize('compression', ['gzip', None])
+def test_save_and_load(search: Search, paper: Paper, compression: str):
+
+    search.add_paper(paper)
+    search.set_cursor('arXiv', {'start_record': 20})
+
+    filepath = os.path.join(tempfile.mkdtemp(), 'search.fpz')
+    binary_util.save(search, filepath, compression)
+
+    with open(filepath, 'rb') as binaryfile:
+        content = binaryfile.read()
+
+    assert content.startswith(binary_util.MAGIC_HEADER)
+
+    data = content[len(binary_util.MAGIC_HEADER) + 2:]
+    if compression == 'gzip':
+        data = gzip.decompress(data)
+    assert json.loads(data) == Search.to_dict(search)
+
+    assert _get_sorted_search_dict(Search.to_dict(binary_util.load(filepath))) == _get_sorted_search_dict(json.loads(data))
+
+
+def test_format_detection(search: Search, paper: Paper):
+
+    search.add_paper(paper)
+
+    # the binary format is detected by its magic header, regardless of the file extension
+    filepath = os.path.join(tempfile.mkdtemp(), 'search.json')
+    persistence_util.save(search, filepath, 'binary')
+
+    assert binary_util.is_binary_file(filepath)
+    assert persistence_util.detect_format(filepath) == 'binary'
+    assert persistence_util.load(filepath).query == search.query
+    assert persistence_util.get_number_of_papers(filepath) == 1
+
+    persistence_util.save(search, filepath)
+    assert not binary_util.is_binary_file(filepath)
+
+    with pytest.raises(ValueError):
+        binary_util.load(filepath)
@@ -0,0 +1,154 @@
+import io
+import time
+import tempfile
+import requests
+from findpapers.utils.cache_util import ResponseCache, CachingStream
+from findpapers.utils.requests_util import DefaultSession
+
+
+def _get_response(url: str, content: bytes) -> requests.Response:
+
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['content-type'] = 'text/html; charset=utf-8'
+    response.url = url
+    response._content = content
+
+    return response
+
+
+def test_cache_get_and_set():
+
+    cache = ResponseCache(tempfile.mkdtemp())
+    url = 'https://fake.host.org/search?q=this'
+
+    assert cache.get('GET', url, {}) is None
+
+    cache.set('GET', url, {}, _get_response(url, b'fake content'))
+
+    response = cache.get('GET', url, {})
+    assert response.status_code == 200
+    assert response.content == b'fake content'
+    assert response.text == 'fake content'
+    assert response.url == url
+    assert 'text/html' in response.headers.get('Content-Type')
+
+    # the request body is part of the cache key
+    assert cache.get('POST', url, {'data': {'dois': 'fake-doi'}}) is None
+    cache.set('POST', url, {'data': {'dois': 'fake-doi'}}, _get_response(url, b'another content'))
+    assert cache.get('POST', url, {'data': {'dois': 'fake-doi'}}).content == b'another content'
+    assert cache.get('POST', url, {'data': {'dois': 'another-doi'}}) is None
+
+    cache.close()
+
+    # the cache is persistent
+    cache = ResponseCache(cache.filepath.rsplit('/', 1)[0])
+    assert cache.get('GET', url, {}).content == b'fake content'
+
+
+def test_cache_ttl():
+
+    cache = ResponseCache(tempfile.mkdtemp(), ttl=0.05)
+    url = 'https://fake.host.org/search'
+
+    cache.set_ttl('another.host.org', 60)
+    another_url = 'https://another.host.org/search'
+
+    cache.set('GET', url, {}, _get_response(url, b'fake content'))
+    cache.set('GET', another_url, {}, _get_response(another_url, b'fake content'))
+    assert cache.get('GET', url, {}) is not None
+
+    time.sleep(0.1)
+
+    assert cache.get('GET', url, {}) is None
+    assert cache.get('GET', another_url, {}) is not None
+    assert cache.size == len(b'fake content')
+
+
+def test_cache_lru_eviction():
+
+    cache = ResponseCache(tempfile.mkdtemp(), max_size=30)
+
+    for i in range(3):
+        url = f'https://fake.host.org/{i}'
+        cache.set('GET', url, {}, _get_response(url, b'0123456789'))
+
+    cache.get('GET', 'https://fake.host.org/0', {})  # now the least recently used is the second one
+
+    url = 'https://fake.host.org/3'
+    cache.set('GET', url, {}, _get_response(url, b'0123456789'))
+
+    assert cache.size <= 30
+    assert cache.get('GET', 'https://fake.host.org/0', {}) is not None
+    assert cache.get('GET', 'https://fake.host.org/1', {}) is None
+    assert cache.get('GET', 'https://fake.host.org/3', {}) is not None
+
+
+def test_caching_stream():
+
+    completed_contents = []
+
+    stream = CachingStream(io.BytesIO(b'0123456789'), completed_contents.append)
+    assert stream.read(4) == b'0123'
+    assert len(completed_contents) == 0  # a partially read content is never cached
+
+    assert stream.read(100) == b'456789'
+    assert stream.read(100) == b''
+    assert completed_contents == [b'0123456789']
+
+    stream = CachingStream(io.BytesIO(b'0123456789'), completed_contents.append)
+    stream.read()
+    assert completed_contents == [b'0123456789', b'0123456789']
+
+
+def test_caching_stream_partial_content():
+
+    completed_contents = []
+    partial_contents = []
+
+    stream = CachingStream(io.BytesIO(b'0123456789'), completed_contents.append, partial_contents.append)
+    assert stream.read(4) == b'0123'
+    stream.close()
+
+    # the read bytes are stored as a partial content when the stream is closed before its end
+    assert completed_contents == []
+    assert partial_contents == [b'0123']
+
+    stream = CachingStream(io.BytesIO(b'0123456789'), completed_contents.append, partial_contents.append)
+    stream.read()
+    stream.close()
+    assert completed_contents == [b'0123456789']
+    assert partial_contents == [b'0123']
+
+
+def test_cache_partial_response():
+
+    cache = ResponseCache(tempfile.mkdtemp())
+    url = 'https://fake.host.org/paper'
+
+    cache.set('GET', url, {}, _get_response(url, b'<html><head>'), partial=True)
+
+    # a partial response is only returned to the requests that accept it
+    assert cache.get('GET', url, {}) is None
+    assert cache.get('GET', url, {}, partial=True).content == b'<html><head>'
+
+    # and a complete response is preferred
+    cache.set('GET', url, {}, _get_response(url, b'<html><head></head></html>'))
+    assert cache.get('GET', url, {}, partial=True).content == b'<html><head></head></html>'
+
+
+def test_session_cache():
+
+    session = DefaultSession()
+    session.enable_cache(tempfile.mkdtemp())
+
+    try:
+        url = 'https://fake.host.org/paper'
+        session.cache.set('GET', url, {}, _get_response(url, b'fake paper page'))
+
+        # network calls are disabled on tests, so this response can only come from the cache
+        assert session.get(url).content == b'fake paper page'
+    finally:
+        session.disable_cache()
+
+    assert session.cache is None
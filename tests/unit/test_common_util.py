@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from typing import Callable, Any
 import findpapers.utils.common_util as util
@@ -21,3 +22,16 @@ def test_get_numeric_month_by_string(string_format: str, numeric_format: str):
 def test_try_success(func: Callable, result: Any):
 
     assert util.try_success(func, 2, 1) == result
+
+
+@pytest.mark.parametrize('func, result', [
+    (lambda: None, None),
+    (lambda: ':)', ':)'),
+    (lambda: 10/0, None),  # forcing a ZeroDivisionError exception
+])
+def test_try_success_async(func: Callable, result: Any):
+
+    async def coroutine_function():
+        return func()
+
+    assert asyncio.run(util.try_success_async(coroutine_function, 2, 0, 0)) == result
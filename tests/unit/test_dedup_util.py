@@ -0,0 +1,65 @@
+import random
+import itertools
+import findpapers.utils.dedup_util as dedup_util
+
+
+def test_normalize_doi():
+
+    assert dedup_util.normalize_doi(None) is None
+    assert dedup_util.normalize_doi(' ') is None
+    assert dedup_util.normalize_doi('https://doi.org/10.1000/ABC') == '10.1000/abc'
+    assert dedup_util.normalize_doi('10.1000/abc') == '10.1000/abc'
+
+
+def test_is_similar():
+
+    assert dedup_util.is_similar('a' * 100, 'a' * 95, 0.95)
+    assert not dedup_util.is_similar('a' * 100, 'a' * 94, 0.95)
+    assert dedup_util.is_similar('awesome title', 'awesome title', 1)
+    assert not dedup_util.is_similar('awesome title', 'awesome title!', 1)
+
+
+def test_disjoint_set():
+
+    disjoint_set = dedup_util.DisjointSet(['A', 'B', 'C', 'D'])
+    disjoint_set.union('A', 'B')
+    disjoint_set.union('D', 'B')
+
+    assert disjoint_set.find('A') == disjoint_set.find('D')
+    assert disjoint_set.get_clusters() == [['A', 'B', 'D'], ['C']]
+
+
+def test_title_index():
+
+    random.seed(42)
+
+    titles = []
+    for i in range(100):
+        title = ''.join(random.choice('ab cd') for _ in range(random.randint(1, 50)))
+        titles.append(title)
+        for j in range(2):
+            changed_title = list(title)
+            for k in range(random.randint(0, 3)):
+                position = random.randint(0, len(changed_title) - 1)
+                changed_title[position] = random.choice(['', 'a', 'b', 'xy'])
+            titles.append(''.join(changed_title))
+
+    for similarity_threshold in [1, 0.95, 0.9, 0.7]:
+
+        title_index = dedup_util.TitleIndex(similarity_threshold)
+        found_pairs = set()
+        for i, title in enumerate(titles):
+            for j in title_index.find_similar(title, 'block'):
+                found_pairs.add((j, i))
+            title_index.add(i, title, 'block')
+
+        # the index must find exactly the same pairs found comparing every pair of titles
+        expected_pairs = set([(i, j) for i, j in itertools.combinations(range(len(titles)), 2)
+                              if dedup_util.is_similar(titles[i], titles[j], similarity_threshold)])
+
+        assert found_pairs == expected_pairs
+        assert len(title_index.find_similar(titles[0], 'another block')) == 0
+
+    title_index.remove(0)
+    assert len(title_index) == len(titles) - 1
+    assert 0 not in title_index.find_similar(titles[0], 'block')
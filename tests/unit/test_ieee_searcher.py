@@ -33,7 +33,7 @@ def test_get_search_url(search: Search):
     api_token = 'fake-token'
     start_record = 200
 
-    query = search.query.replace(' AND NOT ', ' NOT ')
+    query = '"Abstract":"this" AND ("Abstract":"that thing" OR "Abstract":"something") NOT "Abstract":"anything"'
 
     url = f'http://ieeexploreapi.ieee.org/api/v1/search/articles?querytext=({query})&format=json&apikey={api_token}&max_records=200'
     url += f'&start_year={search.since.year}'
@@ -90,3 +90,24 @@ def test_run(search: Search):
 
     with pytest.raises(AttributeError):
         ieee_searcher.run(search, None)
+
+
+@pytest.mark.parametrize('limit, requests_count', [(10, 1), (26, 2), (None, 2)])
+def test_run_limit(search: Search, monkeypatch, limit: int, requests_count: int):
+
+    search.limit = limit
+    search.limit_per_database = None
+
+    requested_start_records = []
+    mocked_get_api_result = ieee_searcher._get_api_result
+
+    def get_api_result(search, api_token, start_record=1):
+        requested_start_records.append(start_record)
+        return mocked_get_api_result(search, api_token, start_record)
+
+    monkeypatch.setattr(ieee_searcher, '_get_api_result', get_api_result)
+
+    ieee_searcher.run(search, 'fake-api-token')
+
+    # the pages beyond the search limit aren't fetched ahead
+    assert len(requested_start_records) == requests_count
@@ -0,0 +1,59 @@
+import io
+import json
+import pytest
+import findpapers.utils.json_util as json_util
+
+
+OBJECT = {
+    'query': 'some "query"\nwith a line break',
+    'limit': 12345,
+    'ratio': -1.5e-3,
+    'empty': [],
+    'nothing': None,
+    'flags': [True, False],
+    'nested': {'b': {'c': [1, 2, {}]}, 'a': 'ção'},
+    'papers': [
+        {'title': 'a title', 'authors': ['Dr Paul', 'Dr John'], 'citations': 10},
+        {'title': 'another title', 'authors': [], 'citations': None}
+    ]
+}
+
+
+@pytest.mark.parametrize('papers', [OBJECT.get('papers'), []])
+def test_dump(papers: list):
+
+    obj = {k: v for k, v in OBJECT.items() if k != 'papers'}
+
+    fp = io.StringIO()
+    json_util.dump(obj, fp, {'papers': iter(papers)})
+
+    assert fp.getvalue() == json.dumps({**obj, 'papers': papers}, indent=2, sort_keys=True)
+
+    fp = io.StringIO()
+    json_util.dump({}, fp)
+    assert fp.getvalue() == json.dumps({}, indent=2, sort_keys=True)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 64 * 1024])
+@pytest.mark.parametrize('indent', [None, 2])
+def test_iterparse(chunk_size: int, indent: int):
+
+    fp = io.StringIO(json.dumps(OBJECT, indent=indent))
+    members = list(json_util.iterparse(fp, ['papers', 'empty'], chunk_size))
+
+    # the streamed arrays are yielded item by item, and the other members at once
+    assert members == [(k, v) for k, v in OBJECT.items() if k not in ['papers', 'empty']] + \
+        [('papers', x) for x in OBJECT.get('papers')]
+
+    members = list(json_util.iterparse(io.StringIO('{}'), ['papers'], chunk_size))
+    assert members == []
+
+    members = list(json_util.iterparse(io.StringIO('{"papers": {"a": 1}}'), ['papers'], chunk_size))
+    assert members == [('papers', {'a': 1})]  # only arrays are streamed
+
+
+@pytest.mark.parametrize('content', ['', '[]', '{"a": 1', '{"a": 1,}', '{"a" 1}', '{"papers": [1, 2}'])
+def test_iterparse_invalid_content(content: str):
+
+    with pytest.raises(ValueError):
+        list(json_util.iterparse(io.StringIO(content), ['papers'], 2))
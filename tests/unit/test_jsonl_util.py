@@ -0,0 +1,78 @@
+import os
+import copy
+import json
+import datetime
+import tempfile
+from findpapers.models.search import Search
+from findpapers.models.paper import Paper
+import findpapers.utils.jsonl_util as jsonl_util
+
+
+def _get_records(filepath: str) -> list:
+    with open(filepath) as jsonlfile:
+        return [json.loads(x) for x in jsonlfile]
+
+
+def test_writer(search: Search, paper: Paper):
+
+    filepath = os.path.join(tempfile.mkdtemp(), 'search.jsonl')
+
+    writer = jsonl_util.JsonlWriter(filepath, search)
+    search.checkpoint_callback = writer.checkpoint
+    search.paper_callback = writer.write_paper
+    search.removed_paper_callback = writer.remove_paper
+
+    assert [x.get('type') for x in _get_records(filepath)] == ['search']
+
+    # the papers are appended as soon as they are added
+    paper.doi = None
+    search.add_paper(paper)
+    another_paper = copy.deepcopy(paper)
+    another_paper.title = 'another awesome paper title'
+    search.add_paper(another_paper)
+    assert [x.get('type') for x in _get_records(filepath)] == ['search', 'paper', 'paper']
+
+    # a duplicated paper enriches the collected one, that gets a new key with its DOI
+    duplicated_paper = copy.deepcopy(paper)
+    duplicated_paper.doi = 'fake-doi'
+    search.add_paper(duplicated_paper)
+    records = _get_records(filepath)
+    assert [x.get('type') for x in records[-2:]] == ['removal', 'paper']
+    assert records[-1].get('key') == 'DOI-fake-doi'
+
+    search.remove_paper(another_paper)
+    search.set_cursor('arXiv', {'start_record': 20})
+    assert [x.get('type') for x in _get_records(filepath)[-2:]] == ['removal', 'search']
+
+    loaded_search = jsonl_util.load(filepath)
+    assert [x.title for x in loaded_search.papers] == [paper.title]
+    assert loaded_search.papers.pop().doi == 'fake-doi'
+    assert loaded_search.get_cursor('arXiv') == {'start_record': 20}
+    assert jsonl_util.get_number_of_papers(filepath) == 1
+    assert [x.doi for x in jsonl_util.iterate_papers(filepath)] == ['fake-doi']
+
+    # a finished stage rewrites the file with only a record for each paper
+    search.finished_stages.append('collect')
+    search.checkpoint()
+    assert [x.get('type') for x in _get_records(filepath)] == ['search', 'paper']
+
+    writer.close()
+
+
+def test_incomplete_last_line(search: Search, paper: Paper):
+
+    filepath = os.path.join(tempfile.mkdtemp(), 'search.jsonl')
+
+    search.add_paper(paper)
+    jsonl_util.save(search, filepath)
+
+    another_paper = copy.deepcopy(paper)
+    another_paper.doi = 'another-doi'
+    another_paper.publication_date = datetime.date(2000, 1, 1)
+    jsonl_util.update_paper(filepath, another_paper)
+
+    with open(filepath, 'a') as jsonlfile:
+        jsonlfile.write('{"type": "paper", "key": "DOI-ano')  # the process was killed while writing this record
+
+    assert len(jsonl_util.load(filepath).papers) == 2
+    assert jsonl_util.get_number_of_papers(filepath) == 2
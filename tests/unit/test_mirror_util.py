@@ -0,0 +1,110 @@
+import os
+import json
+import datetime
+import tempfile
+import pytest
+import findpapers
+import findpapers.utils.mirror_util as mirror_util
+import findpapers.utils.query_util as query_util
+import findpapers.searchers.rxiv_searcher as rxiv_searcher
+from findpapers.models.search import Search
+
+
+def _get_metadata(doi: str, version: str, date: str, title: str, abstract: str) -> dict:
+    return {'doi': doi, 'version': version, 'date': date, 'title': title, 'abstract': abstract,
+            'authors': 'Doe, J.; Roe, R.', 'published': 'NA', 'server': 'medRxiv'}
+
+
+@pytest.fixture(params=[True, False], ids=['upsert', 'insert-update'])
+def mirror_path(request, monkeypatch):
+
+    # the insert and update statements are used on SQLite versions without the upsert syntax
+    monkeypatch.setattr(mirror_util, 'HAS_UPSERT', request.param)
+
+    mirror_path = os.path.join(tempfile.mkdtemp(), 'medrxiv.sqlite')
+
+    mirror_util.save_papers_metadata(mirror_path, [
+        _get_metadata('10.1101/1', '1', '2020-01-01', 'Deep learning for covid-19', 'An old abstract'),
+        _get_metadata('10.1101/2', '1', '2020-02-01', 'Music information retrieval', 'A survey about music and musicians'),
+        _get_metadata('10.1101/3', '1', '2020-03-01', 'Learning deep representations', 'Representation learning of images'),
+    ], '2020-03-01')
+
+    mirror_util.save_papers_metadata(mirror_path, [
+        _get_metadata('10.1101/1', '2', '2020-04-01', 'Deep learning for COVID-19 diagnosis', 'A new abstract'),
+        _get_metadata('10.1101/1', '1', '2020-01-01', 'Deep learning for covid-19', 'An old abstract'),
+    ], '2020-04-01')
+
+    return mirror_path
+
+
+def _get_dois(mirror_path: str, query: str, since: str = None, until: str = None) -> set:
+    return {x.get('doi') for x in mirror_util.iterate_papers_metadata(mirror_path, query_util.parse(query), since, until)}
+
+
+def test_save_papers_metadata(mirror_path: str):
+
+    assert mirror_util.get_watermark(mirror_path) == '2020-04-01'
+    assert mirror_util.get_watermark(os.path.join(tempfile.mkdtemp(), 'nothing.sqlite')) is None
+
+    papers_metadata = list(mirror_util.iterate_papers_metadata(mirror_path))
+
+    assert len(papers_metadata) == 3
+
+    # the latest version metadata is kept, with the date of the first version
+    paper_metadata = next(x for x in papers_metadata if x.get('doi') == '10.1101/1')
+    assert paper_metadata.get('title') == 'Deep learning for COVID-19 diagnosis'
+    assert paper_metadata.get('date') == '2020-01-01'
+
+
+@pytest.mark.parametrize('query, fts_query', [
+    ('[deep learning]', '(("deep learning"))'),
+    ('[deep] AND [learn*] OR [music]', '(("deep" AND "learn" *) OR ("music"))'),
+    ('[deep] AND NOT [music]', '(("deep"))'),
+    ('[deep] AND ([mus?c] OR [images])', '(("deep"))'),
+    ('[mus?c] OR [images]', None),
+    ('[a "quoted" term]', '(("a ""quoted"" term"))'),
+])
+def test_get_fts_query(query: str, fts_query: str):
+
+    assert mirror_util.get_fts_query(query_util.parse(query)) == fts_query
+
+
+def test_iterate_papers_metadata(mirror_path: str):
+
+    assert _get_dois(mirror_path, '[deep learning]') == {'10.1101/1'}
+    assert _get_dois(mirror_path, '[learning]') == {'10.1101/1', '10.1101/3'}
+    assert _get_dois(mirror_path, '[diagnos*] OR [music]') == {'10.1101/1', '10.1101/2'}
+    assert _get_dois(mirror_path, '[old abstract]') == set()
+    assert _get_dois(mirror_path, '[learning]', since='2020-02-01') == {'10.1101/3'}
+    assert _get_dois(mirror_path, '[learning]', until='2020-02-01') == {'10.1101/1'}
+
+
+def test_run_offline(search: Search, mirror_path: str):
+
+    search.query = '[learning] AND NOT [covid-19] OR [musician?]'
+    search.since = None
+    search.until = None
+    search.limit = None
+    search.limit_per_database = None
+
+    rxiv_searcher.run(search, 'medRxiv', mirror_path=mirror_path)
+
+    assert {x.doi for x in search.papers} == {'10.1101/2', '10.1101/3'}
+    assert all('medRxiv' in x.databases for x in search.papers)
+
+    with pytest.raises(FileNotFoundError):
+        rxiv_searcher.run(search, 'medRxiv', mirror_path=os.path.join(tempfile.mkdtemp(), 'nothing.sqlite'))
+
+
+def test_sync_mirror():
+
+    mirror_dir = tempfile.mkdtemp()
+
+    assert findpapers.sync_mirror('MEDRXIV', mirror_dir) == 4
+
+    mirror_path = mirror_util.get_mirror_path('medRxiv', mirror_dir)
+    assert mirror_util.get_watermark(mirror_path) == datetime.date.today().strftime('%Y-%m-%d')
+    assert len(list(mirror_util.iterate_papers_metadata(mirror_path))) == 3
+
+    with pytest.raises(ValueError):
+        findpapers.sync_mirror('arxiv', mirror_dir)
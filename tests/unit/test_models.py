@@ -1,8 +1,9 @@
 import datetime
 import pytest
 import copy
+import threading
 from findpapers.models.publication import Publication
-from findpapers.models.paper import Paper
+from findpapers.models.paper import Paper, DatabaseSet
 from findpapers.models.search import Search
 
 
@@ -111,6 +112,37 @@ def test_paper(paper: Paper):
     assert paper.comments == another_comments
 
 
+def test_paper_compact_representation(paper: Paper):
+
+    assert not hasattr(paper, '__dict__')
+    assert not hasattr(paper.publication, '__dict__')
+
+    with pytest.raises(AttributeError):
+        paper.unknown_attribute = 'some value'
+
+    # equal strings of different papers share the same object
+    another_paper = Paper.from_dict(Paper.to_dict(paper))
+    assert another_paper.authors[0] is paper.authors[0]
+    assert Paper.to_dict(another_paper) == Paper.to_dict(paper)
+
+    assert isinstance(paper.databases, DatabaseSet)
+    assert paper.databases == {'arXiv', 'ACM', 'IEEE', 'PubMed', 'Scopus'}
+
+    paper.databases = ['ACM', 'ACM']
+    assert paper.databases == {'ACM'}
+    assert 'ACM' in paper.databases and 'IEEE' not in paper.databases
+    assert paper.databases.mask == DatabaseSet.get_bit('ACM')
+
+    paper.databases.add('IEEE')
+    paper.databases.discard('ACM')
+    assert list(paper.databases) == ['IEEE']
+    assert len(paper.databases | {'ACM'}) == 2
+
+    copied_paper = copy.deepcopy(paper)
+    copied_paper.databases.add('ACM')
+    assert paper.databases == {'IEEE'}
+
+
 @pytest.mark.skip(reason="It needs some revision after some tool's refactoring")
 def test_search(paper: Paper):
     
@@ -171,3 +203,146 @@ def test_search(paper: Paper):
     assert search.get_publication_key(publication_title, publication_issn, publication_isbn) == f'ISBN-{publication_isbn.lower()}'
     assert search.get_publication_key(publication_title, publication_issn) == f'ISSN-{publication_issn.lower()}'
     assert search.get_publication_key(publication_title) == f'TITLE-{publication_title.lower()}'
+
+
+def test_merge_duplications(paper: Paper):
+
+    search = Search('this AND that')
+
+    def new_paper(title, year, doi=None, database='arXiv'):
+        return Paper(title, 'a long abstract', paper.authors, None, datetime.date(year, 1, 1), set(), doi, databases={database})
+
+    search.add_paper(new_paper('Awesome paper title about deep learning', 2020, database='IEEE'))
+    search.add_paper(new_paper('awesome paper title about deep learning.', 2020, database='PubMed'))
+    search.add_paper(new_paper('Awesome paper title about deep learning!', 2020, 'fake-doi-A'))
+    search.add_paper(new_paper('Awesome paper title about deep learning', 2021))
+    search.add_paper(new_paper('Awesome paper title about deep learning?', 2020, 'fake-doi-B'))
+    search.add_paper(new_paper('A completely different title', 2019, 'https://doi.org/FAKE-DOI-C'))
+    search.add_paper(new_paper('Another different title', 2018, 'fake-doi-c'))
+
+    search.merge_duplications()
+
+    # the 2020 papers are merged into the paper with DOI A, the paper with DOI B cannot be merged with it,
+    # and the papers with the same normalized DOI are merged even from different years
+    assert len(search.papers) == 4
+
+    merged_paper = [x for x in search.papers if x.doi == 'fake-doi-A'][0]
+    assert merged_paper.databases == {'arXiv', 'IEEE', 'PubMed'}
+    assert merged_paper in search.papers_by_database.get('IEEE')
+    assert len(search.papers_by_database.get('IEEE')) == 1
+
+
+def test_add_paper_merging_duplications(paper: Paper):
+
+    search = Search('this AND that', limit_per_database=2)
+
+    def new_paper(title, year, doi=None, database='arXiv'):
+        return Paper(title, 'a long abstract', paper.authors, None, datetime.date(year, 1, 1), set(), doi, databases={database})
+
+    search.add_paper(new_paper('Awesome paper title about deep learning', 2020))
+    search.add_paper(new_paper('Awesome paper title about deep learning.', 2020, 'fake-doi-A', 'IEEE'))
+
+    # the near duplicate is merged as soon as it is added
+    assert len(search.papers) == 1
+    merged_paper = list(search.papers)[0]
+    assert merged_paper.doi == 'fake-doi-A'
+    assert merged_paper.databases == {'arXiv', 'IEEE'}
+    assert merged_paper in search.papers_by_database.get('IEEE')
+
+    # so the near duplicates don't count towards the limits
+    search.add_paper(new_paper('awesome paper title about deep learning!', 2020))
+    search.add_paper(new_paper('Another awesome paper title', 2020))
+    assert len(search.papers_by_database.get('arXiv')) == 2
+
+    search.add_paper(new_paper('Awesome paper title about deep learning', 2021, database='IEEE'))
+    search.add_paper(new_paper('Awesome paper title about deep learning?', 2020, 'fake-doi-B', 'PubMed'))
+    assert len(search.papers) == 4
+
+    # the removed papers are not used anymore to find duplications
+    search.remove_paper(merged_paper)
+    search.add_paper(new_paper('Awesome paper title about deep learning', 2020, 'fake-doi-C', 'PubMed'))
+    assert len(search.papers) == 4
+    assert merged_paper not in search.papers
+
+
+def test_remove_paper_after_merging(paper: Paper):
+
+    search = Search('this AND that')
+
+    def new_paper(title, year, doi=None, database='arXiv'):
+        return Paper(title, 'a long abstract', paper.authors, None, datetime.date(year, 1, 1), set(), doi, databases={database})
+
+    search.add_paper(new_paper('Awesome paper title about deep learning', 2020, database='ACM'))
+    search.add_paper(new_paper('Awesome paper title about deep learning.', 2020, 'fake-doi-A', 'IEEE'))
+    search.add_paper(new_paper('Another awesome paper title', 2020, 'fake-doi-B', 'PubMed'))
+
+    # the first paper got a DOI by the merging, so it's stored by its new key
+    merged_paper = search.get_paper('Awesome paper title about deep learning', datetime.date(2020, 1, 1), 'fake-doi-A')
+    assert merged_paper is not None
+    assert search.paper_by_doi.get('fake-doi-A') is merged_paper
+    assert search.get_paper('Awesome paper title about deep learning', datetime.date(2020, 1, 1)) is None
+
+    # as the filter stage does, then the dedup stage
+    search.remove_paper(merged_paper)
+    search.merge_duplications()
+
+    assert len(search.papers) == 1
+    assert merged_paper not in search.papers
+    assert 'fake-doi-A' not in search.paper_by_doi
+    assert list(search.paper_by_key.values()) == list(search.papers)
+    assert sum(len(x) for x in search.papers_by_database.values()) == 1
+
+
+def test_periodic_checkpoints(paper: Paper):
+
+    search = Search('this AND that')
+    checkpoints = []
+    search.checkpoint_callback = lambda x: checkpoints.append(copy.deepcopy(x.cursor_by_database))
+
+    # the checkpoints made after fetched pages are skipped until the checkpoint interval is elapsed
+    for i in range(3):
+        search.set_cursor('arXiv', {'start_record': i})
+    assert checkpoints == [{'arXiv': {'start_record': 0}}]
+
+    search.checkpoint_interval = 0
+    search.set_cursor('arXiv', {'start_record': 3})
+    assert checkpoints[-1] == {'arXiv': {'start_record': 3}}
+
+    # a forced checkpoint (e.g. after a finished stage) is always made
+    search.checkpoint_interval = 60
+    search.finished_stages.append('collect')
+    search.checkpoint()
+    assert len(checkpoints) == 3
+
+
+def test_checkpoint_snapshot(paper: Paper):
+
+    search = Search('this AND that')
+    search.add_paper(paper)
+    search.set_cursor('IEEE', {'start_record': 25})
+
+    def checkpoint_callback(search: Search):
+        snapshot = search.get_snapshot()
+
+        # the checkpoint is written without holding the search lock, so other threads can keep adding papers
+        another_paper = copy.deepcopy(paper)
+        another_paper.title = 'another awesome paper title'
+        another_paper.doi = 'fake-doi-B'
+        thread = threading.Thread(target=search.add_paper, args=(another_paper,))
+        thread.start()
+        thread.join(1)
+        assert not thread.is_alive()
+
+        snapshots.append(snapshot)
+
+    snapshots = []
+    search.checkpoint_callback = checkpoint_callback
+    search.checkpoint()
+
+    snapshot = snapshots[0]
+    assert len(search.papers) == 2
+    assert len(snapshot.papers) == 1
+    assert list(snapshot.papers)[0] is not paper
+    assert list(snapshot.papers)[0].title == paper.title
+    assert all(x == snapshot.papers for x in snapshot.papers_by_database.values())
+    assert snapshot.cursor_by_database == {'IEEE': {'start_record': 25}}
@@ -0,0 +1,170 @@
+import os
+import copy
+import datetime
+import tempfile
+import pytest
+import findpapers
+from findpapers.models.search import Search
+from findpapers.models.paper import Paper
+from findpapers.models.paper_index import PaperIndex
+import findpapers.utils.persistence_util as persistence_util
+import findpapers.utils.query_util as query_util
+import findpapers.tools.query_tool as query_tool
+
+np = pytest.importorskip('numpy')
+
+
+def _get_paper(paper: Paper, title: str, abstract: str, doi: str) -> Paper:
+    new_paper = copy.copy(paper)
+    new_paper.title = title
+    new_paper.abstract = abstract
+    new_paper.doi = doi
+    new_paper.keywords = set()
+    return new_paper
+
+
+@pytest.fixture
+def papers(paper: Paper):
+    return [
+        _get_paper(paper, 'Deep learning for music', 'We apply deep neural networks to music generation', 'doi-1'),
+        _get_paper(paper, 'Music information retrieval', 'A survey about music and musicians, music everywhere', 'doi-2'),
+        _get_paper(paper, 'Learning deep representations', 'Representation learning of images', 'doi-3'),
+    ]
+
+
+def _get_keys(results: list) -> list:
+    return [x[0] for x in results]
+
+
+def test_search(papers: list):
+
+    index = PaperIndex(papers)
+
+    assert len(index) == 3
+    assert set(_get_keys(index.search('[music]'))) == {'DOI-doi-1', 'DOI-doi-2'}
+    assert _get_keys(index.search('[music]'))[0] == 'DOI-doi-2'  # the highest term frequency
+    assert _get_keys(index.search('[deep learning]')) == ['DOI-doi-1']
+    assert _get_keys(index.search('[learning deep]')) == ['DOI-doi-3']
+    assert set(_get_keys(index.search('[deep] AND [learning]'))) == {'DOI-doi-1', 'DOI-doi-3'}
+    assert _get_keys(index.search('[deep] AND NOT [music]')) == ['DOI-doi-3']
+    assert set(_get_keys(index.search('[musician?] OR [image*]'))) == {'DOI-doi-2', 'DOI-doi-3'}
+    assert set(_get_keys(index.search('[mus*]'))) == {'DOI-doi-1', 'DOI-doi-2'}
+    assert set(_get_keys(index.search('retrieval images'))) == {'DOI-doi-2', 'DOI-doi-3'}
+    assert index.search('[nothing]') == []
+    assert len(index.search('[music] OR [deep]', limit=2)) == 2
+    assert index.search('[retrieval]')[0][1] == 'Music information retrieval'
+
+    with pytest.raises(query_util.QueryError):
+        index.search('[music')
+
+
+def test_phrase_across_fields(paper: Paper):
+
+    index = PaperIndex([_get_paper(paper, 'A title ending with deep', 'learning starts the abstract', 'doi-1')])
+
+    assert index.search('[deep learning]') == []
+    assert len(index.search('[deep] AND [learning]')) == 1
+
+
+def test_update_and_remove(papers: list):
+
+    index = PaperIndex(papers, track_papers=True)
+
+    papers[0].abstract = 'Nothing about it'
+    papers[0].title = 'A new title'
+    index.add_paper(papers[0])
+    index.remove_paper(papers[1])
+
+    assert len(index) == 2
+    assert _get_keys(index.search('[music] OR [title]')) == ['DOI-doi-1']
+
+    papers[2].doi = 'doi-4'  # the paper key changes
+    index.add_paper(papers[2])
+
+    assert _get_keys(index.search('[images]')) == ['DOI-doi-4']
+
+    index.compact()
+
+    assert len(index) == 2
+    assert len(index.keys) == 2
+    assert set(_get_keys(index.search('[new title] OR [images]'))) == {'DOI-doi-1', 'DOI-doi-4'}
+
+
+def test_save_and_load(papers: list):
+
+    index = PaperIndex(papers)
+    index.remove_paper('DOI-doi-3')
+
+    index_path = os.path.join(tempfile.mkdtemp(), 'search.json.index')
+    index.save(index_path, (10, 20))
+
+    assert PaperIndex.load(index_path, (10, 21)) is None
+    assert PaperIndex.load(os.path.join(tempfile.mkdtemp(), 'nothing.index')) is None
+
+    loaded_index = PaperIndex.load(index_path, (10, 20))
+
+    assert len(loaded_index) == 2
+    assert loaded_index.search('[music] OR [deep]') == index.search('[music] OR [deep]')
+    assert loaded_index.search('[learning deep]') == index.search('[learning deep]')
+
+    # a file with another format (e.g. an index saved by a previous version) isn't loaded
+    with open(index_path, 'wb') as indexfile:
+        indexfile.write(b'\x80\x05\x95 not an index')
+
+    assert PaperIndex.load(index_path) is None
+
+
+def test_search_index(search: Search, papers: list):
+
+    search.add_paper(papers[0])
+    index = search.create_index()
+    search.add_paper(papers[1])
+
+    assert set(_get_keys(index.search('[music]'))) == {'DOI-doi-1', 'DOI-doi-2'}
+
+    search.remove_paper(papers[0])
+
+    assert _get_keys(index.search('[music]')) == ['DOI-doi-2']
+
+
+def test_search_update_paper(search: Search, papers: list):
+
+    index = search.create_index()
+    search.add_paper(papers[2])
+
+    # an enriched paper gets a new title and DOI after it's collected
+    papers[2].title = 'Learning deep music representations'
+    papers[2].doi = 'doi-5'
+    search.update_paper(papers[2])
+
+    assert _get_keys(index.search('[music]')) == ['DOI-doi-5']
+    assert search.paper_by_doi.get('doi-5') is papers[2]
+    assert search.paper_by_doi.get('doi-3') is None
+
+
+def test_query_tool(search: Search, papers: list):
+
+    for paper in papers:
+        search.add_paper(paper)
+
+    search_path = os.path.join(tempfile.mkdtemp(), 'search.json')
+    persistence_util.save(search, search_path)
+
+    assert _get_keys(findpapers.query(search_path, '[deep learning]')) == ['DOI-doi-1']
+    assert os.path.isfile(f'{search_path}.index')
+
+    search.remove_paper(papers[0])
+    persistence_util.save(search, search_path)
+    os.utime(search_path, ns=(0, 0))  # the modification time can be the same of the previous save
+
+    assert findpapers.query(search_path, '[deep learning]') == []
+    assert _get_keys(findpapers.query(search_path, '[learning deep]', rebuild_index=True)) == ['DOI-doi-3']
+
+    # a change of the search file that doesn't change the indexed content keeps the saved index valid
+    source_signature = query_tool.get_source_signature(search_path)
+    papers[1].selected = True
+    persistence_util.save(search, search_path)
+    os.utime(search_path, ns=(1, 1))
+    query_tool.refresh_index(search_path, source_signature)
+
+    assert PaperIndex.load(f'{search_path}.index', query_tool.get_source_signature(search_path)) is not None
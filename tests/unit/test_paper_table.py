@@ -0,0 +1,95 @@
+import copy
+import datetime
+import pytest
+from findpapers.models.search import Search
+from findpapers.models.paper import Paper
+from findpapers.models.publication import Publication
+from findpapers.models.paper_table import MISSING_VALUE
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def filled_search(search: Search, paper: Paper) -> Search:
+
+    other_publication = Publication('another publication title', issn='issn-Y')
+
+    for i, (year, citations, selected, databases) in enumerate([(2010, 10, True, {'ACM'}),
+                                                                (2010, None, False, {'IEEE', 'ACM'}),
+                                                                (2015, 30, None, {'arXiv'}),
+                                                                (2020, 5, True, {'Scopus'})]):
+        new_paper = copy.copy(paper)
+        new_paper.title = f'paper {i}'
+        new_paper.doi = f'doi-{i}'
+        new_paper.publication_date = datetime.date(year, 1, 1)
+        new_paper.citations = citations
+        new_paper.selected = selected
+        new_paper.databases = databases
+        new_paper.publication = other_publication if year == 2020 else paper.publication
+        search.add_paper(new_paper)
+
+    return search
+
+
+def test_to_table(filled_search: Search):
+
+    table = filled_search.to_table()
+
+    assert len(table) == 4
+    assert table['year'].tolist() == [2020, 2015, 2010, 2010]
+
+    row_by_title = {x.title: i for i, x in enumerate(table.get_papers())}
+    assert [table['citations'][row_by_title.get(f'paper {i}')] for i in range(4)] == [10, MISSING_VALUE, 30, 5]
+    assert [table['selected'][row_by_title.get(f'paper {i}')] for i in range(4)] == [1, 0, MISSING_VALUE, 1]
+    assert [table['publication_id'][row_by_title.get(f'paper {i}')] for i in range(4)] == [1, 1, 1, 0]
+    assert table.get_publication(0).title == 'another publication title'
+    assert table.get_publication(MISSING_VALUE) is None
+
+
+def test_filter_and_sort(filled_search: Search):
+
+    table = filled_search.to_table()
+
+    filtered_table = table.filter((table['year'] <= 2015) & table.has_database('ACM'))
+    assert sorted(x.title for x in filtered_table.get_papers()) == ['paper 0', 'paper 1']
+    assert filtered_table.publications is table.publications
+
+    assert len(table.filter(table.has_database('PubMed'))) == 0
+    assert table.sort('year')['year'].tolist() == [2010, 2010, 2015, 2020]
+    assert table.sort('year', reverse=True)['year'].tolist() == [2020, 2015, 2010, 2010]
+
+
+def test_top_k(filled_search: Search):
+
+    table = filled_search.to_table()
+
+    assert [x.title for x in table.top_k('citations', 2).get_papers()] == ['paper 2', 'paper 0']
+    assert len(table.top_k('citations', 10)) == 4
+    assert len(table.top_k('citations', 0)) == 0
+
+
+def test_group_by(filled_search: Search):
+
+    table = filled_search.to_table()
+
+    assert table.group_by('year') == {2010: 2, 2015: 1, 2020: 1}
+    assert table.group_by('year', 'citations', 'sum') == {2010: 10, 2015: 30, 2020: 5}
+    assert table.group_by('year', 'citations', 'mean') == {2010: 10, 2015: 30, 2020: 5}
+    assert table.group_by('selected') == {MISSING_VALUE: 1, 0: 1, 1: 2}
+
+    with pytest.raises(ValueError):
+        table.group_by('year', 'citations', 'max')
+
+
+def test_count_by_database(filled_search: Search):
+
+    assert filled_search.to_table().count_by_database() == {'ACM': 2, 'IEEE': 1, 'arXiv': 1, 'Scopus': 1}
+
+
+def test_empty_table(search: Search):
+
+    table = search.to_table()
+
+    assert len(table) == 0
+    assert table.group_by('year') == {}
+    assert table.count_by_database() == {}
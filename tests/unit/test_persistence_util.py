@@ -0,0 +1,142 @@
+import os
+import copy
+import json
+import datetime
+import tempfile
+import pytest
+from findpapers.models.search import Search
+from findpapers.models.paper import Paper
+import findpapers.utils.persistence_util as persistence_util
+import findpapers.utils.sqlite_util as sqlite_util
+
+
+def _get_paper_dict(paper: Paper) -> dict:
+    paper_dict = Paper.to_dict(paper)
+    for field in ['urls', 'keywords', 'databases']:
+        paper_dict[field] = sorted(paper_dict[field])  # these fields are sets, so they have no order
+    return paper_dict
+
+
+def _get_search_dict(search: Search) -> dict:
+    search_dict = Search.to_dict(search)
+    search_dict.pop('processed_at')
+    search_dict['papers'] = sorted([_get_paper_dict(x) for x in search.papers], key=lambda x: x.get('title'))
+    return search_dict
+
+
+def _get_search_with_papers(search: Search, paper: Paper) -> Search:
+
+    search.add_paper(paper)
+
+    another_paper = copy.deepcopy(paper)
+    another_paper.title = 'another awesome paper title'
+    another_paper.doi = None
+    another_paper.publication_date = datetime.date(2000, 1, 1)
+    another_paper.selected = None
+    another_paper.categories = None
+    another_paper.databases = {'ACM'}
+    search.add_paper(another_paper)
+
+    return search
+
+
+def test_get_format():
+
+    assert persistence_util.get_format('/some/path/search.json') == 'json'
+    assert persistence_util.get_format('/some/path/search.jsonl') == 'jsonl'
+    assert persistence_util.get_format('/some/path/search.db') == 'sqlite'
+    assert persistence_util.get_format('/some/path/search.SQLite3') == 'sqlite'
+    assert persistence_util.get_format('/some/path/search', 'sqlite') == 'sqlite'
+
+    with pytest.raises(ValueError):
+        persistence_util.get_format('/some/path/search.json', 'xml')
+
+
+def test_sqlite_save_and_load(search: Search, paper: Paper):
+
+    search = _get_search_with_papers(search, paper)
+    search.set_cursor('arXiv', {'start_record': 10})
+
+    filepath = os.path.join(tempfile.mkdtemp(), 'search.db')
+    persistence_util.save(search, filepath)
+
+    loaded_search = persistence_util.load(filepath)
+
+    assert _get_search_dict(loaded_search) == _get_search_dict(search)
+    assert loaded_search.get_cursor('arXiv') == {'start_record': 10}
+    assert not os.path.exists(f'{filepath}.tmp')
+
+    # saving again replaces the previous database
+    loaded_search.remove_paper(loaded_search.get_paper(paper.title, paper.publication_date, paper.doi))
+    persistence_util.save(loaded_search, filepath)
+    assert len(persistence_util.load(filepath).papers) == 1
+
+
+def test_sqlite_lookups_and_update(search: Search, paper: Paper):
+
+    search = _get_search_with_papers(search, paper)
+
+    filepath = os.path.join(tempfile.mkdtemp(), 'search.sqlite')
+    persistence_util.save(search, filepath)
+
+    loaded_paper = sqlite_util.get_paper(filepath, paper_doi=paper.doi)
+    assert _get_paper_dict(loaded_paper) == _get_paper_dict(paper)
+    assert sqlite_util.get_paper(filepath, paper_doi='another-doi') is None
+
+    paper_key = search.get_paper_key('another awesome paper title', datetime.date(2000, 1, 1))
+    another_paper = sqlite_util.get_paper(filepath, paper_key=paper_key)
+    assert another_paper.title == 'another awesome paper title'
+    assert another_paper.selected is None
+    assert another_paper.categories is None
+
+    another_paper.selected = True
+    another_paper.categories = {'Facet A': ['Category B']}
+    persistence_util.update_paper(search, filepath, another_paper)
+
+    another_paper = sqlite_util.get_paper(filepath, paper_key=paper_key)
+    assert another_paper.selected
+    assert another_paper.categories == {'Facet A': ['Category B']}
+
+    # the other paper remains untouched
+    assert _get_paper_dict(sqlite_util.get_paper(filepath, paper_doi=paper.doi)) == _get_paper_dict(paper)
+
+
+def test_convert(search: Search, paper: Paper):
+
+    search = _get_search_with_papers(search, paper)
+
+    directory = tempfile.mkdtemp()
+    json_filepath = os.path.join(directory, 'search.json')
+    sqlite_filepath = os.path.join(directory, 'search.db')
+    exported_filepath = os.path.join(directory, 'exported_search')
+
+    persistence_util.save(search, json_filepath)
+    persistence_util.convert(json_filepath, sqlite_filepath)
+    persistence_util.convert(sqlite_filepath, exported_filepath, output_format='json')
+
+    assert _get_search_dict(persistence_util.load(exported_filepath)) == _get_search_dict(search)
+
+
+@pytest.mark.parametrize('filename', ['search.json', 'search.db'])
+def test_iterate_papers(search: Search, paper: Paper, filename: str):
+
+    search = _get_search_with_papers(search, paper)
+
+    filepath = os.path.join(tempfile.mkdtemp(), filename)
+    persistence_util.save(search, filepath)
+
+    papers = persistence_util.iterate_papers(filepath)
+    assert [_get_paper_dict(x) for x in papers] == [_get_paper_dict(x) for x in Search.get_sorted_papers(search)]
+    assert persistence_util.get_number_of_papers(filepath) == 2
+
+
+def test_json_save(search: Search, paper: Paper):
+
+    search = _get_search_with_papers(search, paper)
+
+    filepath = os.path.join(tempfile.mkdtemp(), 'search.json')
+    persistence_util.save(search, filepath)
+
+    # the streamed output is the same of a regular indented and key-sorted JSON
+    with open(filepath) as jsonfile:
+        assert jsonfile.read() == json.dumps(Search.to_dict(search), indent=2, sort_keys=True)
@@ -1,76 +1,71 @@
 import copy
 import datetime
 import pytest
+from lxml import etree
 import findpapers.searchers.pubmed_searcher as pubmed_searcher
 from findpapers.models.search import Search
 from findpapers.models.publication import Publication
 
-paper_entry = {
-    'PubmedArticleSet': {
-        'PubmedArticle': {
-            'MedlineCitation': {
-                'Article': {
-                    'Journal': {
-                        'Title': 'fake publication title',
-                        'ISSN': {
-                            '#text': 'fake-issn'
-                        },
-                        'JournalIssue': {
-                            'PubDate': {
-                                'Month': 'Feb',
-                                'Year': '2020'
-                            }
-                        }
-                    },
-                    'ArticleTitle': 'fake paper title',
-                    'ArticleDate': {
-                        'Day': '01',
-                        'Month': '02',
-                        'Year': '2020',
-                    },
-                    'Abstract': {
-                        'AbstractText': 'fake paper abstract'
-                    },
-                    'AuthorList': {
-                        'Author': [
-                            {'ForeName': 'author', 'LastName': 'A'},
-                            {'ForeName': 'author', 'LastName': 'B'}
-                        ]
-                    }
-                },
-                'KeywordList': {
-                    'Keyword': [
-                        {'#text': 'term A'},
-                        {'#text': 'term B'}
-                    ]
-                }
-            },
-            'PubmedData': {
-                'ArticleIdList': {
-                    'ArticleId': [
-                        {'@IdType': 'doi', '#text': 'fake-doi'}
-                    ]
-                }
-            }
-        }
-    }
-}
+PAPER_ENTRY_XML = """
+<PubmedArticle>
+    <MedlineCitation>
+        <Article>
+            <Journal>
+                <ISSN IssnType="Electronic">fake-issn</ISSN>
+                <JournalIssue>
+                    <PubDate>
+                        <Year>2020</Year>
+                        <Month>Feb</Month>
+                    </PubDate>
+                </JournalIssue>
+                <Title>fake publication title</Title>
+            </Journal>
+            <ArticleTitle>fake <i>paper</i> title</ArticleTitle>
+            <Abstract>
+                <AbstractText>fake paper abstract</AbstractText>
+            </Abstract>
+            <AuthorList>
+                <Author><LastName>A</LastName><ForeName>author</ForeName></Author>
+                <Author><LastName>B</LastName><ForeName>author</ForeName></Author>
+            </AuthorList>
+            <ArticleDate DateType="Electronic">
+                <Year>2020</Year>
+                <Month>02</Month>
+                <Day>01</Day>
+            </ArticleDate>
+        </Article>
+        <KeywordList>
+            <Keyword>term A</Keyword>
+            <Keyword> term B </Keyword>
+        </KeywordList>
+    </MedlineCitation>
+    <PubmedData>
+        <ArticleIdList>
+            <ArticleId IdType="pubmed">12345</ArticleId>
+            <ArticleId IdType="doi">fake-doi</ArticleId>
+        </ArticleIdList>
+    </PubmedData>
+</PubmedArticle>
+"""
+
+paper_entry = etree.fromstring(PAPER_ENTRY_XML)
 
 
 def test_mocks():
 
     assert pubmed_searcher._get_api_result() is not None
+    assert len(list(pubmed_searcher._get_paper_entries('FAKE-WEBENV', '1'))) == pubmed_searcher.MAX_ENTRIES_PER_PAGE
 
 
 def test_get_search_url(search: Search):
 
     start_record = 50
 
-    query = search.query.replace(' AND NOT ', ' NOT ')
+    query = '"this"[TIAB] AND ("that thing"[TIAB] OR "something"[TIAB]) NOT "anything"[TIAB]'
 
     url = f'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi?db=pubmed&term={query} AND has abstract [FILT] AND "journal article"[Publication Type]'
     url += f' AND {search.since.strftime("%Y/%m/%d")}:{search.until.strftime("%Y/%m/%d")}[Date - Publication]'
-    url += f'&retstart={start_record}&retmax=50&sort=pub+date'
+    url += f'&retstart={start_record}&retmax=200&sort=pub+date&usehistory=y'
 
     assert pubmed_searcher._get_search_url(search, start_record) == url
 
@@ -104,18 +99,18 @@ def test_get_paper(publication: Publication):
     assert len(paper.urls) == 0
 
     alternative_paper_entry = copy.deepcopy(paper_entry)
-    del alternative_paper_entry['PubmedArticleSet']['PubmedArticle']['MedlineCitation']['Article']['ArticleDate']
-    alternative_paper_entry['PubmedArticleSet']['PubmedArticle'][
-        'MedlineCitation']['Article']['Abstract']['AbstractText'] = [{'#text': 'fake paper abstract'}, {'#text': None}]
-    del alternative_paper_entry['PubmedArticleSet']['PubmedArticle']['MedlineCitation']['KeywordList']
+    article = alternative_paper_entry.find('MedlineCitation/Article')
+    article.remove(article.find('ArticleDate'))
+    article.find('Abstract').append(etree.fromstring('<AbstractText/>'))
+    alternative_paper_entry.find('MedlineCitation').remove(alternative_paper_entry.find('MedlineCitation/KeywordList'))
 
     paper = pubmed_searcher._get_paper(alternative_paper_entry, publication)
     assert paper.publication_date == datetime.date(2020, 2, 1)
     assert paper.abstract == 'fake paper abstract\n'
+    assert len(paper.keywords) == 0
 
     alternative_paper_entry = copy.deepcopy(paper_entry)
-    alternative_paper_entry['PubmedArticleSet']['PubmedArticle'][
-        'MedlineCitation']['Article']['ArticleDate']['Month'] = 'INVALID MONTH'
+    alternative_paper_entry.find('MedlineCitation/Article/ArticleDate/Month').text = 'INVALID MONTH'
 
     paper = pubmed_searcher._get_paper(alternative_paper_entry, publication)
     assert paper.publication_date == datetime.date(2020, 1, 1)
@@ -127,3 +122,44 @@ def test_run(search: Search):
     pubmed_searcher.run(search)
 
     assert len(search.papers) == 51
+
+
+def test_run_batches(search: Search, monkeypatch):
+
+    requested_start_records = []
+    mocked_get_paper_entries = pubmed_searcher._get_paper_entries
+
+    def mocked_data(web_env, query_key, start_record=0):
+        requested_start_records.append(start_record)
+        return mocked_get_paper_entries(web_env, query_key, start_record)
+
+    monkeypatch.setattr(pubmed_searcher, '_get_paper_entries', mocked_data)
+
+    search.limit = None
+    search.limit_per_database = None
+    pubmed_searcher.run(search)
+
+    # the 51 papers are fetched by a single batch request
+    assert requested_start_records == [0]
+    assert len(search.papers) == 51
+
+
+def test_run_failed_batch(search: Search, monkeypatch):
+
+    monkeypatch.setattr(pubmed_searcher, 'MAX_ENTRIES_PER_PAGE', 20)
+
+    mocked_get_paper_entries = pubmed_searcher._get_paper_entries
+
+    def mocked_data(web_env, query_key, start_record=0):
+        if start_record == 20:
+            raise ConnectionError('The XML response could not be read (status code: 500)')
+        return mocked_get_paper_entries(web_env, query_key, start_record)
+
+    monkeypatch.setattr(pubmed_searcher, '_get_paper_entries', mocked_data)
+
+    search.limit = None
+    search.limit_per_database = None
+    pubmed_searcher.run(search)
+
+    # the papers of the failed batch are skipped, the search goes on with the next batch
+    assert len(search.papers) == 31
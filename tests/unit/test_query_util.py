@@ -0,0 +1,110 @@
+import copy
+import pytest
+import findpapers.utils.query_util as query_util
+from findpapers.models.search import Search
+from findpapers.models.paper import Paper
+
+
+def test_parse():
+
+    query_tree = query_util.parse('[term a] AND ([term b] OR [term *]) AND NOT [term d]')
+
+    assert not query_tree.enclosed
+    assert query_tree.depth == 1
+    assert query_tree.connectors == ['AND', 'AND NOT']
+    assert [x.value for x in query_util.get_terms(query_tree)] == ['term a', 'term b', 'term *', 'term d']
+    assert [x.position for x in query_util.get_terms(query_tree)] == [0, 14, 26, 44]
+    assert [x.has_wildcard for x in query_util.get_terms(query_tree)] == [False, False, True, False]
+    assert query_util.get_connectors(query_tree) == ['AND', 'AND NOT', 'OR']
+
+    group = query_tree.nodes[1]
+    assert group.enclosed
+    assert group.position == 13
+    assert group.connectors == ['OR']
+
+    assert query_util.parse('[term a] OR ([term b] AND ([term c] OR [term d]))').depth == 2
+
+
+@pytest.mark.parametrize('query, position', [
+    ('[term a] OR ([term b] AND ([term c] OR [term d])', 12),
+    ('[term a] or [term b]', 8),
+    ('[term a] OR NOT [term b]', 12),
+    ('[term a] [term b]', 8),
+    ('[term a] AND', 8),
+    ('[term a])', 8),
+    ('([term a] OR [term b])([term c])', 22),
+    ('() AND [term b]', 1),
+    ('[ ] AND [term b]', 0),
+    ('[term a] AND [term b', 13),
+])
+def test_parse_error(query: str, position: int):
+
+    with pytest.raises(query_util.QueryError) as exception_info:
+        query_util.parse(query)
+
+    assert exception_info.value.position == position
+    assert f'at position {position}' in str(exception_info.value)
+    assert not query_util.is_valid(query)
+
+
+def test_render():
+
+    query_tree = query_util.parse('[term a] AND ([term b] OR [term *]) AND NOT [term d]')
+
+    assert query_util.render(query_tree, lambda x: f'[{x.value}]') == '[term a] AND ([term b] OR [term *]) AND NOT [term d]'
+    assert query_util.render(query_tree, lambda x: x.value if x.has_wildcard else f'"{x.value}"', {'AND NOT': 'NOT'}) == \
+        '"term a" AND ("term b" OR term *) NOT "term d"'
+
+
+def test_search_query_tree(search: Search):
+
+    query_tree = search.query_tree
+
+    assert search.query_tree is query_tree
+
+    search.query = '[term a]'
+
+    assert search.query_tree is not query_tree
+    assert [x.value for x in query_util.get_terms(search.query_tree)] == ['term a']
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('[awesome paper]', True),
+    ('[AWESOME]', True),
+    ('[awesome title]', False),
+    ('[awe]', False),
+    ('[awe*]', True),
+    ('[abstrac?]', True),
+    ('[abstra?]', False),
+    ('[term b]', True),
+    ('[title a]', False),
+    ('[awesome] AND [abstract]', True),
+    ('[awesome] AND NOT [abstract]', False),
+    ('[nothing] OR [abstract] AND NOT [awesome]', False),
+    ('[abstract] OR [nothing] AND NOT [awesome]', True),
+    ('([abstract] OR [nothing]) AND NOT [awesome]', False),
+    ('[nothing] OR ([long] AND ([term ?] OR [nothing]))', True),
+])
+def test_compile_matcher(paper: Paper, query: str, expected: bool):
+
+    assert query_util.compile_matcher(query)(paper) == expected
+
+
+def test_filter_papers(search: Search, paper: Paper):
+
+    other_paper = copy.copy(paper)
+    other_paper.title = 'another paper title'
+    other_paper.doi = 'another-doi'
+    other_paper.abstract = 'this is about something else'
+    other_paper.keywords = set()
+
+    search.add_paper(paper)
+    search.add_paper(other_paper)
+
+    assert list(query_util.filter_papers([paper, other_paper], '[something]')) == [other_paper]
+    assert search.get_matching_papers() == [other_paper]
+    assert len(search.get_matching_papers('[title]')) == 2
+    assert search.get_matching_papers('[paper title] AND NOT [awesome]') == [other_paper]
+
+    with pytest.raises(query_util.QueryError):
+        search.get_matching_papers('[title')
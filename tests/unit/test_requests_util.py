@@ -0,0 +1,142 @@
+import time
+import threading
+import pytest
+from findpapers.utils.requests_util import DefaultSession, TokenBucket, PagePrefetcher
+
+
+def test_token_bucket():
+
+    bucket = TokenBucket(2, 0.1)
+
+    start = time.monotonic()
+    for i in range(6):
+        bucket.consume()
+    elapsed = time.monotonic() - start
+
+    # 2 tokens are available right away, the other 4 need 0.05s each
+    assert elapsed >= 0.19
+    assert elapsed < 1
+
+
+def test_token_bucket_reserve():
+
+    bucket = TokenBucket(2, 0.1)
+
+    wait_times = [bucket.reserve() for i in range(4)]
+
+    # the reserved tokens are queued, so each caller waits for its own token
+    assert wait_times[:2] == [0, 0]
+    assert wait_times[2] == pytest.approx(0.05, abs=0.01)
+    assert wait_times[3] == pytest.approx(0.1, abs=0.01)
+
+
+def test_token_bucket_shared_by_threads():
+
+    bucket = TokenBucket(1, 0.05)
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=bucket.consume) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    assert elapsed >= 0.19
+
+
+def test_session_rate_limits():
+
+    session = DefaultSession()
+
+    assert 'export.arxiv.org' in session.bucket_by_host
+    assert 'eutils.ncbi.nlm.nih.gov' in session.bucket_by_host
+
+    session.set_rate_limit('Fake.Host.org', 1, 0.1)
+    assert 'fake.host.org' in session.bucket_by_host
+
+    start = time.monotonic()
+    session.wait_for_host('https://fake.host.org/some/path')
+    session.wait_for_host('https://fake.host.org/another/path')
+    assert time.monotonic() - start >= 0.09
+
+    session.set_rate_limit('fake.host.org', None)
+    assert 'fake.host.org' not in session.bucket_by_host
+
+    start = time.monotonic()
+    session.wait_for_host('https://not.limited.org')
+    assert time.monotonic() - start < 0.05
+
+
+@pytest.mark.parametrize('pages_ahead', [0, 1, 3])
+def test_page_prefetcher(pages_ahead: int):
+
+    fetched_offsets = []
+
+    def fetch_page(offset: int):
+        fetched_offsets.append(offset)
+        return f'page {offset}'
+
+    with PagePrefetcher(fetch_page, range(0, 50, 10), pages_ahead) as pages:
+
+        time.sleep(0.05)
+        assert len(fetched_offsets) == pages_ahead
+
+        assert next(pages) == 'page 0'
+        assert list(pages) == ['page 10', 'page 20', 'page 30', 'page 40']
+
+    assert sorted(fetched_offsets) == [0, 10, 20, 30, 40]
+
+
+def test_page_prefetcher_needed_pages():
+
+    fetched_offsets = []
+    last_needed_offset = [10]
+
+    def fetch_page(offset: int):
+        fetched_offsets.append(offset)
+        return f'page {offset}'
+
+    with PagePrefetcher(fetch_page, range(0, 50, 10), 3, is_needed=lambda x: x <= last_needed_offset[0]) as pages:
+
+        assert next(pages) == 'page 0'
+        assert next(pages) == 'page 10'
+
+        # a page that isn't needed yet is fetched as soon as it's needed
+        last_needed_offset[0] = 20
+        assert next(pages) == 'page 20'
+        assert next(pages, None) is None
+
+    assert sorted(fetched_offsets) == [0, 10, 20]
+
+
+def test_page_prefetcher_close():
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def fetch_page(offset: int):
+        started.set()
+        release.wait(1)
+        return offset
+
+    pages = PagePrefetcher(fetch_page, range(100), 3)
+    started.wait(1)
+    pages.close()
+    release.set()
+
+    # the pages that weren't being fetched are cancelled
+    assert next(pages, None) is None
+
+
+def test_page_prefetcher_rate_limit():
+
+    session = DefaultSession()
+    session.set_rate_limit('fake-host.org', 1, 10)
+
+    pages = PagePrefetcher(lambda x: x, range(10), 3, 'http://fake-host.org/api')
+
+    assert pages.pages_ahead == 1
+    assert list(pages) == list(range(10))
+
+    session.set_rate_limit('fake-host.org', None)
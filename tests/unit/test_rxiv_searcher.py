@@ -12,6 +12,11 @@ def test_get_search_urls(search: Search):
     urls = rxiv_searcher._get_search_urls(search, 'medRxiv')
 
     assert len(urls) == 2
+    assert 'abstract_title%3A%2522term%252Ba%2522%2B%2522term%252Bb%2522%20abstract_title_flags%3Amatch-all%20' in urls[0]
+    assert 'abstract_title%3A%2522term%252Bc%2522%2B%2522term%252Bd%2522%20abstract_title_flags%3Amatch-any%20' in urls[1]
+
+    search.query = '[term a] AND [term b]'
+    assert len(rxiv_searcher._get_search_urls(search, 'medRxiv')) == 1
 
     with pytest.raises(ValueError): # wildcards not supported
         search.query = '([term a] AND [term ?]) OR ([term c] OR [term d])'
@@ -33,3 +38,125 @@ def test_get_search_urls(search: Search):
         search.query = '([term a] AND [term b] OR [term c])'
         rxiv_searcher._get_search_urls(search, 'medRxiv')
 
+
+
+def test_get_data():
+
+    data = list(rxiv_searcher._get_data('https://www.medrxiv.org/search/fake-query'))
+
+    assert len(data) == 2
+    assert data[0].get('total_papers') == 3
+    assert data[0].get('dois') == ['10.1101/2020.01.01.000001', '10.1101/2020.01.02.000002']
+    assert data[1].get('dois') == ['10.1101/2020.01.03.000003']
+    assert data[1].get('next_page_url') is None
+
+
+def test_get_metadata_by_doi():
+
+    metadata = list(rxiv_searcher.iterate_interval_metadata('medRxiv', '2020-01-01', '2020-01-31'))
+
+    assert len(metadata) == 4
+
+    metadata_by_doi = rxiv_searcher._get_metadata_by_doi('medRxiv', '2020-01-01', '2020-01-31')
+
+    assert len(metadata_by_doi) == 3
+    assert metadata_by_doi.get('10.1101/2020.01.01.000001').get('version') == '1'
+
+
+@pytest.mark.parametrize('bulk', [None, True, False])
+def test_run(search: Search, monkeypatch, bulk: bool):
+
+    search.query = '[term a] AND [term b]'
+    search.limit = None
+    search.limit_per_database = None
+
+    paper_metadata_calls = []
+    get_paper_metadata = rxiv_searcher._get_paper_metadata
+
+    def mocked_get_paper_metadata(doi, database):
+        paper_metadata_calls.append(doi)
+        return get_paper_metadata(doi, database)
+
+    monkeypatch.setattr(rxiv_searcher, '_get_paper_metadata', mocked_get_paper_metadata)
+
+    rxiv_searcher.run(search, 'medRxiv', bulk)
+
+    assert len(search.papers) == 3
+    assert {x.doi for x in search.papers} == {'10.1101/2020.01.01.000001', '10.1000/fake-journal-doi', '10.1101/2020.01.03.000003'}
+
+    # the bulk mode is used by default since it needs only one request for the whole interval
+    assert len(paper_metadata_calls) == (3 if bulk is False else 0)
+
+
+def test_run_bulk_with_later_versions(search: Search, monkeypatch):
+
+    search.query = '[term a] AND [term b]'
+    search.limit = None
+    search.limit_per_database = None
+
+    paper_metadata_calls = []
+    get_paper_metadata = rxiv_searcher._get_paper_metadata
+    get_interval_page = rxiv_searcher._get_interval_page
+
+    def mocked_get_paper_metadata(doi, database):
+        paper_metadata_calls.append(doi)
+        return get_paper_metadata(doi, database)
+
+    def mocked_get_interval_page(database, since, until, cursor=0):
+        # the first version of a paper was posted before the interval
+        interval_page = get_interval_page(database, since, until, cursor)
+        interval_page['collection'] = [x for x in interval_page.get('collection') if x.get('date') != '2020-01-01']
+        return interval_page
+
+    monkeypatch.setattr(rxiv_searcher, '_get_paper_metadata', mocked_get_paper_metadata)
+    monkeypatch.setattr(rxiv_searcher, '_get_interval_page', mocked_get_interval_page)
+
+    rxiv_searcher.run(search, 'medRxiv', True)
+
+    # the paper is collected with its first version, as when the papers are requested one by one
+    assert paper_metadata_calls == ['10.1101/2020.01.01.000001']
+    paper = [x for x in search.papers if x.doi == '10.1101/2020.01.01.000001'][0]
+    assert paper.publication_date == datetime.date(2020, 1, 1)
+
+
+def test_run_bulk_with_limit(search: Search, monkeypatch):
+
+    search.query = '[term a] AND [term b]'
+    search.limit = 1
+    search.limit_per_database = None
+
+    paper_metadata_calls = []
+    get_paper_metadata = rxiv_searcher._get_paper_metadata
+
+    def mocked_get_paper_metadata(doi, database):
+        paper_metadata_calls.append(doi)
+        return get_paper_metadata(doi, database)
+
+    def mocked_get_metadata_by_doi(*args, **kwargs):
+        raise AssertionError('the interval metadata should not be fetched')
+
+    monkeypatch.setattr(rxiv_searcher, '_get_paper_metadata', mocked_get_paper_metadata)
+    monkeypatch.setattr(rxiv_searcher, '_get_metadata_by_doi', mocked_get_metadata_by_doi)
+
+    rxiv_searcher.run(search, 'medRxiv')
+
+    # a single paper can be collected, so it's cheaper to request it by its DOI than to fetch the whole interval
+    assert len(search.papers) == 1
+    assert len(paper_metadata_calls) == 1
+
+
+def test_run_with_limit(search: Search, monkeypatch):
+
+    search.query = '[term a] AND [term b]'
+    search.limit = 2
+    search.limit_per_database = None
+
+    results_urls = []
+    get_result = rxiv_searcher._get_result
+    monkeypatch.setattr(rxiv_searcher, '_get_result', lambda x: results_urls.append(x) or get_result(x))
+
+    rxiv_searcher.run(search, 'medRxiv', False)
+
+    # the DOIs of the first result page cover the limit, so the second one isn't requested
+    assert len(search.papers) == 2
+    assert len(results_urls) == 1
@@ -7,7 +7,7 @@ from findpapers.models.publication import Publication
 
 def test_get_query(search: Search):
 
-    query = f'TITLE-ABS-KEY({search.query})'
+    query = 'TITLE-ABS-KEY({this} AND ({that thing} OR {something}) AND NOT {anything})'
     query += f' AND PUBYEAR > {search.since.year - 1}'
     query += f' AND PUBYEAR < {search.until.year + 1}'
 
@@ -130,4 +130,29 @@ def test_enrich_publication_data(search: Search):
         assert publication.sjr is not None
         assert publication.snip is not None
         assert len(publication.subject_areas) > 0
-    
\ No newline at end of file
+    
+
+def test_get_paper_complete_view(publication: Publication, mock_scopus_get_paper_page_error):
+
+    paper_entry = {
+        'dc:title': 'fake paper title',
+        'prism:coverDate': '2020-01-01',
+        'prism:doi': 'fake-doi',
+        'prism:pageRange': '10-19',
+        'dc:creator': 'Doe J.',
+        'dc:description': ' fake abstract ',
+        'author': [{'authname': 'Doe J.'}, {'authname': 'Roe R.'}],
+        'authkeywords': 'keyword a | keyword b',
+        'link': [
+            {'@ref': 'scopus', '@href': 'http://fake-url'}
+        ]
+    }
+
+    # the paper page isn't scraped, since it would raise an error
+    paper = scopus_searcher._get_paper(paper_entry, publication)
+
+    assert paper.abstract == 'fake abstract'
+    assert paper.authors == ['Doe J.', 'Roe R.']
+    assert paper.keywords == {'keyword a', 'keyword b'}
+    assert paper.number_of_pages == 10
+    assert len(paper.urls) == 1
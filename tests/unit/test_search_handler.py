@@ -1,11 +1,24 @@
+import io
+import asyncio
+import functools
+import contextlib
 import os
+import copy
+import threading
 import json
 import findpapers
 import tempfile
 import pytest
+import requests
 from findpapers.models.search import Search
 from findpapers.models.paper import Paper
+from findpapers.models.paper_index import PaperIndex
 import findpapers.tools.search_runner_tool as search_runner_tool
+import findpapers.tools.query_tool as query_tool
+import findpapers.searchers.arxiv_searcher as arxiv_searcher
+import findpapers.utils.persistence_util as persistence_util
+import findpapers.utils.common_util as common_util
+from findpapers.utils.requests_util import DefaultSession
 
 
 @pytest.mark.skip(reason="It needs some revision after some tool's refactoring")
@@ -72,4 +85,300 @@ def test_query_sanitize():
     assert search_runner_tool._sanitize_query('[term a]    AND     [term b]') == '[term a] AND [term b]'
     assert search_runner_tool._sanitize_query('([term a]    OR     [term b]) AND [term *]') == '([term a] OR [term b]) AND [term *]'
     assert search_runner_tool._sanitize_query('([term a]\nOR\t[term b]) AND [term *]') == '([term a] OR [term b]) AND [term *]'
-    assert search_runner_tool._sanitize_query('([term a]\n\n\n\nOR\n\n\n\n[term b]) AND [term *]') == '([term a] OR [term b]) AND [term *]'
\ No newline at end of file
+    assert search_runner_tool._sanitize_query('([term a]\n\n\n\nOR\n\n\n\n[term b]) AND [term *]') == '([term a] OR [term b]) AND [term *]'
+
+def test_run_databases_in_parallel(search: Search, paper: Paper):
+
+    search.limit = 30
+    search.limit_per_database = 12
+    search.databases = None
+
+    def fake_run(database: str):
+        for i in range(50):
+            if search.reached_its_limit(database):
+                break
+            another_paper = copy.deepcopy(paper)
+            another_paper.title = f'{database} paper title {i}'
+            another_paper.doi = None
+            another_paper.publication = None
+            another_paper.databases = {database}
+            try:
+                search.add_paper(another_paper)
+            except OverflowError:
+                pass
+
+    database_runs = [(lambda x=database: fake_run(x), database) for database in ['arXiv', 'ACM', 'IEEE', 'PubMed', 'Scopus']]
+
+    search_runner_tool._run_databases(database_runs, search, 5)
+
+    assert len(search.papers) == 30
+    for database, papers in search.papers_by_database.items():
+        assert len(papers) <= 12
+
+
+def test_enrich_in_parallel(search: Search, paper: Paper, monkeypatch):
+
+    requested_urls = []
+    enriching_threads = set()
+
+    def mocked_get_paper_metadata_by_url(url: str):
+        requested_urls.append(url)
+        return {
+            'citation_title': f'enriched title {url}',
+            'citation_author': ['author A', 'author B', 'author C', 'author D', 'author E'],
+            'citation_pdf_url': f'{url}/pdf',
+        }, url
+
+    mocked_enrich_paper = search_runner_tool._enrich_paper
+
+    def enrich_paper(paper, paper_metadata_list):
+        enriching_threads.add(threading.current_thread())
+        mocked_enrich_paper(paper, paper_metadata_list)
+
+    monkeypatch.setattr(search_runner_tool, '_get_paper_metadata_by_url', mocked_get_paper_metadata_by_url)
+    monkeypatch.setattr(search_runner_tool, '_enrich_paper', enrich_paper)
+
+    for i in range(20):
+        another_paper = copy.deepcopy(paper)
+        another_paper.title = f'paper title {i:02d}'
+        another_paper.doi = f'fake-doi-{i}'
+        another_paper.publication = None
+        search.add_paper(another_paper)
+
+    search_runner_tool._enrich(search, max_parallel_enrichments=5)
+
+    assert len(requested_urls) == 20
+    # the papers are only changed by the thread that called the enrichment
+    assert enriching_threads == {threading.current_thread()}
+    for enriched_paper in search.papers:
+        assert enriched_paper.title == f'enriched title http://doi.org/{enriched_paper.doi}'
+        assert len(enriched_paper.authors) == 5
+        assert f'http://doi.org/{enriched_paper.doi}/pdf' in enriched_paper.urls
+
+
+class FakeAsyncResponse():
+
+    def __init__(self, url: str, content: bytes, read_bytes: list):
+        self.url = url
+        self.headers = {'content-type': 'text/html; charset=utf-8'}
+        self.content = content
+        self.read_bytes = read_bytes
+
+    async def aiter_bytes(self, chunk_size: int):
+        for i in range(0, len(self.content), chunk_size):
+            self.read_bytes.append(chunk_size)
+            yield self.content[i:i+chunk_size]
+
+
+class FakeAsyncSession():
+
+    in_flight = 0
+    max_in_flight = 0
+    requested_urls = []
+    failures_by_url = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, url: str):
+        FakeAsyncSession.requested_urls.append(url)
+        if FakeAsyncSession.failures_by_url.get(url, 0) > 0:
+            FakeAsyncSession.failures_by_url[url] -= 1
+            raise ConnectionError('fake error')
+        FakeAsyncSession.in_flight += 1
+        FakeAsyncSession.max_in_flight = max(FakeAsyncSession.max_in_flight, FakeAsyncSession.in_flight)
+        await asyncio.sleep(0.01)
+        page = f'<html><head><meta name="citation_title" content="enriched title {url}"></head><body>'.encode() \
+            + (b'<p>lorem ipsum</p>' * 10000) + b'</body></html>'
+        try:
+            yield FakeAsyncResponse(url, page, [])
+        finally:
+            FakeAsyncSession.in_flight -= 1
+
+
+def test_enrich_async(search: Search, paper: Paper, monkeypatch):
+
+    FakeAsyncSession.requested_urls = []
+    FakeAsyncSession.max_in_flight = 0
+    FakeAsyncSession.failures_by_url = {'http://doi.org/fake-doi-0': 1}  # a failed request is tried again
+
+    monkeypatch.setattr(search_runner_tool.async_requests_util, 'AsyncSession', FakeAsyncSession)
+    monkeypatch.setattr(search_runner_tool.common_util, 'try_success_async',
+                        functools.partial(common_util.try_success_async, next_try_delay=0))
+
+    for i in range(10):
+        another_paper = copy.deepcopy(paper)
+        another_paper.title = f'paper title {i:02d}'
+        another_paper.doi = f'fake-doi-{i}'
+        another_paper.publication = None
+        search.add_paper(another_paper)
+
+    search_runner_tool._enrich(search, max_parallel_enrichments=3, async_http=True)
+
+    assert len(FakeAsyncSession.requested_urls) == 11
+    assert FakeAsyncSession.max_in_flight == 3
+    for enriched_paper in search.papers:
+        assert enriched_paper.title == f'enriched title http://doi.org/{enriched_paper.doi}'
+
+
+def test_get_html_head_meta_list_async():
+
+    read_bytes = []
+    page = b'<html><head><meta name="citation_title" content="fake title"></head><body>' + (b'<p>lorem ipsum</p>' * 10000) + b'</body></html>'
+    response = FakeAsyncResponse('http://fake-url', page, read_bytes)
+
+    meta_list = asyncio.run(search_runner_tool._get_html_head_meta_list_async(response))
+
+    assert meta_list == [{'name': 'citation_title', 'content': 'fake title'}]
+    # only the page head is read
+    assert sum(read_bytes) <= search_runner_tool.HTML_CHUNK_SIZE
+
+
+def test_search_async_http_with_cache():
+
+    if search_runner_tool.async_requests_util.httpx is None:
+        with pytest.raises(ImportError):
+            findpapers.search('fake-output.json', '[term a]', async_http=True)
+    else:  # pragma: no cover
+        with pytest.raises(ValueError):
+            findpapers.search('fake-output.json', '[term a]', async_http=True, cache_dir=tempfile.mkdtemp())
+
+
+def test_get_paper_metadata_by_url(monkeypatch):
+
+    page_head = b'<html><head><title>fake page</title><meta name="citation_title" content="fake title">' \
+                b'<meta name="citation_author" content="author A"/><meta name="citation_author" content="author B"/></head>'
+    page_body = b'<body><meta name="citation_doi" content="fake-doi">' + (b'<p>lorem ipsum</p>' * 100000) + b'</body></html>'
+    read_bytes = []
+
+    class FakeRaw(io.BytesIO):
+        def read(self, amt=None):
+            data = super().read(amt)
+            read_bytes.append(len(data))
+            return data
+
+    raw = FakeRaw(page_head + page_body)
+
+    def mocked_get(self, url, **kwargs):
+        assert kwargs.get('stream')
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['content-type'] = 'text/html; charset=utf-8'
+        response.url = url
+        response.raw = raw
+        return response
+
+    monkeypatch.setattr(DefaultSession, 'get', mocked_get)
+
+    paper_metadata, paper_url = search_runner_tool._get_paper_metadata_by_url('http://fake-url')
+
+    assert paper_url == 'http://fake-url'
+    assert paper_metadata == {'citation_title': 'fake title', 'citation_author': ['author A', 'author B']}
+    # only the page head is downloaded
+    assert sum(read_bytes) <= search_runner_tool.HTML_CHUNK_SIZE
+    assert raw.closed
+
+
+def test_get_paper_metadata_by_url_cached(monkeypatch):
+
+    page = b'<html><head><meta name="citation_title" content="fake title"></head><body>' \
+           + (b'<p>lorem ipsum</p>' * 100000) + b'</body></html>'
+    requested_urls = []
+
+    def mocked_request(self, method, url, **kwargs):
+        requested_urls.append(url)
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['content-type'] = 'text/html; charset=utf-8'
+        response.url = url
+        response.raw = io.BytesIO(page)
+        return response
+
+    monkeypatch.setattr(requests.Session, 'request', mocked_request, raising=False)
+
+    session = DefaultSession()
+    session.enable_cache(tempfile.mkdtemp())
+
+    try:
+        # only the page head is read, but it's cached so the next fetch makes no network call
+        for i in range(2):
+            paper_metadata, paper_url = search_runner_tool._get_paper_metadata_by_url('http://fake-url')
+            assert paper_metadata == {'citation_title': 'fake title'}
+            assert paper_url == 'http://fake-url'
+
+        assert requested_urls == ['http://fake-url']
+    finally:
+        session.disable_cache()
+
+
+@pytest.mark.parametrize('filename', ['output.json', 'output.jsonl', 'output.db'])
+def test_resume(search: Search, paper: Paper, monkeypatch, filename: str):
+
+    temp_dirpath = tempfile.mkdtemp()
+    temp_filepath = os.path.join(temp_dirpath, filename)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('a finished stage cannot run again')
+
+    monkeypatch.setattr(search_runner_tool, '_run_databases', fail)
+    monkeypatch.setattr(search_runner_tool, '_enrich', fail)
+
+    search.add_paper(paper)
+    search.finished_databases = {'arXiv', 'PubMed'}
+    search.finished_stages = ['collect', 'enrich']
+    persistence_util.save(search, temp_filepath)
+
+    findpapers.search(temp_filepath, resume=True)
+
+    resumed_search = persistence_util.load(temp_filepath)
+    assert resumed_search.query == search.query
+    assert len(resumed_search.papers) == 1
+    # the search is finished, so there's nothing to resume anymore
+    assert not resumed_search.has_checkpoint()
+
+    # the index kept up to date by the search is saved next to the output file
+    index = PaperIndex.load(f'{temp_filepath}.index', query_tool.get_source_signature(temp_filepath))
+    assert index is not None and len(index) == 1
+
+    findpapers.search(temp_filepath, resume=True)
+
+
+def test_database_checkpoints(search: Search, monkeypatch):
+
+    checkpoints = []
+    search.checkpoint_callback = lambda x: checkpoints.append(copy.deepcopy(x.cursor_by_database))
+    search.limit = None
+    search.limit_per_database = None
+    search.since = None
+    search.until = None
+
+    requested_start_records = []
+    mocked_get_api_result = arxiv_searcher._get_api_result
+
+    def get_api_result(search, start_record=0):
+        requested_start_records.append(start_record)
+        return mocked_get_api_result(search, start_record)
+
+    monkeypatch.setattr(arxiv_searcher, '_get_api_result', get_api_result)
+
+    search_runner_tool._database_safe_run(lambda: arxiv_searcher.run(search), search, arxiv_searcher.DATABASE_LABEL)
+
+    # the mocked feed has 21 papers and 20 entries per page
+    assert requested_start_records == [0, 20]
+    assert checkpoints[0] == {'arXiv': {'start_record': 20}}
+    assert 'arXiv' in search.finished_databases
+
+    # a resumed search continues from the last cursor, and a finished database is skipped
+    search.finished_databases = set()
+    requested_start_records.clear()
+    arxiv_searcher.run(search)
+    assert requested_start_records == [20]
+
+    search.finished_databases = {'arXiv'}
+    requested_start_records.clear()
+    search_runner_tool._database_safe_run(lambda: arxiv_searcher.run(search), search, arxiv_searcher.DATABASE_LABEL)
+    assert requested_start_records == []
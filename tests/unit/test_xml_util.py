@@ -0,0 +1,63 @@
+import io
+import pytest
+import requests
+import findpapers.utils.xml_util as xml_util
+
+
+XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed>
+    <total>3</total>
+    <entry><title>first <i>entry</i> </title></entry>
+    <entry><title>second entry</title></entry>
+    <entry><title>third entry</title></entry>
+</feed>
+"""
+
+
+def test_iterparse():
+
+    titles = []
+    for element in xml_util.iterparse(io.BytesIO(XML), ['total', 'entry']):
+        if element.tag == 'total':
+            assert xml_util.get_text(element) == '3'
+        else:
+            titles.append(xml_util.get_text(element, 'title'))
+            # the already handled elements are cleared and released
+            previous = element.getprevious()
+            assert len(previous) == 0 and previous.getprevious() is None
+
+    assert titles == ['first entry', 'second entry', 'third entry']
+
+
+def test_iterparse_response():
+
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(XML)
+
+    entries = xml_util.iterparse_response(response, ['entry'])
+
+    assert xml_util.get_text(next(entries), 'title') == 'first entry'
+    assert len(list(entries)) == 2
+
+
+def test_get_text():
+
+    element = next(xml_util.iterparse(io.BytesIO(XML), ['entry']))
+
+    assert xml_util.get_text(element, 'title') == 'first entry'
+    assert xml_util.get_text(element, 'missing') is None
+
+
+@pytest.mark.parametrize('status_code, raw', [(500, None), (404, io.BytesIO(b'Not found')), (200, None)])
+def test_iterparse_invalid_response(status_code: int, raw):
+
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = raw
+
+    with pytest.raises(ConnectionError):
+        xml_util.iterparse_response(response, ['entry'])
+
+    with pytest.raises(ConnectionError):
+        xml_util.iterparse_response(None, ['entry'])